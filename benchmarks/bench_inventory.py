@@ -0,0 +1,98 @@
+# benchmarks/bench_inventory.py
+
+"""
+Throughput and memory benchmark for the streaming inventory parser.
+
+Builds a synthetic `kubectl get pods -A -o json` List (pretty-printed, as kubectl
+prints it) and counts its items two ways: json.loads of the whole document, as
+the proxy used to buffer it, and jsonstream.iter_list_items feeding
+inventory.TypeStats chunk by chunk. Reports MB/s and peak traced memory of each.
+
+    python benchmarks/bench_inventory.py --objects 100000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+
+from kube_ai_proxy.inventory import TypeStats
+from kube_ai_proxy.jsonstream import iter_list_items
+
+
+def synth_pod(i: int) -> dict:
+    return {
+        "apiVersion": "v1",
+        "kind": "Pod",
+        "metadata": {
+            "name": f"app-{i:06d}-7d9f8c6b5-x2k4q",
+            "namespace": f"team-{i % 200}",
+            "labels": {"app": f"app-{i % 500}", "pod-template-hash": "7d9f8c6b5"} if i % 7 else {},
+            "uid": f"{i:08x}-0000-4000-8000-000000000000",
+            "resourceVersion": str(1000000 + i),
+        },
+        "spec": {
+            "containers": [{
+                "name": "main",
+                "image": "registry.example.com/app:1.2.3",
+                "resources": {"requests": {"cpu": "100m", "memory": "128Mi"}} if i % 3 else {},
+                "env": [{"name": f"VAR_{k}", "value": "x" * 20} for k in range(10)],
+            }],
+            "nodeName": f"node-{i % 300}",
+        },
+        "status": {
+            "phase": "Running",
+            "conditions": [{"type": t, "status": "True"} for t in ("Initialized", "Ready", "ContainersReady", "PodScheduled")],
+        },
+    }
+
+
+class BytesReader:
+    """StreamReader stand-in serving a bytes object in read(n) chunks."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.pos = 0
+
+    async def read(self, n: int) -> bytes:
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += len(chunk)
+        return chunk
+
+
+async def stream_count(data: bytes) -> TypeStats:
+    stats = TypeStats("pods", namespaced=True)
+    async for item in iter_list_items(BytesReader(data)):
+        stats.add(item)
+    return stats
+
+
+def measure(label: str, size: int, fn) -> None:
+    start = time.perf_counter()
+    count = fn()
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    print(f"{label:>10}: {count} items, {size / elapsed / 1e6:6.1f} MB/s, peak {peak / 2**20:8.1f} MiB")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--objects", type=int, default=100000)
+    args = parser.parse_args()
+
+    doc = json.dumps(
+        {"apiVersion": "v1", "items": [synth_pod(i) for i in range(args.objects)], "kind": "List",
+         "metadata": {"resourceVersion": ""}},
+        indent=4,
+    ).encode()
+    print(f"List document: {len(doc) / 2**20:.1f} MiB, {args.objects} pods")
+    measure("json.loads", len(doc), lambda: len(json.loads(doc)["items"]))
+    measure("streaming", len(doc), lambda: asyncio.run(stream_count(doc)).count)
+
+
+if __name__ == "__main__":
+    main()
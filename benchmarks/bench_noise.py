@@ -0,0 +1,132 @@
+# benchmarks/bench_noise.py
+
+"""
+Throughput and size benchmark for noise stripping of `-o yaml` / `-o json` output.
+
+Builds a synthetic `kubectl get deployments -A -o yaml` List (managedFields,
+last-applied annotation and all, printed the way kubectl prints it: sorted keys,
+indentless sequences, `|` block scalars) and its `-o json` twin, then times:
+  - yaml lines: noise.strip_yaml, the line scanner the proxy uses
+  - yaml parse: a PyYAML load / strip_tree / dump round trip, for comparison
+  - json:       noise.strip_json (json.loads / strip_tree / json.dumps)
+Each stripped YAML is checked to parse to the same objects as strip_tree of the input.
+
+    python benchmarks/bench_noise.py --objects 2000
+"""
+
+import argparse
+import copy
+import json
+import time
+
+import yaml
+
+from kube_ai_proxy.noise import strip_json, strip_tree, strip_yaml
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+_Dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+
+class KubectlDumper(_Dumper):
+    pass
+
+
+def _str(dumper, value: str):
+    return dumper.represent_scalar("tag:yaml.org,2002:str", value, style="|" if "\n" in value else None)
+
+
+KubectlDumper.add_representer(str, _str)
+
+
+def synth_deployment(i: int) -> dict:
+    name = f"app-{i:05d}"
+    spec = {
+        "replicas": 3,
+        "selector": {"matchLabels": {"app": name}},
+        "strategy": {"rollingUpdate": {"maxSurge": "25%", "maxUnavailable": "25%"}, "type": "RollingUpdate"},
+        "template": {
+            "metadata": {"creationTimestamp": None, "labels": {"app": name}},
+            "spec": {
+                "containers": [{
+                    "name": "main",
+                    "image": f"registry.example.com/{name}:1.{i % 40}.0",
+                    "ports": [{"containerPort": 8080, "protocol": "TCP"}],
+                    "resources": {} if i % 2 else {"requests": {"cpu": "100m", "memory": "128Mi"}},
+                    "env": [{"name": f"VAR_{k}", "value": f"value-{k}"} for k in range(5)],
+                }],
+                "volumes": [{"name": "scratch", "emptyDir": {}}],
+                "securityContext": {},
+            },
+        },
+    }
+    last_applied = json.dumps({"apiVersion": "apps/v1", "kind": "Deployment",
+                               "metadata": {"name": name, "namespace": f"team-{i % 50}"}, "spec": spec})
+    managed = [
+        {
+            "apiVersion": "apps/v1",
+            "fieldsType": "FieldsV1",
+            "fieldsV1": {"f:metadata": {"f:annotations": {".": {}, "f:kubectl.kubernetes.io/last-applied-configuration": {}}},
+                         "f:spec": {f"f:field{k}": {} for k in range(40)}},
+            "manager": manager,
+            "operation": "Update",
+            "time": "2024-05-01T10:00:00Z",
+        }
+        for manager in ("kubectl-client-side-apply", "kube-controller-manager")
+    ]
+    return {
+        "apiVersion": "apps/v1",
+        "kind": "Deployment",
+        "metadata": {
+            "annotations": {"deployment.kubernetes.io/revision": "3", "kubectl.kubernetes.io/last-applied-configuration": last_applied + "\n"},
+            "creationTimestamp": "2024-05-01T10:00:00Z",
+            "generation": 3,
+            "labels": {"app": name},
+            "managedFields": managed,
+            "name": name,
+            "namespace": f"team-{i % 50}",
+            "resourceVersion": str(100000 + i),
+            "uid": f"{i:08x}-0000-4000-8000-000000000000",
+        },
+        "spec": spec,
+        "status": {"availableReplicas": 3, "readyReplicas": 3, "replicas": 3, "updatedReplicas": 3},
+    }
+
+
+def timed(fn, repeat: int = 3) -> tuple[float, object]:
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--objects", type=int, default=2000)
+    args = parser.parse_args()
+
+    doc = {"apiVersion": "v1", "items": [synth_deployment(i) for i in range(args.objects)],
+           "kind": "List", "metadata": {"resourceVersion": ""}}
+    text_yaml = yaml.dump(doc, Dumper=KubectlDumper, default_flow_style=False, sort_keys=True, width=1 << 30)
+    text_json = json.dumps(doc, indent=4)
+    expected = strip_tree(copy.deepcopy(doc))
+
+    def parse_roundtrip() -> str:
+        return yaml.dump(strip_tree(yaml.load(text_yaml, Loader=_Loader)), Dumper=KubectlDumper,
+                         default_flow_style=False, sort_keys=True, width=1 << 30)
+
+    for label, text, fn in (
+        ("yaml lines", text_yaml, lambda: strip_yaml(text_yaml)),
+        ("yaml parse", text_yaml, parse_roundtrip),
+        ("json", text_json, lambda: strip_json(text_json)),
+    ):
+        elapsed, out = timed(fn)
+        loaded = json.loads(out) if label == "json" else yaml.load(out, Loader=_Loader)
+        same = "ok" if loaded == expected else "MISMATCH"
+        print(f"{label:>10}: {len(text) / 2**20:6.1f} MiB -> {len(out) / 2**20:6.1f} MiB "
+              f"({100 * (1 - len(out) / len(text)):4.1f}% removed), {len(text) / elapsed / 1e6:6.1f} MB/s, {same}")
+
+
+if __name__ == "__main__":
+    main()
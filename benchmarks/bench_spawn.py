@@ -0,0 +1,124 @@
+# benchmarks/bench_spawn.py
+
+"""
+Child spawn latency benchmark: in-process spawning vs the spawn helper, by server RSS.
+
+The spawn helper is started first, while this process is small, as main() does.
+For each RSS size the process then grows to that size (touched ballast pages), and
+each path runs `/bin/true`:
+  - fork:   asyncio.create_subprocess_exec with a preexec_fn (forced fork, as when
+            child rlimits are configured)
+  - inproc: asyncio.create_subprocess_exec without one (vfork/posix_spawn when allowed)
+  - helper: spawn_server.SPAWNER.spawn (posix_spawn in the helper, pipes passed back)
+Reported: p50/p99 of sequential spawn-to-exit latency, wall time of a concurrent
+burst, and the longest event-loop stall seen during that burst.
+
+    python benchmarks/bench_spawn.py --rss-mb 0,512,2048 --runs 200 --burst 100
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import statistics
+import time
+from asyncio.subprocess import PIPE
+
+from kube_ai_proxy.spawn_server import SPAWNER
+
+ARGV = ["/bin/true"]
+
+
+def _noop() -> None:
+    pass
+
+
+async def spawn_fork():
+    return await asyncio.create_subprocess_exec(
+        *ARGV, stdout=PIPE, stderr=PIPE, start_new_session=True, preexec_fn=_noop
+    )
+
+
+async def spawn_inproc():
+    return await asyncio.create_subprocess_exec(*ARGV, stdout=PIPE, stderr=PIPE, start_new_session=True)
+
+
+async def spawn_helper():
+    return await SPAWNER.spawn(ARGV, False, dict(os.environ))
+
+
+async def sequential(spawn, runs: int) -> list[float]:
+    latencies = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        proc = await spawn()
+        await proc.communicate()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+async def burst(spawn, count: int) -> tuple[float, float]:
+    """Wall time of `count` concurrent spawns and the longest loop stall meanwhile."""
+    stall = 0.0
+    done = False
+
+    async def ticker() -> None:
+        nonlocal stall
+        last = time.perf_counter()
+        while not done:
+            await asyncio.sleep(0.001)
+            now = time.perf_counter()
+            stall = max(stall, now - last - 0.001)
+            last = now
+
+    tick = asyncio.ensure_future(ticker())
+    await asyncio.sleep(0.01)
+    start = time.perf_counter()
+    procs = await asyncio.gather(*(spawn() for _ in range(count)))
+    await asyncio.gather(*(p.communicate() for p in procs))
+    elapsed = time.perf_counter() - start
+    done = True
+    await tick
+    return elapsed, stall
+
+
+def rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def pct(values: list[float], q: float) -> float:
+    return statistics.quantiles(values, n=100)[int(q) - 1] if len(values) > 1 else values[0]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rss-mb", default="0,512,2048", help="comma-separated ballast sizes in MiB")
+    parser.add_argument("--runs", type=int, default=200)
+    parser.add_argument("--burst", type=int, default=100)
+    args = parser.parse_args()
+
+    if not SPAWNER.start():
+        raise SystemExit("spawn helper unavailable on this platform")
+    paths = (("fork", spawn_fork), ("inproc", spawn_inproc), ("helper", spawn_helper))
+    ballast: list[bytearray] = []
+    try:
+        for size in (int(s) for s in args.rss_mb.split(",")):
+            grow = size - sum(len(b) for b in ballast) // 2**20
+            if grow > 0:
+                # Written page by page so the memory is resident, not just reserved
+                chunk = bytearray(grow * 2**20)
+                for i in range(0, len(chunk), 4096):
+                    chunk[i] = 1
+                ballast.append(chunk)
+            print(f"ballast {size} MiB (max RSS {rss_mb():.0f} MiB)")
+            for label, spawn in paths:
+                lat = asyncio.run(sequential(spawn, args.runs))
+                wall, stall = asyncio.run(burst(spawn, args.burst))
+                print(f"  {label:>6}: p50 {1000 * pct(lat, 50):6.2f} ms  p99 {1000 * pct(lat, 99):6.2f} ms  "
+                      f"burst of {args.burst}: {1000 * wall:7.1f} ms, max loop stall {1000 * stall:6.2f} ms")
+    finally:
+        SPAWNER.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# benchmarks/bench_transport.py
+
+"""
+Throughput benchmark for the Kube AI Proxy HTTP transports.
+
+Starts the server as a subprocess once per configuration (single-process SSE, the
+baseline; single-process streamable HTTP; streamable HTTP with N pre-forked
+workers), then drives it with concurrent MCP client sessions that each call a
+cheap tool in a loop, reporting tool calls/s and p50/p99 latency.
+
+    python benchmarks/bench_transport.py --clients 64 --calls 200 --workers 4
+
+The default tool, proxy_metrics, never spawns a CLI child, so the numbers measure
+the transport and the server's event loop rather than kubectl.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+
+def wait_for_port(port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server did not start listening on port {port} within {timeout}s")
+
+
+def start_server(transport: str, workers: int, port: int, uvloop: bool) -> subprocess.Popen:
+    env = dict(
+        os.environ,
+        K8S_MCP_TRANSPORT=transport,
+        K8S_MCP_WORKERS=str(workers),
+        K8S_MCP_PORT=str(port),
+        K8S_MCP_UVLOOP=str(uvloop).lower(),
+        K8S_MCP_AUDIT="false",
+    )
+    return subprocess.Popen(
+        [sys.executable, "-m", "kube_ai_proxy.main"], env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+
+async def client(transport: str, url: str, tool: str, calls: int, latencies: list[float]) -> None:
+    connect = sse_client(url) if transport == "sse" else streamablehttp_client(url)
+    async with connect as streams:
+        async with ClientSession(streams[0], streams[1]) as session:
+            await session.initialize()
+            for _ in range(calls):
+                start = time.perf_counter()
+                await session.call_tool(tool, {})
+                latencies.append(time.perf_counter() - start)
+
+
+async def drive(transport: str, port: int, tool: str, clients: int, calls: int) -> tuple[float, list[float]]:
+    url = f"http://127.0.0.1:{port}/sse" if transport == "sse" else f"http://127.0.0.1:{port}/mcp"
+    latencies: list[float] = []
+    start = time.perf_counter()
+    await asyncio.gather(*(client(transport, url, tool, calls, latencies) for _ in range(clients)))
+    return time.perf_counter() - start, latencies
+
+
+def run(transport: str, workers: int, args) -> None:
+    proc = start_server(transport, workers, args.port, args.uvloop)
+    try:
+        wait_for_port(args.port, args.startup_timeout)
+        elapsed, latencies = asyncio.run(drive(transport, args.port, args.tool, args.clients, args.calls))
+    finally:
+        proc.terminate()
+        proc.wait(10)
+    latencies.sort()
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(
+        f"{transport:>15} workers={workers:<2} {len(latencies) / elapsed:9.0f} calls/s  "
+        f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--clients", type=int, default=32, help="concurrent client sessions")
+    parser.add_argument("--calls", type=int, default=200, help="tool calls per session")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="workers for the multi-process run")
+    parser.add_argument("--tool", default="proxy_metrics", help="argument-free tool to call")
+    parser.add_argument("--port", type=int, default=18765)
+    parser.add_argument("--uvloop", action=argparse.BooleanOptionalAction, default=True)
+    parser.add_argument("--startup-timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    print(f"{args.clients} clients x {args.calls} calls of {args.tool} (uvloop: {args.uvloop})")
+    run("sse", 1, args)
+    run("streamable-http", 1, args)
+    if args.workers > 1:
+        run("streamable-http", args.workers, args)
+
+
+if __name__ == "__main__":
+    main()
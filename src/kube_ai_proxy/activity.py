@@ -0,0 +1,157 @@
+# src/kube_ai_proxy/activity.py
+
+"""
+In-flight tool calls of Kube AI Proxy.
+
+Diagnostics that run outside the event loop (the sampling profiler's thread) need
+to know which tool call a piece of work belongs to:
+  - track: wrap a tool function so every call is registered while it runs
+  - current_call: the tool call of the running task (a context variable, so tasks
+    spawned inside a call inherit it)
+  - call_for_task: the call an asyncio task works for, readable from any thread;
+    tasks are tagged at creation by a task factory installed on first use
+  - call_in_context: the call recorded in a captured context
+  - running_calls / event_loop / loop_thread: in-flight calls, and the loop serving
+    them and the thread it runs on
+  - on_loop: run a callback in the loop's thread once the serving loop is known
+"""
+
+import asyncio
+import functools
+import contextvars
+import itertools
+import os
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+_CALL_IDS = itertools.count(1)
+
+
+@dataclass(frozen=True)
+class ToolCall:
+    id: int
+    tool: str
+    summary: str = ""
+    started: float = field(default_factory=time.monotonic)
+
+    def __str__(self) -> str:
+        return f"{self.tool}#{self.id}" + (f" ({self.summary})" if self.summary else "")
+
+
+_CURRENT: contextvars.ContextVar[Optional[ToolCall]] = contextvars.ContextVar("kube_ai_proxy_tool_call", default=None)
+_TASK_CALLS: "weakref.WeakKeyDictionary[asyncio.Task, ToolCall]" = weakref.WeakKeyDictionary()
+_RUNNING: dict[int, ToolCall] = {}
+_LOCK = threading.Lock()
+_LOOP: Optional[asyncio.AbstractEventLoop] = None
+_LOOP_THREAD: Optional[int] = None
+_LOOP_HOOKS: list[Callable[[asyncio.AbstractEventLoop], None]] = []
+
+
+def _after_fork() -> None:
+    # Calls in flight belong to the parent, whose threads may have held the lock at fork time
+    global _LOCK, _LOOP, _LOOP_THREAD
+    _LOCK = threading.Lock()
+    _RUNNING.clear()
+    _TASK_CALLS.clear()
+    _LOOP = _LOOP_THREAD = None
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def current_call() -> Optional[ToolCall]:
+    return _CURRENT.get()
+
+
+def call_for_task(task: Optional[asyncio.Task]) -> Optional[ToolCall]:
+    if task is None:
+        return None
+    with _LOCK:
+        return _TASK_CALLS.get(task)
+
+
+def call_in_context(ctx: contextvars.Context) -> Optional[ToolCall]:
+    """The tool call recorded in a captured context (e.g. one handed to an executor thread)."""
+    return ctx.get(_CURRENT)
+
+
+def running_calls() -> list[ToolCall]:
+    with _LOCK:
+        return sorted(_RUNNING.values(), key=lambda c: c.started)
+
+
+def event_loop() -> Optional[asyncio.AbstractEventLoop]:
+    """The loop tool calls run on (set by the first tracked call)."""
+    return _LOOP
+
+
+def loop_thread() -> Optional[int]:
+    return _LOOP_THREAD
+
+
+def on_loop(hook: Callable[[asyncio.AbstractEventLoop], None]) -> None:
+    """Call `hook(loop)` from the loop thread when the first tracked call runs on a loop."""
+    _LOOP_HOOKS.append(hook)
+
+
+def _task_factory(loop, coro, **kwargs):
+    task = asyncio.Task(coro, loop=loop, **kwargs)
+    call = _CURRENT.get()
+    if call is not None:
+        with _LOCK:
+            _TASK_CALLS[task] = call
+    return task
+
+
+def _install(loop: asyncio.AbstractEventLoop) -> None:
+    global _LOOP, _LOOP_THREAD
+    if _LOOP is not loop:
+        _LOOP = loop
+        _LOOP_THREAD = threading.get_ident()
+        # Leave a factory someone else installed alone; only the calling task is tagged then
+        if loop.get_task_factory() is None:
+            loop.set_task_factory(_task_factory)
+        for hook in _LOOP_HOOKS:
+            hook(loop)
+
+
+def _summary(kwargs: dict) -> str:
+    for key in ("command", "name", "target", "job_id"):
+        value = kwargs.get(key)
+        if isinstance(value, str) and value:
+            return value if len(value) <= 80 else value[:77] + "..."
+    return ""
+
+
+def track(fn):
+    """Wrap an async tool function; the signature seen by FastMCP is unchanged."""
+
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        loop = asyncio.get_running_loop()
+        _install(loop)
+        call = ToolCall(next(_CALL_IDS), fn.__name__, _summary(kwargs))
+        token = _CURRENT.set(call)
+        task = asyncio.current_task()
+        with _LOCK:
+            previous = _TASK_CALLS.get(task) if task is not None else None
+            if task is not None:
+                _TASK_CALLS[task] = call
+            _RUNNING[call.id] = call
+        try:
+            return await fn(*args, **kwargs)
+        finally:
+            with _LOCK:
+                _RUNNING.pop(call.id, None)
+                if task is not None:
+                    if previous is None:
+                        _TASK_CALLS.pop(task, None)
+                    else:
+                        _TASK_CALLS[task] = previous
+            _CURRENT.reset(token)
+
+    return wrapper
@@ -0,0 +1,276 @@
+# src/kube_ai_proxy/argocd_session.py
+
+"""
+Long-lived ArgoCD session and result cache for Kube AI Proxy.
+
+Instead of every argocd CLI invocation logging in on its own, the proxy owns one session:
+  - ArgoCDSession: obtains and refreshes a token via the ArgoCD REST API
+    (`POST /api/v1/session`) and hands it, with a shared `--config` file and
+    connection options, to every CLI child through ARGOCD_* environment variables
+  - run_argocd: executes an argocd argv, serving `app list` / `app get` from a
+    short-TTL cache and invalidating it when the proxy itself mutates applications
+"""
+
+import asyncio
+import base64
+import json
+import logging
+import shlex
+import ssl
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Optional
+
+from kube_ai_proxy.audit import audit_command
+from kube_ai_proxy.cache import TTLCache
+from kube_ai_proxy.cli_executor import child_env, communicate, spawn
+from kube_ai_proxy.config import (
+    ARGOCD_AUTH_TOKEN,
+    ARGOCD_CACHE_TTL,
+    ARGOCD_CONFIG_DIR,
+    ARGOCD_GRPC_WEB,
+    ARGOCD_INSECURE,
+    ARGOCD_PASSWORD,
+    ARGOCD_PLAINTEXT,
+    ARGOCD_SERVER,
+    ARGOCD_USERNAME,
+)
+from kube_ai_proxy.throttle import THROTTLE
+from kube_ai_proxy.tools import CommandResult
+
+logger = logging.getLogger("kube_ai_proxy.argocd_session")
+
+# Refresh the token this many seconds before it expires
+REFRESH_MARGIN = 300.0
+LOGIN_TIMEOUT = 30.0
+
+# `argocd app` subcommands whose output may be cached, and those that change app state
+CACHEABLE_APP_COMMANDS = {"list", "get"}
+MUTATING_APP_COMMANDS = {
+    "sync", "set", "unset", "delete", "rollback", "patch", "patch-resource", "edit",
+    "create", "terminate-op", "actions", "delete-resource",
+}
+# `app get` flags that force a server-side refresh and must bypass the cache
+_REFRESH_FLAGS = {"--refresh", "--hard-refresh"}
+
+_AUTH_ERRORS = ("Unauthenticated", "token is expired", "invalid session")
+
+
+def _jwt_expiry(token: str) -> Optional[float]:
+    """`exp` claim of a JWT, or None if the token is not a decodable JWT."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        exp = json.loads(base64.urlsafe_b64decode(payload)).get("exp")
+        return float(exp) if exp else None
+    except (IndexError, ValueError, AttributeError):
+        return None
+
+
+class ArgoCDSession:
+    """
+    One ArgoCD login shared by every argocd child process.
+    With username/password the token is refreshed before it expires; a static
+    ARGOCD_AUTH_TOKEN is used as-is; with neither, the shared CLI config file
+    (populated by `argocd login` through the proxy) carries the session.
+    """
+
+    def __init__(
+        self,
+        server: str = ARGOCD_SERVER,
+        username: str = ARGOCD_USERNAME,
+        password: str = ARGOCD_PASSWORD,
+        token: str = ARGOCD_AUTH_TOKEN,
+        grpc_web: bool = ARGOCD_GRPC_WEB,
+        insecure: bool = ARGOCD_INSECURE,
+        plaintext: bool = ARGOCD_PLAINTEXT,
+        config_dir: Path | str = ARGOCD_CONFIG_DIR,
+    ):
+        self.server = server
+        self.username = username
+        self.password = password
+        self.grpc_web = grpc_web
+        self.insecure = insecure
+        self.plaintext = plaintext
+        self.config_dir = Path(config_dir)
+        self._static_token = bool(token)
+        self._token = token
+        self._expires_at = _jwt_expiry(token) if token else None
+        self._lock = asyncio.Lock()
+        self.logins = 0
+
+    @property
+    def base_url(self) -> str:
+        if "://" in self.server:
+            return self.server.rstrip("/")
+        return f"{'http' if self.plaintext else 'https'}://{self.server}"
+
+    @property
+    def can_login(self) -> bool:
+        return bool(self.server and self.username and self.password)
+
+    def _needs_refresh(self) -> bool:
+        if self._static_token or not self.can_login:
+            return False
+        if not self._token:
+            return True
+        return self._expires_at is not None and self._expires_at - time.time() < REFRESH_MARGIN
+
+    def _login(self) -> str:
+        """Blocking `POST /api/v1/session`; returns the session token."""
+        body = json.dumps({"username": self.username, "password": self.password}).encode()
+        req = urllib.request.Request(
+            f"{self.base_url}/api/v1/session",
+            data=body,
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        context = None
+        if self.insecure:
+            # ARGOCD_INSECURE: like `argocd --insecure`, accept any server certificate
+            context = ssl.create_default_context()
+            context.check_hostname = False
+            context.verify_mode = ssl.CERT_NONE
+        with urllib.request.urlopen(req, timeout=LOGIN_TIMEOUT, context=context) as resp:
+            token = json.loads(resp.read().decode("utf-8")).get("token", "")
+        if not token:
+            raise ValueError("ArgoCD session response did not contain a token")
+        return token
+
+    async def token(self) -> str:
+        """Current session token, logging in again when it is missing or close to expiry."""
+        if not self._needs_refresh():
+            return self._token
+        async with self._lock:
+            if self._needs_refresh():
+                try:
+                    token = await asyncio.to_thread(self._login)
+                except (urllib.error.URLError, OSError, ValueError) as e:
+                    logger.warning(f"ArgoCD login to {self.server} failed: {e}")
+                    return self._token
+                self._token = token
+                self._expires_at = _jwt_expiry(token)
+                self.logins += 1
+                logger.info(f"ArgoCD session established with {self.server}")
+        return self._token
+
+    def expire(self) -> None:
+        """Forget a token the server rejected so the next call logs in again."""
+        if not self._static_token:
+            self._token = ""
+            self._expires_at = None
+
+    async def env(self) -> dict[str, str]:
+        """Environment for an argocd child: shared config, server, token and connection flags."""
+        env = child_env()
+        self.config_dir.mkdir(parents=True, exist_ok=True)
+        # The CLI splits ARGOCD_OPTS shell-style, so the path is quoted for spaces
+        opts = [env.get("ARGOCD_OPTS", ""), f"--config {shlex.quote(str(self.config_dir / 'config'))}"]
+        if self.grpc_web:
+            opts.append("--grpc-web")
+        if self.insecure:
+            opts.append("--insecure")
+        if self.plaintext:
+            opts.append("--plaintext")
+        env["ARGOCD_OPTS"] = " ".join(o for o in opts if o)
+        if self.server:
+            env["ARGOCD_SERVER"] = self.server
+        token = await self.token()
+        if token:
+            env["ARGOCD_AUTH_TOKEN"] = token
+        return env
+
+
+def _app_subcommand(argv: list[str]) -> Optional[str]:
+    if len(argv) > 2 and argv[1] in ("app", "apps", "application", "applications"):
+        return argv[2]
+    return None
+
+
+def is_cacheable(argv: list[str]) -> bool:
+    return _app_subcommand(argv) in CACHEABLE_APP_COMMANDS and not _REFRESH_FLAGS & set(argv)
+
+
+def invalidate_for(argv: list[str]) -> int:
+    """
+    Drop cached results a command may have made stale: every `app list`, plus
+    every `app get` naming an application that appears in the command.
+    """
+    sub = _app_subcommand(argv)
+    if sub not in MUTATING_APP_COMMANDS and not (sub == "get" and _REFRESH_FLAGS & set(argv)):
+        return 0
+    touched = {tok for tok in argv[3:] if not tok.startswith("-")}
+
+    def stale(key: tuple) -> bool:
+        return key[2] == "list" or bool(touched & set(key[3:]))
+
+    dropped = APP_CACHE.invalidate(stale)
+    if dropped:
+        logger.debug(f"Invalidated {dropped} cached ArgoCD results after '{sub}'")
+    return dropped
+
+
+async def _run(argv: list[str], timeout: float) -> tuple[int, str]:
+    proc = await spawn(argv, env=await ARGOCD_SESSION.env())
+    try:
+        out, err = await communicate(proc, timeout)
+    except asyncio.TimeoutError:
+        return -1, f"Command timed out after {timeout}s"
+    exit_code = proc.returncode if proc.returncode is not None else 0
+    return exit_code, out.decode("utf-8", errors="replace") or err.decode("utf-8", "replace")
+
+
+async def run_argocd(argv: list[str], timeout: float, rbac: Optional[str] = None) -> CommandResult:
+    """
+    Execute an argocd argv through the shared session and the app result cache.
+    With `rbac` the run (cache hits included) is audited with that verdict; callers
+    that audit the user's own command line themselves leave it None.
+    """
+    start_ts = time.time()
+    key = tuple(argv)
+    cacheable = is_cacheable(argv)
+    if cacheable:
+        cached = APP_CACHE.get(key)
+        if cached is not None:
+            result = CommandResult(
+                status="success",
+                output=cached,
+                exit_code=0,
+                execution_time=time.time() - start_ts,
+            )
+            if rbac is not None:
+                await audit_command("argocd", argv, result, rbac=rbac)
+            return result
+
+    async def run() -> CommandResult:
+        exit_code, output = await _run(argv, timeout)
+        if exit_code != 0 and ARGOCD_SESSION.can_login and any(e in output for e in _AUTH_ERRORS):
+            # Token revoked or expired early: log in again and retry once
+            ARGOCD_SESSION.expire()
+            exit_code, output = await _run(argv, timeout)
+        return CommandResult(status="success" if exit_code == 0 else "error", output=output, exit_code=exit_code)
+
+    # ArgoCD API servers get their own adaptive window, separate from Kubernetes contexts
+    result = await THROTTLE.run(argv, run, context=f"argocd:{ARGOCD_SESSION.server or 'cli-config'}")
+    exit_code, output = result["exit_code"], result["output"]
+
+    invalidate_for(argv)
+    if cacheable and exit_code == 0:
+        APP_CACHE.put(key, output)
+
+    result = CommandResult(
+        status="success" if exit_code == 0 else "error",
+        output=output,
+        exit_code=exit_code,
+        execution_time=time.time() - start_ts,
+    )
+    if rbac is not None:
+        await audit_command("argocd", argv, result, rbac=rbac)
+    return result
+
+
+# Initialize once
+ARGOCD_SESSION = ArgoCDSession()
+APP_CACHE = TTLCache(ARGOCD_CACHE_TTL)
@@ -0,0 +1,329 @@
+# src/kube_ai_proxy/audit.py
+
+"""
+Audit log of executed commands for Kube AI Proxy.
+
+Every command the proxy runs (or refuses on RBAC grounds) becomes one JSON record:
+who, tool, validated command, context/namespace, RBAC verdict, exit code, duration
+and output size. Records never touch the disk on the request path:
+  - AuditLog.emit: enqueue a record; when the queue is full it is dropped, or with
+    the "block" policy the caller waits (asynchronously) a bounded time first
+  - a background thread drains the queue in batches into a JSONL file, rotated by
+    size and age (optionally gzip-compressed), keeping a fixed number of backups
+  - redact_command: mask credentials in a command line (values of password/token/secret
+    flags, `--from-literal` values, `--set` entries with secret-looking keys)
+  - audit_command: build and emit the record for a command result
+Counters (written, dropped, batches, rotations) go to the shared METRICS registry.
+"""
+
+import asyncio
+import getpass
+import gzip
+import json
+import logging
+import os
+import queue
+import re
+import shlex
+import shutil
+import threading
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+from kube_ai_proxy.config import (
+    AUDIT_BACKUPS,
+    AUDIT_BLOCK_TIMEOUT,
+    AUDIT_COMPRESS,
+    AUDIT_DIR,
+    AUDIT_ENABLED,
+    AUDIT_IDENTITY,
+    AUDIT_MAX_BYTES,
+    AUDIT_POLICY,
+    AUDIT_QUEUE_SIZE,
+    AUDIT_ROTATE_INTERVAL,
+    K8S_CONTEXT,
+    K8S_NAMESPACE,
+)
+from kube_ai_proxy.metrics import METRICS
+from kube_ai_proxy.tools import CommandResult, command_scope
+
+logger = logging.getLogger("kube_ai_proxy.audit")
+
+AUDIT_FILE = "audit.jsonl"
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+
+
+class AuditLog:
+    """Bounded in-memory queue in front of a batching, rotating JSONL writer thread."""
+
+    def __init__(
+        self,
+        directory: Path | str = AUDIT_DIR,
+        max_bytes: int = AUDIT_MAX_BYTES,
+        rotate_interval: float = AUDIT_ROTATE_INTERVAL,
+        backups: int = AUDIT_BACKUPS,
+        compress: bool = AUDIT_COMPRESS,
+        queue_size: int = AUDIT_QUEUE_SIZE,
+        policy: str = AUDIT_POLICY,
+        block_timeout: float = AUDIT_BLOCK_TIMEOUT,
+        enabled: bool = AUDIT_ENABLED,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.rotate_interval = rotate_interval
+        self.backups = backups
+        self.compress = compress
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.enabled = enabled
+        self._queue: queue.Queue[Optional[dict]] = queue.Queue(maxsize=max(1, queue_size))
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._opened_at = 0.0
+        self._queue_size = max(1, queue_size)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        # The writer thread is not forked, and records queued for it stay with the parent
+        self._queue = queue.Queue(maxsize=self._queue_size)
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    @property
+    def path(self) -> Path:
+        return self.directory / AUDIT_FILE
+
+    # ── producer side ──────────────────────────────────────────────────────────
+
+    def _ensure_writer(self) -> None:
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._writer, name="audit-writer", daemon=True)
+                    self._thread.start()
+
+    async def emit(self, record: dict) -> bool:
+        """Queue one record; returns False if it had to be dropped."""
+        if not self.enabled:
+            return False
+        self._ensure_writer()
+        try:
+            self._queue.put_nowait(record)
+            return True
+        except queue.Full:
+            pass
+        if self.policy == "block":
+            # Back-pressure without stalling the event loop: retry until the deadline
+            deadline = time.monotonic() + self.block_timeout
+            while time.monotonic() < deadline:
+                await asyncio.sleep(0.01)
+                try:
+                    self._queue.put_nowait(record)
+                    METRICS.inc("audit_blocked_total")
+                    return True
+                except queue.Full:
+                    continue
+        METRICS.inc("audit_dropped_total")
+        return False
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Flush queued records and stop the writer (shutdown path)."""
+        if self._thread is None:
+            return
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            logger.warning("Audit queue still full at shutdown; remaining records are lost")
+            return
+        self._thread.join(timeout)
+        self._thread = None
+
+    # ── writer thread ──────────────────────────────────────────────────────────
+
+    def _writer(self) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        try:
+            st = self.path.stat()
+            self._opened_at = st.st_mtime if st.st_size else time.time()
+        except FileNotFoundError:
+            self._opened_at = time.time()
+
+        stop = False
+        while not stop:
+            try:
+                first = self._queue.get(timeout=FLUSH_INTERVAL)
+            except queue.Empty:
+                try:
+                    self._maybe_rotate(0)
+                except OSError as e:
+                    logger.warning(f"Audit rotation failed: {e}")
+                continue
+            batch = [first]
+            while len(batch) < BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:
+                stop = True
+                batch = [r for r in batch if r is not None]
+            if batch:
+                self._write(batch)
+        METRICS.set("audit_queue_depth", 0)
+
+    def _write(self, batch: list[dict]) -> None:
+        data = "".join(json.dumps(r, separators=(",", ":"), default=str) + "\n" for r in batch).encode()
+        try:
+            self._maybe_rotate(len(data))
+            with self.path.open("ab") as fh:
+                fh.write(data)
+        except OSError as e:
+            logger.warning(f"Audit write failed, {len(batch)} records lost: {e}")
+            METRICS.inc("audit_dropped_total", len(batch))
+            return
+        METRICS.inc("audit_records_total", len(batch))
+        METRICS.inc("audit_batches_total")
+        METRICS.set("audit_queue_depth", self._queue.qsize())
+
+    def _maybe_rotate(self, incoming: int) -> None:
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return
+        too_big = size and size + incoming > self.max_bytes
+        too_old = size and time.time() - self._opened_at >= self.rotate_interval
+        if not (too_big or too_old):
+            return
+
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ")
+        rotated = self.directory / f"audit-{stamp}.jsonl"
+        os.replace(self.path, rotated)
+        self._opened_at = time.time()
+        if self.compress:
+            with rotated.open("rb") as src, gzip.open(f"{rotated}.gz", "wb") as dst:
+                shutil.copyfileobj(src, dst)
+            rotated.unlink()
+        METRICS.inc("audit_rotations_total")
+
+        backups = sorted(self.directory.glob("audit-*.jsonl*"))
+        for old in backups[: max(0, len(backups) - self.backups)]:
+            old.unlink(missing_ok=True)
+
+
+MASK = "***"
+# Flags whose value is a credential, e.g. --password, --auth-token, --client-secret, --api-key
+_SECRET_FLAG = re.compile(r"^--?[\w-]*(pass(word|phrase)?|token|secret|api-?key|credentials?)$", re.IGNORECASE)
+# `--set key=value` keys whose value is masked
+_SECRET_KEY = re.compile(r"password|token|secret|key", re.IGNORECASE)
+_SET_FLAGS = ("--set", "--set-string", "--set-json", "--set-literal")
+_SHELL_OPS = frozenset(("|", "||", "&&", ";", "&", ">", ">>", "<", "2>", "2>&1"))
+
+
+def _mask_literal(value: str) -> str:
+    key, eq, _ = value.partition("=")
+    return f"{key}={MASK}" if eq else MASK
+
+
+def _mask_set(value: str) -> str:
+    entries = []
+    for entry in value.split(","):
+        key, eq, _ = entry.partition("=")
+        entries.append(f"{key}={MASK}" if eq and _SECRET_KEY.search(key) else entry)
+    return ",".join(entries)
+
+
+def _masker(flag: str):
+    if flag == "--from-literal":
+        return _mask_literal
+    if flag in _SET_FLAGS:
+        return _mask_set
+    if _SECRET_FLAG.match(flag):
+        return lambda value: MASK
+    return None
+
+
+def redact_command(text: str) -> str:
+    """The command line with credential values masked; unchanged if there are none."""
+    try:
+        tokens = shlex.split(text)
+    except ValueError:
+        return text
+    changed = False
+    out = []
+    mask = None
+    for tok in tokens:
+        if mask is not None and tok not in _SHELL_OPS:
+            redacted = mask(tok)
+            mask = None
+        elif tok.startswith("-"):
+            name, eq, value = tok.partition("=")
+            mask = _masker(name)
+            redacted = tok
+            if mask is not None and eq:
+                redacted = f"{name}={mask(value)}"
+                mask = None
+        else:
+            redacted = tok
+        changed = changed or redacted != tok
+        out.append(redacted)
+    if not changed:
+        return text
+    return " ".join(t if t in _SHELL_OPS else shlex.quote(t) for t in out)
+
+
+_IDENTITY: Optional[str] = None
+
+
+def _identity() -> str:
+    global _IDENTITY
+    if _IDENTITY is None:
+        try:
+            _IDENTITY = AUDIT_IDENTITY or getpass.getuser()
+        except (KeyError, OSError):
+            _IDENTITY = str(os.getuid())
+    return _IDENTITY
+
+
+async def audit_command(
+    tool: str,
+    command: str | list[str],
+    result: Optional[CommandResult],
+    rbac: str = "n/a",
+    duration: Optional[float] = None,
+    output_chars: Optional[int] = None,
+    prefetch: bool = False,
+) -> None:
+    """
+    Emit the audit record for one command. `rbac` is "allowed", "denied" or "n/a";
+    `result` may be None when the command never ran. `output_chars` overrides the
+    size taken from the result (for output that is not held in it, e.g. jobs).
+    Speculative runs by the prefetcher are marked with "prefetch": true.
+    """
+    if not AUDIT.enabled:
+        return
+    text = command if isinstance(command, str) else shlex.join(command)
+    context, namespace = command_scope(text)
+    record = {
+        "ts": datetime.now(timezone.utc).isoformat(timespec="milliseconds"),
+        "who": _identity(),
+        "tool": tool,
+        "command": redact_command(text),
+        "context": context or K8S_CONTEXT,
+        "namespace": namespace or K8S_NAMESPACE,
+        "rbac": rbac,
+        "exit_code": result.get("exit_code") if result else None,
+        "status": result.get("status") if result else None,
+        "duration": duration if duration is not None else (result or {}).get("execution_time"),
+        "output_chars": output_chars if output_chars is not None else len((result or {}).get("output", "")),
+    }
+    if prefetch:
+        record["prefetch"] = True
+    await AUDIT.emit(record)
+
+
+# Initialize once
+AUDIT = AuditLog()
@@ -0,0 +1,167 @@
+# src/kube_ai_proxy/cache.py
+
+"""
+Cache primitives shared by the Kube AI Proxy executors.
+  - DiskLRUCache: size-bounded, content-keyed file cache with LRU eviction
+  - TTLCache: small in-memory cache of command results with per-entry expiry
+"""
+
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Callable, Hashable, Optional
+
+logger = logging.getLogger("kube_ai_proxy.cache")
+
+
+class DiskLRUCache:
+    """
+    Files keyed by hex digest under one directory, evicted least-recently-used
+    once their total size exceeds `max_bytes`. Recency is kept in memory and
+    seeded from file mtimes, so the cache survives restarts.
+    All methods are blocking; call them via asyncio.to_thread from the event loop.
+    """
+
+    def __init__(self, directory: Path | str, max_bytes: int, suffix: str = ""):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._entries: Optional[OrderedDict[str, int]] = None
+        self._total = 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _load(self) -> OrderedDict[str, int]:
+        if self._entries is None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            found = []
+            for p in self.directory.glob(f"*{self.suffix}"):
+                if p.name.startswith("."):
+                    continue
+                try:
+                    st = p.stat()
+                except OSError:
+                    continue
+                found.append((st.st_mtime, p.name[: len(p.name) - len(self.suffix)], st.st_size))
+            self._entries = OrderedDict((key, size) for _, key, size in sorted(found))
+            self._total = sum(self._entries.values())
+        return self._entries
+
+    def path(self, key: str) -> Optional[Path]:
+        """Path of a cached entry (marking it recently used), or None on a miss."""
+        with self._lock:
+            entries = self._load()
+            if key not in entries:
+                return None
+            p = self._path(key)
+            try:
+                os.utime(p)
+            except FileNotFoundError:
+                self._total -= entries.pop(key)
+                return None
+            entries.move_to_end(key)
+            return p
+
+    def get(self, key: str) -> Optional[bytes]:
+        p = self.path(key)
+        if p is None:
+            return None
+        try:
+            return p.read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes) -> Path:
+        """Store `data` atomically under `key` and evict down to the size cap."""
+        with self._lock:
+            entries = self._load()
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(data)
+            return self._commit(entries, key, Path(tmp), len(data))
+
+    def put_file(self, key: str, src: Path | str) -> Path:
+        """Move an existing file into the cache under `key`."""
+        with self._lock:
+            entries = self._load()
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+            os.close(fd)
+            shutil.move(str(src), tmp)
+            return self._commit(entries, key, Path(tmp), Path(tmp).stat().st_size)
+
+    def _commit(self, entries: OrderedDict[str, int], key: str, tmp: Path, size: int) -> Path:
+        dest = self._path(key)
+        os.replace(tmp, dest)
+        self._total += size - entries.pop(key, 0)
+        entries[key] = size
+        self._evict(entries, keep=key)
+        return dest
+
+    def _evict(self, entries: OrderedDict[str, int], keep: str) -> None:
+        while self._total > self.max_bytes and len(entries) > 1:
+            victim = next(iter(entries))
+            if victim == keep:
+                entries.move_to_end(victim)
+                continue
+            self._total -= entries.pop(victim)
+            try:
+                self._path(victim).unlink()
+            except FileNotFoundError:
+                pass
+            logger.debug(f"Evicted cache entry {victim} from {self.directory}")
+
+    @property
+    def total_bytes(self) -> int:
+        with self._lock:
+            self._load()
+            return self._total
+
+
+class TTLCache:
+    """
+    In-memory mapping whose entries expire `ttl` seconds after insertion.
+    Bounded to `max_entries`, dropping the least recently used entry first.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 512):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None or item[0] < time.monotonic():
+            if item is not None:
+                del self._data[key]
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: Hashable, value: Any, ttl: float | None = None) -> None:
+        if (ttl if ttl is not None else self.ttl) <= 0:
+            return
+        self._data.pop(key, None)
+        self._data[key] = (time.monotonic() + (ttl if ttl is not None else self.ttl), value)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+
+    def invalidate(self, predicate: Callable[[Hashable], bool] | None = None) -> int:
+        """Drop entries whose key matches `predicate` (all entries if None)."""
+        victims = [k for k in self._data if predicate is None or predicate(k)]
+        for k in victims:
+            del self._data[k]
+        return len(victims)
+
+    def __len__(self) -> int:
+        return len(self._data)
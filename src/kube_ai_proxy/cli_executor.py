@@ -4,25 +4,212 @@
 Shared CLI execution utilities for Kube AI Proxy.
 This mirrors patterns from k8s-mcp-server:
   - check_cli_installed: discover if a tool is available
-  - run_startup_checks: sync wrapper around check_cli_installed
+  - run_startup_checks: sync wrapper around check_cli_installed; verdicts are kept
+    in the warm-start state until the tool's binary changes
   - execute_command: validate & run (with pipe-support via shell)
-  - get_command_help: `<tool> --help`
+  - get_command_help / help_text: `<tool> --help`, cached in the shared store
+    under the tool binary's fingerprint
+  - child_env: environment handed to every CLI child process
+  - spawn / communicate / terminate: children run in their own process group (with
+    optional rlimits), started by the spawn helper when it runs; timeouts and cancellation SIGTERM, then SIGKILL, the whole
+    group and reap it
+  - terminate_all: synchronous cleanup of every live child group on shutdown
+  - run_cli: one child of a tool that fans out (logs, bundles, inventory, rollout
+    watches, istio and discovery queries), run in its context's throttle window
+    and audited like a user command
 """
 
 import asyncio
 import logging
+import os
+import resource
 import shlex
+import shutil
+import signal
 import time
-from asyncio.subprocess import PIPE
-from typing import Optional
+from asyncio.subprocess import PIPE, Process
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
 
-from kube_ai_proxy.config import DEFAULT_TIMEOUT, SUPPORTED_CLI_TOOLS
+from kube_ai_proxy.audit import audit_command
+from kube_ai_proxy.config import (
+    CHILD_KILL_GRACE,
+    CHILD_RLIMIT_AS,
+    CHILD_RLIMIT_CPU,
+    CHILD_RLIMIT_NOFILE,
+    DEFAULT_TIMEOUT,
+    DISCOVERY_CACHE_DIR,
+    HELP_CACHE_TTL,
+    SUPPORTED_CLI_TOOLS,
+)
 from kube_ai_proxy.security.security import validate_command, is_pipe_command
+from kube_ai_proxy.shared_store import SHARED_STORE
+from kube_ai_proxy.spawn_server import SPAWNER, SpawnUnavailable
+from kube_ai_proxy.throttle import THROTTLE, child_started
 from kube_ai_proxy.tools import CommandResult
+from kube_ai_proxy.warm_state import WARM_STATE, binary_fingerprint
 
 logger = logging.getLogger("kube_ai_proxy.cli_executor")
 
 
+# ─── 0) Child process environment ──────────────────────────────────────────────
+
+def child_env() -> dict[str, str]:
+    """
+    Environment for CLI children. Points kubectl at the proxy-managed discovery
+    cache so a fresh HOME does not force API discovery on every call.
+    """
+    env = dict(os.environ)
+    if "KUBECACHEDIR" not in env:
+        DISCOVERY_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        env["KUBECACHEDIR"] = str(DISCOVERY_CACHE_DIR)
+    return env
+
+
+# ─── 0b) Child process lifecycle ───────────────────────────────────────────────
+
+_RLIMITS = [
+    (limit, value)
+    for limit, value in (
+        (resource.RLIMIT_CPU, CHILD_RLIMIT_CPU),
+        (resource.RLIMIT_AS, CHILD_RLIMIT_AS),
+        (resource.RLIMIT_NOFILE, CHILD_RLIMIT_NOFILE),
+    )
+    if value > 0
+]
+
+# Children spawned and not yet known to be reaped
+_LIVE: set[Process] = set()
+
+if hasattr(os, "register_at_fork"):
+    # A forked worker must not signal or reap the parent's children
+    os.register_at_fork(after_in_child=_LIVE.clear)
+
+
+def _apply_rlimits() -> None:
+    """preexec_fn: runs in the forked child before exec."""
+    for limit, value in _RLIMITS:
+        resource.setrlimit(limit, (value, value))
+
+
+def _signal_group(proc: Process, sig: int) -> bool:
+    """Signal the child's whole process group (its pgid is its pid); False if it is gone."""
+    try:
+        os.killpg(proc.pid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+async def spawn(
+    cmd: list[str] | str,
+    shell: bool = False,
+    env: dict[str, str] | None = None,
+    **kwargs,
+) -> Process:
+    """
+    Start a CLI child in a new session/process group, with the configured rlimits and
+    child_env() unless `env` is given. `cmd` is an argv list, or a bash command line
+    when `shell` is true. stdout/stderr default to pipes.
+    Children are started by the spawn helper when it runs (see spawn_server), so
+    this process never forks; otherwise, or for arguments the helper does not
+    take, they are started here.
+    """
+    kwargs.setdefault("stdout", PIPE)
+    kwargs.setdefault("stderr", PIPE)
+    env = env if env is not None else child_env()
+
+    proc = None
+    if SPAWNER.available and SPAWNER.supports(kwargs):
+        try:
+            proc = await SPAWNER.spawn(cmd, shell, env, kwargs["stdout"], kwargs["stderr"], _RLIMITS)
+        except SpawnUnavailable:
+            proc = None
+    if proc is None:
+        kwargs["env"] = env
+        kwargs["start_new_session"] = True
+        if _RLIMITS:
+            kwargs["preexec_fn"] = _apply_rlimits
+        if shell:
+            proc = await asyncio.create_subprocess_shell(cmd, executable="/bin/bash", **kwargs)
+        else:
+            proc = await asyncio.create_subprocess_exec(*cmd, **kwargs)
+
+    for done in [p for p in _LIVE if p.returncode is not None]:
+        _LIVE.discard(done)
+    _LIVE.add(proc)
+    await child_started()
+    return proc
+
+
+def _members_left(proc: Process) -> bool:
+    """
+    Whether the group of a reaped child still has members. They keep its pgid (the
+    child's old pid) reserved, so while no process holds that pid the group is ours;
+    once a process does, the pid was reused and the group is someone else's.
+    """
+    try:
+        os.kill(proc.pid, 0)
+        return False
+    except ProcessLookupError:
+        return _signal_group(proc, 0)
+    except PermissionError:
+        return False
+
+
+async def terminate(proc: Process, grace: float = CHILD_KILL_GRACE) -> None:
+    """SIGTERM the child's process group, SIGKILL it after `grace` seconds, and reap the child."""
+    if proc.returncode is None and _signal_group(proc, signal.SIGTERM):
+        try:
+            await asyncio.wait_for(proc.wait(), grace)
+        except asyncio.TimeoutError:
+            pass
+    # Also catches group members that ignored SIGTERM or outlived the leader. Once the
+    # leader is reaped only members still in the group keep its pgid from being reused
+    if proc.returncode is None or _members_left(proc):
+        _signal_group(proc, signal.SIGKILL)
+    await proc.wait()
+    _LIVE.discard(proc)
+
+
+async def communicate(proc: Process, timeout: float | None) -> tuple[bytes, bytes]:
+    """
+    proc.communicate() with a deadline. On timeout (asyncio.TimeoutError) or task
+    cancellation the child's process group is terminated and reaped before the
+    exception propagates.
+    """
+    try:
+        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+    except (asyncio.TimeoutError, asyncio.CancelledError):
+        await asyncio.shield(terminate(proc))
+        raise
+    _LIVE.discard(proc)
+    return out, err
+
+
+def terminate_all(grace: float = CHILD_KILL_GRACE) -> int:
+    """
+    Synchronous shutdown path (signal handlers): SIGTERM every live child group,
+    SIGKILL whatever is left after `grace` seconds. Returns the number of groups signalled.
+    """
+    procs = [p for p in _LIVE if p.returncode is None and _signal_group(p, signal.SIGTERM)]
+    deadline = time.monotonic() + grace
+    pending = procs
+    while pending and time.monotonic() < deadline:
+        time.sleep(0.05)
+        for p in pending:
+            try:
+                os.waitpid(p.pid, os.WNOHANG)
+            except ChildProcessError:
+                pass  # already reaped by the event loop's child watcher
+        pending = [p for p in pending if _signal_group(p, 0)]
+    for p in pending:
+        _signal_group(p, signal.SIGKILL)
+    _LIVE.clear()
+    return len(procs)
+
+
 # ─── 1) Tool‐existence checks ────────────────────────────────────────────────────
 
 async def check_cli_installed(cli_tool: str) -> bool:
@@ -41,8 +228,8 @@ async def check_cli_installed(cli_tool: str) -> bool:
 
     args = shlex.split(check_cmd)
     try:
-        proc = await asyncio.create_subprocess_exec(*args, stdout=PIPE, stderr=PIPE)
-        await proc.communicate()
+        proc = await spawn(args)
+        await communicate(proc, DEFAULT_TIMEOUT)
         return proc.returncode == 0
     except Exception as e:
         logger.warning(f"Error checking {cli_tool}: {e}")
@@ -53,16 +240,46 @@ def run_startup_checks(tools: dict[str, dict]) -> dict[str, bool]:
     """
     Synchronously check installation status of each supported tool.
     Returns a mapping: { tool_name: True|False }
+    A verdict from a previous run is reused while the tool's binary is unchanged.
+    The remaining tools are checked concurrently on one event loop.
     """
     statuses: dict[str, bool] = {}
+    pending = {}
     for name in tools:
-        try:
-            ok = asyncio.run(check_cli_installed(name))
-            statuses[name] = ok
-            logger.info(f"{name} installed: {ok}")
-        except Exception:
+        state = WARM_STATE.section(f"cli.{name}", 1, lambda name=name: binary_fingerprint(name))
+        cached = state.get("installed")
+        if cached is not None:
+            statuses[name] = cached
+            logger.info(f"{name} installed: {cached} (unchanged binary)")
+        else:
+            pending[name] = state
+    if not pending:
+        return statuses
+
+    async def check_all() -> list:
+        return await asyncio.gather(*(check_cli_installed(n) for n in pending), return_exceptions=True)
+
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        # One loop for all remaining checks, run concurrently
+        results = asyncio.run(check_all())
+    else:
+        # Called from inside a running loop, where asyncio.run is not allowed: use a
+        # fresh loop in a helper thread (this blocks the caller either way)
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            results = pool.submit(asyncio.run, check_all()).result()
+
+    for (name, state), ok in zip(pending.items(), results):
+        if isinstance(ok, BaseException):
             statuses[name] = False
-            logger.warning(f"Startup check failed for {name}")
+            logger.warning(f"Startup check failed for {name}: {ok}")
+            continue
+        statuses[name] = ok
+        if ok or shutil.which(name) is None:
+            # A failure of an installed binary (timeout, EAGAIN) is checked again next boot
+            state.put("installed", ok)
+        logger.info(f"{name} installed: {ok}")
     return statuses
 
 
@@ -73,16 +290,10 @@ async def _run_shell_pipeline(command: str, timeout: float) -> tuple[int, str]:
     Run a shell pipeline so pipes, redirects, etc. Just Work™.
     Returns (exit_code, combined_output).
     """
-    proc = await asyncio.create_subprocess_shell(
-        command,
-        stdout=PIPE,
-        stderr=PIPE,
-        executable="/bin/bash",
-    )
+    proc = await spawn(command, shell=True)
     try:
-        out, err = await asyncio.wait_for(proc.communicate(), timeout)
+        out, err = await communicate(proc, timeout)
     except asyncio.TimeoutError:
-        proc.kill()
         return -1, f"Command timed out after {timeout}s"
 
     text = out.decode("utf-8", "replace") or err.decode("utf-8", "replace")
@@ -90,10 +301,15 @@ async def _run_shell_pipeline(command: str, timeout: float) -> tuple[int, str]:
     return exit_code, text
 
 
-async def execute_command(command: str, timeout: Optional[int] = None) -> CommandResult:
+async def execute_command(
+    command: str,
+    timeout: Optional[int] = None,
+    audit_as: Optional[str] = None,
+) -> CommandResult:
     """
     Validate, execute (with pipes via shell), and capture output for a CLI command.
-    Always returns an int exit_code and float execution_time.
+    Always returns an int exit_code and float execution_time. `audit_as` is the
+    command line recorded in the audit log when `command` is a rewrite of it.
     """
     # 1) Validate security and syntax
     validate_command(command)
@@ -103,29 +319,105 @@ async def execute_command(command: str, timeout: Optional[int] = None) -> Comman
     start_ts = time.time()
 
     # 3) Dispatch: shell for pipes, exec for simple
-    if is_pipe_command(command):
-        exit_code, output = await _run_shell_pipeline(command, exec_timeout)
-    else:
-        args = shlex.split(command)
-        proc = await asyncio.create_subprocess_exec(*args, stdout=PIPE, stderr=PIPE)
-        try:
-            out, err = await asyncio.wait_for(proc.communicate(), exec_timeout)
-            exit_code = proc.returncode or 0
-            output = out.decode("utf-8", "replace") or err.decode("utf-8", "replace")
-        except asyncio.TimeoutError:
-            proc.kill()
-            exit_code = -1
-            output = f"Command timed out after {exec_timeout}s"
+    async def run() -> CommandResult:
+        if is_pipe_command(command):
+            exit_code, output = await _run_shell_pipeline(command, exec_timeout)
+        else:
+            proc = await spawn(shlex.split(command))
+            try:
+                out, err = await communicate(proc, exec_timeout)
+                exit_code = proc.returncode or 0
+                output = out.decode("utf-8", "replace") or err.decode("utf-8", "replace")
+            except asyncio.TimeoutError:
+                exit_code = -1
+                output = f"Command timed out after {exec_timeout}s"
+        return {
+            "status": "success" if exit_code == 0 else "error",
+            "output": output,
+            "exit_code": exit_code,
+        }
+
+    # 4) Within the target context's adaptive concurrency window
+    result = await THROTTLE.run(command, run)
+    result["execution_time"] = time.time() - start_ts
+    audited = audit_as or command
+    await audit_command(audited.split(maxsplit=1)[0], audited, result)
+    return result
+
 
-    duration = time.time() - start_ts
-    status = "success" if exit_code == 0 else "error"
+@dataclass
+class CLIRun:
+    """Outcome of run_cli. A timed-out run has returncode -1 and no output."""
+    returncode: int
+    stdout: bytes = b""
+    stderr: bytes = b""
+    timed_out: bool = False
 
-    return {
-        "status": status,
-        "output": output,
-        "exit_code": exit_code,
-        "execution_time": duration,
-    }
+    def error(self) -> str:
+        """Last line of stderr, else the exit code."""
+        lines = self.stderr.decode("utf-8", "replace").strip().splitlines()
+        return lines[-1] if lines else f"exit code {self.returncode}"
+
+
+async def _run_child(
+    argv: list[str],
+    timeout: Optional[float],
+    consume: Optional[Callable[[Process], Awaitable[None]]],
+    env: Optional[dict[str, str]],
+) -> CLIRun:
+    proc = await spawn(argv, env=env)
+
+    async def read() -> bytes:
+        if consume is None:
+            return await proc.stdout.read()
+        await consume(proc)
+        return b""
+
+    try:
+        out, err = await asyncio.wait_for(asyncio.gather(read(), proc.stderr.read()), timeout)
+        await proc.wait()
+    except asyncio.CancelledError:
+        await asyncio.shield(terminate(proc))
+        raise
+    except asyncio.TimeoutError:
+        await terminate(proc)
+        return CLIRun(-1, timed_out=True)
+    return CLIRun(proc.returncode if proc.returncode is not None else -1, out, err)
+
+
+async def run_cli(
+    argv: list[str],
+    timeout: Optional[float],
+    consume: Optional[Callable[[Process], Awaitable[None]]] = None,
+    hold: Optional[bool] = None,
+    rbac: str = "n/a",
+    env: Optional[dict[str, str]] = None,
+) -> CLIRun:
+    """
+    Run a CLI child inside its context's throttle window and audit it under
+    argv[0]. Output is collected, or streamed by `consume(proc)` reading
+    proc.stdout (then not counted in the audit record, and throttled runs are not
+    retried since their output was already handed on). With hold=False (default:
+    for long-running commands, see Throttle.run) the window slot is only held
+    while the child starts, for watches that stay open.
+    Timeouts come back as a timed-out CLIRun; cancellation terminates the child.
+    """
+    start_ts = time.time()
+
+    async def run() -> dict:
+        done = await _run_child(argv, timeout, consume, env)
+        return {"output": done.stderr.decode("utf-8", "replace"), "exit_code": done.returncode, "run": done}
+
+    done = (await THROTTLE.run(argv, run, retry=consume is None, hold=hold))["run"]
+
+    result = CommandResult(
+        status="success" if done.returncode == 0 else "error",
+        output=f"Command timed out after {timeout}s" if done.timed_out else "",
+        exit_code=done.returncode,
+        execution_time=time.time() - start_ts,
+    )
+    await audit_command(argv[0], argv, result, rbac=rbac, output_chars=len(done.stdout))
+    return done
 
 
 async def get_command_help(cli_tool: str, command: Optional[str] = None) -> CommandResult:
@@ -142,4 +434,29 @@ async def get_command_help(cli_tool: str, command: Optional[str] = None) -> Comm
 
     help_flag = SUPPORTED_CLI_TOOLS[cli_tool]["help_flag"]
     cmd = cli_tool + (f" {command}" if command else "") + f" {help_flag}"
-    return await execute_command(cmd)
+    key = f"{binary_fingerprint(cli_tool)} {cmd}"
+    cached = await asyncio.to_thread(SHARED_STORE.get, "help", key)
+    if cached is not None:
+        return CommandResult(status="success", output=cached, exit_code=0, execution_time=0.0)
+    result = await execute_command(cmd)
+    if result["status"] == "success":
+        await asyncio.to_thread(SHARED_STORE.put, "help", key, result["output"], HELP_CACHE_TTL)
+    return result
+
+
+async def help_text(argv: list[str]) -> str:
+    """
+    Output of a `<tool> [subcommand] --help` argv (stdout, else stderr). Help text
+    only changes with the tool version, so it is shared by all workers for
+    HELP_CACHE_TTL seconds, keyed by the binary's fingerprint.
+    """
+    key = f"{binary_fingerprint(argv[0])} {shlex.join(argv)}"
+    cached = await asyncio.to_thread(SHARED_STORE.get, "help", key)
+    if cached is not None:
+        return cached
+    proc = await spawn(argv)
+    out, err = await communicate(proc, None)
+    text = out.decode(errors="replace") or err.decode(errors="replace")
+    if proc.returncode == 0:
+        await asyncio.to_thread(SHARED_STORE.put, "help", key, text, HELP_CACHE_TTL)
+    return text
@@ -5,11 +5,124 @@
 Environment variables:
   - K8S_MCP_TIMEOUT: custom timeout in seconds (default: 300)
   - K8S_MCP_MAX_OUTPUT: max output size in characters (default: 100000)
-  - K8S_MCP_TRANSPORT: transport protocol ("stdio" or "sse", default: "stdio")
+  - K8S_MCP_TRANSPORT: transport protocol ("stdio", "sse" or "streamable-http", default: "stdio")
+  - K8S_MCP_HOST / K8S_MCP_PORT: listen address of the HTTP transports (default: "127.0.0.1" / 8000)
+  - K8S_MCP_WORKERS: pre-forked worker processes sharing the listening socket; streamable-http
+    only, served statelessly so any worker can answer any request. Background job tools
+    keep their jobs in one process and are not offered with more than one worker (default: 1)
+  - K8S_MCP_UVLOOP: run the event loop on uvloop when it is installed ("true" or "false", default: "true")
+  - K8S_MCP_SHARED_STORE_MAX_MB: size cap of the SQLite store shared by all workers (help text,
+    RBAC verdicts) in MiB (default: 64)
+  - K8S_MCP_WARM_START: persist learned state (CLI checks, API discovery, parsed security policy)
+    across restarts, checked against tool binary, kubeconfig and policy fingerprints ("true" or "false", default: "true")
+  - K8S_MCP_STATE_DIR: directory of the warm-start state store (default: $K8S_MCP_CACHE_DIR/state)
+  - K8S_MCP_STATE_MAX_MB / K8S_MCP_STATE_MAX_ENTRY_KB: size caps of the state store and of one entry
+    (default: 16 / 4096)
+  - K8S_MCP_STATE_FLUSH_DELAY: seconds changes are batched before they are written (default: 2)
+  - K8S_MCP_HELP_CACHE_TTL: seconds `<tool> --help` output is reused (default: 86400)
+  - K8S_MCP_RBAC_CACHE_TTL: seconds a `kubectl auth can-i` verdict is reused, 0 to disable (default: 30)
   - K8S_CONTEXT: Kubernetes context to use (default: current context)
   - K8S_NAMESPACE: Kubernetes namespace to use (default: "default")
   - K8S_MCP_SECURITY_MODE: security mode ("strict" or "permissive", default: "strict")
   - K8S_MCP_SECURITY_CONFIG: path to custom security rules YAML (default: None)
+  - K8S_MCP_CACHE_DIR: base directory for proxy-managed caches (default: ~/.cache/kube-ai-proxy)
+  - K8S_MCP_DISCOVERY_REFRESH: API discovery refresh interval in seconds (default: 600)
+  - K8S_MCP_RENDER_CACHE: memoize `helm template` / `helm install --dry-run` output ("true" or "false", default: "true")
+  - K8S_MCP_RENDER_CACHE_MAX_MB: size cap of the render cache in MiB (default: 256)
+  - K8S_MCP_CHART_CACHE_MAX_MB: size cap of the pulled chart archive cache in MiB (default: 512)
+  - K8S_MCP_CHART_CACHE_TTL: seconds an unpinned chart reference stays cached (default: 3600)
+  - ARGOCD_SERVER: ArgoCD API server address used for the proxy-managed session (default: None)
+  - ARGOCD_USERNAME / ARGOCD_PASSWORD: credentials the proxy logs in with and refreshes (default: None)
+  - ARGOCD_AUTH_TOKEN: static ArgoCD token, used as-is instead of logging in (default: None)
+  - ARGOCD_GRPC_WEB / ARGOCD_INSECURE / ARGOCD_PLAINTEXT: ArgoCD connection options ("true" or "false")
+  - K8S_MCP_ARGOCD_CACHE_TTL: seconds `argocd app list/get` results are reused (default: 10)
+  - K8S_MCP_ISTIO_SNAPSHOT_TTL: seconds a parsed proxy-config snapshot is reused (default: 120)
+  - K8S_MCP_ISTIO_SNAPSHOT_MAX_MB: memory budget for proxy-config snapshots in MiB (default: 256)
+  - K8S_MCP_ISTIO_ANALYZE_CONCURRENCY: namespaces analyzed in parallel (default: 4)
+  - K8S_MCP_ISTIO_ANALYZE_MAX_AGE: seconds before cached findings are re-analyzed anyway (default: 1800)
+  - ISTIO_ROOT_NAMESPACE: Istio root config namespace, fingerprinted into every namespace (default: "istio-system")
+  - K8S_MCP_LOG_CONCURRENCY: pod/container log streams fetched in parallel (default: 8)
+  - K8S_MCP_LOG_POD_MAX_KB: log bytes kept per pod in multi-pod collection, in KiB (default: 256)
+  - K8S_MCP_LOG_MAX_PODS: pods a multi-pod log collection may fan out to (default: 50)
+  - K8S_MCP_TROUBLESHOOT_CONCURRENCY: kubectl queries a troubleshooting bundle runs in parallel (default: 8)
+  - K8S_MCP_TROUBLESHOOT_ITEM_TIMEOUT: seconds each bundle item may take before it is reported as missing (default: 20)
+  - K8S_MCP_TROUBLESHOOT_MAX_PODS: most-unhealthy pods whose logs go into a bundle (default: 5)
+  - K8S_MCP_TROUBLESHOOT_LOG_TAIL / K8S_MCP_TROUBLESHOOT_LOG_KB: log lines and KiB kept per container
+    in a bundle (default: 100 / 16)
+  - K8S_MCP_INVENTORY_CONCURRENCY: resource types listed in parallel by the inventory tool (default: 6)
+  - K8S_MCP_INVENTORY_CHUNK_SIZE: `--chunk-size` of inventory list requests (default: 500)
+  - K8S_MCP_SPAWN_SERVER: start CLI children from a small helper process launched at startup
+    instead of forking the server ("true" or "false", default: "true")
+  - K8S_MCP_CHILD_KILL_GRACE: seconds between SIGTERM and SIGKILL for a timed-out child process group (default: 5)
+  - K8S_MCP_CHILD_CPU_SECONDS: RLIMIT_CPU for child commands, 0 for unlimited (default: 0)
+  - K8S_MCP_CHILD_MEMORY_MB: RLIMIT_AS for child commands in MiB, 0 for unlimited (default: 0;
+    Go binaries reserve large virtual ranges, so keep this generous)
+  - K8S_MCP_CHILD_NOFILE: RLIMIT_NOFILE for child commands, 0 to inherit (default: 0)
+  - K8S_MCP_JOBS_MAX: background jobs kept in the job table, running or finished (default: 100)
+  - K8S_MCP_JOBS_MAX_RUNNING: background jobs allowed to run at once (default: 10)
+  - K8S_MCP_JOBS_RETENTION: seconds a finished job stays queryable (default: 3600)
+  - K8S_MCP_JOBS_MAX_RUNTIME: seconds before a background job is terminated (default: 3600)
+  - K8S_MCP_JOBS_OUTPUT_MEMORY_KB: job output held in memory before spilling to disk, in KiB (default: 256)
+  - K8S_MCP_JOBS_OUTPUT_MAX_MB: job output recorded per job in MiB; the rest is counted and dropped (default: 64)
+  - K8S_MCP_AUDIT: write an audit log of executed commands ("true" or "false", default: "true")
+  - K8S_MCP_AUDIT_DIR: directory of the audit JSONL files (default: <cache dir>/audit)
+  - K8S_MCP_AUDIT_IDENTITY: identity recorded as "who" in audit records (default: the OS user)
+  - K8S_MCP_AUDIT_MAX_MB: rotate the audit file at this size in MiB (default: 50)
+  - K8S_MCP_AUDIT_ROTATE_SECONDS: rotate the audit file at least this often (default: 86400)
+  - K8S_MCP_AUDIT_BACKUPS: rotated audit files kept (default: 10)
+  - K8S_MCP_AUDIT_COMPRESS: gzip rotated audit files ("true" or "false", default: "false")
+  - K8S_MCP_AUDIT_QUEUE: audit records buffered in memory ahead of the writer (default: 10000)
+  - K8S_MCP_AUDIT_POLICY: when the buffer is full, "drop" the record or "block" the caller
+    for up to K8S_MCP_AUDIT_BLOCK_TIMEOUT seconds before dropping it (default: "drop", 1.0)
+  - K8S_MCP_THROTTLE: adaptive (AIMD) concurrency limit per Kubernetes context ("true" or "false", default: "true")
+  - K8S_MCP_THROTTLE_WINDOW: initial / minimum / maximum concurrent commands per context (default: 16 / 1 / 64),
+    via K8S_MCP_THROTTLE_WINDOW, K8S_MCP_THROTTLE_MIN_WINDOW and K8S_MCP_THROTTLE_MAX_WINDOW
+  - K8S_MCP_THROTTLE_RETRIES: retries of a throttled read-only command (default: 3)
+  - K8S_MCP_THROTTLE_BACKOFF: base / maximum retry backoff in seconds (default: 0.5 / 10),
+    via K8S_MCP_THROTTLE_BACKOFF and K8S_MCP_THROTTLE_BACKOFF_MAX
+  - K8S_MCP_APPLY_BATCH: objects per server-side apply request of an ordered apply (default: 20)
+  - K8S_MCP_APPLY_CONCURRENCY: apply requests of one wave running in parallel (default: 4)
+  - K8S_MCP_APPLY_FIELD_MANAGER: field manager of ordered server-side applies (default: "kube-ai-proxy")
+  - K8S_MCP_ROLLOUT_MAX_WATCHES: watch streams of one rollout wait; past this many namespace/kind
+    groups, one cluster-wide watch per kind is used instead (default: 10)
+  - K8S_MCP_TOP_SAMPLER: poll `kubectl top pods/nodes` in the background and keep rolling CPU/memory
+    series for the query_top_metrics tool ("true" or "false", default: "false")
+  - K8S_MCP_TOP_INTERVAL: seconds between `kubectl top` polls (default: 30)
+  - K8S_MCP_TOP_CONTEXTS: comma-separated contexts to sample (default: K8S_CONTEXT, else the current context)
+  - K8S_MCP_TOP_POINTS: points kept per series in the raw, 1m and 10m tiers (default: 120,360,432,
+    i.e. 1 hour, 6 hours and 3 days at the default interval)
+  - K8S_MCP_TOP_MAX_SERIES: pods or nodes tracked per context; past it the series seen longest ago
+    is replaced (default: 2000)
+  - K8S_MCP_STRIP_NOISE: remove noise from `-o yaml` / `-o json` kubectl output, keeping the format;
+    `raw=True` on a call returns the output untouched ("true" or "false", default: "true")
+  - K8S_MCP_NOISE_PATHS: comma-separated noise paths relative to each object, map keys containing
+    dots in brackets (default: metadata.managedFields,
+    metadata.annotations[kubectl.kubernetes.io/last-applied-configuration], metadata.uid,
+    metadata.resourceVersion)
+  - K8S_MCP_NOISE_EMPTY_KEYS: keys whose empty map (`{}`) is dropped (default: annotations, labels,
+    resources, securityContext, status, loadBalancer, nodeSelector)
+  - K8S_MCP_PREFETCH: speculatively run likely read-only follow-ups of kubectl/helm results in the
+    background ("true" or "false", default: "false")
+  - K8S_MCP_PREFETCH_TTL: seconds a prefetched result may be served, once (default: 15)
+  - K8S_MCP_PREFETCH_PER_RESULT: follow-ups predicted per result (default: 3)
+  - K8S_MCP_PREFETCH_CONCURRENCY: prefetches running at once (default: 2)
+  - K8S_MCP_PREFETCH_PER_MINUTE: prefetches started per minute (default: 30)
+  - K8S_MCP_PREFETCH_MAX_MB: prefetched output held in memory in MiB (default: 16)
+  - K8S_MCP_PREFETCH_TIMEOUT: seconds a prefetch may run (default: 15)
+  - K8S_MCP_PREFETCH_MIN_SCORE: likelihood (0-1) a follow-up needs to be prefetched (default: 0.3)
+  - K8S_MCP_LOOP_WATCHDOG: log and count event-loop stalls with the loop thread's stack and the tool
+    call being served ("true" or "false", default: "true")
+  - K8S_MCP_LOOP_LAG_THRESHOLD: seconds the loop may be late before a stall is reported (default: 0.25)
+  - K8S_MCP_LOOP_LAG_INTERVAL: seconds between loop heartbeats (default: 0.1)
+  - K8S_MCP_OFFLOAD_BUDGET_MS: predicted milliseconds a decode/parse step may run on the loop before it
+    is moved to a worker thread (default: 5)
+  - K8S_MCP_PROFILE: seconds to profile right after startup, 0 for none (default: 0)
+  - K8S_MCP_PROFILE_DIR: directory of collapsed-stack and summary profile files (default: <cache dir>/profiles)
+  - K8S_MCP_PROFILE_INTERVAL_MS: sampling interval of the profiler in milliseconds (default: 10)
+  - K8S_MCP_PROFILE_SIGNAL_SECONDS: length of a profile started by SIGUSR2, which also stops one
+    early (default: 30)
+  - HELM_REPOSITORY_CACHE: Helm repository cache holding <repo>-index.yaml files
+    (default: Helm's own default, ~/.cache/helm/repository)
 
 """
 import os
@@ -19,8 +132,14 @@ from pathlib import Path
 DEFAULT_TIMEOUT = int(os.environ.get("K8S_MCP_TIMEOUT", "300"))
 MAX_OUTPUT_SIZE = int(os.environ.get("K8S_MCP_MAX_OUTPUT", "100000"))
 
-# MCP transport protocol: stdio or sse
+# MCP transport protocol: stdio, sse or streamable-http
 MCP_TRANSPORT = os.environ.get("K8S_MCP_TRANSPORT", "stdio")
+MCP_HOST = os.environ.get("K8S_MCP_HOST", "127.0.0.1")
+MCP_PORT = int(os.environ.get("K8S_MCP_PORT", "8000"))
+MCP_WORKERS = int(os.environ.get("K8S_MCP_WORKERS", "1"))
+# Workers only fork for streamable HTTP ("http" is its alias); other transports run one process
+MULTI_WORKER = MCP_WORKERS > 1 and MCP_TRANSPORT.lower() in ("streamable-http", "http")
+MCP_UVLOOP = os.environ.get("K8S_MCP_UVLOOP", "true").lower() == "true"
 
 # Kubernetes context and namespace
 K8S_CONTEXT = os.environ.get("K8S_CONTEXT", "")
@@ -30,6 +149,169 @@ K8S_NAMESPACE = os.environ.get("K8S_NAMESPACE", "default")
 SECURITY_MODE = os.environ.get("K8S_MCP_SECURITY_MODE", "strict")
 SECURITY_CONFIG_PATH = os.environ.get("K8S_MCP_SECURITY_CONFIG", None)
 
+# Proxy-managed cache directories
+CACHE_DIR = Path(
+    os.environ.get("K8S_MCP_CACHE_DIR", Path.home() / ".cache" / "kube-ai-proxy")
+)
+# Shared kubectl discovery cache, handed to every kubectl child via KUBECACHEDIR
+DISCOVERY_CACHE_DIR = CACHE_DIR / "kubectl"
+DISCOVERY_REFRESH_INTERVAL = int(os.environ.get("K8S_MCP_DISCOVERY_REFRESH", "600"))
+
+# Helm repository cache (read) and the proxy's compiled chart index (written)
+HELM_REPOSITORY_CACHE = Path(
+    os.environ.get("HELM_REPOSITORY_CACHE")
+    or Path(
+        os.environ.get("HELM_CACHE_HOME")
+        or Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "helm"
+    ) / "repository"
+)
+HELM_INDEX_PATH = CACHE_DIR / "helm-index.sqlite3"
+
+# Helm render memoization and pulled chart archives
+RENDER_CACHE_ENABLED = os.environ.get("K8S_MCP_RENDER_CACHE", "true").lower() == "true"
+RENDER_CACHE_DIR = CACHE_DIR / "renders"
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("K8S_MCP_RENDER_CACHE_MAX_MB", "256")) * 1024 * 1024
+CHART_CACHE_DIR = CACHE_DIR / "charts"
+CHART_CACHE_MAX_BYTES = int(os.environ.get("K8S_MCP_CHART_CACHE_MAX_MB", "512")) * 1024 * 1024
+CHART_CACHE_TTL = int(os.environ.get("K8S_MCP_CHART_CACHE_TTL", "3600"))
+
+# ArgoCD session management and short-lived result caching
+ARGOCD_SERVER = os.environ.get("ARGOCD_SERVER", "")
+ARGOCD_USERNAME = os.environ.get("ARGOCD_USERNAME", "")
+ARGOCD_PASSWORD = os.environ.get("ARGOCD_PASSWORD", "")
+ARGOCD_AUTH_TOKEN = os.environ.get("ARGOCD_AUTH_TOKEN", "")
+ARGOCD_GRPC_WEB = os.environ.get("ARGOCD_GRPC_WEB", "false").lower() == "true"
+ARGOCD_INSECURE = os.environ.get("ARGOCD_INSECURE", "false").lower() == "true"
+ARGOCD_PLAINTEXT = os.environ.get("ARGOCD_PLAINTEXT", "false").lower() == "true"
+ARGOCD_CONFIG_DIR = CACHE_DIR / "argocd"
+ARGOCD_CACHE_TTL = float(os.environ.get("K8S_MCP_ARGOCD_CACHE_TTL", "10"))
+
+# istioctl proxy-config snapshots
+ISTIO_SNAPSHOT_TTL = float(os.environ.get("K8S_MCP_ISTIO_SNAPSHOT_TTL", "120"))
+ISTIO_SNAPSHOT_MAX_BYTES = int(os.environ.get("K8S_MCP_ISTIO_SNAPSHOT_MAX_MB", "256")) * 1024 * 1024
+
+# Incremental `istioctl analyze`
+ISTIO_ANALYZE_CONCURRENCY = int(os.environ.get("K8S_MCP_ISTIO_ANALYZE_CONCURRENCY", "4"))
+ISTIO_ANALYZE_MAX_AGE = float(os.environ.get("K8S_MCP_ISTIO_ANALYZE_MAX_AGE", "1800"))
+ISTIO_ROOT_NAMESPACE = os.environ.get("ISTIO_ROOT_NAMESPACE", "istio-system")
+
+# Concurrent multi-pod log collection
+POD_LOGS_CONCURRENCY = int(os.environ.get("K8S_MCP_LOG_CONCURRENCY", "8"))
+POD_LOGS_MAX_BYTES_PER_POD = int(os.environ.get("K8S_MCP_LOG_POD_MAX_KB", "256")) * 1024
+POD_LOGS_MAX_PODS = int(os.environ.get("K8S_MCP_LOG_MAX_PODS", "50"))
+
+# One-shot troubleshooting bundles
+TROUBLESHOOT_CONCURRENCY = int(os.environ.get("K8S_MCP_TROUBLESHOOT_CONCURRENCY", "8"))
+TROUBLESHOOT_ITEM_TIMEOUT = float(os.environ.get("K8S_MCP_TROUBLESHOOT_ITEM_TIMEOUT", "20"))
+TROUBLESHOOT_MAX_PODS = int(os.environ.get("K8S_MCP_TROUBLESHOOT_MAX_PODS", "5"))
+TROUBLESHOOT_LOG_TAIL = int(os.environ.get("K8S_MCP_TROUBLESHOOT_LOG_TAIL", "100"))
+TROUBLESHOOT_LOG_BYTES = int(os.environ.get("K8S_MCP_TROUBLESHOOT_LOG_KB", "16")) * 1024
+
+# Streaming cluster inventory
+INVENTORY_CONCURRENCY = int(os.environ.get("K8S_MCP_INVENTORY_CONCURRENCY", "6"))
+INVENTORY_CHUNK_SIZE = int(os.environ.get("K8S_MCP_INVENTORY_CHUNK_SIZE", "500"))
+
+# Child process lifecycle: spawn helper, kill escalation and resource limits (0 = not limited)
+SPAWN_SERVER_ENABLED = os.environ.get("K8S_MCP_SPAWN_SERVER", "true").lower() == "true"
+CHILD_KILL_GRACE = float(os.environ.get("K8S_MCP_CHILD_KILL_GRACE", "5"))
+CHILD_RLIMIT_CPU = int(os.environ.get("K8S_MCP_CHILD_CPU_SECONDS", "0"))
+CHILD_RLIMIT_AS = int(os.environ.get("K8S_MCP_CHILD_MEMORY_MB", "0")) * 1024 * 1024
+CHILD_RLIMIT_NOFILE = int(os.environ.get("K8S_MCP_CHILD_NOFILE", "0"))
+
+# Background jobs for long-running commands
+JOBS_MAX = int(os.environ.get("K8S_MCP_JOBS_MAX", "100"))
+JOBS_MAX_RUNNING = int(os.environ.get("K8S_MCP_JOBS_MAX_RUNNING", "10"))
+JOBS_RETENTION = float(os.environ.get("K8S_MCP_JOBS_RETENTION", "3600"))
+JOBS_MAX_RUNTIME = float(os.environ.get("K8S_MCP_JOBS_MAX_RUNTIME", "3600"))
+JOBS_OUTPUT_MEMORY = int(os.environ.get("K8S_MCP_JOBS_OUTPUT_MEMORY_KB", "256")) * 1024
+JOBS_OUTPUT_MAX_BYTES = int(os.environ.get("K8S_MCP_JOBS_OUTPUT_MAX_MB", "64")) * 1024 * 1024
+JOBS_DIR = CACHE_DIR / "jobs"
+
+# Audit log of executed commands, written in batches by a background thread
+AUDIT_ENABLED = os.environ.get("K8S_MCP_AUDIT", "true").lower() == "true"
+AUDIT_DIR = Path(os.environ.get("K8S_MCP_AUDIT_DIR", CACHE_DIR / "audit"))
+AUDIT_IDENTITY = os.environ.get("K8S_MCP_AUDIT_IDENTITY", "")
+AUDIT_MAX_BYTES = int(os.environ.get("K8S_MCP_AUDIT_MAX_MB", "50")) * 1024 * 1024
+AUDIT_ROTATE_INTERVAL = float(os.environ.get("K8S_MCP_AUDIT_ROTATE_SECONDS", "86400"))
+AUDIT_BACKUPS = int(os.environ.get("K8S_MCP_AUDIT_BACKUPS", "10"))
+AUDIT_COMPRESS = os.environ.get("K8S_MCP_AUDIT_COMPRESS", "false").lower() == "true"
+AUDIT_QUEUE_SIZE = int(os.environ.get("K8S_MCP_AUDIT_QUEUE", "10000"))
+AUDIT_POLICY = os.environ.get("K8S_MCP_AUDIT_POLICY", "drop").lower()
+AUDIT_BLOCK_TIMEOUT = float(os.environ.get("K8S_MCP_AUDIT_BLOCK_TIMEOUT", "1.0"))
+
+# Adaptive client-side throttling against API server 429s / Priority & Fairness rejections
+THROTTLE_ENABLED = os.environ.get("K8S_MCP_THROTTLE", "true").lower() == "true"
+THROTTLE_INITIAL_WINDOW = float(os.environ.get("K8S_MCP_THROTTLE_WINDOW", "16"))
+THROTTLE_MIN_WINDOW = float(os.environ.get("K8S_MCP_THROTTLE_MIN_WINDOW", "1"))
+THROTTLE_MAX_WINDOW = float(os.environ.get("K8S_MCP_THROTTLE_MAX_WINDOW", "64"))
+THROTTLE_MAX_RETRIES = int(os.environ.get("K8S_MCP_THROTTLE_RETRIES", "3"))
+THROTTLE_BACKOFF_BASE = float(os.environ.get("K8S_MCP_THROTTLE_BACKOFF", "0.5"))
+THROTTLE_BACKOFF_MAX = float(os.environ.get("K8S_MCP_THROTTLE_BACKOFF_MAX", "10"))
+
+# SQLite key/value store shared by all worker processes
+SHARED_STORE_PATH = CACHE_DIR / "shared.sqlite3"
+SHARED_STORE_MAX_BYTES = int(os.environ.get("K8S_MCP_SHARED_STORE_MAX_MB", "64")) * 1024 * 1024
+HELP_CACHE_TTL = float(os.environ.get("K8S_MCP_HELP_CACHE_TTL", "86400"))
+RBAC_CACHE_TTL = float(os.environ.get("K8S_MCP_RBAC_CACHE_TTL", "30"))
+
+# Warm-start state persisted across restarts
+WARM_START_ENABLED = os.environ.get("K8S_MCP_WARM_START", "true").lower() == "true"
+STATE_DIR = Path(os.environ.get("K8S_MCP_STATE_DIR", CACHE_DIR / "state"))
+STATE_MAX_BYTES = int(os.environ.get("K8S_MCP_STATE_MAX_MB", "16")) * 1024 * 1024
+STATE_MAX_ENTRY_BYTES = int(os.environ.get("K8S_MCP_STATE_MAX_ENTRY_KB", "4096")) * 1024
+STATE_FLUSH_DELAY = float(os.environ.get("K8S_MCP_STATE_FLUSH_DELAY", "2"))
+
+# Dependency-ordered parallel apply
+APPLY_BATCH_SIZE = int(os.environ.get("K8S_MCP_APPLY_BATCH", "20"))
+APPLY_CONCURRENCY = int(os.environ.get("K8S_MCP_APPLY_CONCURRENCY", "4"))
+APPLY_FIELD_MANAGER = os.environ.get("K8S_MCP_APPLY_FIELD_MANAGER", "kube-ai-proxy")
+
+# Multiplexed rollout waits
+ROLLOUT_MAX_WATCHES = int(os.environ.get("K8S_MCP_ROLLOUT_MAX_WATCHES", "10"))
+
+# Rolling `kubectl top` time series (opt-in)
+TOP_SAMPLER_ENABLED = os.environ.get("K8S_MCP_TOP_SAMPLER", "false").lower() == "true"
+TOP_INTERVAL = float(os.environ.get("K8S_MCP_TOP_INTERVAL", "30"))
+TOP_CONTEXTS = [c.strip() for c in os.environ.get("K8S_MCP_TOP_CONTEXTS", "").split(",") if c.strip()]
+TOP_POINTS = tuple(int(n) for n in os.environ.get("K8S_MCP_TOP_POINTS", "120,360,432").split(","))
+TOP_MAX_SERIES = int(os.environ.get("K8S_MCP_TOP_MAX_SERIES", "2000"))
+
+# Noise stripping of structured resource output
+NOISE_STRIP_ENABLED = os.environ.get("K8S_MCP_STRIP_NOISE", "true").lower() == "true"
+NOISE_PATHS = os.environ.get(
+    "K8S_MCP_NOISE_PATHS",
+    "metadata.managedFields,"
+    "metadata.annotations[kubectl.kubernetes.io/last-applied-configuration],"
+    "metadata.uid,"
+    "metadata.resourceVersion",
+).split(",")
+NOISE_EMPTY_KEYS = os.environ.get(
+    "K8S_MCP_NOISE_EMPTY_KEYS",
+    "annotations,labels,resources,securityContext,status,loadBalancer,nodeSelector",
+).split(",")
+
+# Speculative prefetch of likely follow-up commands (opt-in)
+PREFETCH_ENABLED = os.environ.get("K8S_MCP_PREFETCH", "false").lower() == "true"
+PREFETCH_TTL = float(os.environ.get("K8S_MCP_PREFETCH_TTL", "15"))
+PREFETCH_PER_RESULT = int(os.environ.get("K8S_MCP_PREFETCH_PER_RESULT", "3"))
+PREFETCH_CONCURRENCY = int(os.environ.get("K8S_MCP_PREFETCH_CONCURRENCY", "2"))
+PREFETCH_PER_MINUTE = int(os.environ.get("K8S_MCP_PREFETCH_PER_MINUTE", "30"))
+PREFETCH_MAX_BYTES = int(os.environ.get("K8S_MCP_PREFETCH_MAX_MB", "16")) * 1024 * 1024
+PREFETCH_TIMEOUT = float(os.environ.get("K8S_MCP_PREFETCH_TIMEOUT", "15"))
+PREFETCH_MIN_SCORE = float(os.environ.get("K8S_MCP_PREFETCH_MIN_SCORE", "0.3"))
+
+# Event-loop lag watchdog and offloading of heavy steps
+LOOP_WATCHDOG_ENABLED = os.environ.get("K8S_MCP_LOOP_WATCHDOG", "true").lower() == "true"
+LOOP_LAG_THRESHOLD = float(os.environ.get("K8S_MCP_LOOP_LAG_THRESHOLD", "0.25"))
+LOOP_LAG_INTERVAL = float(os.environ.get("K8S_MCP_LOOP_LAG_INTERVAL", "0.1"))
+OFFLOAD_BUDGET = float(os.environ.get("K8S_MCP_OFFLOAD_BUDGET_MS", "5")) / 1000
+
+# On-demand sampling profiler (admin tool, SIGUSR2, or at startup)
+PROFILE_AT_STARTUP = float(os.environ.get("K8S_MCP_PROFILE", "0"))
+PROFILE_DIR = Path(os.environ.get("K8S_MCP_PROFILE_DIR", CACHE_DIR / "profiles"))
+PROFILE_INTERVAL = float(os.environ.get("K8S_MCP_PROFILE_INTERVAL_MS", "10")) / 1000
+PROFILE_SIGNAL_DURATION = float(os.environ.get("K8S_MCP_PROFILE_SIGNAL_SECONDS", "30"))
+
 # Supported CLI tools with their check and help commands
 SUPPORTED_CLI_TOOLS = {
     "kubectl": {
@@ -0,0 +1,258 @@
+# src/kube_ai_proxy/discovery.py
+
+"""
+API discovery for Kube AI Proxy.
+
+kubectl children share one proxy-managed discovery cache (see cli_executor.child_env),
+and the proxy keeps an in-memory index of the API resources served by the cluster:
+  - ResourceIndex.refresh: rebuild the index from `kubectl api-resources -o wide`
+  - resolve_resource: map short names, plurals, kinds and `kind/name` forms to an APIResource
+  - normalize_resource: canonical `plural[.group][/name]` form for `kubectl auth can-i`
+  - prewarm_discovery / ensure_background_refresh: startup warm-up and periodic refresh;
+    the index of the previous run is loaded from the warm-start state when the
+    kubeconfig and kubectl are unchanged, and refreshed in the background
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from kube_ai_proxy.cli_executor import run_cli
+from kube_ai_proxy.config import DISCOVERY_REFRESH_INTERVAL, K8S_CONTEXT
+from kube_ai_proxy.warm_state import WARM_STATE, binary_fingerprint, kubeconfig_fingerprint
+
+logger = logging.getLogger("kube_ai_proxy.discovery")
+
+# Columns printed by `kubectl api-resources -o wide`
+_COLUMNS = ("NAME", "SHORTNAMES", "APIVERSION", "NAMESPACED", "KIND", "VERBS", "CATEGORIES")
+
+DISCOVERY_TIMEOUT = 60.0
+
+_STATE = WARM_STATE.section(
+    "discovery", 1, lambda: f"{kubeconfig_fingerprint()}-{binary_fingerprint('kubectl')}"
+)
+
+
+@dataclass(frozen=True)
+class APIResource:
+    """A single resource type served by the API server."""
+    name: str
+    kind: str
+    group: str
+    version: str
+    namespaced: bool
+    short_names: tuple[str, ...] = ()
+    verbs: frozenset[str] = field(default_factory=frozenset)
+    categories: tuple[str, ...] = ()
+
+    @property
+    def qualified_name(self) -> str:
+        """`plural.group` for grouped resources, bare plural for the core group."""
+        return f"{self.name}.{self.group}" if self.group else self.name
+
+    def supports(self, verb: str) -> bool:
+        return verb in self.verbs
+
+    def to_row(self) -> list:
+        return [self.name, self.kind, self.group, self.version, self.namespaced,
+                list(self.short_names), sorted(self.verbs), list(self.categories)]
+
+    @classmethod
+    def from_row(cls, row: list) -> "APIResource":
+        name, kind, group, version, namespaced, short_names, verbs, categories = row
+        return cls(name, kind, group, version, namespaced, tuple(short_names), frozenset(verbs), tuple(categories))
+
+
+def parse_api_resources(text: str) -> list[APIResource]:
+    """
+    Parse the fixed-width table printed by `kubectl api-resources -o wide`.
+    Column offsets are taken from the header, since SHORTNAMES is often blank.
+    """
+    lines = [line for line in text.splitlines() if line.strip()]
+    if not lines:
+        return []
+
+    header = lines[0]
+    present = sorted((header.find(col), col) for col in _COLUMNS if header.find(col) >= 0)
+    missing = {"NAME", "APIVERSION", "NAMESPACED", "KIND"} - {col for _, col in present}
+    if missing:
+        raise ValueError(f"Unexpected api-resources header: missing {', '.join(sorted(missing))}")
+    bounds = {
+        col: (start, present[i + 1][0] if i + 1 < len(present) else None)
+        for i, (start, col) in enumerate(present)
+    }
+
+    resources: list[APIResource] = []
+    for line in lines[1:]:
+        cells = {col: line[a:b].strip() for col, (a, b) in bounds.items()}
+        group, _, version = cells["APIVERSION"].rpartition("/")
+        resources.append(APIResource(
+            name=cells["NAME"],
+            kind=cells["KIND"],
+            group=group,
+            version=version,
+            namespaced=cells["NAMESPACED"].lower() == "true",
+            short_names=tuple(s for s in cells.get("SHORTNAMES", "").split(",") if s),
+            verbs=frozenset(cells.get("VERBS", "").strip("[]").split()),
+            categories=tuple(c for c in cells.get("CATEGORIES", "").split(",") if c),
+        ))
+    return resources
+
+
+class ResourceIndex:
+    """
+    In-memory lookup table of API resources.
+    Lookups are pure dictionary reads; refresh() swaps in a new table atomically.
+    """
+
+    def __init__(self, context: str | None = None):
+        self.context = context or K8S_CONTEXT
+        self._by_key: dict[str, APIResource] = {}
+        self._resources: list[APIResource] = []
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.last_refresh: float = 0.0
+        self.from_snapshot = False
+
+    @property
+    def resources(self) -> list[APIResource]:
+        return list(self._resources)
+
+    def load(self, resources: list[APIResource]) -> None:
+        """Replace the index contents. First match wins, mirroring kubectl's priority order."""
+        by_key: dict[str, APIResource] = {}
+        for res in resources:
+            singular = res.kind.lower()
+            keys = [res.name, singular, *res.short_names]
+            if res.group:
+                keys += [
+                    f"{res.name}.{res.group}",
+                    f"{singular}.{res.group}",
+                    f"{res.name}.{res.version}.{res.group}",
+                    f"{singular}.{res.version}.{res.group}",
+                ]
+            for key in keys:
+                by_key.setdefault(key.lower(), res)
+        self._by_key = by_key
+        self._resources = list(resources)
+
+    def load_snapshot(self) -> bool:
+        """Load the index saved by a previous run for this context; False if there is none that is current."""
+        rows = _STATE.get(self.context or "")
+        if not rows:
+            return False
+        try:
+            resources = [APIResource.from_row(row) for row in rows]
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Discarding discovery snapshot: {e}")
+            return False
+        self.load(resources)
+        self.from_snapshot = True
+        logger.info(f"API resource index loaded from the previous run: {len(resources)} resources")
+        return True
+
+    def resolve(self, token: str) -> Optional[APIResource]:
+        """Resolve `deploy`, `Deployment`, `deployments.apps` or `deploy/nginx` to an APIResource."""
+        type_part = token.split("/", 1)[0].strip().lower()
+        if not type_part:
+            return None
+        return self._by_key.get(type_part)
+
+    def normalize(self, token: str) -> str:
+        """Canonical `plural[.group][/name]`, or the token unchanged if it is unknown."""
+        if not token or token.startswith("-"):
+            return token
+        type_part, sep, name = token.partition("/")
+        res = self.resolve(type_part)
+        if res is None:
+            return token
+        return res.qualified_name + (f"/{name}" if sep else "")
+
+    async def refresh(self, timeout: float = DISCOVERY_TIMEOUT) -> bool:
+        """Rebuild the index from the cluster. Keeps the previous table on failure."""
+        cmd = ["kubectl", "api-resources", "-o", "wide"]
+        if self.context:
+            cmd += ["--context", self.context]
+
+        async with self._lock:
+            try:
+                done = await run_cli(cmd, timeout)
+            except OSError as e:
+                logger.warning(f"API discovery unavailable: {e}")
+                return False
+            if done.timed_out:
+                logger.warning(f"API discovery timed out after {timeout}s")
+                return False
+            out, err = done.stdout, done.stderr
+
+            # api-resources exits non-zero when some groups fail discovery but
+            # still prints the rest, so parse whatever came back.
+            try:
+                resources = parse_api_resources(out.decode("utf-8", "replace"))
+            except ValueError as e:
+                logger.warning(f"Could not parse api-resources output: {e}")
+                return False
+            if not resources:
+                logger.warning(
+                    f"API discovery returned no resources: {err.decode('utf-8', 'replace').strip()}"
+                )
+                return False
+
+            self.load(resources)
+            self.last_refresh = time.time()
+            self.from_snapshot = False
+            _STATE.put(self.context or "", [res.to_row() for res in resources])
+            logger.info(f"API resource index refreshed: {len(resources)} resources")
+            return True
+
+    async def _refresh_loop(self, interval: float) -> None:
+        # Refresh right away if the startup prewarm did not populate the index
+        # or only loaded the previous run's snapshot
+        pending = not self._resources or self.from_snapshot
+        while True:
+            if not pending:
+                await asyncio.sleep(interval)
+            pending = False
+            try:
+                await self.refresh()
+            except Exception as e:
+                logger.warning(f"Background discovery refresh failed: {e}")
+
+    def ensure_background_refresh(self, interval: float = DISCOVERY_REFRESH_INTERVAL) -> None:
+        """Start the periodic refresh task on the running loop (idempotent)."""
+        if interval <= 0 or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._refresh_loop(interval))
+
+
+# Initialize once
+RESOURCE_INDEX = ResourceIndex()
+
+
+def resolve_resource(token: str) -> Optional[APIResource]:
+    return RESOURCE_INDEX.resolve(token)
+
+
+def normalize_resource(token: str) -> str:
+    return RESOURCE_INDEX.normalize(token)
+
+
+def ensure_background_refresh() -> None:
+    RESOURCE_INDEX.ensure_background_refresh()
+
+
+def prewarm_discovery() -> bool:
+    """
+    Synchronously populate the discovery cache directory and the resource index.
+    Intended for startup, before the server loop is running. A current snapshot
+    from the previous run is used instead of asking the cluster.
+    """
+    if RESOURCE_INDEX.load_snapshot():
+        return True
+    try:
+        return asyncio.run(RESOURCE_INDEX.refresh())
+    except Exception as e:
+        logger.warning(f"Discovery prewarm failed: {e}")
+        return False
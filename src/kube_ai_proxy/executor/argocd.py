@@ -2,13 +2,18 @@
 
 """
 Executor module for ArgoCD commands.
-Defines describe_argocd and execute_argocd functions, decorated as MCP tools.
+Defines describe_argocd, execute_argocd and argocd_app_overview, registered as MCP tools.
 """
+import json
 import shlex
 import asyncio
-from asyncio.subprocess import PIPE
+import time
+from collections import Counter
 from mcp.server.fastmcp import Context
 
+from kube_ai_proxy.argocd_session import run_argocd
+from kube_ai_proxy.audit import audit_command
+from kube_ai_proxy.cli_executor import help_text
 from kube_ai_proxy.config import SUPPORTED_CLI_TOOLS, DEFAULT_TIMEOUT
 
 from kube_ai_proxy.security.rbac_checker import RBACChecker
@@ -30,9 +35,7 @@ async def describe_argocd(
         cmd.extend(shlex.split(command))
     cmd.append(help_flag)
 
-    proc = await asyncio.create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-    out, err = await proc.communicate()
-    text = out.decode(errors="replace") or err.decode(errors="replace")
+    text = await help_text(cmd)
 
     return CommandHelpResult(help_text=text, status="success")
 
@@ -54,33 +57,162 @@ async def execute_argocd(
         checker = RBACChecker()
         allowed = await checker.can_i_argocd(verb, target)
         if not allowed:
-            return CommandResult(
+            result = CommandResult(
                 status="error",
                 output=f"RBAC: permission denied for {verb} {target}",
                 exit_code=1,
             )
+            await audit_command("argocd", command, result, rbac="denied")
+            return result
 
     # Determine timeout
     exec_timeout = float(timeout or DEFAULT_TIMEOUT)
 
-    # Launch process
-    proc = await asyncio.create_subprocess_exec(
-        *shlex.split(command), stdout=PIPE, stderr=PIPE
+    # Run through the shared ArgoCD session (cached app list/get, invalidated on mutation)
+    result = await run_argocd(parts, exec_timeout)
+    await audit_command("argocd", command, result, rbac="allowed" if len(parts) > 1 else "n/a")
+    return result
+
+
+# ───────────────────────────────────────────────────────────────────────────────
+# Bulk health/sync overview
+# ───────────────────────────────────────────────────────────────────────────────
+
+OVERVIEW_CONCURRENCY = 8
+OVERVIEW_DETAIL_LIMIT = 50
+
+
+def _app_status(name: str, app: dict) -> dict:
+    """Reduce an Application object to the fields the overview reports."""
+    status = app.get("status") or {}
+    health = (status.get("health") or {}).get("status") or "Unknown"
+    sync = (status.get("sync") or {}).get("status") or "Unknown"
+
+    message = ""
+    for res in status.get("resources") or []:
+        res_health = (res.get("health") or {})
+        if res_health.get("status") not in (None, "Healthy") or res.get("status") == "OutOfSync":
+            message = f"{res.get('kind')}/{res.get('name')}: " + (
+                res_health.get("message") or res_health.get("status") or res.get("status", "")
+            )
+            break
+    if not message:
+        conditions = status.get("conditions") or []
+        operation = status.get("operationState") or {}
+        if conditions:
+            message = f"{conditions[0].get('type')}: {conditions[0].get('message', '')}"
+        elif operation.get("phase") not in (None, "Succeeded"):
+            message = f"{operation.get('phase')}: {operation.get('message', '')}"
+
+    return {
+        "name": name,
+        "project": (app.get("spec") or {}).get("project", ""),
+        "health": health,
+        "sync": sync,
+        "revision": ((status.get("sync") or {}).get("revision") or "")[:8],
+        "message": " ".join(message.split())[:160],
+    }
+
+
+def _needs_attention(app: dict) -> bool:
+    return app["health"] != "Healthy" or app["sync"] != "Synced"
+
+
+def _format_overview(apps: list[dict], failures: dict[str, str], detail_limit: int) -> str:
+    health = Counter(a["health"] for a in apps)
+    sync = Counter(a["sync"] for a in apps)
+    attention = sorted(
+        (a for a in apps if _needs_attention(a)),
+        key=lambda a: (a["health"] == "Healthy", a["health"], a["name"]),
     )
 
-    try:
-        out, err = await asyncio.wait_for(proc.communicate(), exec_timeout)
-        exit_code = proc.returncode if proc.returncode is not None else 0
-        output = out.decode("utf-8", errors="replace") or err.decode("utf-8", "replace")
-        status = "success" if exit_code == 0 else "error"
-    except asyncio.TimeoutError:
-        proc.kill()
-        exit_code = -1
-        output = f"Command timed out after {exec_timeout}s"
-        status = "error"
+    lines = [
+        f"Applications: {len(apps) + len(failures)}",
+        "Health: " + "  ".join(f"{k}={v}" for k, v in health.most_common()),
+        "Sync:   " + "  ".join(f"{k}={v}" for k, v in sync.most_common()),
+    ]
+    if attention:
+        lines += ["", f"Needs attention ({len(attention)}):"]
+        rows = [("NAME", "PROJECT", "HEALTH", "SYNC", "REVISION", "MESSAGE")]
+        rows += [
+            (a["name"], a["project"], a["health"], a["sync"], a["revision"], a["message"])
+            for a in attention[:detail_limit]
+        ]
+        widths = [max(len(r[i]) for r in rows) for i in range(5)]
+        lines += ["  ".join(r[i].ljust(widths[i]) for i in range(5)) + "  " + r[5] for r in rows]
+        if len(attention) > detail_limit:
+            lines.append(f"... {len(attention) - detail_limit} more not shown")
+    if failures:
+        lines += ["", f"Failed to fetch ({len(failures)}):"]
+        lines += [f"{name}: {err}" for name, err in sorted(failures.items())[:detail_limit]]
+    return "\n".join(lines)
+
+
+async def argocd_app_overview(
+    project: str | None = None,
+    selector: str | None = None,
+    concurrency: int = OVERVIEW_CONCURRENCY,
+    detail_limit: int = OVERVIEW_DETAIL_LIMIT,
+    timeout: int | None = None,
+    ctx: Context | None = None,
+) -> CommandResult:
+    """
+    Summarize health and sync status of all ArgoCD applications (optionally filtered
+    by project and label selector). Applications are fetched concurrently; unhealthy
+    or out-of-sync ones are streamed as they arrive and listed in detail.
+    """
+    start_ts = time.time()
+    exec_timeout = float(timeout or DEFAULT_TIMEOUT)
+
+    if not await RBACChecker().can_i_argocd("app", "get"):
+        return CommandResult(
+            status="error",
+            output="RBAC: permission denied for app get",
+            exit_code=1,
+        )
+
+    list_cmd = ["argocd", "app", "list", "-o", "name"]
+    if project:
+        list_cmd += ["--project", project]
+    if selector:
+        list_cmd += ["--selector", selector]
+    listing = await run_argocd(list_cmd, exec_timeout, rbac="allowed")
+    if listing["status"] != "success":
+        return listing
+    names = [line.strip() for line in listing["output"].splitlines() if line.strip()]
+    if ctx:
+        await ctx.info(f"Collecting status for {len(names)} ArgoCD applications")
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(name: str) -> tuple[str, dict | None, str]:
+        async with sem:
+            argv = ["argocd", "app", "get", name, "-o", "json"]
+            result = await run_argocd(argv, exec_timeout, rbac="allowed")
+        if result["status"] != "success":
+            lines = result["output"].strip().splitlines()
+            return name, None, lines[-1] if lines else "error"
+        try:
+            return name, _app_status(name, json.loads(result["output"])), ""
+        except (ValueError, AttributeError) as e:
+            return name, None, f"unparseable output: {e}"
+
+    apps: list[dict] = []
+    failures: dict[str, str] = {}
+    for done, next_result in enumerate(asyncio.as_completed([fetch(n) for n in names]), start=1):
+        name, app, error = await next_result
+        if app is None:
+            failures[name] = error
+        else:
+            apps.append(app)
+            if ctx and _needs_attention(app):
+                await ctx.info(f"{name}: health={app['health']} sync={app['sync']} {app['message']}")
+        if ctx:
+            await ctx.report_progress(done, len(names))
 
     return CommandResult(
-        status=status,
-        output=output,
-        exit_code=exit_code,
-    )
\ No newline at end of file
+        status="success" if not failures else "error",
+        output=_format_overview(apps, failures, detail_limit),
+        exit_code=0 if not failures else 1,
+        execution_time=time.time() - start_ts,
+    )
@@ -3,14 +3,20 @@
 import logging
 import shlex
 import asyncio
+import time
 from asyncio.subprocess import PIPE
 
 from pydantic import Field
 from mcp.server.fastmcp import Context
 
+from kube_ai_proxy.audit import audit_command
 from kube_ai_proxy.cli_executor import execute_command, get_command_help
-from kube_ai_proxy.tools import CommandResult, CommandHelpResult
-from kube_ai_proxy.config import DEFAULT_TIMEOUT
+from kube_ai_proxy.tools import CommandResult, CommandHelpResult, is_pipe_command
+from kube_ai_proxy.config import DEFAULT_TIMEOUT, RENDER_CACHE_ENABLED
+from kube_ai_proxy.helm_index import HELM_INDEX, format_search_results
+from kube_ai_proxy.prefetch import PREFETCHER, session_key
+from kube_ai_proxy.render_cache import execute_render, parse_render_command
+from kube_ai_proxy.security.security import validate_command
 
 
 logger = logging.getLogger(__name__)
@@ -70,6 +76,71 @@ async def execute_helm(
         await ctx.info(f"Executing{' piped' if is_pipe else ''} Helm command")
 
     exec_timeout = timeout if timeout is not None else DEFAULT_TIMEOUT
+
+    # Render-only commands (template, install --dry-run) are memoized by content hash
+    if RENDER_CACHE_ENABLED and not is_pipe_command(cmd_str):
+        argv = shlex.split(cmd_str)
+        spec = parse_render_command(argv)
+        if spec is not None:
+            return await execute_render(argv, spec, exec_timeout)
+
+    # Follow-ups prefetched after this session's previous result are served once
+    argv = None if is_pipe_command(cmd_str) else shlex.split(cmd_str)
+    if argv is not None:
+        validate_command(cmd_str)
+        prefetched = await PREFETCHER.lookup(argv)
+        if prefetched is not None:
+            await audit_command("helm", cmd_str, prefetched)
+            return prefetched
+
     # Delegate to shared executor
     result = await execute_command(cmd_str, exec_timeout)
+    if argv is not None:
+        PREFETCHER.observe(argv, result, session_key(ctx))
     return result
+
+
+async def search_helm_charts(
+    query: str = Field(
+        default="",
+        description="Substring matched against 'repo/chart' names and descriptions",
+    ),
+    version: str | None = Field(
+        default=None,
+        description="Semver constraint, e.g. '>=1.2.0 <2.0.0', '^15', '~1.4.x'",
+    ),
+    repo: str | None = Field(default=None, description="Restrict to one Helm repository"),
+    keyword: str | None = Field(default=None, description="Exact chart keyword to match"),
+    all_versions: bool = Field(
+        default=False,
+        description="List every matching version instead of only the newest",
+    ),
+    limit: int = Field(default=50, description="Maximum number of rows to return"),
+    ctx: Context | None = None,
+) -> CommandResult:
+    """
+    Search charts in locally added Helm repositories without invoking `helm search repo`.
+    Uses an on-disk index rebuilt only for repositories whose index.yaml changed.
+    """
+    if ctx:
+        await ctx.info(f"Searching Helm chart index for '{query or keyword or '*'}'")
+    start_ts = time.time()
+    try:
+        results = await asyncio.to_thread(
+            HELM_INDEX.search,
+            query=query,
+            version=version,
+            repo=repo,
+            keyword=keyword,
+            all_versions=all_versions,
+            limit=limit,
+        )
+    except ValueError as e:
+        return CommandResult(status="error", output=str(e), exit_code=1)
+
+    return CommandResult(
+        status="success",
+        output=format_search_results(results),
+        exit_code=0,
+        execution_time=time.time() - start_ts,
+    )
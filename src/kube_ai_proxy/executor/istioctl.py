@@ -2,20 +2,28 @@
 
 """
 Executor module for Istioctl commands.
-Defines describe_istioctl and execute_istioctl, to be registered centrally in mcp/__init__.py.
+Defines describe_istioctl, execute_istioctl, query_proxy_config and analyze_istio_mesh,
+to be registered centrally in mcp/__init__.py.
 """
 
+import json
 import shlex
 import asyncio
-from asyncio.subprocess import PIPE
+import time
+from mcp.server.fastmcp import Context
 
+from kube_ai_proxy.audit import audit_command
+from kube_ai_proxy.cli_executor import communicate, help_text, spawn
 from kube_ai_proxy.config import (
     SUPPORTED_CLI_TOOLS,
     DEFAULT_TIMEOUT,
     K8S_CONTEXT,
     K8S_NAMESPACE,
 )
+from kube_ai_proxy.istio_analyze import ANALYZER, format_report, merge_messages
+from kube_ai_proxy.istio_snapshot import SNAPSHOTS, ProxySnapshot, parse_dump, query_snapshot, split_pod_ref
 from kube_ai_proxy.security.rbac_checker import RBACChecker
+from kube_ai_proxy.throttle import THROTTLE
 from kube_ai_proxy.tools import CommandResult, CommandHelpResult
 
 
@@ -31,9 +39,7 @@ async def describe_istioctl(command: str | None = None) -> CommandHelpResult:
         cmd.extend(shlex.split(command))
     cmd.append(help_flag)
 
-    proc = await asyncio.create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-    out, err = await proc.communicate()
-    text = out.decode(errors="replace") or err.decode(errors="replace")
+    text = await help_text(cmd)
 
     return CommandHelpResult(help_text=text)
 
@@ -44,39 +50,152 @@ async def execute_istioctl(command: str, timeout: int | None = None) -> CommandR
     """
     # 1) RBAC check
     parts = shlex.split(command)
+    rbac = "n/a"
     if len(parts) > 1:
         verb = parts[1]
         resource = parts[2] if len(parts) > 2 else ""
         checker = RBACChecker(context=K8S_CONTEXT, namespace=K8S_NAMESPACE)
         allowed = await checker.can_i_istio(verb, resource)
         if not allowed:
-            return CommandResult(
+            result = CommandResult(
                 status="error",
                 output=f"RBAC: permission denied for {verb} {resource}",
                 exit_code=1,
             )
+            await audit_command("istioctl", command, result, rbac="denied")
+            return result
+        rbac = "allowed"
 
     # 2) Execute the actual command
     exec_timeout = timeout or DEFAULT_TIMEOUT
-    proc = await asyncio.create_subprocess_exec(
-        *shlex.split(command), stdout=PIPE, stderr=PIPE
-    )
-    try:
-        out, err = await asyncio.wait_for(proc.communicate(), exec_timeout)
+    start_ts = time.time()
+
+    async def run() -> CommandResult:
+        proc = await spawn(parts)
+        try:
+            out, err = await communicate(proc, exec_timeout)
+        except asyncio.TimeoutError:
+            return CommandResult(
+                status="error",
+                output=f"Command timed out after {exec_timeout}s",
+                exit_code=-1,
+            )
         exit_code = proc.returncode if proc.returncode is not None else -1
-        output    = out.decode("utf-8", errors="replace") or err.decode("utf-8", errors="replace")
-        status    = "success" if exit_code == 0 else "error"
+        return CommandResult(
+            status="success" if exit_code == 0 else "error",
+            output=out.decode("utf-8", errors="replace") or err.decode("utf-8", errors="replace"),
+            exit_code=exit_code,
+        )
+
+    result = await THROTTLE.run(parts, run)
+    await audit_command("istioctl", command, result, rbac=rbac, duration=time.time() - start_ts)
+
+    # 3) Keep an indexed snapshot of full JSON config dumps for query_proxy_config
+    if result["exit_code"] == 0:
+        snap = await asyncio.to_thread(_parse_proxy_config, parts, result["output"])
+        if snap is not None:
+            SNAPSHOTS.put(snap)
+
+    return result
 
-    except asyncio.TimeoutError:
-        proc.kill()
+
+def _parse_proxy_config(parts: list[str], output: str) -> ProxySnapshot | None:
+    """Index the output of `istioctl proxy-config all <pod> -o json`, if that is what ran."""
+    if len(parts) < 4 or parts[1] not in ("proxy-config", "pc") or parts[2] != "all":
+        return None
+    if "json" not in parts and "-ojson" not in parts and "--output=json" not in parts:
+        return None
+    namespace = None
+    for flag in ("-n", "--namespace"):
+        if flag in parts[:-1]:
+            namespace = parts[parts.index(flag) + 1]
+    pod = next((p for p in parts[3:] if not p.startswith("-")), None)
+    if pod:
+        pod, namespace = split_pod_ref(pod, namespace)
+        return parse_dump(pod, namespace, output)
+    return None
+
+
+async def query_proxy_config(
+    pod: str,
+    kind: str,
+    namespace: str | None = None,
+    name: str | None = None,
+    fqdn: str | None = None,
+    domain: str | None = None,
+    port: int | None = None,
+    health: str | None = None,
+    refresh: bool = False,
+    limit: int = 20,
+    timeout: int | None = None,
+) -> CommandResult:
+    """
+    Query one pod's Envoy config without re-fetching the full dump.
+    kind: cluster (by name or fqdn), route (by domain or name), listener (by port or name),
+    endpoint (by cluster name/fqdn and/or health). Omit filters to list what is indexed.
+    """
+    checker = RBACChecker(context=K8S_CONTEXT, namespace=K8S_NAMESPACE)
+    if not await checker.can_i_istio("proxy-config", pod):
         return CommandResult(
             status="error",
-            output=f"Command timed out after {exec_timeout}s",
-            exit_code=-1,
+            output=f"RBAC: permission denied for proxy-config {pod}",
+            exit_code=1,
+        )
+
+    try:
+        found, error = await query_snapshot(
+            pod, namespace, kind, float(timeout or DEFAULT_TIMEOUT), refresh=refresh,
+            name=name, fqdn=fqdn, domain=domain, port=port, health=health, limit=limit,
         )
+    except ValueError as e:
+        return CommandResult(status="error", output=str(e), exit_code=1)
+    if found is None:
+        return CommandResult(status="error", output=error, exit_code=1)
+
+    return CommandResult(
+        status="success",
+        output=json.dumps(found, indent=2) if found else f"No {kind} entries matched",
+        exit_code=0,
+    )
+
 
+async def analyze_istio_mesh(
+    namespaces: list[str] | None = None,
+    output: str = "text",
+    force: bool = False,
+    timeout: int | None = None,
+    ctx: Context | None = None,
+) -> CommandResult:
+    """
+    Run `istioctl analyze` incrementally: only namespaces whose Istio resources changed
+    since the last run are re-analyzed (concurrently); cached findings fill in the rest.
+    output: "text" (istioctl style) or "json" (merged message list).
+    """
+    checker = RBACChecker(context=K8S_CONTEXT, namespace=K8S_NAMESPACE)
+    if not await checker.can_i_istio("analyze", ""):
+        return CommandResult(status="error", output="RBAC: permission denied for analyze", exit_code=1)
+
+    start_ts = time.time()
+
+    async def progress(ns, findings):
+        if ctx:
+            await ctx.info(f"Analyzed {ns}: {len(findings.messages)} messages")
+
+    findings, reanalyzed, error = await ANALYZER.analyze(
+        namespaces, float(timeout or DEFAULT_TIMEOUT), force=force, progress=progress
+    )
+    if error:
+        return CommandResult(status="error", output=error, exit_code=1)
+
+    text = (
+        json.dumps(merge_messages(findings), indent=2)
+        if output == "json"
+        else format_report(findings, reanalyzed)
+    )
+    has_errors = any(f.error for f in findings.values())
     return CommandResult(
-        status=status,
-        output=output,
-        exit_code=exit_code,
+        status="error" if has_errors else "success",
+        output=text,
+        exit_code=1 if has_errors else 0,
+        execution_time=time.time() - start_ts,
     )
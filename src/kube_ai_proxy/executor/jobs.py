@@ -0,0 +1,52 @@
+# src/kube_ai_proxy/executor/jobs.py
+
+"""
+Executor module for background jobs.
+Defines submit_job, get_job, wait_job, cancel_job and list_jobs, registered as MCP
+tools, for commands that may outlive a client's tool-call timeout.
+"""
+
+from kube_ai_proxy.jobs import DEFAULT_READ_LIMIT, JOBS
+from kube_ai_proxy.tools import JobStatus
+
+
+async def submit_job(command: str, timeout: int | None = None) -> JobStatus:
+    """
+    Start a kubectl/helm/istioctl/argocd command (pipes allowed) in the background
+    and return its job id immediately. Poll with get_job or wait_job.
+    """
+    job = await JOBS.submit(command, timeout)
+    return job.snapshot()
+
+
+async def get_job(job_id: str, offset: int = 0, max_bytes: int = DEFAULT_READ_LIMIT) -> JobStatus:
+    """
+    Return a job's state and its output from `offset`. Pass the returned offset on
+    the next call to receive only new output.
+    """
+    return JOBS.get(job_id).snapshot(offset, max_bytes)
+
+
+async def wait_job(
+    job_id: str,
+    timeout: int = 30,
+    offset: int = 0,
+    max_bytes: int = DEFAULT_READ_LIMIT,
+) -> JobStatus:
+    """
+    Wait up to `timeout` seconds for a job to finish, then return its state and
+    output from `offset` (the job keeps running if the deadline passes).
+    """
+    job = await JOBS.wait(job_id, timeout)
+    return job.snapshot(offset, max_bytes)
+
+
+async def cancel_job(job_id: str) -> JobStatus:
+    """Terminate a running job (its whole process group) and return its final state."""
+    job = await JOBS.cancel(job_id)
+    return job.snapshot(job.output.size)
+
+
+async def list_jobs() -> list[JobStatus]:
+    """List known jobs (running, and finished ones still within retention) without output."""
+    return [job.snapshot(job.output.size) for job in JOBS.jobs()]
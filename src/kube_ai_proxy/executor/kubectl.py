@@ -2,21 +2,41 @@
 
 """
 Executor module for Kubernetes 'kubectl' commands.
-Defines functions for describe_kubectl and execute_kubectl, then wires them
-into your MCP server at import-time *after* mcp is fully initialized.
+Defines functions for describe_kubectl, execute_kubectl, collect_pod_logs,
+troubleshoot_bundle, cluster_inventory, wait_for_rollouts and query_top_metrics, then
+wires them into your MCP server at import-time *after* mcp is fully initialized.
 """
 
 import shlex
 import asyncio
-from asyncio.subprocess import PIPE
+import time
+from mcp.server.fastmcp import Context
 
+from kube_ai_proxy.audit import audit_command
+from kube_ai_proxy.cli_executor import communicate, help_text, spawn
 from kube_ai_proxy.config import (
     K8S_CONTEXT,
     K8S_NAMESPACE,
     SUPPORTED_CLI_TOOLS,
     DEFAULT_TIMEOUT,
+    MAX_OUTPUT_SIZE,
+    POD_LOGS_CONCURRENCY,
+    POD_LOGS_MAX_BYTES_PER_POD,
+    TROUBLESHOOT_ITEM_TIMEOUT,
 )
+from kube_ai_proxy.discovery import ensure_background_refresh, normalize_resource
+from kube_ai_proxy.inventory import collect_inventory
+from kube_ai_proxy.log_mining import summarize_logs
+from kube_ai_proxy.loopwatch import decode
+from kube_ai_proxy.noise import denoise_result
+from kube_ai_proxy.ordered_apply import ordered_apply
+from kube_ai_proxy.pod_logs import collect_logs
+from kube_ai_proxy.prefetch import PREFETCHER, session_key
+from kube_ai_proxy.rollout import access_scopes, wait_for_rollouts as wait_rollouts
 from kube_ai_proxy.security.rbac_checker import RBACChecker
+from kube_ai_proxy.throttle import THROTTLE
+from kube_ai_proxy.topseries import TOP_SAMPLER, ensure_top_sampler
+from kube_ai_proxy.troubleshoot import collect_bundle
 from kube_ai_proxy.tools import CommandResult, CommandHelpResult
 
 
@@ -34,9 +54,7 @@ async def describe_kubectl(
         cmd.extend(shlex.split(command))
     cmd.append(help_flag)
 
-    proc = await asyncio.create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-    out, err = await proc.communicate()
-    text = out.decode(errors="replace") or err.decode(errors="replace")
+    text = await help_text(cmd)
 
     return CommandHelpResult(help_text=text, status="success")
 
@@ -44,49 +62,363 @@ async def describe_kubectl(
 async def execute_kubectl(
     command: str,
     timeout: int | None = None,
+    summarize: bool = False,
+    raw: bool = False,
+    ordered: bool = False,
+    ctx: Context | None = None,
 ) -> CommandResult:
     """
     Execute a kubectl command, enforcing RBAC policies before execution.
+    With summarize=True, `kubectl logs` output is returned as log templates with
+    counts and time ranges (error lines kept verbatim) instead of raw text.
+    `-o yaml` / `-o json` output comes back without managedFields, the
+    last-applied annotation and similar noise unless raw=True.
+    With ordered=True, `kubectl apply -f <files/dirs>` is applied in dependency
+    waves (CRDs, namespaces, RBAC/config, workloads, custom resources) of
+    concurrent server-side applies with per-object results, stopping at the
+    first failure; add `--dry-run` to only print the wave plan.
+    A read already prefetched for this session's likely next step is served from
+    the prefetch cache.
     """
-    # RBAC check: parse verb and resource
+    ensure_background_refresh()
+    ensure_top_sampler()
+
+    # RBAC check: parse verb and resource (short names and kind/name resolved via discovery)
     parts = shlex.split(command)
+    rbac = "n/a"
     if len(parts) > 1:
         verb = parts[1]
-        resource = parts[2] if len(parts) > 2 else ""
+        resource = normalize_resource(parts[2]) if len(parts) > 2 else ""
         checker = RBACChecker(context=K8S_CONTEXT, namespace=K8S_NAMESPACE)
         allowed = await checker.can_i(verb, resource)
         if not allowed:
-            return CommandResult(
+            result = CommandResult(
                 status="error",
                 output=f"RBAC: permission denied for {verb} {resource}",
                 exit_code=1,
             )
+            await audit_command("kubectl", command, result, rbac="denied")
+            return result
+        rbac = "allowed"
 
     # Execute the command
     exec_timeout = timeout or DEFAULT_TIMEOUT
-    proc = await asyncio.create_subprocess_exec(
-        *shlex.split(command), stdout=PIPE, stderr=PIPE
-    )
-    try:
-        out, err = await asyncio.wait_for(proc.communicate(), exec_timeout)
+    start_ts = time.time()
+    if summarize and len(parts) > 1 and parts[1] == "logs":
+        result = await summarize_logs(parts, exec_timeout, MAX_OUTPUT_SIZE)
+        await audit_command("kubectl", command, result, rbac=rbac)
+        return result
+
+    if ordered and len(parts) > 1 and parts[1] == "apply":
+        async def progress(done: int, total: int) -> None:
+            if ctx:
+                await ctx.report_progress(done, total)
+
+        try:
+            output, ok = await ordered_apply(parts, exec_timeout, progress=progress)
+        except ValueError as e:
+            output, ok = f"Ordered apply: {e}", False
+        result = CommandResult(
+            status="success" if ok else "error",
+            output=output,
+            exit_code=0 if ok else 1,
+            execution_time=time.time() - start_ts,
+        )
+        await audit_command("kubectl", command, result, rbac=rbac)
+        return result
+
+    prefetched = await PREFETCHER.lookup(parts)
+    if prefetched is not None:
+        if not raw:
+            prefetched = await denoise_result(parts, prefetched)
+        await audit_command("kubectl", command, prefetched, rbac=rbac)
+        return prefetched
+
+    async def run() -> CommandResult:
+        proc = await spawn(parts)
+        try:
+            out, err = await communicate(proc, exec_timeout)
+        except asyncio.TimeoutError:
+            # Treat timeout as error with a distinct non-zero code
+            return CommandResult(
+                status="error",
+                output=f"Command timed out after {exec_timeout}s",
+                exit_code=-1,
+            )
         exit_code = proc.returncode if proc.returncode is not None else -1
-        output = out.decode("utf-8", errors="replace") or err.decode("utf-8", errors="replace")
-        status = "success" if exit_code == 0 else "error"
+        return CommandResult(
+            status="success" if exit_code == 0 else "error",
+            output=await decode(out) if out else await decode(err),
+            exit_code=exit_code,
+        )
+
+    # Runs inside the context's adaptive concurrency window; throttled reads are retried
+    result = await THROTTLE.run(parts, run)
+    if not raw:
+        result = await denoise_result(parts, result)
+    await audit_command("kubectl", command, result, rbac=rbac, duration=time.time() - start_ts)
+    PREFETCHER.observe(parts, result, session_key(ctx))
+    return result
+
+
+async def collect_pod_logs(
+    target: str | None = None,
+    selector: str | None = None,
+    namespace: str | None = None,
+    container: str | None = None,
+    since: str | None = None,
+    tail: int | None = None,
+    previous: bool = False,
+    timestamps: bool = True,
+    concurrency: int = POD_LOGS_CONCURRENCY,
+    max_bytes_per_pod: int = POD_LOGS_MAX_BYTES_PER_POD,
+    timeout: int | None = None,
+    ctx: Context | None = None,
+) -> CommandResult:
+    """
+    Fetch logs of every pod behind a workload (`deployment/web`, `statefulset/db`, a
+    pod name) or label selector concurrently and merge them into one timestamp-ordered
+    output, each line prefixed with `[pod/container]`. `since` and `tail` are passed
+    to `kubectl logs`; each pod keeps at most `max_bytes_per_pod` of its newest lines.
+    """
+    start_ts = time.time()
+    exec_timeout = float(timeout or DEFAULT_TIMEOUT)
+    namespace = namespace or K8S_NAMESPACE
+
+    checker = RBACChecker(context=K8S_CONTEXT, namespace=namespace)
+    if not await checker.can_i("get", "pods/log"):
+        return CommandResult(
+            status="error",
+            output="RBAC: permission denied for get pods/log",
+            exit_code=1,
+        )
+
+    async def progress(done: int, total: int) -> None:
+        if ctx:
+            await ctx.report_progress(done, total)
+
+    output, ok = await collect_logs(
+        target,
+        selector,
+        namespace,
+        exec_timeout,
+        container=container,
+        since=since,
+        tail=tail,
+        previous=previous,
+        timestamps=timestamps,
+        concurrency=concurrency,
+        max_bytes_per_pod=max_bytes_per_pod,
+        max_chars=MAX_OUTPUT_SIZE,
+        progress=progress,
+    )
+    return CommandResult(
+        status="success" if ok else "error",
+        output=output,
+        exit_code=0 if ok else 1,
+        execution_time=time.time() - start_ts,
+    )
+
+
+async def troubleshoot_bundle(
+    kind: str,
+    name: str,
+    namespace: str | None = None,
+    include_logs: bool = True,
+    timeout: int | None = None,
+    ctx: Context | None = None,
+) -> CommandResult:
+    """
+    Collect everything needed to troubleshoot one resource in a single call: its
+    owner chain, related pods and services, failing conditions, warning events,
+    logs of crashed or unready containers, endpoint readiness and `kubectl describe`.
+    All queries run concurrently, each within `timeout` seconds; the result is
+    deduplicated and ordered with the most relevant signals first.
+    """
+    start_ts = time.time()
+    exec_timeout = float(timeout or TROUBLESHOOT_ITEM_TIMEOUT)
+    namespace = namespace or K8S_NAMESPACE
+
+    checker = RBACChecker(context=K8S_CONTEXT, namespace=namespace)
+    resource = normalize_resource(kind)
+    if not await checker.can_i("get", resource):
+        return CommandResult(
+            status="error",
+            output=f"RBAC: permission denied for get {resource}",
+            exit_code=1,
+        )
+    if include_logs and not await checker.can_i("get", "pods/log"):
+        include_logs = False
+
+    if ctx:
+        await ctx.info(f"Collecting troubleshooting bundle for {kind}/{name} in {namespace}")
+    output, ok = await collect_bundle(
+        kind,
+        name,
+        namespace,
+        timeout=exec_timeout,
+        include_logs=include_logs,
+        max_chars=MAX_OUTPUT_SIZE,
+    )
+    return CommandResult(
+        status="success" if ok else "error",
+        output=output,
+        exit_code=0 if ok else 1,
+        execution_time=time.time() - start_ts,
+    )
+
+
+async def cluster_inventory(
+    namespace: str | None = None,
+    types: str | None = None,
+    include_events: bool = False,
+    timeout: int | None = None,
+    ctx: Context | None = None,
+) -> CommandResult:
+    """
+    Count every object of every listable resource type (or only the comma-separated
+    `types`), cluster-wide or in one namespace, without returning the objects: per
+    type the count, namespaces, unlabeled objects and workloads whose containers
+    lack resource requests or a memory limit, plus the largest namespaces.
+    Lists are fetched concurrently in `--chunk-size` pages and parsed as they stream.
+    """
+    start_ts = time.time()
+    exec_timeout = float(timeout or DEFAULT_TIMEOUT)
+    only = {t.strip().lower() for t in types.split(",") if t.strip()} if types else None
+
+    async def progress(done: int, total: int) -> None:
+        if ctx:
+            await ctx.report_progress(done, total)
 
-    except asyncio.TimeoutError:
-        proc.kill()
-        # Treat timeout as error with a distinct non-zero code
+    output, ok = await collect_inventory(
+        namespace,
+        exec_timeout,
+        types=only,
+        include_events=include_events,
+        progress=progress,
+    )
+    return CommandResult(
+        status="success" if ok else "error",
+        output=output,
+        exit_code=0 if ok else 1,
+        execution_time=time.time() - start_ts,
+    )
+
+
+async def wait_for_rollouts(
+    workloads: list[str] | None = None,
+    selector: str | None = None,
+    namespace: str | None = None,
+    timeout: int = 600,
+    fail_fast: bool = True,
+    ctx: Context | None = None,
+) -> CommandResult:
+    """
+    Wait for the rollouts of several workloads at once: `workloads` as
+    "deployment/web", "sts/db" or "shop/ds/agent" (namespace/kind/name), and/or
+    every Deployment, StatefulSet and DaemonSet matching a label `selector`.
+    One watch per namespace and kind follows them all, judging completion with
+    `kubectl rollout status` rules and reporting each workload's progress.
+    Returns when all are rolled out, one fails (unless fail_fast=False) or
+    `timeout` seconds pass.
+    """
+    start_ts = time.time()
+    if not workloads and not selector:
         return CommandResult(
             status="error",
-            output=f"Command timed out after {exec_timeout}s",
-            exit_code=-1,
+            output="Give workloads (kind/name) or a label selector",
+            exit_code=1,
+            execution_time=0.0,
         )
+    # Named workloads are read in their own namespaces; a selector without a
+    # namespace (or too many namespaces to watch one by one) reads cluster-wide
+    try:
+        scopes = access_scopes(workloads or [], selector, namespace)
+    except ValueError as e:
+        return CommandResult(status="error", output=f"Error: {e}", exit_code=1, execution_time=0.0)
+    checks = [
+        (verb, resource, ns)
+        for ns, resources in scopes.items()
+        for resource in sorted(resources)
+        for verb in (("list", "watch") if ns is None else ("get", "list", "watch"))
+    ]
+    verdicts = await asyncio.gather(*(
+        RBACChecker(context=K8S_CONTEXT, namespace=ns, all_namespaces=ns is None).can_i(verb, resource)
+        for verb, resource, ns in checks
+    ))
+    for (verb, resource, ns), allowed in zip(checks, verdicts):
+        if not allowed:
+            where = f"in namespace {ns}" if ns else "across all namespaces"
+            return CommandResult(
+                status="error",
+                output=f"RBAC: permission denied for {verb} {resource} {where}",
+                exit_code=1,
+                execution_time=time.time() - start_ts,
+            )
+
+    async def progress(workload, done: int, total: int) -> None:
+        if ctx:
+            await ctx.info(f"{workload.ref}: {workload.message}")
+            await ctx.report_progress(done, total)
+
+    output, ok = await wait_rollouts(
+        workloads or [],
+        selector,
+        namespace,
+        float(timeout),
+        fail_fast=fail_fast,
+        on_change=progress,
+    )
+    return CommandResult(
+        status="success" if ok else "error",
+        output=output,
+        exit_code=0 if ok else 1,
+        execution_time=time.time() - start_ts,
+    )
 
 
+async def query_top_metrics(
+    kind: str = "pods",
+    metric: str = "memory",
+    window: str = "1h",
+    namespace: str | None = None,
+    name: str | None = None,
+    sort: str = "trend",
+    top: int = 10,
+    context: str | None = None,
+) -> CommandResult:
+    """
+    Query the rolling `kubectl top` history kept by the background sampler
+    (K8S_MCP_TOP_SAMPLER). For `kind` "pods" or "nodes" and `metric` "cpu"
+    (millicores) or "memory" (MiB) over `window` (e.g. "30m", "6h", "2d"), returns
+    the `top` series ranked by `sort`: "trend" (per-hour slope) or "change" for
+    the biggest movers either way, or "p95", "max", "latest". Filter by
+    `namespace` and by `name` (substring, or glob with * ? []). A single matching
+    series also lists its points.
+    """
+    start_ts = time.time()
+    if not TOP_SAMPLER.enabled:
+        return CommandResult(
+            status="error",
+            output="kubectl top sampling is off; set K8S_MCP_TOP_SAMPLER=true to collect history",
+            exit_code=1,
+            execution_time=0.0,
+        )
+    ensure_top_sampler()
+    try:
+        output = TOP_SAMPLER.query(kind, metric, window, namespace, name, top, sort, context)
+    except ValueError as e:
+        return CommandResult(
+            status="error",
+            output=f"Top metrics: {e}",
+            exit_code=1,
+            execution_time=time.time() - start_ts,
+        )
     return CommandResult(
-        status=status,
+        status="success",
         output=output,
-        exit_code=exit_code,
+        exit_code=0,
+        execution_time=time.time() - start_ts,
     )
 
 
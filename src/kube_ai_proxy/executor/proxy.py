@@ -0,0 +1,56 @@
+# src/kube_ai_proxy/executor/proxy.py
+
+"""
+Executor module for introspecting the proxy itself.
+Defines proxy_metrics and profile_proxy, registered as MCP tools.
+"""
+
+from typing import Optional
+
+from mcp.server.fastmcp import Context
+
+from kube_ai_proxy.metrics import METRICS
+from kube_ai_proxy.profiler import PROFILER
+from kube_ai_proxy.tools import CommandResult
+
+MAX_PROFILE_SECONDS = 300
+
+
+async def proxy_metrics() -> CommandResult:
+    """
+    Return the proxy's internal counters and gauges (audit records written and
+    dropped, queue depth, ...) in Prometheus text format.
+    """
+    return CommandResult(status="success", output=METRICS.render() or "(no metrics recorded yet)", exit_code=0)
+
+
+async def profile_proxy(
+    duration: float = 10,
+    interval_ms: Optional[float] = None,
+    top: int = 20,
+    ctx: Optional[Context] = None,
+) -> CommandResult:
+    """
+    Sample the stacks of all proxy threads and asyncio tasks for `duration` seconds
+    (at most 300) and return the top-N hottest functions, await points and samples
+    per tool call. The full collapsed-stack profile (flamegraph input) is written
+    next to the summary; both paths are listed in the output.
+    """
+    duration = min(max(duration, 0.1), MAX_PROFILE_SECONDS)
+    interval = interval_ms / 1000 if interval_ms else None
+    if not PROFILER.start(duration, interval, top):
+        return CommandResult(
+            status="error",
+            output="A profile is already running (started by another call, SIGUSR2 or K8S_MCP_PROFILE)",
+            exit_code=1,
+        )
+    if ctx:
+        await ctx.info(f"Profiling for {duration:.0f}s")
+    await PROFILER.wait()
+    profile, (collapsed, summary) = PROFILER.last, PROFILER.last_paths
+    if profile is None:
+        return CommandResult(status="error", output="Profiling failed; see the proxy log", exit_code=1)
+    output = profile.summary(top)
+    if collapsed is not None:
+        output += f"\n\nCollapsed stacks: {collapsed}\nSummary: {summary}"
+    return CommandResult(status="success", output=output, exit_code=0)
@@ -0,0 +1,375 @@
+# src/kube_ai_proxy/helm_index.py
+
+"""
+Indexed Helm chart search for Kube AI Proxy.
+
+`helm search repo` re-parses every `<repo>-index.yaml` in the Helm repository cache
+on each call. HelmChartIndex compiles those files once into a SQLite index and only
+re-reads a repository when its index file changes:
+  - HelmChartIndex.sync: incremental rebuild from the repository cache
+  - HelmChartIndex.search: name/description, keyword and semver-constrained lookups
+  - parse_version / VersionConstraint: the subset of Helm (Masterminds) semver we need
+"""
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+from kube_ai_proxy.config import HELM_INDEX_PATH, HELM_REPOSITORY_CACHE
+
+logger = logging.getLogger("kube_ai_proxy.helm_index")
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+INDEX_SUFFIX = "-index.yaml"
+
+
+# ─── 1) Semantic versions ──────────────────────────────────────────────────────
+
+_VERSION_RE = re.compile(
+    r"^v?(\d+)(?:\.(\d+))?(?:\.(\d+))?(?:-([0-9A-Za-z.-]+))?(?:\+[0-9A-Za-z.-]+)?$"
+)
+
+
+@dataclass(frozen=True, order=True)
+class Version:
+    """Comparable semantic version; a release sorts after its prereleases."""
+    major: int
+    minor: int
+    patch: int
+    release: bool
+    prerelease: tuple = ()
+
+    @property
+    def is_prerelease(self) -> bool:
+        return not self.release
+
+
+def parse_version(text: str) -> Optional[Version]:
+    """Parse `1.2.3`, `v1.2`, `1.2.3-rc.1+build`; returns None for non-semver strings."""
+    m = _VERSION_RE.match(text.strip()) if text else None
+    if not m:
+        return None
+    major, minor, patch, pre = m.groups()
+    # Numeric identifiers sort before alphanumeric ones, per SemVer precedence
+    pre_key = tuple(
+        (0, int(p), "") if p.isdigit() else (1, 0, p)
+        for p in pre.split(".")
+    ) if pre else ()
+    return Version(int(major), int(minor or 0), int(patch or 0), pre is None, pre_key)
+
+
+_OP_SPACE_RE = re.compile(r"(!=|>=|<=|~>|=|>|<|~|\^)\s+")
+_CLAUSE_RE = re.compile(r"^(=|!=|>=|<=|>|<|~>|~|\^)?\s*v?([0-9xX*]+(?:\.[0-9xX*]+){0,2}(?:-[0-9A-Za-z.-]+)?)$")
+
+
+class VersionConstraint:
+    """
+    Helm-style version constraint, e.g. `>=1.2.0 <2.0.0`, `^1.4`, `~2.1.x`, `1.x || >=3`.
+    Comma or whitespace separates AND clauses, `||` separates OR groups.
+    As in Helm, prereleases only match when a clause names a prerelease.
+    """
+
+    def __init__(self, text: str):
+        self.text = text.strip()
+        self._groups: list[list[tuple[str, Version]]] = []
+        self._allow_prerelease = "-" in self.text
+        for group in self.text.split("||"):
+            clauses = []
+            group = _OP_SPACE_RE.sub(r"\1", group.strip())
+            for raw in re.split(r"[,\s]+", group):
+                if not raw or raw == "*":
+                    continue
+                clauses.extend(self._parse_clause(raw))
+            self._groups.append(clauses)
+
+    def _parse_clause(self, raw: str) -> list[tuple[str, Version]]:
+        m = _CLAUSE_RE.match(raw)
+        if not m:
+            raise ValueError(f"Invalid version constraint: '{raw}'")
+        op, ver = m.group(1) or "=", m.group(2)
+        core, _, pre = ver.partition("-")
+        fields = core.split(".")
+        wild = next((i for i, f in enumerate(fields) if f in ("x", "X", "*")), None)
+        nums = [int(f) for f in fields[: wild if wild is not None else len(fields)]]
+        given = len(nums)
+        nums += [0] * (3 - len(nums))
+        low = parse_version(".".join(map(str, nums)) + (f"-{pre}" if pre else ""))
+
+        def bump(idx: int) -> Version:
+            parts = nums[:idx] + [nums[idx] + 1] + [0] * (2 - idx)
+            return Version(parts[0], parts[1], parts[2], False, ((0, 0, ""),))
+
+        if op in ("=",) and given < 3:
+            # `1.2` / `1.2.x` means any patch of 1.2
+            return [(">=", low), ("<", bump(given - 1))] if given else []
+        if op in ("~", "~>"):
+            return [(">=", low), ("<", bump(min(1, max(given - 1, 0))))]
+        if op == "^":
+            first_nonzero = next((i for i, n in enumerate(nums[:given]) if n), max(given - 1, 0))
+            return [(">=", low), ("<", bump(first_nonzero))]
+        return [(op, low)]
+
+    def matches(self, version: Version) -> bool:
+        if version.is_prerelease and not self._allow_prerelease:
+            return False
+        return any(all(_compare(op, version, ref) for op, ref in group) for group in self._groups)
+
+
+def _compare(op: str, v: Version, ref: Version) -> bool:
+    return {
+        "=": v == ref, "!=": v != ref,
+        ">": v > ref, ">=": v >= ref,
+        "<": v < ref, "<=": v <= ref,
+    }[op]
+
+
+# ─── 2) Chart index ────────────────────────────────────────────────────────────
+
+@dataclass
+class ChartVersion:
+    """One chart version as listed in a repository index."""
+    repo: str
+    name: str
+    version: str
+    app_version: str
+    description: str
+    deprecated: bool = False
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.repo}/{self.name}"
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS repos (
+    name       TEXT PRIMARY KEY,
+    path       TEXT NOT NULL,
+    mtime_ns   INTEGER NOT NULL,
+    size       INTEGER NOT NULL,
+    indexed_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS charts (
+    repo        TEXT NOT NULL,
+    name        TEXT NOT NULL,
+    version     TEXT NOT NULL,
+    app_version TEXT,
+    description TEXT,
+    deprecated  INTEGER NOT NULL DEFAULT 0,
+    created     TEXT
+);
+CREATE TABLE IF NOT EXISTS keywords (
+    repo    TEXT NOT NULL,
+    name    TEXT NOT NULL,
+    keyword TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS charts_repo_name ON charts(repo, name);
+CREATE INDEX IF NOT EXISTS charts_name ON charts(name);
+CREATE INDEX IF NOT EXISTS keywords_keyword ON keywords(keyword);
+CREATE INDEX IF NOT EXISTS keywords_repo ON keywords(repo);
+"""
+
+
+class HelmChartIndex:
+    """
+    SQLite-backed index over the Helm repository cache.
+    All methods are blocking; call them via asyncio.to_thread from the event loop.
+    """
+
+    def __init__(self, cache_dir: Path | str | None = None, db_path: Path | str | None = None):
+        self.cache_dir = Path(cache_dir or HELM_REPOSITORY_CACHE)
+        self.db_path = Path(db_path or HELM_INDEX_PATH)
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if str(self.db_path) != ":memory:":
+                self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def _index_files(self) -> dict[str, Path]:
+        if not self.cache_dir.is_dir():
+            return {}
+        return {
+            p.name[: -len(INDEX_SUFFIX)]: p
+            for p in self.cache_dir.glob(f"*{INDEX_SUFFIX}")
+        }
+
+    def sync(self) -> list[str]:
+        """
+        Re-index repositories whose index file was added, changed or removed.
+        Returns the names of repositories that were (re)indexed or dropped.
+        """
+        with self._lock:
+            db = self._db()
+            known = {
+                name: (mtime_ns, size)
+                for name, mtime_ns, size in db.execute("SELECT name, mtime_ns, size FROM repos")
+            }
+            files = self._index_files()
+            touched: list[str] = []
+
+            for repo in set(known) - set(files):
+                with db:
+                    self._drop_repo(db, repo)
+                touched.append(repo)
+
+            for repo, path in files.items():
+                try:
+                    st = path.stat()
+                except OSError:
+                    continue
+                if known.get(repo) == (st.st_mtime_ns, st.st_size):
+                    continue
+                try:
+                    entries = self._load_index_file(path)
+                except (OSError, yaml.YAMLError) as e:
+                    logger.warning(f"Skipping unreadable Helm index {path}: {e}")
+                    continue
+                with db:
+                    self._drop_repo(db, repo)
+                    self._insert_repo(db, repo, entries)
+                    db.execute(
+                        "INSERT INTO repos (name, path, mtime_ns, size, indexed_at) VALUES (?, ?, ?, ?, ?)",
+                        (repo, str(path), st.st_mtime_ns, st.st_size, time.time()),
+                    )
+                touched.append(repo)
+
+            if touched:
+                logger.info(f"Helm chart index updated for: {', '.join(sorted(touched))}")
+            return touched
+
+    @staticmethod
+    def _load_index_file(path: Path) -> dict:
+        with path.open("rb") as fh:
+            data = yaml.load(fh, Loader=_Loader) or {}
+        return data.get("entries") or {}
+
+    @staticmethod
+    def _drop_repo(db: sqlite3.Connection, repo: str) -> None:
+        db.execute("DELETE FROM charts WHERE repo = ?", (repo,))
+        db.execute("DELETE FROM keywords WHERE repo = ?", (repo,))
+        db.execute("DELETE FROM repos WHERE name = ?", (repo,))
+
+    @staticmethod
+    def _insert_repo(db: sqlite3.Connection, repo: str, entries: dict) -> None:
+        chart_rows = []
+        keyword_rows = set()
+        for name, versions in entries.items():
+            for v in versions or []:
+                chart_rows.append((
+                    repo,
+                    name,
+                    str(v.get("version", "")),
+                    str(v.get("appVersion", "") or ""),
+                    (v.get("description") or "").strip(),
+                    int(bool(v.get("deprecated"))),
+                    str(v.get("created", "") or ""),
+                ))
+                for kw in v.get("keywords") or []:
+                    keyword_rows.add((repo, name, str(kw).lower()))
+        db.executemany(
+            "INSERT INTO charts (repo, name, version, app_version, description, deprecated, created)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?)",
+            chart_rows,
+        )
+        db.executemany("INSERT INTO keywords (repo, name, keyword) VALUES (?, ?, ?)", keyword_rows)
+
+    def search(
+        self,
+        query: str = "",
+        version: str | None = None,
+        repo: str | None = None,
+        keyword: str | None = None,
+        all_versions: bool = False,
+        include_deprecated: bool = False,
+        limit: int = 50,
+    ) -> list[ChartVersion]:
+        """
+        Search like `helm search repo`: `query` matches `repo/name` or the description
+        (case-insensitive). `version` is a semver constraint; without `all_versions`
+        only the newest matching version of each chart is returned.
+        """
+        self.sync()
+        constraint = VersionConstraint(version) if version else None
+
+        sql = ["SELECT repo, name, version, app_version, description, deprecated FROM charts c WHERE 1=1"]
+        params: list = []
+        if repo:
+            sql.append("AND repo = ?")
+            params.append(repo)
+        if query:
+            sql.append("AND (lower(repo || '/' || name) LIKE ? OR lower(description) LIKE ?)")
+            like = f"%{query.lower()}%"
+            params += [like, like]
+        if keyword:
+            sql.append(
+                "AND EXISTS (SELECT 1 FROM keywords k WHERE k.repo = c.repo AND k.name = c.name AND k.keyword = ?)"
+            )
+            params.append(keyword.lower())
+        if not include_deprecated:
+            sql.append("AND deprecated = 0")
+
+        with self._lock:
+            rows = self._db().execute(" ".join(sql), params).fetchall()
+
+        best: dict[tuple[str, str], list[tuple[Version, ChartVersion]]] = {}
+        for r_repo, r_name, r_version, app_version, description, deprecated in rows:
+            parsed = parse_version(r_version)
+            if parsed is None:
+                continue
+            if constraint is not None:
+                if not constraint.matches(parsed):
+                    continue
+            elif parsed.is_prerelease:
+                # Mirror helm: prereleases need --devel or an explicit constraint
+                continue
+            best.setdefault((r_repo, r_name), []).append((parsed, ChartVersion(
+                repo=r_repo,
+                name=r_name,
+                version=r_version,
+                app_version=app_version or "",
+                description=description or "",
+                deprecated=bool(deprecated),
+            )))
+
+        results: list[ChartVersion] = []
+        for key in sorted(best):
+            ranked = sorted(best[key], key=lambda pair: pair[0], reverse=True)
+            results.extend(cv for _, cv in (ranked if all_versions else ranked[:1]))
+            if len(results) >= limit:
+                break
+        return results[:limit]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def format_search_results(results: list[ChartVersion]) -> str:
+    """Render results as the same table `helm search repo` prints."""
+    if not results:
+        return "No results found"
+    rows = [("NAME", "CHART VERSION", "APP VERSION", "DESCRIPTION")]
+    rows += [(r.full_name, r.version, r.app_version, r.description) for r in results]
+    widths = [max(len(row[i]) for row in rows) for i in range(3)]
+    return "\n".join(
+        "\t".join(row[i].ljust(widths[i]) for i in range(3)) + "\t" + row[3]
+        for row in rows
+    )
+
+
+# Initialize once
+HELM_INDEX = HelmChartIndex()
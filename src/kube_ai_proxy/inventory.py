@@ -0,0 +1,228 @@
+# src/kube_ai_proxy/inventory.py
+
+"""
+Streaming cluster inventory for Kube AI Proxy.
+
+`kubectl get all -A -o json` on a cluster with 100k+ objects returns hundreds of
+megabytes that would otherwise be buffered, parsed whole and handed to the client.
+The inventory instead lists every listable type concurrently with paginated
+(`--chunk-size`) requests, parses each list item by item as it streams in, and
+keeps only counters:
+  - listable_types: resource types from the discovery index that support `list`
+  - TypeStats.add: count one object by namespace, label presence and, for objects
+    with a pod template, containers without resource requests or limits
+  - scan_type: stream one type's list through jsonstream.iter_list_items
+  - collect_inventory: fan out and render the aggregate tables
+"""
+
+import asyncio
+import time
+from asyncio.subprocess import Process
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+from kube_ai_proxy.cli_executor import run_cli
+from kube_ai_proxy.config import INVENTORY_CHUNK_SIZE, INVENTORY_CONCURRENCY, K8S_CONTEXT
+from kube_ai_proxy.discovery import RESOURCE_INDEX, APIResource
+from kube_ai_proxy.jsonstream import iter_list_items
+
+# Types left out unless asked for: high-churn events, deprecated componentstatuses,
+# and metrics-server views that duplicate pods/nodes
+_SKIPPED_TYPES = {"events", "events.events.k8s.io", "componentstatuses"}
+_SKIPPED_GROUPS = {"metrics.k8s.io"}
+
+TOP_NAMESPACES = 15
+MAX_ERRORS = 20
+
+
+@dataclass
+class TypeStats:
+    """Counters for one resource type; items are counted, never kept."""
+    resource: str
+    namespaced: bool
+    count: int = 0
+    namespaces: Counter = field(default_factory=Counter)
+    unlabeled: int = 0
+    with_pods: int = 0
+    no_requests: int = 0
+    no_limits: int = 0
+    error: str = ""
+
+    def add(self, item: dict) -> None:
+        meta = item.get("metadata") or {}
+        self.count += 1
+        if self.namespaced:
+            self.namespaces[meta.get("namespace", "")] += 1
+        if not meta.get("labels"):
+            self.unlabeled += 1
+        spec = pod_spec(item)
+        if spec is None:
+            return
+        self.with_pods += 1
+        containers = spec.get("containers") or []
+        resources = [c.get("resources") or {} for c in containers]
+        if any(not {"cpu", "memory"} <= set(r.get("requests") or {}) for r in resources):
+            self.no_requests += 1
+        if any("memory" not in (r.get("limits") or {}) for r in resources):
+            self.no_limits += 1
+
+
+def pod_spec(item: dict) -> Optional[dict]:
+    """The pod spec of a Pod, or the pod template spec of a workload (None for other objects)."""
+    spec = item.get("spec") or {}
+    kind = item.get("kind")
+    if kind == "Pod":
+        return spec
+    if kind == "CronJob":
+        spec = (spec.get("jobTemplate") or {}).get("spec") or {}
+    template = (spec.get("template") or {}).get("spec")
+    return template if isinstance(template, dict) and "containers" in template else None
+
+
+def listable_types(
+    resources: list[APIResource],
+    namespace: Optional[str] = None,
+    include_events: bool = False,
+    only: Optional[set[str]] = None,
+) -> list[APIResource]:
+    """
+    Types to inventory: everything that supports `list` (namespaced types only when
+    a namespace is given), optionally restricted to names, kinds or short names in `only`.
+    """
+    selected = []
+    for res in resources:
+        if not res.supports("list") or res.group in _SKIPPED_GROUPS:
+            continue
+        if namespace and not res.namespaced:
+            continue
+        if only is not None:
+            names = {res.name, res.qualified_name, res.kind.lower(), *res.short_names}
+            if not names & only:
+                continue
+        elif res.qualified_name in _SKIPPED_TYPES and not include_events:
+            continue
+        selected.append(res)
+    return selected
+
+
+async def scan_type(
+    res: APIResource,
+    namespace: Optional[str],
+    timeout: float,
+    chunk_size: int = INVENTORY_CHUNK_SIZE,
+) -> TypeStats:
+    """List one type (paginated) and fold every item into a TypeStats as it is parsed."""
+    stats = TypeStats(res.qualified_name, res.namespaced)
+    cmd = ["kubectl", "get", res.qualified_name, "-o", "json", f"--chunk-size={chunk_size}"]
+    if res.namespaced:
+        cmd += ["--namespace", namespace] if namespace else ["--all-namespaces"]
+    if K8S_CONTEXT:
+        cmd += ["--context", K8S_CONTEXT]
+
+    async def read(proc: Process) -> None:
+        try:
+            async for item in iter_list_items(proc.stdout):
+                stats.add(item)
+        except ValueError as e:
+            stats.error = f"unparseable output: {e}"
+            while await proc.stdout.read(1 << 16):
+                pass
+
+    done = await run_cli(cmd, timeout, consume=read)
+    if done.timed_out:
+        stats.error = f"timed out after {timeout}s (partial count)"
+    elif done.returncode != 0:
+        stats.error = done.error()
+    return stats
+
+
+def _table(rows: list[tuple], header: tuple) -> list[str]:
+    widths = [max(len(str(r[i])) for r in [header, *rows]) for i in range(len(header))]
+    # Numbers (and "-" placeholders) right-aligned, text left-aligned
+    numeric = [all(isinstance(r[i], int) or r[i] == "-" for r in rows) for i in range(len(header))]
+    fmt = "  ".join(f"{{:>{w}}}" if numeric[i] else f"{{:<{w}}}" for i, w in enumerate(widths))
+    return [fmt.format(*r).rstrip() for r in [header, *rows]]
+
+
+def render_inventory(stats: list[TypeStats], namespace: Optional[str], elapsed: float) -> str:
+    counted = [s for s in stats if s.count]
+    counted.sort(key=lambda s: (-s.count, s.resource))
+    by_namespace: Counter = Counter()
+    for s in counted:
+        by_namespace.update(s.namespaces)
+    total = sum(s.count for s in counted)
+    scope = f"namespace {namespace}" if namespace else f"{len(by_namespace)} namespaces"
+
+    out = [f"Inventory: {total} objects in {len(counted)} types across {scope} ({elapsed:.1f}s)", ""]
+    rows = [
+        (
+            s.resource,
+            s.count,
+            len(s.namespaces) if s.namespaced else "-",
+            s.unlabeled,
+            s.no_requests if s.with_pods else "-",
+            s.no_limits if s.with_pods else "-",
+        )
+        for s in counted
+    ]
+    out += _table(rows, ("TYPE", "COUNT", "NAMESPACES", "UNLABELED", "NO-REQUESTS", "NO-MEM-LIMIT"))
+    out.append(
+        "NO-REQUESTS: objects with a container lacking cpu or memory requests; "
+        "NO-MEM-LIMIT: lacking a memory limit"
+    )
+
+    empty = [s.resource for s in stats if not s.count and not s.error]
+    if empty:
+        out.append(f"Types without objects: {len(empty)}")
+
+    if not namespace and by_namespace:
+        out += ["", f"Top namespaces ({min(TOP_NAMESPACES, len(by_namespace))} of {len(by_namespace)}):"]
+        ns_rows = []
+        for ns, count in by_namespace.most_common(TOP_NAMESPACES):
+            top = sorted(((s.namespaces[ns], s.resource) for s in counted if s.namespaces[ns]), reverse=True)[:3]
+            ns_rows.append((ns or "(none)", count, ", ".join(f"{r} {c}" for c, r in top)))
+        out += _table(ns_rows, ("NAMESPACE", "OBJECTS", "LARGEST TYPES"))
+
+    errors = [s for s in stats if s.error]
+    if errors:
+        out += ["", f"Types not fully listed ({len(errors)}):"]
+        out += [f"- {s.resource}: {s.error}" for s in errors[:MAX_ERRORS]]
+        if len(errors) > MAX_ERRORS:
+            out.append(f"- ... {len(errors) - MAX_ERRORS} more")
+    return "\n".join(out)
+
+
+async def collect_inventory(
+    namespace: Optional[str],
+    timeout: float,
+    types: Optional[set[str]] = None,
+    include_events: bool = False,
+    concurrency: int = INVENTORY_CONCURRENCY,
+    chunk_size: int = INVENTORY_CHUNK_SIZE,
+    progress=None,
+) -> tuple[str, bool]:
+    """
+    Inventory every listable type and return (aggregate tables, ok). `timeout`
+    applies to each type's listing; `progress(done, total)` is awaited per type.
+    """
+    start_ts = time.time()
+    if not RESOURCE_INDEX.resources:
+        await RESOURCE_INDEX.refresh()
+    selected = listable_types(RESOURCE_INDEX.resources, namespace, include_events, types)
+    if not selected:
+        return "No listable resource types found (is API discovery available?)", False
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def scan(res: APIResource) -> TypeStats:
+        async with sem:
+            return await scan_type(res, namespace, timeout, chunk_size)
+
+    stats: list[TypeStats] = []
+    for done, next_stats in enumerate(asyncio.as_completed([scan(r) for r in selected]), start=1):
+        stats.append(await next_stats)
+        if progress is not None:
+            await progress(done, len(selected))
+    ok = any(not s.error for s in stats)
+    return render_inventory(stats, namespace, time.time() - start_ts), ok
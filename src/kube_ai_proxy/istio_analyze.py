@@ -0,0 +1,229 @@
+# src/kube_ai_proxy/istio_analyze.py
+
+"""
+Incremental `istioctl analyze` for Kube AI Proxy.
+
+Findings are cached per namespace under a fingerprint of the Istio-relevant objects
+in it (kind, name and resourceVersion), so only namespaces that changed since the
+last run are analyzed again:
+  - fingerprint_namespaces: one cluster-wide listing → per-namespace digests
+  - IncrementalAnalyzer.analyze: re-analyze changed namespaces concurrently, merge report
+  - format_report: istioctl-style text for the merged findings
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from kube_ai_proxy.cli_executor import run_cli
+from kube_ai_proxy.config import (
+    ISTIO_ANALYZE_CONCURRENCY,
+    ISTIO_ANALYZE_MAX_AGE,
+    ISTIO_ROOT_NAMESPACE,
+    K8S_CONTEXT,
+)
+from kube_ai_proxy.discovery import resolve_resource
+from kube_ai_proxy.loopwatch import decode, loads_json
+
+logger = logging.getLogger("kube_ai_proxy.istio_analyze")
+
+# Resource types whose changes can alter analyzer output for their namespace
+FINGERPRINT_RESOURCES = (
+    "virtualservices.networking.istio.io",
+    "destinationrules.networking.istio.io",
+    "gateways.networking.istio.io",
+    "sidecars.networking.istio.io",
+    "serviceentries.networking.istio.io",
+    "workloadentries.networking.istio.io",
+    "workloadgroups.networking.istio.io",
+    "envoyfilters.networking.istio.io",
+    "peerauthentications.security.istio.io",
+    "requestauthentications.security.istio.io",
+    "authorizationpolicies.security.istio.io",
+    "telemetries.telemetry.istio.io",
+    "wasmplugins.extensions.istio.io",
+    "services",
+    # Analyzers also read workloads (sidecar injection, ports, selector overlaps) and
+    # config maps (mesh config and injector templates in the root namespace)
+    "pods",
+    "deployments.apps",
+    "configmaps",
+)
+
+_ROW_TEMPLATE = (
+    '{range .items[*]}{.kind}{"\\t"}{.metadata.namespace}{"\\t"}'
+    '{.metadata.name}{"\\t"}{.metadata.resourceVersion}{"\\n"}{end}'
+)
+
+LEVEL_ORDER = {"Error": 0, "Warning": 1, "Info": 2}
+
+
+async def _run(cmd: list[str], timeout: float) -> tuple[int, str, str]:
+    if K8S_CONTEXT:
+        cmd = cmd + ["--context", K8S_CONTEXT]
+    done = await run_cli(cmd, timeout)
+    if done.timed_out:
+        return -1, "", f"Command timed out after {timeout}s"
+    return done.returncode, await decode(done.stdout), await decode(done.stderr)
+
+
+def _served_resources() -> list[str]:
+    """Fingerprint types the cluster actually serves (a missing CRD would fail the listing)."""
+    served = []
+    for name in FINGERPRINT_RESOURCES:
+        res = resolve_resource(name)
+        if res is not None:
+            served.append(res.qualified_name)
+    # Before discovery has run, fall back to the full list and let kubectl decide
+    return served or list(FINGERPRINT_RESOURCES)
+
+
+async def fingerprint_namespaces(timeout: float) -> tuple[Optional[dict[str, str]], str]:
+    """
+    Digest of (kind, name, resourceVersion) per namespace, plus the namespace object
+    itself (injection labels) and the Istio root namespace (mesh-wide config).
+    Returns (fingerprints, error).
+    """
+    code, ns_out, err = await _run(
+        ["kubectl", "get", "namespaces", "-o",
+         'jsonpath={range .items[*]}{.metadata.name}{"\\t"}{.metadata.resourceVersion}{"\\n"}{end}'],
+        timeout,
+    )
+    if code != 0:
+        return None, err or ns_out
+    code, rows, err = await _run(
+        ["kubectl", "get", ",".join(_served_resources()), "--all-namespaces",
+         "-o", f"jsonpath={_ROW_TEMPLATE}"],
+        timeout,
+    )
+    if code != 0:
+        return None, err or rows
+
+    per_ns: dict[str, list[str]] = defaultdict(list)
+    for line in rows.splitlines():
+        fields = line.split("\t")
+        if len(fields) == 4:
+            kind, ns, name, rv = fields
+            per_ns[ns].append(f"{kind}/{name}@{rv}")
+
+    root = "\n".join(sorted(per_ns.get(ISTIO_ROOT_NAMESPACE, [])))
+    fingerprints: dict[str, str] = {}
+    for line in ns_out.splitlines():
+        if "\t" not in line:
+            continue
+        ns, ns_rv = line.split("\t", 1)
+        h = hashlib.sha256()
+        h.update(f"namespace@{ns_rv}\n".encode())
+        h.update("\n".join(sorted(per_ns.get(ns, []))).encode())
+        h.update(b"\0root\0" + root.encode())
+        fingerprints[ns] = h.hexdigest()
+    return fingerprints, ""
+
+
+@dataclass
+class NamespaceFindings:
+    fingerprint: str
+    messages: list[dict]
+    analyzed_at: float = field(default_factory=time.time)
+    error: str = ""
+
+
+class IncrementalAnalyzer:
+    """Per-namespace `istioctl analyze` results, reused while the fingerprint is unchanged."""
+
+    def __init__(self, concurrency: int = ISTIO_ANALYZE_CONCURRENCY, max_age: float = ISTIO_ANALYZE_MAX_AGE):
+        self.concurrency = concurrency
+        self.max_age = max_age
+        self._cache: dict[str, NamespaceFindings] = {}
+
+    def _fresh(self, ns: str, fingerprint: str) -> bool:
+        cached = self._cache.get(ns)
+        return (
+            cached is not None
+            and not cached.error
+            and cached.fingerprint == fingerprint
+            and time.time() - cached.analyzed_at < self.max_age
+        )
+
+    async def _analyze_one(self, ns: str, fingerprint: str, timeout: float) -> NamespaceFindings:
+        code, out, err = await _run(["istioctl", "analyze", "--namespace", ns, "-o", "json"], timeout)
+        # analyze exits non-zero when it reports errors; the JSON is still complete
+        try:
+            messages = await loads_json(out) if out.strip() else []
+        except ValueError:
+            return NamespaceFindings(fingerprint, [], error=(err or out).strip() or f"exit code {code}")
+        if not isinstance(messages, list):
+            messages = []
+        return NamespaceFindings(fingerprint, messages)
+
+    async def analyze(
+        self,
+        namespaces: list[str] | None,
+        timeout: float,
+        force: bool = False,
+        progress=None,
+    ) -> tuple[dict[str, NamespaceFindings], list[str], str]:
+        """
+        Analyze the given namespaces (all if None). Returns (findings per namespace,
+        namespaces that were re-analyzed, error). `progress(ns, findings)` is awaited
+        as each namespace completes.
+        """
+        fingerprints, error = await fingerprint_namespaces(timeout)
+        if fingerprints is None:
+            return {}, [], error
+        targets = [ns for ns in (namespaces or sorted(fingerprints)) if ns in fingerprints]
+        stale = [ns for ns in targets if force or not self._fresh(ns, fingerprints[ns])]
+        logger.info(f"istioctl analyze: {len(stale)} of {len(targets)} namespaces changed")
+
+        sem = asyncio.Semaphore(max(1, self.concurrency))
+
+        async def run(ns: str) -> None:
+            async with sem:
+                findings = await self._analyze_one(ns, fingerprints[ns], timeout)
+            self._cache[ns] = findings
+            if progress is not None:
+                await progress(ns, findings)
+
+        await asyncio.gather(*(run(ns) for ns in stale))
+        for ns in set(self._cache) - set(fingerprints):
+            del self._cache[ns]
+        return {ns: self._cache[ns] for ns in targets if ns in self._cache}, stale, ""
+
+
+def merge_messages(findings: dict[str, NamespaceFindings]) -> list[dict]:
+    """All messages, deduplicated (cluster-scoped findings repeat per namespace), most severe first."""
+    seen = set()
+    merged = []
+    for ns in sorted(findings):
+        for msg in findings[ns].messages:
+            key = (msg.get("code"), msg.get("origin"), msg.get("message"))
+            if key in seen:
+                continue
+            seen.add(key)
+            merged.append(msg)
+    merged.sort(key=lambda m: (LEVEL_ORDER.get(m.get("level", ""), 3), m.get("code", ""), m.get("origin", "")))
+    return merged
+
+
+def format_report(findings: dict[str, NamespaceFindings], reanalyzed: list[str]) -> str:
+    merged = merge_messages(findings)
+    lines = [
+        f"Analyzed {len(findings)} namespaces "
+        f"({len(reanalyzed)} re-analyzed, {len(findings) - len(reanalyzed)} unchanged)"
+    ]
+    errors = {ns: f.error for ns, f in findings.items() if f.error}
+    if not merged and not errors:
+        lines.append("✔ No validation issues found")
+    for m in merged:
+        lines.append(f"{m.get('level', 'Info')} [{m.get('code', '')}] ({m.get('origin', '')}) {m.get('message', '')}")
+    for ns, err in sorted(errors.items()):
+        lines.append(f"Analysis failed for namespace {ns}: {err}")
+    return "\n".join(lines)
+
+
+# Initialize once
+ANALYZER = IncrementalAnalyzer()
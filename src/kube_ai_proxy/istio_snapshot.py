@@ -0,0 +1,304 @@
+# src/kube_ai_proxy/istio_snapshot.py
+
+"""
+Indexed snapshots of Envoy configuration captured with `istioctl proxy-config all`.
+
+A multi-MB config dump is parsed once per pod into lookup tables, so agents can ask
+for a single cluster, route, listener or endpoint set without re-fetching the dump:
+  - ProxySnapshot.from_dump: build indexes from a config dump
+  - parse_dump: raw dump text to a snapshot, run in a worker thread for large dumps
+  - SnapshotStore: per-pod snapshots with TTL and a memory budget (LRU eviction),
+    used from the event loop only
+  - capture_snapshot / query_snapshot: fetch-on-miss and fragment queries
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict, defaultdict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from kube_ai_proxy.cli_executor import run_cli
+from kube_ai_proxy.config import (
+    ISTIO_SNAPSHOT_MAX_BYTES,
+    ISTIO_SNAPSHOT_TTL,
+    K8S_CONTEXT,
+    K8S_NAMESPACE,
+)
+
+logger = logging.getLogger("kube_ai_proxy.istio_snapshot")
+
+QUERY_KINDS = ("cluster", "route", "listener", "endpoint")
+
+
+def _cluster_fqdn(cluster: dict) -> str:
+    """Service FQDN of an Istio cluster (`outbound|9080||reviews.default.svc.cluster.local`)."""
+    name = cluster.get("name", "")
+    parts = name.split("|")
+    if len(parts) == 4 and parts[3]:
+        return parts[3]
+    return (cluster.get("eds_cluster_config") or {}).get("service_name", "")
+
+
+def _socket(address: dict) -> tuple[str, int]:
+    sock = (address or {}).get("socket_address") or {}
+    return sock.get("address", ""), int(sock.get("port_value", 0) or 0)
+
+
+@dataclass
+class ProxySnapshot:
+    """Parsed, indexed Envoy configuration of one pod."""
+    pod: str
+    namespace: str
+    captured_at: float
+    size: int
+    clusters: dict[str, dict] = field(default_factory=dict)
+    clusters_by_fqdn: dict[str, list[str]] = field(default_factory=lambda: defaultdict(list))
+    routes_by_domain: dict[str, list[dict]] = field(default_factory=lambda: defaultdict(list))
+    listeners_by_port: dict[int, list[dict]] = field(default_factory=lambda: defaultdict(list))
+    endpoints_by_health: dict[str, list[dict]] = field(default_factory=lambda: defaultdict(list))
+    endpoints_by_cluster: dict[str, list[dict]] = field(default_factory=lambda: defaultdict(list))
+
+    @classmethod
+    def from_dump(cls, pod: str, namespace: str, dump: Any, size: int = 0) -> "ProxySnapshot":
+        snap = cls(pod=pod, namespace=namespace, captured_at=time.monotonic(), size=size)
+        configs = dump.get("configs", []) if isinstance(dump, dict) else dump or []
+        if isinstance(dump, dict) and "cluster_statuses" in dump:
+            configs = [dump]
+        for cfg in configs:
+            kind = (cfg.get("@type") or "").rsplit(".", 1)[-1]
+            if kind == "ClustersConfigDump":
+                for entry in cfg.get("static_clusters", []) + cfg.get("dynamic_active_clusters", []):
+                    snap._add_cluster(entry.get("cluster") or {})
+            elif kind == "ListenersConfigDump":
+                for entry in cfg.get("static_listeners", []):
+                    snap._add_listener(entry.get("listener") or {})
+                for entry in cfg.get("dynamic_listeners", []):
+                    snap._add_listener((entry.get("active_state") or {}).get("listener") or {})
+            elif kind == "RoutesConfigDump":
+                for entry in cfg.get("static_route_configs", []) + cfg.get("dynamic_route_configs", []):
+                    snap._add_route_config(entry.get("route_config") or {})
+            elif kind == "EndpointsConfigDump":
+                for entry in cfg.get("static_endpoint_configs", []) + cfg.get("dynamic_endpoint_configs", []):
+                    snap._add_endpoint_config(entry.get("endpoint_config") or {})
+            elif "cluster_statuses" in cfg:
+                # `istioctl proxy-config endpoint -o json` (Envoy /clusters) format
+                for status in cfg["cluster_statuses"]:
+                    for host in status.get("host_statuses", []):
+                        addr, port = _socket(host.get("address"))
+                        health = (host.get("health_status") or {}).get("eds_health_status", "UNKNOWN")
+                        snap._add_endpoint(status.get("name", ""), addr, port, health)
+        return snap
+
+    def _add_cluster(self, cluster: dict) -> None:
+        name = cluster.get("name")
+        if not name:
+            return
+        self.clusters[name] = cluster
+        fqdn = _cluster_fqdn(cluster)
+        if fqdn:
+            self.clusters_by_fqdn[fqdn].append(name)
+
+    def _add_listener(self, listener: dict) -> None:
+        if listener:
+            _, port = _socket(listener.get("address"))
+            self.listeners_by_port[port].append(listener)
+
+    def _add_route_config(self, route_config: dict) -> None:
+        for vhost in route_config.get("virtual_hosts", []):
+            fragment = {"route_config": route_config.get("name", ""), "virtual_host": vhost}
+            for domain in vhost.get("domains", []):
+                self.routes_by_domain[domain].append(fragment)
+
+    def _add_endpoint_config(self, endpoint_config: dict) -> None:
+        cluster = endpoint_config.get("cluster_name", "")
+        for locality in endpoint_config.get("endpoints", []):
+            for lb in locality.get("lb_endpoints", []):
+                addr, port = _socket((lb.get("endpoint") or {}).get("address"))
+                self._add_endpoint(cluster, addr, port, lb.get("health_status", "UNKNOWN"))
+
+    def _add_endpoint(self, cluster: str, address: str, port: int, health: str) -> None:
+        entry = {"cluster": cluster, "address": f"{address}:{port}", "health": health}
+        self.endpoints_by_health[health].append(entry)
+        self.endpoints_by_cluster[cluster].append(entry)
+
+    @property
+    def has_endpoints(self) -> bool:
+        return bool(self.endpoints_by_cluster)
+
+    def query(
+        self,
+        kind: str,
+        name: str | None = None,
+        fqdn: str | None = None,
+        domain: str | None = None,
+        port: int | None = None,
+        health: str | None = None,
+        limit: int = 20,
+    ) -> list[dict]:
+        """Return only the matching fragments; an unfiltered query returns names/keys."""
+        if kind == "cluster":
+            if name:
+                found = [self.clusters[name]] if name in self.clusters else []
+            elif fqdn:
+                found = [self.clusters[n] for n in self.clusters_by_fqdn.get(fqdn, [])]
+            else:
+                found = [{"name": n, "fqdn": _cluster_fqdn(c)} for n, c in self.clusters.items()]
+        elif kind == "route":
+            if domain:
+                found = list(self.routes_by_domain.get(domain, []))
+                if not found:
+                    # Fall back to wildcard domains such as `*.example.com`
+                    found = [
+                        frag for d, frags in self.routes_by_domain.items()
+                        if d.startswith("*.") and domain.endswith(d[1:]) for frag in frags
+                    ]
+            elif name:
+                found = [
+                    frag for frags in self.routes_by_domain.values() for frag in frags
+                    if frag["route_config"] == name or frag["virtual_host"].get("name") == name
+                ]
+                found = list({id(f): f for f in found}.values())
+            else:
+                found = [{"domain": d, "virtual_hosts": len(f)} for d, f in self.routes_by_domain.items()]
+        elif kind == "listener":
+            if port is not None:
+                found = list(self.listeners_by_port.get(port, []))
+            elif name:
+                found = [l for ls in self.listeners_by_port.values() for l in ls if l.get("name") == name]
+            else:
+                found = [
+                    {"port": p, "listeners": [l.get("name", "") for l in ls]}
+                    for p, ls in sorted(self.listeners_by_port.items())
+                ]
+        elif kind == "endpoint":
+            if name or fqdn:
+                clusters = [name] if name else self.clusters_by_fqdn.get(fqdn or "", [])
+                found = [e for c in clusters for e in self.endpoints_by_cluster.get(c, [])]
+                if health:
+                    found = [e for e in found if e["health"] == health.upper()]
+            elif health:
+                found = list(self.endpoints_by_health.get(health.upper(), []))
+            else:
+                found = [{"health": h, "count": len(e)} for h, e in self.endpoints_by_health.items()]
+        else:
+            raise ValueError(f"Unknown proxy-config kind '{kind}'; expected one of {', '.join(QUERY_KINDS)}")
+        return found[:limit]
+
+
+class SnapshotStore:
+    """
+    Snapshots keyed by (namespace, pod), expired after `ttl` seconds and evicted
+    least-recently-used once their combined dump size exceeds `max_bytes`.
+    """
+
+    def __init__(self, ttl: float = ISTIO_SNAPSHOT_TTL, max_bytes: int = ISTIO_SNAPSHOT_MAX_BYTES):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._snapshots: OrderedDict[tuple[str, str], ProxySnapshot] = OrderedDict()
+        self._total = 0
+
+    def get(self, namespace: str, pod: str) -> Optional[ProxySnapshot]:
+        key = (namespace, pod)
+        snap = self._snapshots.get(key)
+        if snap is None:
+            return None
+        if time.monotonic() - snap.captured_at > self.ttl:
+            self._drop(key)
+            return None
+        self._snapshots.move_to_end(key)
+        return snap
+
+    def put(self, snap: ProxySnapshot) -> None:
+        key = (snap.namespace, snap.pod)
+        self._drop(key)
+        self._snapshots[key] = snap
+        self._total += snap.size
+        while self._total > self.max_bytes and len(self._snapshots) > 1:
+            self._drop(next(iter(self._snapshots)))
+
+    def _drop(self, key: tuple[str, str]) -> None:
+        snap = self._snapshots.pop(key, None)
+        if snap is not None:
+            self._total -= snap.size
+
+
+def parse_dump(pod: str, namespace: str, raw: str) -> Optional[ProxySnapshot]:
+    """Index raw `proxy-config all -o json` output; None if it is not JSON. Touches no shared state."""
+    try:
+        dump = json.loads(raw)
+    except ValueError:
+        return None
+    return ProxySnapshot.from_dump(pod, namespace, dump, size=len(raw))
+
+
+def split_pod_ref(pod: str, namespace: str | None) -> tuple[str, str]:
+    """`pod.namespace` or `pod` + namespace → (pod, namespace), as istioctl accepts both."""
+    if namespace:
+        return pod, namespace
+    if "." in pod:
+        name, ns = pod.split(".", 1)
+        return name, ns
+    return pod, K8S_NAMESPACE
+
+
+async def _istioctl_json(args: list[str], timeout: float) -> tuple[bool, str]:
+    cmd = ["istioctl", *args, "-o", "json"]
+    if K8S_CONTEXT:
+        cmd += ["--context", K8S_CONTEXT]
+    done = await run_cli(cmd, timeout)
+    if done.timed_out:
+        return False, f"Command timed out after {timeout}s"
+    if done.returncode != 0:
+        return False, done.stderr.decode("utf-8", "replace") or done.stdout.decode("utf-8", "replace")
+    return True, done.stdout.decode("utf-8", "replace")
+
+
+async def capture_snapshot(pod: str, namespace: str, timeout: float) -> tuple[Optional[ProxySnapshot], str]:
+    """Fetch and index a pod's proxy config. Returns (snapshot, error)."""
+    ok, text = await _istioctl_json(["proxy-config", "all", pod, "-n", namespace], timeout)
+    if not ok:
+        return None, text
+    snap = await asyncio.to_thread(parse_dump, pod, namespace, text)
+    if snap is None:
+        return None, "istioctl proxy-config output was not JSON"
+    if not snap.has_endpoints:
+        # Older istioctl versions leave EDS out of `all`; pull it separately
+        ok, eds = await _istioctl_json(["proxy-config", "endpoint", pod, "-n", namespace], timeout)
+        if ok:
+            try:
+                extra = ProxySnapshot.from_dump(pod, namespace, json.loads(eds))
+            except ValueError:
+                extra = None
+            if extra is not None:
+                for entries in extra.endpoints_by_cluster.values():
+                    for e in entries:
+                        snap.endpoints_by_cluster[e["cluster"]].append(e)
+                        snap.endpoints_by_health[e["health"]].append(e)
+    SNAPSHOTS.put(snap)
+    logger.info(f"Captured proxy-config snapshot for {pod}.{namespace} ({snap.size} bytes)")
+    return snap, ""
+
+
+async def query_snapshot(
+    pod: str,
+    namespace: str | None,
+    kind: str,
+    timeout: float,
+    refresh: bool = False,
+    **filters,
+) -> tuple[Optional[list[dict]], str]:
+    """Answer a query from the pod's snapshot, capturing one first if needed."""
+    pod, namespace = split_pod_ref(pod, namespace)
+    snap = None if refresh else SNAPSHOTS.get(namespace, pod)
+    if snap is None:
+        snap, error = await capture_snapshot(pod, namespace, timeout)
+        if snap is None:
+            return None, error
+    return snap.query(kind, **filters), ""
+
+
+# Initialize once
+SNAPSHOTS = SnapshotStore()
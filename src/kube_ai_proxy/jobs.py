@@ -0,0 +1,322 @@
+# src/kube_ai_proxy/jobs.py
+
+"""
+Background jobs for long-running commands in Kube AI Proxy.
+
+`helm upgrade --wait`, `kubectl rollout status` or `argocd app sync --wait` can
+outlive a client's tool-call timeout. Such commands are submitted as jobs instead:
+  - JobManager.submit: validate, authorize and start a command; returns its id at once
+  - JobManager.get / wait: look a job up, optionally waiting up to a deadline for
+    it to finish; Job.snapshot gives its state plus output from an offset
+  - JobManager.cancel: terminate the job's process group
+Jobs live in a bounded table with retention for finished ones; OutputBuffer keeps
+the head of the output in memory, spills the rest to disk and caps the total.
+"""
+
+import asyncio
+import logging
+import os
+import shlex
+import tempfile
+import time
+import uuid
+from asyncio.subprocess import STDOUT
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from kube_ai_proxy.argocd_session import ARGOCD_SESSION, invalidate_for
+from kube_ai_proxy.audit import audit_command
+from kube_ai_proxy.cli_executor import spawn, terminate
+from kube_ai_proxy.config import (
+    JOBS_DIR,
+    JOBS_MAX,
+    JOBS_MAX_RUNNING,
+    JOBS_MAX_RUNTIME,
+    JOBS_OUTPUT_MAX_BYTES,
+    JOBS_OUTPUT_MEMORY,
+    JOBS_RETENTION,
+    K8S_CONTEXT,
+    K8S_NAMESPACE,
+)
+from kube_ai_proxy.discovery import normalize_resource
+from kube_ai_proxy.prefetch import PREFETCHER
+from kube_ai_proxy.security.rbac_checker import RBACChecker
+from kube_ai_proxy.security.security import validate_command
+from kube_ai_proxy.throttle import is_idempotent_read
+from kube_ai_proxy.tools import CommandResult, JobStatus, command_scope, is_pipe_command, split_pipe_command
+
+logger = logging.getLogger("kube_ai_proxy.jobs")
+
+# Largest output slice returned by one status/wait call
+DEFAULT_READ_LIMIT = 64 * 1024
+
+
+def _utf8_prefix(data: bytes) -> int:
+    """Length of the longest prefix of `data` that does not end inside a UTF-8 sequence."""
+    for back in range(1, min(4, len(data)) + 1):
+        b = data[-back]
+        if b & 0xC0 == 0x80:
+            continue  # continuation byte, keep looking for the lead byte
+        need = 1 if b < 0x80 else 2 if b < 0xE0 else 3 if b < 0xF0 else 4
+        return len(data) - back if back < need else len(data)
+    return len(data)
+
+
+class OutputBuffer:
+    """
+    Append-only job output addressed by byte offset. The first `memory_limit` bytes
+    stay in memory, later bytes go to a spill file, and anything past `max_bytes`
+    is dropped (and counted).
+    """
+
+    def __init__(
+        self,
+        memory_limit: int = JOBS_OUTPUT_MEMORY,
+        max_bytes: int = JOBS_OUTPUT_MAX_BYTES,
+        spill_dir: Path | str = JOBS_DIR,
+    ):
+        self.memory_limit = memory_limit
+        self.max_bytes = max_bytes
+        self.spill_dir = Path(spill_dir)
+        self._head = bytearray()
+        self._spill: Optional[Path] = None
+        self.size = 0
+        self.dropped = 0
+
+    def write(self, data: bytes) -> None:
+        room = max(self.max_bytes - self.size, 0)
+        if len(data) > room:
+            self.dropped += len(data) - room
+            data = data[:room]
+        if not data:
+            return
+        self.size += len(data)
+        if len(self._head) < self.memory_limit:
+            take = self.memory_limit - len(self._head)
+            self._head += data[:take]
+            data = data[take:]
+        if data:
+            if self._spill is None:
+                self.spill_dir.mkdir(parents=True, exist_ok=True)
+                fd, name = tempfile.mkstemp(prefix="job-", suffix=".out", dir=self.spill_dir)
+                os.close(fd)
+                self._spill = Path(name)
+            with self._spill.open("ab") as fh:
+                fh.write(data)
+
+    def read(self, offset: int, limit: int = DEFAULT_READ_LIMIT) -> tuple[str, int]:
+        """Text from byte `offset` (at most `limit` bytes) and the offset to continue from."""
+        offset = max(0, min(offset, self.size))
+        end = min(self.size, offset + limit)
+        data = bytes(self._head[offset:end])
+        if end > len(self._head) and self._spill is not None:
+            with self._spill.open("rb") as fh:
+                fh.seek(max(offset, len(self._head)) - len(self._head))
+                data += fh.read(end - max(offset, len(self._head)))
+        if end < self.size:
+            data = data[: _utf8_prefix(data)]
+        return data.decode("utf-8", "replace"), offset + len(data)
+
+    def close(self) -> None:
+        if self._spill is not None:
+            self._spill.unlink(missing_ok=True)
+            self._spill = None
+
+
+@dataclass
+class Job:
+    id: str
+    command: str
+    timeout: float
+    output: OutputBuffer = field(default_factory=OutputBuffer)
+    state: str = "running"
+    exit_code: Optional[int] = None
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+    done: asyncio.Event = field(default_factory=asyncio.Event)
+    task: Optional[asyncio.Task] = None
+
+    def snapshot(self, offset: int = 0, limit: int = DEFAULT_READ_LIMIT) -> JobStatus:
+        text, next_offset = self.output.read(offset, limit)
+        status = JobStatus(
+            job_id=self.id,
+            command=self.command,
+            state=self.state,
+            output=text,
+            offset=next_offset,
+            execution_time=(self.finished_at or time.time()) - self.started_at,
+        )
+        if self.exit_code is not None:
+            status["exit_code"] = self.exit_code
+        if self.output.dropped:
+            status["dropped_bytes"] = self.output.dropped
+        return status
+
+
+async def _authorize(command: str) -> Optional[str]:
+    """RBAC check for the command's first stage, as the per-tool executors do; returns an error or None."""
+    stage = split_pipe_command(command)[0] if is_pipe_command(command) else command
+    parts = shlex.split(stage)
+    if len(parts) < 2:
+        return None
+    tool, verb = parts[0], parts[1]
+    target = parts[2] if len(parts) > 2 else ""
+    checker = RBACChecker(context=K8S_CONTEXT, namespace=K8S_NAMESPACE)
+    if tool == "kubectl":
+        target = normalize_resource(target) if target else ""
+        allowed = await checker.can_i(verb, target)
+    elif tool == "helm":
+        allowed = await checker.can_i_helm(verb, target)
+    elif tool == "istioctl":
+        allowed = await checker.can_i_istio(verb, target)
+    else:
+        allowed = await checker.can_i_argocd(verb, target)
+    return None if allowed else f"RBAC: permission denied for {verb} {target}"
+
+
+class JobManager:
+    """
+    Bounded table of background jobs. At most `max_running` run at once and at most
+    `max_jobs` are kept; finished jobs are dropped after `retention` seconds, or
+    oldest-first when the table is full.
+    """
+
+    def __init__(
+        self,
+        max_jobs: int = JOBS_MAX,
+        max_running: int = JOBS_MAX_RUNNING,
+        retention: float = JOBS_RETENTION,
+        max_runtime: float = JOBS_MAX_RUNTIME,
+    ):
+        self.max_jobs = max_jobs
+        self.max_running = max_running
+        self.retention = retention
+        self.max_runtime = max_runtime
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+
+    @property
+    def running(self) -> int:
+        return sum(1 for job in self._jobs.values() if job.state == "running")
+
+    def _drop(self, job_id: str) -> None:
+        job = self._jobs.pop(job_id)
+        job.output.close()
+
+    def _prune(self) -> None:
+        now = time.time()
+        for job in list(self._jobs.values()):
+            if job.finished_at is not None and now - job.finished_at > self.retention:
+                self._drop(job.id)
+        finished = [job.id for job in self._jobs.values() if job.finished_at is not None]
+        while len(self._jobs) >= self.max_jobs and finished:
+            self._drop(finished.pop(0))
+
+    async def submit(self, command: str, timeout: float | None = None) -> Job:
+        """
+        Validate, authorize and start `command`. Raises ValueError if the command is
+        rejected or the job table has no room.
+        """
+        validate_command(command)
+        error = await _authorize(command)
+        if error:
+            raise ValueError(error)
+
+        self._prune()
+        if self.running >= self.max_running:
+            raise ValueError(f"Too many running jobs ({self.max_running}); wait for or cancel one first")
+        if len(self._jobs) >= self.max_jobs:
+            raise ValueError(f"Job table is full ({self.max_jobs} jobs)")
+
+        job = Job(
+            id=uuid.uuid4().hex[:12],
+            command=command,
+            timeout=min(timeout or self.max_runtime, self.max_runtime),
+        )
+        self._jobs[job.id] = job
+        job.task = asyncio.create_task(self._run(job))
+        logger.info(f"Job {job.id} started: {command}")
+        return job
+
+    async def _run(self, job: Job) -> None:
+        shell = is_pipe_command(job.command)
+        argv = shlex.split(job.command)
+        proc = None
+        state, exit_code = "failed", -1
+        try:
+            env = await ARGOCD_SESSION.env() if argv[0] == "argocd" else None
+            proc = await spawn(job.command if shell else argv, shell=shell, env=env, stderr=STDOUT)
+            await asyncio.wait_for(self._pump(proc, job), job.timeout)
+            state = "succeeded" if proc.returncode == 0 else "failed"
+            exit_code = proc.returncode
+        except asyncio.TimeoutError:
+            # Before OSError: TimeoutError subclasses it on Python 3.11+
+            await terminate(proc)
+            job.output.write(f"\nJob terminated after {job.timeout}s\n".encode())
+            state = "timed_out"
+        except OSError as e:
+            job.output.write(f"{e}\n".encode())
+        except asyncio.CancelledError:
+            if proc is not None:
+                await asyncio.shield(terminate(proc))
+                exit_code = proc.returncode
+            state = "cancelled"
+        finally:
+            if argv[0] == "argocd":
+                invalidate_for(argv)
+            if not is_idempotent_read(job.command):
+                PREFETCHER.invalidate(command_scope(job.command)[0])
+            self._finish(job, state, exit_code)
+        await audit_command(
+            argv[0],
+            job.command,
+            CommandResult(status="success" if state == "succeeded" else "error", output="", exit_code=exit_code),
+            rbac="allowed",
+            duration=job.finished_at - job.started_at,
+            output_chars=job.output.size,
+        )
+
+    @staticmethod
+    async def _pump(proc, job: Job) -> None:
+        while chunk := await proc.stdout.read(1 << 16):
+            job.output.write(chunk)
+        await proc.wait()
+
+    def _finish(self, job: Job, state: str, exit_code: Optional[int]) -> None:
+        job.state = state
+        job.exit_code = exit_code
+        job.finished_at = time.time()
+        job.done.set()
+        logger.info(f"Job {job.id} {state} (exit code {exit_code})")
+
+    def get(self, job_id: str) -> Job:
+        self._prune()
+        job = self._jobs.get(job_id)
+        if job is None:
+            raise ValueError(f"Unknown or expired job: {job_id}")
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Job:
+        """Wait up to `timeout` seconds for the job to finish; returns it either way."""
+        job = self.get(job_id)
+        try:
+            await asyncio.wait_for(job.done.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        return job
+
+    async def cancel(self, job_id: str) -> Job:
+        job = self.get(job_id)
+        if job.task is not None and not job.task.done():
+            job.task.cancel()
+            await job.done.wait()
+        return job
+
+    def jobs(self) -> list[Job]:
+        self._prune()
+        return list(self._jobs.values())
+
+
+# Initialize once
+JOBS = JobManager()
@@ -0,0 +1,234 @@
+# src/kube_ai_proxy/jsonstream.py
+
+"""
+Incremental parsing of Kubernetes List JSON for Kube AI Proxy.
+
+`kubectl get ... -o json` prints one List object whose `items` array can be
+gigabytes on a large cluster. Rather than reading and parsing it whole, the
+stream is decoded chunk by chunk and every element of `items` is parsed and
+handed out on its own, so at most one item (plus one read chunk) is held at once:
+  - ItemSplitter.feed / close: push decoded text, collect the completed items
+  - iter_list_items: async generator over the items of a List read from a stream
+  - ValueSplitter / iter_json_values: the same for a stream of concatenated
+    top-level values, as `kubectl get --watch -o json` prints them
+"""
+
+import codecs
+import json
+import re
+from typing import AsyncIterator, Optional
+
+_NON_WS = re.compile(r"[^ \t\n\r]")
+_DECODER = json.JSONDecoder()
+
+# Largest single item accepted before the stream is treated as malformed
+MAX_ITEM_CHARS = 64 * 1024 * 1024
+
+
+class ItemSplitter:
+    """
+    Push parser for `{"...": ..., "items": [ {...}, {...} ], "...": ...}`.
+    Top-level keys other than `items` are parsed and kept in `fields` (they are
+    small: apiVersion, kind, metadata). json.JSONDecoder.raw_decode parses each
+    value once it is complete; after a failed attempt on an incomplete value the
+    next one waits until its pending text has doubled, which keeps re-scanning linear.
+    """
+
+    def __init__(self, max_item: int = MAX_ITEM_CHARS):
+        self.max_item = max_item
+        self.fields: dict = {}
+        self._buf = ""
+        self._pos = 0
+        # "start" -> "key" -> "colon" -> "value" / "items" -> "next" -> ... -> "done"
+        self._state = "start"
+        self._key = ""
+        self._retry_at = 0
+
+    def _skip_ws(self) -> None:
+        m = _NON_WS.search(self._buf, self._pos)
+        self._pos = m.start() if m else len(self._buf)
+
+    def _value(self, final: bool) -> tuple[bool, object]:
+        """Parse one JSON value at the cursor; (False, None) if more input is needed."""
+        if not final and len(self._buf) < self._retry_at:
+            return False, None
+        try:
+            value, end = _DECODER.raw_decode(self._buf, self._pos)
+        except json.JSONDecodeError:
+            if final:
+                raise
+            if len(self._buf) - self._pos > self.max_item:
+                raise ValueError(f"JSON value larger than {self.max_item} characters")
+            self._retry_at = self._pos + 2 * (len(self._buf) - self._pos)
+            return False, None
+        self._retry_at = 0
+        self._pos = end
+        return True, value
+
+    def feed(self, text: str, final: bool = False) -> list:
+        """Add decoded text; returns the `items` elements completed by it."""
+        if self._pos:
+            # Drop consumed text; what is left is at most one partial value
+            self._buf = self._buf[self._pos:]
+            self._retry_at = max(0, self._retry_at - self._pos)
+            self._pos = 0
+        self._buf += text
+        items = []
+        while True:
+            self._skip_ws()
+            if self._pos >= len(self._buf):
+                break
+            ch = self._buf[self._pos]
+            state = self._state
+            if state == "start":
+                if ch != "{":
+                    raise ValueError("expected a JSON object")
+                self._pos += 1
+                self._state = "key"
+            elif state == "key":
+                if ch == "}":
+                    self._pos += 1
+                    self._state = "done"
+                    continue
+                if ch == ",":
+                    self._pos += 1
+                    continue
+                done, key = self._value(final)
+                if not done:
+                    break
+                self._key = key
+                self._state = "colon"
+            elif state == "colon":
+                if ch != ":":
+                    raise ValueError("expected ':' after an object key")
+                self._pos += 1
+                self._state = "items" if self._key == "items" else "value"
+            elif state == "value":
+                done, value = self._value(final)
+                if not done:
+                    break
+                self.fields[self._key] = value
+                self._state = "key"
+            elif state == "items":
+                if ch == "n":
+                    if len(self._buf) - self._pos < 4 and not final:
+                        break
+                    if not self._buf.startswith("null", self._pos):
+                        raise ValueError("expected 'items' to be an array")
+                    self._pos += 4
+                    self._state = "key"
+                    continue
+                if ch != "[":
+                    raise ValueError("expected 'items' to be an array")
+                self._pos += 1
+                self._state = "next"
+            elif state == "next":
+                if ch == "]":
+                    self._pos += 1
+                    self._state = "key"
+                    continue
+                if ch == ",":
+                    self._pos += 1
+                    continue
+                done, item = self._value(final)
+                if not done:
+                    break
+                items.append(item)
+            else:  # done: ignore trailing whitespace/garbage
+                self._pos = len(self._buf)
+        return items
+
+    def close(self) -> list:
+        """Flush at end of input; raises ValueError if the document is incomplete."""
+        items = self.feed("", final=True)
+        if self._state != "done":
+            raise ValueError("truncated JSON list")
+        return items
+
+
+async def iter_list_items(
+    reader,
+    chunk_size: int = 1 << 16,
+    max_item: int = MAX_ITEM_CHARS,
+    splitter: Optional[ItemSplitter] = None,
+) -> AsyncIterator[dict]:
+    """
+    Yield each element of the `items` array of a List JSON read from `reader`.
+    Empty input yields nothing; malformed or truncated input raises ValueError.
+    """
+    splitter = splitter or ItemSplitter(max_item)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    received = False
+    while chunk := await reader.read(chunk_size):
+        received = True
+        for item in splitter.feed(decoder.decode(chunk)):
+            yield item
+    if not received:
+        # No output at all (the command failed): nothing to parse, not a truncated list
+        return
+    splitter.feed(decoder.decode(b"", final=True))
+    for item in splitter.close():
+        yield item
+
+
+class ValueSplitter:
+    """
+    Push parser for concatenated top-level JSON values (`{...}{...}` or one per
+    line). A value is parsed once its text has doubled since the last failed
+    attempt, or when the caller says the stream went idle (a watch event may be
+    followed by minutes of silence, and must not wait for more input).
+    """
+
+    def __init__(self, max_value: int = MAX_ITEM_CHARS):
+        self.max_value = max_value
+        self._buf = ""
+        self._retry_at = 0
+
+    def feed(self, text: str, idle: bool = False) -> list:
+        """Add decoded text; returns the values completed by it."""
+        self._buf += text
+        values = []
+        pos = 0
+        while True:
+            m = _NON_WS.search(self._buf, pos)
+            if m is None:
+                pos = len(self._buf)
+                break
+            pos = m.start()
+            if not idle and len(self._buf) - pos < self._retry_at:
+                break
+            try:
+                value, pos = _DECODER.raw_decode(self._buf, pos)
+            except json.JSONDecodeError:
+                if len(self._buf) - pos > self.max_value:
+                    raise ValueError(f"JSON value larger than {self.max_value} characters")
+                self._retry_at = 2 * (len(self._buf) - pos)
+                break
+            self._retry_at = 0
+            values.append(value)
+        self._buf = self._buf[pos:]
+        return values
+
+    def close(self) -> list:
+        """Flush at end of input; raises ValueError if a value is incomplete."""
+        values = self.feed("", idle=True)
+        if self._buf.strip():
+            raise ValueError("truncated JSON value")
+        return values
+
+
+async def iter_json_values(
+    reader,
+    chunk_size: int = 1 << 16,
+    max_value: int = MAX_ITEM_CHARS,
+) -> AsyncIterator[object]:
+    """Yield each top-level JSON value read from `reader` as soon as it is complete."""
+    splitter = ValueSplitter(max_value)
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    while chunk := await reader.read(chunk_size):
+        # A short read means the writer has paused: try to finish the pending value now
+        for value in splitter.feed(decoder.decode(chunk), idle=len(chunk) < chunk_size):
+            yield value
+    splitter.feed(decoder.decode(b"", final=True))
+    for value in splitter.close():
+        yield value
@@ -0,0 +1,315 @@
+# src/kube_ai_proxy/log_mining.py
+
+"""
+Log template mining for Kube AI Proxy.
+
+Chatty pods produce mostly repeated lines. LogMiner clusters a log stream into
+templates with a Drain-style fixed-depth parse tree (variables masked first), so
+`kubectl logs` can come back as templates with counts instead of raw text:
+  - LogMiner.feed: add one line (bounded memory: template count, samples and
+    verbatim error lines are all capped)
+  - LogMiner.summary: templates by count with first/last timestamps and samples
+  - summarize_logs: run a `kubectl logs` argv and mine its stdout as it streams
+"""
+
+import asyncio
+import codecs
+import re
+import time
+from collections import OrderedDict
+from typing import Optional
+
+from kube_ai_proxy.cli_executor import spawn, terminate
+from kube_ai_proxy.tools import CommandResult
+
+WILDCARD = "<*>"
+
+# One alternation, one pass per line; earlier, more specific alternatives win
+_MASK = re.compile(
+    r"(?P<UUID>\b[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\b)"
+    r"|(?P<IP>\b\d{1,3}(?:\.\d{1,3}){3}(?::\d+)?\b)"
+    r"|(?P<HEX>\b(?:0x[0-9a-fA-F]+|[0-9a-fA-F]{16,})\b)"
+    r"|(?P<DUR>\b\d+(?:\.\d+)?(?:ns|us|µs|ms|s|m|h)\b)"
+    r"|(?P<NUM>(?<![A-Za-z_])[-+]?\d+(?:\.\d+)?(?![A-Za-z_]))"
+)
+_MASK_TOKENS = {name: f"<{name}>" for name in _MASK.groupindex}
+_HAS_DIGIT = re.compile(r"\d")
+
+# RFC3339 prefix added by `kubectl logs --timestamps`, and common in-line timestamps
+_KUBECTL_TS = re.compile(r"^(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d+)?(?:Z|[+-]\d{2}:?\d{2})) ")
+_INLINE_TS = re.compile(r"^\[?\d{4}[-/]\d{2}[-/]\d{2}[ T]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?\]?\s*")
+
+# Upper-case level words are matched case-sensitively so prose like "0 errors" is not an error line
+_ERROR_LINE = re.compile(
+    r"\b(?:ERROR|ERR|FATAL|CRITICAL|CRIT|PANIC|SEVERE)\b"
+    r"|(?i:level=(?:error|fatal|panic|critical)\b)"
+    r"|(?i:\"(?:level|severity)\"\s*:\s*\"(?:error|fatal|panic|critical)\")"
+    r"|^[EF]\d{4} "
+    r"|^panic:|Traceback \(most recent call last\)|Exception\b"
+)
+# Substrings every _ERROR_LINE match (other than klog's E/F prefix) contains, lower-cased
+_ERROR_HINTS = ("err", "fatal", "crit", "panic", "severe", "exception", "traceback")
+
+
+def is_error_line(line: str) -> bool:
+    # Cheap substring prefilter; most lines are not errors and skip the regex entirely
+    if line[:1] not in ("E", "F"):
+        low = line.lower()
+        if not any(hint in low for hint in _ERROR_HINTS):
+            return False
+    return _ERROR_LINE.search(line) is not None
+
+
+def _mask_token(m: re.Match) -> str:
+    return _MASK_TOKENS[m.lastgroup]
+
+
+def mask(line: str) -> str:
+    if _HAS_DIGIT.search(line) is None:
+        return line
+    return _MASK.sub(_mask_token, line)
+
+
+class _Cluster:
+    __slots__ = ("id", "tokens", "count", "first", "last", "samples")
+
+    def __init__(self, cid: int, tokens: list[str], ts: str, sample: str):
+        self.id = cid
+        self.tokens = tokens
+        self.count = 1
+        self.first = ts
+        self.last = ts
+        self.samples = [sample]
+
+    @property
+    def template(self) -> str:
+        return " ".join(self.tokens)
+
+
+class LogMiner:
+    """
+    Drain-style online template miner.
+    Lines are routed by token count and their first `depth - 2` tokens to a leaf of
+    candidate clusters; a line joins the most similar cluster above `similarity`,
+    with differing positions generalized to `<*>`, or starts a new cluster.
+    """
+
+    def __init__(
+        self,
+        depth: int = 4,
+        similarity: float = 0.5,
+        max_children: int = 100,
+        max_clusters: int = 1000,
+        max_samples: int = 3,
+        max_error_lines: int = 200,
+        max_line_length: int = 2048,
+    ):
+        self.depth = max(depth, 3)
+        self.similarity = similarity
+        self.max_children = max_children
+        self.max_clusters = max_clusters
+        self.max_samples = max_samples
+        self.max_error_lines = max_error_lines
+        self.max_line_length = max_line_length
+
+        self._root: dict = {}
+        self._clusters: OrderedDict[int, _Cluster] = OrderedDict()
+        self._next_id = 0
+        self.lines = 0
+        self.bytes = 0
+        self.evicted_lines = 0
+        self.error_lines: list[str] = []
+        self.errors_dropped = 0
+        self.first_ts = ""
+        self.last_ts = ""
+
+    # ── ingestion ──────────────────────────────────────────────────────────────
+
+    def feed(self, line: str) -> None:
+        line = line.rstrip("\r\n")
+        if not line:
+            return
+        self.lines += 1
+        self.bytes += len(line) + 1
+
+        ts = ""
+        m = _KUBECTL_TS.match(line)
+        if m:
+            ts = m.group(1)
+            line = line[m.end():]
+        else:
+            m = _INLINE_TS.match(line)
+            if m:
+                ts = m.group(0).strip(" []")
+                line = line[m.end():]
+        if ts:
+            self.first_ts = self.first_ts or ts
+            self.last_ts = ts
+
+        if len(line) > self.max_line_length:
+            line = line[: self.max_line_length]
+
+        if is_error_line(line):
+            if len(self.error_lines) < self.max_error_lines:
+                self.error_lines.append(f"{ts} {line}" if ts else line)
+            else:
+                self.errors_dropped += 1
+
+        tokens = mask(line).split()
+        if not tokens:
+            return
+        self._add(tokens, ts, line)
+
+    def _leaf(self, tokens: list[str]) -> list[int]:
+        node = self._root.setdefault(len(tokens), {})
+        for tok in tokens[: self.depth - 2]:
+            key = WILDCARD if tok.startswith("<") or _HAS_DIGIT.search(tok) else tok
+            if key not in node:
+                if len(node) >= self.max_children:
+                    key = WILDCARD
+                node = node.setdefault(key, {})
+            else:
+                node = node[key]
+        return node.setdefault(None, [])
+
+    def _add(self, tokens: list[str], ts: str, raw: str) -> None:
+        leaf = self._leaf(tokens)
+        best: Optional[_Cluster] = None
+        best_sim = -1.0
+        best_params = 0
+        live = []
+        for cid in leaf:
+            cluster = self._clusters.get(cid)
+            if cluster is None:
+                continue
+            live.append(cid)
+            same = params = 0
+            for a, b in zip(cluster.tokens, tokens):
+                if a == WILDCARD:
+                    params += 1
+                elif a == b:
+                    same += 1
+            sim = same / len(tokens)
+            if sim > best_sim or (sim == best_sim and params > best_params):
+                best, best_sim, best_params = cluster, sim, params
+        if len(live) != len(leaf):
+            leaf[:] = live
+
+        if best is not None and best_sim >= self.similarity:
+            if best.tokens != tokens:
+                best.tokens = [a if a == b else WILDCARD for a, b in zip(best.tokens, tokens)]
+            best.count += 1
+            best.last = ts or best.last
+            if len(best.samples) < self.max_samples and raw not in best.samples:
+                best.samples.append(raw)
+            self._clusters.move_to_end(best.id)
+            return
+
+        cluster = _Cluster(self._next_id, tokens, ts, raw)
+        self._next_id += 1
+        self._clusters[cluster.id] = cluster
+        leaf.append(cluster.id)
+        if len(self._clusters) > self.max_clusters:
+            # Least recently matched template goes; its lines stay counted
+            _, victim = self._clusters.popitem(last=False)
+            self.evicted_lines += victim.count
+
+    # ── reporting ──────────────────────────────────────────────────────────────
+
+    @property
+    def templates(self) -> list[_Cluster]:
+        return sorted(self._clusters.values(), key=lambda c: c.count, reverse=True)
+
+    def summary(self, max_templates: int = 50, max_chars: int | None = None) -> str:
+        templates = self.templates
+        lines = [
+            f"Log summary: {self.lines} lines ({self.bytes} bytes), "
+            f"{len(templates)} templates, {len(self.error_lines) + self.errors_dropped} error lines"
+        ]
+        if self.first_ts:
+            lines.append(f"Time range: {self.first_ts} → {self.last_ts}")
+        if self.evicted_lines:
+            lines.append(f"({self.evicted_lines} lines belonged to rare templates evicted from memory)")
+
+        if self.error_lines:
+            lines += ["", f"Error lines (verbatim, {len(self.error_lines)} shown):"]
+            lines += [f"  {e}" for e in self.error_lines]
+            if self.errors_dropped:
+                lines.append(f"  ... {self.errors_dropped} more error lines (counted in templates below)")
+
+        lines += ["", "Templates (by count):"]
+        for c in templates[:max_templates]:
+            span = f" {c.first} → {c.last}" if c.first else ""
+            lines.append(f"  [{c.count:>8}]{span} {c.template}")
+            if WILDCARD in c.tokens or "<" in c.template:
+                for sample in c.samples:
+                    lines.append(f"      e.g. {sample[:300]}")
+        if len(templates) > max_templates:
+            rest = sum(c.count for c in templates[max_templates:])
+            lines.append(f"  ... {len(templates) - max_templates} more templates covering {rest} lines")
+
+        text = "\n".join(lines)
+        if max_chars is not None and len(text) > max_chars:
+            text = text[:max_chars] + "\n... summary truncated"
+        return text
+
+
+async def mine_stream(stream: asyncio.StreamReader, miner: LogMiner, chunk_size: int = 1 << 16) -> None:
+    """Feed a byte stream to `miner` line by line without buffering it whole."""
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+    pending = ""
+    while True:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
+            break
+        text = pending + decoder.decode(chunk)
+        lines = text.split("\n")
+        pending = lines.pop()
+        for line in lines:
+            miner.feed(line)
+        if len(pending) > miner.max_line_length * 4:
+            # Unterminated giant line: keep the head, drop the rest
+            miner.feed(pending)
+            pending = ""
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        miner.feed(pending)
+
+
+async def summarize_logs(argv: list[str], timeout: float, max_chars: int | None = None) -> CommandResult:
+    """Run a `kubectl logs` argv (with --timestamps added) and return its template summary."""
+    if "--timestamps" not in argv and not any(a.startswith("--timestamps=") for a in argv):
+        argv = [*argv, "--timestamps"]
+    start_ts = time.time()
+    miner = LogMiner()
+
+    proc = await spawn(argv)
+    try:
+        _, err = await asyncio.wait_for(
+            asyncio.gather(mine_stream(proc.stdout, miner), proc.stderr.read()), timeout
+        )
+        await proc.wait()
+    except asyncio.CancelledError:
+        await asyncio.shield(terminate(proc))
+        raise
+    except asyncio.TimeoutError:
+        await terminate(proc)
+        return CommandResult(
+            status="error",
+            output=f"Command timed out after {timeout}s\n" + miner.summary(max_chars=max_chars),
+            exit_code=-1,
+        )
+
+    exit_code = proc.returncode if proc.returncode is not None else -1
+    if exit_code != 0 and miner.lines == 0:
+        return CommandResult(
+            status="error",
+            output=err.decode("utf-8", "replace"),
+            exit_code=exit_code,
+        )
+    return CommandResult(
+        status="success" if exit_code == 0 else "error",
+        output=miner.summary(max_chars=max_chars),
+        exit_code=exit_code,
+        execution_time=time.time() - start_ts,
+    )
@@ -0,0 +1,243 @@
+# src/kube_ai_proxy/loopwatch.py
+
+"""
+Event-loop lag watchdog for Kube AI Proxy.
+
+One asyncio loop serves every client, so any synchronous step that runs long on
+it stalls them all: a big decode or parse, file I/O, a nested asyncio.run.
+  - LoopWatchdog: a heartbeat callback on the loop plus a thread that checks it. If
+    the heartbeat is more than K8S_MCP_LOOP_LAG_THRESHOLD seconds late, the thread
+    captures the loop thread's stack and the tool call being served and logs them
+    at once. When the loop comes back, the stall is logged with its full length and
+    counted per tool
+  - Offloader.run: run a known-heavy synchronous step (decode, JSON parse, YAML/JSON
+    noise stripping) inline when it is predicted to fit K8S_MCP_OFFLOAD_BUDGET_MS,
+    else in a worker thread. The prediction is a per-step cost per input byte,
+    learned from past runs
+  - decode / loads_json: offloaded wrappers of the most common steps
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional
+
+from kube_ai_proxy import activity
+from kube_ai_proxy.config import (
+    LOOP_LAG_INTERVAL,
+    LOOP_LAG_THRESHOLD,
+    LOOP_WATCHDOG_ENABLED,
+    OFFLOAD_BUDGET,
+)
+from kube_ai_proxy.metrics import METRICS
+
+logger = logging.getLogger("kube_ai_proxy.loopwatch")
+
+STACK_LIMIT = 40
+
+# Starting estimates in seconds per input byte, replaced by measurements
+STEP_COSTS = {
+    "decode": 1e-9,
+    "json": 2e-8,
+    "strip": 1e-7,
+}
+DEFAULT_STEP_COST = 1e-7
+EWMA_WEIGHT = 0.2
+# Smaller inputs are dominated by call overhead and would skew the per-byte cost
+MIN_LEARN_SIZE = 64 * 1024
+
+
+@dataclass
+class Stall:
+    """A late heartbeat as seen by the watchdog thread."""
+    beat: float  # monotonic time of the last heartbeat before the stall
+    detected: float
+    call: Optional[activity.ToolCall]
+    task: str
+    stack: list[str] = field(default_factory=list)
+    running: list[activity.ToolCall] = field(default_factory=list)
+
+    def culprit(self) -> str:
+        if self.call is not None:
+            return str(self.call)
+        return f"task {self.task}" if self.task else "no task (loop callback)"
+
+
+class LoopWatchdog:
+    """Loop heartbeat and the thread watching it."""
+
+    def __init__(
+        self,
+        threshold: float = LOOP_LAG_THRESHOLD,
+        interval: float = LOOP_LAG_INTERVAL,
+        enabled: bool = LOOP_WATCHDOG_ENABLED,
+    ):
+        self.threshold = threshold
+        self.interval = interval
+        self.enabled = enabled and threshold > 0 and interval > 0
+        self.max_lag = 0.0
+        self.stalls = 0
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._beat = 0.0
+        self._stall: Optional[Stall] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        # The watching thread and the watched loop stay with the parent
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._loop = self._loop_thread = None
+        self._stall = None
+
+    def start(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Watch `loop` (default: the running one); call from the loop's thread. Idempotent per loop."""
+        loop = loop or asyncio.get_running_loop()
+        if not self.enabled or loop is self._loop:
+            return
+        self.stop()
+        self._stop = threading.Event()
+        self._loop, self._loop_thread = loop, threading.get_ident()
+        self._beat = time.monotonic()
+        loop.call_later(self.interval, self._heartbeat, self._beat + self.interval)
+        self._thread = threading.Thread(
+            target=self._watch, args=(self._stop,), name="kube-ai-proxy-loopwatch", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._loop = None
+
+    def _heartbeat(self, due: float) -> None:
+        if self._loop is None or self._loop.is_closed():
+            return
+        now = time.monotonic()
+        lag = now - due
+        self._beat = now
+        with self._lock:
+            stall, self._stall = self._stall, None
+        if lag > self.max_lag:
+            self.max_lag = lag
+            METRICS.set("loop_lag_max_seconds", round(lag, 4))
+        METRICS.set("loop_lag_seconds", round(max(lag, 0.0), 4))
+        if stall is not None and now - stall.beat - self.interval >= self.threshold:
+            self._report(stall, now - stall.beat - self.interval)
+        self._loop.call_later(self.interval, self._heartbeat, now + self.interval)
+
+    def _watch(self, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            beat = self._beat
+            if time.monotonic() - beat - self.interval < self.threshold:
+                continue
+            with self._lock:
+                if self._stall is not None and self._stall.beat == beat:
+                    continue  # this stall is already captured
+            try:
+                stall = self._capture(beat)
+            except Exception as e:
+                logger.debug(f"Loop stall capture failed: {e}")
+                continue
+            with self._lock:
+                if self._beat != beat:
+                    continue  # the loop came back while the stack was taken
+                self._stall = stall
+            logger.warning(
+                f"Event loop blocked for {stall.detected - beat - self.interval:.2f}s so far in "
+                f"{stall.culprit()}; loop thread stack:\n" + "".join(stall.stack).rstrip()
+            )
+
+    def _capture(self, beat: float) -> Stall:
+        loop = self._loop
+        task = asyncio.tasks._current_tasks.get(loop) if loop is not None else None
+        coro = task.get_coro() if task is not None else None
+        frame = sys._current_frames().get(self._loop_thread)
+        return Stall(
+            beat=beat,
+            detected=time.monotonic(),
+            call=activity.call_for_task(task),
+            task=getattr(coro, "__qualname__", "") if coro is not None else "",
+            stack=traceback.format_stack(frame, limit=STACK_LIMIT) if frame is not None else [],
+            running=activity.running_calls(),
+        )
+
+    def _report(self, stall: Stall, length: float) -> None:
+        self.stalls += 1
+        tool = stall.call.tool if stall.call is not None else "-"
+        METRICS.inc("loop_stalls_total", tool=tool)
+        METRICS.inc("loop_stall_seconds_total", round(length, 4), tool=tool)
+        others = [str(c) for c in stall.running if c != stall.call]
+        logger.warning(
+            f"Event loop was blocked for {length:.2f}s in {stall.culprit()}"
+            + (f"; also waiting: {', '.join(others)}" if others else "")
+        )
+
+
+class Offloader:
+    """Runs synchronous steps inline or in a worker thread, by their predicted cost."""
+
+    def __init__(self, budget: float = OFFLOAD_BUDGET):
+        self.budget = budget
+        self._cost = dict(STEP_COSTS)
+
+    def predict(self, step: str, size: int) -> float:
+        return self._cost.get(step, DEFAULT_STEP_COST) * size
+
+    def _learn(self, step: str, size: int, elapsed: float) -> None:
+        if size < MIN_LEARN_SIZE:
+            return
+        cost = self._cost.get(step, DEFAULT_STEP_COST)
+        self._cost[step] = cost + EWMA_WEIGHT * (elapsed / size - cost)
+
+    def _timed(self, step: str, size: int, fn: Callable[..., Any], *args) -> Any:
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self._learn(step, size, time.perf_counter() - start)
+
+    async def run(self, step: str, fn: Callable[..., Any], *args, size: int) -> Any:
+        """fn(*args), in a worker thread when `size` bytes of input make it too slow for the loop."""
+        if self.predict(step, size) <= self.budget:
+            METRICS.inc("offload_steps_total", step=step, where="inline")
+            return self._timed(step, size, fn, *args)
+        METRICS.inc("offload_steps_total", step=step, where="thread")
+        return await asyncio.to_thread(self._timed, step, size, fn, *args)
+
+
+# Initialize once
+WATCHDOG = LoopWatchdog()
+OFFLOADER = Offloader()
+
+
+def start_loop_watchdog(loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+    WATCHDOG.start(loop)
+
+
+async def offload(step: str, fn: Callable[..., Any], *args, size: int) -> Any:
+    return await OFFLOADER.run(step, fn, *args, size=size)
+
+
+def _decode(data: bytes) -> str:
+    return data.decode("utf-8", "replace")
+
+
+async def decode(data: bytes) -> str:
+    """UTF-8 decode with replacement, off the loop for large outputs."""
+    return await OFFLOADER.run("decode", _decode, data, size=len(data))
+
+
+async def loads_json(data: str | bytes) -> Any:
+    """json.loads, off the loop for large documents."""
+    return await OFFLOADER.run("json", json.loads, data, size=len(data))
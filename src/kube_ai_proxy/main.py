@@ -19,9 +19,24 @@ logging.basicConfig(
 logger = logging.getLogger("kube-ai-proxy")
 
 
+def cleanup():
+    """Release what a serving process holds: child process groups and queued audit records."""
+    # Don't leave running kubectl/helm process groups behind
+    from kube_ai_proxy.cli_executor import terminate_all
+    terminated = terminate_all()
+    if terminated:
+        logger.info(f"Terminated {terminated} running child process groups")
+    from kube_ai_proxy.spawn_server import SPAWNER
+    SPAWNER.close()
+    # Flush queued audit records
+    from kube_ai_proxy.audit import AUDIT
+    AUDIT.close()
+
+
 def handle_interrupt(signum, frame):
     """Gracefully handle termination signals."""
     logger.info(f"Received signal {signum}, shutting down gracefully...")
+    cleanup()
     sys.exit(0)
 
 
@@ -31,6 +46,12 @@ def main():
     signal.signal(signal.SIGINT, handle_interrupt)
     signal.signal(signal.SIGTERM, handle_interrupt)
 
+    # 1b) Start the spawn helper while this process is still small
+    from kube_ai_proxy.config import SPAWN_SERVER_ENABLED
+    if SPAWN_SERVER_ENABLED:
+        from kube_ai_proxy.spawn_server import SPAWNER
+        SPAWNER.start()
+
     # 2) Verify we can import FastMCP from the 'fastmcp' package
     try:
         from fastmcp import FastMCP
@@ -40,12 +61,15 @@ def main():
         sys.exit(1)
 
     # 3) Import your configured server instance (built in kube_ai_proxy/mcp/__init__.py)
-    from kube_ai_proxy.config import MCP_TRANSPORT
+    from kube_ai_proxy.config import MCP_TRANSPORT, MCP_WORKERS
     from kube_ai_proxy.mcp import mcp  # this 'mcp' is your FastMCP() instance
+    from kube_ai_proxy.server import serve
 
     # 4) Validate transport option
     transport = MCP_TRANSPORT.lower()
-    if transport not in ("stdio", "sse"):
+    if transport == "http":
+        transport = "streamable-http"
+    if transport not in ("stdio", "sse", "streamable-http"):
         logger.error(
             f"Invalid transport protocol '{transport}' specified. Defaulting to 'stdio'."
         )
@@ -53,7 +77,7 @@ def main():
 
     logger.info(f"Starting Kube AI Proxy MCP server with '{transport}' transport")
     # 5) Run the server (this blocks until shutdown)
-    mcp.run(transport=transport)
+    serve(mcp, transport, workers=MCP_WORKERS, on_exit=cleanup)
 
 
 if __name__ == "__main__":
@@ -17,15 +17,26 @@ from kube_ai_proxy.config import (
     DEFAULT_TIMEOUT,
     K8S_CONTEXT,
     K8S_NAMESPACE,
+    MULTI_WORKER,
 )
+from kube_ai_proxy.activity import on_loop, track
 from kube_ai_proxy.cli_executor import run_startup_checks
+from kube_ai_proxy.discovery import prewarm_discovery
+from kube_ai_proxy.loopwatch import start_loop_watchdog
 from kube_ai_proxy.prompts import register_prompts
 
 # 3) Executor functions (plain async funcs, defined in their modules)
-from kube_ai_proxy.executor.kubectl import describe_kubectl, execute_kubectl
-from kube_ai_proxy.executor.helm    import describe_helm,    execute_helm
-from kube_ai_proxy.executor.istioctl import describe_istioctl, execute_istioctl
-from kube_ai_proxy.executor.argocd  import describe_argocd,  execute_argocd
+from kube_ai_proxy.executor.kubectl import (
+    describe_kubectl, execute_kubectl, collect_pod_logs, troubleshoot_bundle, cluster_inventory,
+    wait_for_rollouts, query_top_metrics,
+)
+from kube_ai_proxy.executor.helm    import describe_helm,    execute_helm, search_helm_charts
+from kube_ai_proxy.executor.istioctl import (
+    describe_istioctl, execute_istioctl, query_proxy_config, analyze_istio_mesh,
+)
+from kube_ai_proxy.executor.argocd  import describe_argocd,  execute_argocd, argocd_app_overview
+from kube_ai_proxy.executor.jobs    import submit_job, get_job, wait_job, cancel_job, list_jobs
+from kube_ai_proxy.executor.proxy   import proxy_metrics, profile_proxy
 
 # 4) (Optional) RBACChecker for middleware
 from kube_ai_proxy.security.rbac_checker import RBACChecker
@@ -38,6 +49,10 @@ logger = logging.getLogger("kube-ai-proxy.mcp")
 cli_status = run_startup_checks(SUPPORTED_CLI_TOOLS)
 logger.info(f"CLI tools installed status: {cli_status}")
 
+# Prewarm the shared discovery cache and the in-memory API resource index
+if cli_status.get("kubectl"):
+    prewarm_discovery()
+
 #
 # 6) Instantiate one global FastMCP server
 #
@@ -50,6 +65,21 @@ mcp = FastMCP(
 # 7) Middleware: inject defaults into each request’s Context.locals
 #
 
+# Every registered tool is wrapped so its calls show up in the activity table
+# (profiler attribution); the wrapper keeps the tool's name and signature
+_register_tool = mcp.tool
+
+
+def _tracked_tool(*args, **kwargs):
+    register = _register_tool(*args, **kwargs)
+    return lambda fn: register(track(fn))
+
+
+mcp.tool = _tracked_tool
+
+# The first tracked call reveals the serving loop; watch it for stalls from then on
+on_loop(start_loop_watchdog)
+
 
 #
 # 10) Register prompt templates
@@ -58,9 +88,30 @@ register_prompts(mcp)
 
 mcp.tool(description="Get kubectl help text")(    describe_kubectl)
 mcp.tool(description="Execute kubectl commands")( execute_kubectl)
+mcp.tool(description="Collect time-ordered logs from all pods of a workload or selector")(collect_pod_logs)
+mcp.tool(description="Collect a prioritized troubleshooting bundle for one resource in a single call")(troubleshoot_bundle)
+mcp.tool(description="Count cluster objects by type and namespace without returning them")(cluster_inventory)
+mcp.tool(description="Wait for the rollouts of many Deployments, StatefulSets and DaemonSets at once")(wait_for_rollouts)
+mcp.tool(description="Trends, percentiles and top movers of pod/node CPU and memory from sampled kubectl top")(query_top_metrics)
 mcp.tool(description="Get Helm help text")(       describe_helm)
 mcp.tool(description="Execute Helm commands")(    execute_helm)
+mcp.tool(description="Search indexed Helm repository charts")(search_helm_charts)
 mcp.tool(description="Get istioctl help text")(   describe_istioctl)
 mcp.tool(description="Execute istioctl commands")(execute_istioctl)
+mcp.tool(description="Query indexed Envoy proxy-config snapshots")(query_proxy_config)
+mcp.tool(description="Incremental istioctl analyze with per-namespace caching")(analyze_istio_mesh)
 mcp.tool(description="Get ArgoCD help text")(     describe_argocd)
 mcp.tool(description="Execute ArgoCD commands")(  execute_argocd)
+mcp.tool(description="Summarize health and sync status of ArgoCD applications")(argocd_app_overview)
+# Jobs live in the memory of the worker that started them, while pre-forked workers
+# take requests in any order, so job tools are offered by single-process servers only
+if not MULTI_WORKER:
+    mcp.tool(description="Run a long-running command as a background job")(submit_job)
+    mcp.tool(description="Get a background job's state and new output")(get_job)
+    mcp.tool(description="Wait for a background job with a deadline")(wait_job)
+    mcp.tool(description="Cancel a background job")(cancel_job)
+    mcp.tool(description="List background jobs")(list_jobs)
+else:
+    logger.info("Background job tools disabled: K8S_MCP_WORKERS > 1 serves requests from any worker")
+mcp.tool(description="Show proxy internal metrics")(proxy_metrics)
+mcp.tool(description="Profile the proxy for a few seconds and report its hottest functions")(profile_proxy)
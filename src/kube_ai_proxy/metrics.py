@@ -0,0 +1,74 @@
+# src/kube_ai_proxy/metrics.py
+
+"""
+In-process metrics for Kube AI Proxy.
+
+Subsystems count what they do (audit records written and dropped, cache hits, ...)
+in one shared registry, exposed through the `proxy_metrics` tool:
+  - Metrics.inc / Metrics.set: bump a counter or set a gauge, with optional labels
+  - Metrics.render: Prometheus text exposition of every series
+"""
+
+import os
+import threading
+from typing import Optional
+
+
+def _series(name: str, labels: dict[str, object]) -> str:
+    if not labels:
+        return name
+    inner = ",".join(f'{k}="{v}"' for k, v in sorted(labels.items()))
+    return f"{name}{{{inner}}}"
+
+
+class Metrics:
+    """Counters and gauges keyed by name and label set. Safe to update from any thread."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._values: dict[str, float] = {}
+        self._kinds: dict[str, str] = {}
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        # Another thread may have held the lock at fork time
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels) -> None:
+        key = _series(name, labels)
+        with self._lock:
+            self._kinds.setdefault(name, "counter")
+            self._values[key] = self._values.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, **labels) -> None:
+        key = _series(name, labels)
+        with self._lock:
+            self._kinds.setdefault(name, "gauge")
+            self._values[key] = float(value)
+
+    def get(self, name: str, **labels) -> Optional[float]:
+        with self._lock:
+            return self._values.get(_series(name, labels))
+
+    def snapshot(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> str:
+        with self._lock:
+            values = sorted(self._values.items())
+            kinds = dict(self._kinds)
+        lines = []
+        typed = set()
+        for key, value in values:
+            name = key.partition("{")[0]
+            if name not in typed:
+                lines.append(f"# TYPE {name} {kinds.get(name, 'gauge')}")
+                typed.add(name)
+            lines.append(f"{key} {value:g}")
+        return "\n".join(lines)
+
+
+# Initialize once
+METRICS = Metrics()
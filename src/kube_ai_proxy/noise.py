@@ -0,0 +1,243 @@
+# src/kube_ai_proxy/noise.py
+
+"""
+Noise stripping for `-o yaml` / `-o json` resource output in Kube AI Proxy.
+
+Most of the bytes of `kubectl get -o yaml` are bookkeeping nobody asked about:
+metadata.managedFields, the kubectl.kubernetes.io/last-applied-configuration
+annotation, uid, resourceVersion. They are removed before output reaches the
+client, and the output keeps its format:
+  - parse_paths: noise paths like `metadata.annotations[kubectl.kubernetes.io/last-applied-configuration]`,
+    relative to each object (the List itself, or every element of its `items`)
+  - strip_yaml: line scanner over kubectl's block-style YAML; lines of noise keys
+    and their children are dropped, every other line is kept byte for byte
+  - strip_tree: the same on parsed objects, used for JSON
+  - strip_output / strip_result: pick the stripper from the command's `-o` flag
+  - denoise_result: strip_result for the executors (honours K8S_MCP_STRIP_NOISE,
+    large outputs off the event loop, see loopwatch.offload)
+Maps left empty by stripping are dropped, as are inline `{}` maps under keys
+where emptiness carries no meaning (EMPTY_KEYS); `emptyDir: {}` or a NetworkPolicy's
+`podSelector: {}` stay.
+"""
+
+import json
+import re
+from typing import Iterable, Optional
+
+from kube_ai_proxy.config import NOISE_EMPTY_KEYS, NOISE_PATHS, NOISE_STRIP_ENABLED
+from kube_ai_proxy.loopwatch import offload
+from kube_ai_proxy.metrics import METRICS
+from kube_ai_proxy.tools import CommandResult
+
+_PATH_TOKEN = re.compile(r"\[([^\]]+)\]|([^.\[\]]+)")
+# One mapping key of a block-style YAML line: optional "- " sequence markers,
+# a plain or quoted key, ":" and an optional inline value
+_KEY_LINE = re.compile(
+    r"(?P<dash>(?:- )*)(?P<key>\"(?:[^\"\\]|\\.)*\"|'(?:[^']|'')*'|[^\s\"'#-][^:]*?(?::\S[^:]*?)*|-[^\s:][^:]*?)"
+    r":(?:[ \t]+(?P<value>.*))?$"
+)
+
+
+def parse_paths(specs: Iterable[str]) -> frozenset[tuple[str, ...]]:
+    """`a.b[c.d/e]` -> ("a", "b", "c.d/e"); empty specs are ignored."""
+    paths = set()
+    for spec in specs:
+        spec = spec.strip()
+        if spec:
+            paths.add(tuple(bracketed or plain for bracketed, plain in _PATH_TOKEN.findall(spec)))
+    return frozenset(paths)
+
+
+DEFAULT_PATHS = parse_paths(NOISE_PATHS)
+EMPTY_KEYS = frozenset(k.strip() for k in NOISE_EMPTY_KEYS if k.strip())
+
+
+def _unquote(key: str) -> str:
+    if len(key) >= 2 and key[0] == key[-1] == '"':
+        try:
+            return json.loads(key)
+        except ValueError:
+            return key[1:-1]
+    if len(key) >= 2 and key[0] == key[-1] == "'":
+        return key[1:-1].replace("''", "'")
+    return key
+
+
+def _matches(path: list[str], paths: frozenset) -> bool:
+    key = tuple(path)
+    # Paths are relative to each object; List elements sit under the top-level "items"
+    return key in paths or (len(key) > 1 and key[0] == "items" and key[1:] in paths)
+
+
+class _Frame:
+    __slots__ = ("indent", "key", "line", "emitted")
+
+    def __init__(self, indent: int, key: str, line: Optional[str], emitted: bool):
+        self.indent = indent
+        self.key = key
+        self.line = line
+        self.emitted = emitted
+
+
+def strip_yaml(text: str, paths: frozenset = DEFAULT_PATHS, empty_keys: frozenset = EMPTY_KEYS) -> str:
+    """
+    Remove noise paths from block-style YAML (as printed by kubectl, one or more
+    `---`-separated documents) without re-serializing it.
+    """
+    out: list[str] = []
+    stack: list[_Frame] = []
+    skip_indent = -1   # dropping the node whose key sits at this indent
+    block_indent = -1  # inside a `|`/`>` block scalar of a key at this indent
+
+    def emit(line: str) -> None:
+        for frame in stack:
+            if not frame.emitted:
+                out.append(frame.line)
+                frame.emitted = True
+        out.append(line)
+
+    for line in text.splitlines(keepends=True):
+        content = line.strip()
+        indent = len(line) - len(line.lstrip(" "))
+        if skip_indent >= 0:
+            if not content or indent > skip_indent or (indent == skip_indent and content.startswith("- ")):
+                continue
+            skip_indent = -1
+        if block_indent >= 0:
+            if not content or indent > block_indent:
+                out.append(line)
+                continue
+            block_indent = -1
+        if not content or content.startswith("#"):
+            out.append(line)
+            continue
+        if content in ("---", "...") and indent == 0:
+            stack.clear()
+            out.append(line)
+            continue
+
+        m = _KEY_LINE.match(content)
+        dash = len(m.group("dash")) if m else (2 if content.startswith("- ") or content == "-" else 0)
+        # Sequence items close deeper frames but not the key holding the sequence
+        while stack and (stack[-1].indent > indent or (stack[-1].indent == indent and not dash)):
+            stack.pop()
+        if m is None:
+            emit(line)
+            continue
+
+        key = _unquote(m.group("key"))
+        value = (m.group("value") or "").strip()
+        key_indent = indent + dash
+        path = [f.key for f in stack] + [key]
+        if not dash and (_matches(path, paths) or (value == "{}" and key in empty_keys)):
+            # Drops the children, a block scalar or the continuation lines of a long value
+            skip_indent = indent
+            continue
+        if value[:1] in ("|", ">"):
+            block_indent = key_indent
+        if value:
+            emit(line)
+            continue
+        # A map or sequence follows; held back until a child is kept, dropped if none is
+        if dash:
+            emit(line)
+            stack.append(_Frame(key_indent, key, None, True))
+        else:
+            stack.append(_Frame(key_indent, key, line, False))
+    return "".join(out)
+
+
+def _strip_object(obj: dict, paths: frozenset) -> None:
+    for path in paths:
+        parents = [obj]
+        for key in path[:-1]:
+            child = parents[-1].get(key)
+            if not isinstance(child, dict):
+                break
+            parents.append(child)
+        else:
+            if path[-1] in parents[-1]:
+                del parents[-1][path[-1]]
+                # Drop maps the removal left empty
+                for depth in range(len(parents) - 1, 0, -1):
+                    if parents[depth]:
+                        break
+                    del parents[depth - 1][path[depth - 1]]
+
+
+def _drop_empty(node, empty_keys: frozenset) -> None:
+    if isinstance(node, dict):
+        for key in list(node):
+            value = node[key]
+            if isinstance(value, (dict, list)):
+                had_entries = bool(value)
+                _drop_empty(value, empty_keys)
+                # Emptied by the removals below it, or empty where that means nothing
+                if value == {} and (had_entries or key in empty_keys):
+                    del node[key]
+    elif isinstance(node, list):
+        for value in node:
+            _drop_empty(value, empty_keys)
+
+
+def strip_tree(doc, paths: frozenset = DEFAULT_PATHS, empty_keys: frozenset = EMPTY_KEYS):
+    """Remove noise paths from a parsed object or List in place; returns it."""
+    if not isinstance(doc, dict):
+        return doc
+    _strip_object(doc, paths)
+    items = doc.get("items")
+    if isinstance(items, list):
+        for item in items:
+            if isinstance(item, dict):
+                _strip_object(item, paths)
+    _drop_empty(doc, empty_keys)
+    return doc
+
+
+def strip_json(text: str, paths: frozenset = DEFAULT_PATHS, empty_keys: frozenset = EMPTY_KEYS) -> str:
+    doc = strip_tree(json.loads(text), paths, empty_keys)
+    # kubectl prints 4-space indented JSON
+    return json.dumps(doc, indent=4, ensure_ascii=False) + ("\n" if text.endswith("\n") else "")
+
+
+def output_format(argv: list[str]) -> Optional[str]:
+    """"yaml" or "json" when the command asks for that output format, else None."""
+    fmt = None
+    for i, tok in enumerate(argv):
+        name, eq, value = tok.partition("=")
+        if name in ("-o", "--output"):
+            fmt = value if eq else (argv[i + 1] if i + 1 < len(argv) else "")
+        elif name.startswith("-o") and len(name) > 2 and not name.startswith("--"):
+            fmt = name[2:]
+    return fmt if fmt in ("yaml", "json") else None
+
+
+def strip_output(text: str, fmt: str, paths: frozenset = DEFAULT_PATHS, empty_keys: frozenset = EMPTY_KEYS) -> str:
+    """Stripped output in the same format; the text unchanged if it is not of that format."""
+    if fmt == "json":
+        if not text.lstrip().startswith("{"):
+            return text
+        try:
+            return strip_json(text, paths, empty_keys)
+        except ValueError:
+            return text
+    return strip_yaml(text, paths, empty_keys)
+
+
+def strip_result(argv: list[str], result: CommandResult) -> CommandResult:
+    """Strip the output of a successful `-o yaml|json` command; other results are returned as-is."""
+    fmt = output_format(argv)
+    if fmt is None or result.get("exit_code") != 0 or not DEFAULT_PATHS and not EMPTY_KEYS:
+        return result
+    before = result.get("output", "")
+    after = strip_output(before, fmt)
+    METRICS.inc("noise_bytes_total", len(before), stage="before")
+    METRICS.inc("noise_bytes_total", len(after), stage="after")
+    return CommandResult(**{**result, "output": after})
+
+
+async def denoise_result(argv: list[str], result: CommandResult) -> CommandResult:
+    """strip_result when enabled; outputs too large to strip on the loop go to a worker thread."""
+    if not NOISE_STRIP_ENABLED or output_format(argv) is None:
+        return result
+    return await offload("strip", strip_result, argv, result, size=len(result.get("output", "")))
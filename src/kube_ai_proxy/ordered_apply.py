@@ -0,0 +1,476 @@
+# src/kube_ai_proxy/ordered_apply.py
+
+"""
+Dependency-ordered parallel apply for Kube AI Proxy.
+
+`kubectl apply -f dir/` sends hundreds of manifests one after another through one
+process, and fails on ordering: a custom resource before its CRD, a namespaced
+object before its Namespace. The ordered apply parses the manifest set, builds
+the dependency graph and applies it in waves, each wave in concurrent batches
+of server-side apply:
+  - load_manifests: the objects of `-f` files and directories (`-R` to recurse),
+    List objects expanded
+  - build_plan: categories (CRDs -> namespaces -> RBAC/config -> workloads -> custom
+    resources and everything else) become waves; dependency edges (CR -> CRD,
+    object -> Namespace, workload -> ServiceAccount/ConfigMap/Secret/PVC,
+    binding -> Role) are kept for reporting and for skipping dependents of failures
+  - render_plan: the wave plan (dry-run planning mode)
+  - apply_plan: apply wave by wave; CRDs are waited for until established. A failed
+    object is an early abort: batches not started yet and later waves are skipped
+  - ordered_apply: entry point for a `kubectl apply -f ...` argv; `--dry-run`
+    prints the plan, `--dry-run=server` validates it batch by batch
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shlex
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+import yaml
+
+from kube_ai_proxy.cli_executor import communicate, spawn
+from kube_ai_proxy.config import APPLY_BATCH_SIZE, APPLY_CONCURRENCY, APPLY_FIELD_MANAGER
+from kube_ai_proxy.discovery import RESOURCE_INDEX
+from kube_ai_proxy.prefetch import PREFETCHER
+from kube_ai_proxy.throttle import THROTTLE
+from kube_ai_proxy.tools import command_scope
+
+logger = logging.getLogger("kube_ai_proxy.ordered_apply")
+
+_Loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+MANIFEST_SUFFIXES = (".yaml", ".yml", ".json")
+CRD_ESTABLISH_TIMEOUT = 60
+
+CATEGORIES = ("CRDs", "namespaces", "RBAC/config", "workloads", "custom resources and others")
+_CATEGORY_KINDS = {
+    "CustomResourceDefinition": 0,
+    "Namespace": 1,
+    **dict.fromkeys((
+        "ServiceAccount", "Role", "ClusterRole", "RoleBinding", "ClusterRoleBinding", "ConfigMap",
+        "Secret", "Service", "Endpoints", "EndpointSlice", "PersistentVolume", "PersistentVolumeClaim",
+        "StorageClass", "PriorityClass", "ResourceQuota", "LimitRange", "NetworkPolicy", "IngressClass",
+        "RuntimeClass",
+    ), 2),
+    **dict.fromkeys((
+        "Deployment", "StatefulSet", "DaemonSet", "ReplicaSet", "ReplicationController", "Job", "CronJob",
+        "Pod", "HorizontalPodAutoscaler", "PodDisruptionBudget", "Ingress",
+    ), 3),
+}
+# Used when discovery does not know a kind
+_CLUSTER_SCOPED = {
+    "Namespace", "Node", "PersistentVolume", "StorageClass", "PriorityClass", "ClusterRole",
+    "ClusterRoleBinding", "CustomResourceDefinition", "APIService", "IngressClass", "RuntimeClass",
+    "MutatingWebhookConfiguration", "ValidatingWebhookConfiguration", "CSIDriver",
+    "ValidatingAdmissionPolicy", "ValidatingAdmissionPolicyBinding",
+}
+# Dependencies a server-side dry run cannot see, as they are never persisted
+_CREATES_API = {"CustomResourceDefinition", "Namespace"}
+_POD_OWNERS = {"Deployment", "StatefulSet", "DaemonSet", "ReplicaSet", "ReplicationController", "Job"}
+
+
+@dataclass
+class Manifest:
+    obj: dict
+    source: str
+    group: str
+    kind: str
+    name: str
+    namespace: Optional[str]  # None for cluster-scoped objects
+    category: int = 4
+    deps: set[int] = field(default_factory=set)
+
+    @property
+    def ref(self) -> str:
+        kind = f"{self.kind.lower()}.{self.group}" if self.group else self.kind.lower()
+        return f"{kind}/{self.name}" + (f" -n {self.namespace}" if self.namespace else "")
+
+
+@dataclass
+class Plan:
+    manifests: list[Manifest]
+    waves: list[list[int]]
+
+
+# ─── Loading ────────────────────────────────────────────────────────────────────
+
+def _files(paths: list[str], recursive: bool) -> list[Path]:
+    files = []
+    for p in map(Path, paths):
+        if p.is_dir():
+            found = p.rglob("*") if recursive else p.iterdir()
+            files += sorted(f for f in found if f.is_file() and f.suffix in MANIFEST_SUFFIXES)
+        elif p.is_file():
+            files.append(p)
+        else:
+            raise ValueError(f"{p}: no such file or directory")
+    return files
+
+
+def load_manifests(paths: list[str], recursive: bool = False) -> list[dict]:
+    """Every object in the given files/directories as (source, object) dicts; Lists are expanded."""
+    objects = []
+    for path in _files(paths, recursive):
+        try:
+            with open(path, encoding="utf-8") as fh:
+                docs = list(yaml.load_all(fh, Loader=_Loader))
+        except (OSError, yaml.YAMLError) as e:
+            raise ValueError(f"{path}: {e}") from None
+        stack = [d for d in reversed(docs) if d]
+        while stack:
+            doc = stack.pop()
+            if not isinstance(doc, dict):
+                raise ValueError(f"{path}: not a Kubernetes object")
+            if doc.get("kind", "").endswith("List") and isinstance(doc.get("items"), list):
+                stack.extend(reversed([i for i in doc["items"] if i]))
+                continue
+            objects.append({"source": str(path), "object": doc})
+    return objects
+
+
+# ─── Planning ───────────────────────────────────────────────────────────────────
+
+def _namespaced(group: str, kind: str, crd_scopes: dict[tuple[str, str], bool]) -> bool:
+    if (group, kind) in crd_scopes:
+        return crd_scopes[(group, kind)]
+    res = RESOURCE_INDEX.resolve(f"{kind}.{group}" if group else kind)
+    if res is not None and res.kind == kind:
+        return res.namespaced
+    return kind not in _CLUSTER_SCOPED
+
+
+def _pod_refs(obj: dict) -> set[tuple[str, str]]:
+    """(kind, name) of the ServiceAccount, ConfigMaps, Secrets and PVCs a pod template uses."""
+    spec = obj.get("spec") or {}
+    if obj.get("kind") == "CronJob":
+        spec = ((spec.get("jobTemplate") or {}).get("spec") or {})
+    if obj.get("kind") != "Pod":
+        spec = ((spec.get("template") or {}).get("spec") or {})
+    refs = set()
+    if spec.get("serviceAccountName"):
+        refs.add(("ServiceAccount", spec["serviceAccountName"]))
+    for vol in spec.get("volumes") or []:
+        if (vol.get("configMap") or {}).get("name"):
+            refs.add(("ConfigMap", vol["configMap"]["name"]))
+        if (vol.get("secret") or {}).get("secretName"):
+            refs.add(("Secret", vol["secret"]["secretName"]))
+        if (vol.get("persistentVolumeClaim") or {}).get("claimName"):
+            refs.add(("PersistentVolumeClaim", vol["persistentVolumeClaim"]["claimName"]))
+    for c in (spec.get("containers") or []) + (spec.get("initContainers") or []):
+        for src in c.get("envFrom") or []:
+            if (src.get("configMapRef") or {}).get("name"):
+                refs.add(("ConfigMap", src["configMapRef"]["name"]))
+            if (src.get("secretRef") or {}).get("name"):
+                refs.add(("Secret", src["secretRef"]["name"]))
+    return refs
+
+
+def build_plan(objects: list[dict], default_namespace: Optional[str] = None) -> Plan:
+    """Order objects into waves; raises ValueError for objects without kind or name."""
+    crd_scopes: dict[tuple[str, str], bool] = {}
+    for item in objects:
+        obj = item["object"]
+        if obj.get("kind") == "CustomResourceDefinition":
+            spec = obj.get("spec") or {}
+            crd_scopes[(spec.get("group", ""), (spec.get("names") or {}).get("kind", ""))] = spec.get("scope") != "Cluster"
+
+    manifests: list[Manifest] = []
+    for item in objects:
+        obj, source = item["object"], item["source"]
+        kind = obj.get("kind")
+        meta = obj.get("metadata") or {}
+        name = meta.get("name")
+        if not kind or not name:
+            raise ValueError(f"{source}: object without kind or metadata.name")
+        group = obj.get("apiVersion", "").rpartition("/")[0]
+        namespace = None
+        if _namespaced(group, kind, crd_scopes):
+            namespace = meta.get("namespace") or default_namespace or "default"
+        manifests.append(Manifest(obj, source, group, kind, name, namespace, _CATEGORY_KINDS.get(kind, 4)))
+
+    index = {(m.kind, m.namespace, m.name): i for i, m in enumerate(manifests)}
+    crds = {}
+    for i, m in enumerate(manifests):
+        if m.kind == "CustomResourceDefinition":
+            spec = m.obj.get("spec") or {}
+            crds[(spec.get("group", ""), (spec.get("names") or {}).get("kind", ""))] = i
+    for i, m in enumerate(manifests):
+        deps = set()
+        if (m.group, m.kind) in crds:
+            deps.add(crds[(m.group, m.kind)])
+        if m.namespace and ("Namespace", None, m.namespace) in index:
+            deps.add(index[("Namespace", None, m.namespace)])
+        if m.kind in _POD_OWNERS or m.kind in ("Pod", "CronJob"):
+            deps |= {index[(k, m.namespace, n)] for k, n in _pod_refs(m.obj) if (k, m.namespace, n) in index}
+        if m.kind in ("RoleBinding", "ClusterRoleBinding"):
+            role = m.obj.get("roleRef") or {}
+            role_ns = None if role.get("kind") == "ClusterRole" else m.namespace
+            if (role.get("kind"), role_ns, role.get("name")) in index:
+                deps.add(index[(role.get("kind"), role_ns, role.get("name"))])
+        m.deps = deps - {i}
+
+    # One wave per non-empty category; a dependency inside a category (a RoleBinding
+    # on a Role, ...) pushes the dependent into a later wave of its own category
+    waves: list[list[int]] = []
+    for category in range(len(CATEGORIES)):
+        members = [i for i, m in enumerate(manifests) if m.category == category]
+        pending = set(members)
+        while pending:
+            ready = sorted(i for i in pending if not (manifests[i].deps & pending))
+            if not ready:
+                raise ValueError("dependency cycle among " + ", ".join(manifests[i].ref for i in sorted(pending)))
+            waves.append(ready)
+            pending -= set(ready)
+    return Plan(manifests, waves)
+
+
+def _wave_name(plan: Plan, wave: list[int]) -> str:
+    return CATEGORIES[plan.manifests[wave[0]].category]
+
+
+def render_plan(plan: Plan, batch_size: int = APPLY_BATCH_SIZE) -> str:
+    out = [f"Apply plan: {len(plan.manifests)} objects in {len(plan.waves)} waves (batches of {batch_size})"]
+    for n, wave in enumerate(plan.waves, start=1):
+        batches = -(-len(wave) // batch_size)
+        out += ["", f"Wave {n}/{len(plan.waves)}: {_wave_name(plan, wave)} ({len(wave)} objects, {batches} batches)"]
+        for i in wave:
+            m = plan.manifests[i]
+            after = ", ".join(plan.manifests[d].ref for d in sorted(m.deps))
+            out.append(f"  {m.ref}" + (f"  (after {after})" if after else ""))
+    return "\n".join(out)
+
+
+# ─── Applying ───────────────────────────────────────────────────────────────────
+
+@dataclass
+class ObjectResult:
+    ok: bool
+    detail: str
+
+
+def _match_error(m: Manifest, errors: list[str]) -> Optional[str]:
+    quoted = f'"{m.name}"'
+    for line in errors:
+        if quoted in line or f"/{m.name}" in line:
+            return line
+    return None
+
+
+async def _apply_batch(
+    batch: list[Manifest],
+    flags: list[str],
+    timeout: float,
+    dry_run: Optional[str],
+) -> list[ObjectResult]:
+    """Server-side apply one batch as a List; per-object results from `-o name` and stderr."""
+    doc = {"apiVersion": "v1", "kind": "List", "items": [m.obj for m in batch]}
+    fd, path = tempfile.mkstemp(prefix="apply-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w") as fh:
+            json.dump(doc, fh)
+        cmd = ["kubectl", "apply", "--server-side", f"--field-manager={APPLY_FIELD_MANAGER}", "-o", "name", "-f", path, *flags]
+        if dry_run:
+            cmd.append(f"--dry-run={dry_run}")
+
+        async def run():
+            proc = await spawn(cmd)
+            try:
+                out, err = await communicate(proc, timeout)
+            except asyncio.TimeoutError:
+                return {"status": "error", "output": f"timed out after {timeout}s", "exit_code": -1, "stdout": ""}
+            return {
+                "status": "success" if proc.returncode == 0 else "error",
+                "output": err.decode("utf-8", "replace"),
+                "exit_code": proc.returncode,
+                "stdout": out.decode("utf-8", "replace"),
+            }
+
+        result = await THROTTLE.run(cmd, run)
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    applied = {line.strip().lower() for line in result["stdout"].splitlines() if line.strip()}
+    errors = [line for line in result["output"].splitlines() if line.strip()]
+    results = []
+    for m in batch:
+        kind = f"{m.kind.lower()}.{m.group}" if m.group else m.kind.lower()
+        if f"{kind}/{m.name}".lower() in applied:
+            results.append(ObjectResult(True, "applied" + (f" (dry run: {dry_run})" if dry_run else "")))
+        else:
+            reason = _match_error(m, errors) or (errors[-1] if errors else f"not applied (exit code {result['exit_code']})")
+            results.append(ObjectResult(False, reason))
+    return results
+
+
+def _cluster_flags(flags: list[str]) -> list[str]:
+    """The --context/--kubeconfig flags (with their values, in either form) of the apply flags."""
+    picked = []
+    for i, tok in enumerate(flags):
+        name = tok.partition("=")[0]
+        if name in ("--context", "--kubeconfig"):
+            picked += [tok] if "=" in tok else flags[i : i + 2]
+    return picked
+
+
+async def _wait_established(crds: list[Manifest], flags: list[str]) -> Optional[str]:
+    cmd = ["kubectl", "wait", "--for", "condition=established", f"--timeout={CRD_ESTABLISH_TIMEOUT}s"]
+    cmd += [f"customresourcedefinition.apiextensions.k8s.io/{m.name}" for m in crds]
+    cmd += _cluster_flags(flags)
+    proc = await spawn(cmd)
+    try:
+        _, err = await communicate(proc, CRD_ESTABLISH_TIMEOUT + 10)
+    except asyncio.TimeoutError:
+        return "timed out waiting for CRDs to be established"
+    return None if proc.returncode == 0 else err.decode("utf-8", "replace").strip()
+
+
+async def apply_plan(
+    plan: Plan,
+    flags: list[str],
+    timeout: float,
+    dry_run: Optional[str] = None,
+    batch_size: int = APPLY_BATCH_SIZE,
+    concurrency: int = APPLY_CONCURRENCY,
+    progress=None,
+) -> tuple[str, bool]:
+    """
+    Apply the plan wave by wave and return (per-object report, ok). Batches of a
+    wave run concurrently; after a wave with failures no further wave starts.
+    `dry_run="server"` validates every batch instead of persisting it (objects
+    whose CRD or Namespace is part of the set cannot be validated before it exists).
+    `progress(done, total)` is awaited per finished wave.
+    """
+    start_ts = time.time()
+    sem = asyncio.Semaphore(max(1, concurrency))
+    results: dict[int, ObjectResult] = {}
+    failed = False
+    lines: list[str] = []
+
+    async def run_batch(batch: list[int]) -> None:
+        nonlocal failed
+        async with sem:
+            # Early abort: batches not started yet once one has failed
+            if failed:
+                return
+            outcome = await _apply_batch([plan.manifests[i] for i in batch], flags, timeout, dry_run)
+            results.update(zip(batch, outcome))
+            if not dry_run and not all(r.ok for r in outcome):
+                failed = True
+
+    for n, wave in enumerate(plan.waves, start=1):
+        todo = []
+        for i in wave:
+            m = plan.manifests[i]
+            blocked = [d for d in sorted(m.deps) if d in results and not results[d].ok]
+            if blocked:
+                results[i] = ObjectResult(False, f"skipped: depends on failed {plan.manifests[blocked[0]].ref}")
+            elif dry_run and any(plan.manifests[d].kind in _CREATES_API for d in m.deps):
+                # Nothing is persisted in a dry run, so the server would not find them
+                results[i] = ObjectResult(True, "not validated: its CRD or namespace is created by this apply")
+            else:
+                todo.append(i)
+        await asyncio.gather(*(run_batch(todo[k:k + batch_size]) for k in range(0, len(todo), batch_size)))
+
+        crds = [i for i in todo if plan.manifests[i].kind == "CustomResourceDefinition" and i in results and results[i].ok]
+        if crds and not dry_run:
+            error = await _wait_established([plan.manifests[i] for i in crds], flags)
+            if error:
+                failed = True
+                for i in crds:
+                    results[i] = ObjectResult(False, f"not established: {error}")
+
+        bad = [i for i in wave if i not in results or not results[i].ok]
+        lines += ["", f"Wave {n}/{len(plan.waves)}: {_wave_name(plan, wave)}: {len(wave) - len(bad)} ok, {len(bad)} failed"]
+        for i in bad:
+            detail = results[i].detail if i in results else "not applied (aborted)"
+            lines.append(f"  FAILED {plan.manifests[i].ref}: {detail}")
+        lines += [f"  {plan.manifests[i].ref}: {results[i].detail}" for i in wave if i not in bad]
+        if progress is not None:
+            await progress(n, len(plan.waves))
+        if failed:
+            rest = sum(len(w) for w in plan.waves[n:])
+            if rest:
+                lines += ["", f"Aborted after wave {n}: {rest} objects in later waves not applied"]
+            break
+
+    mode = f"server-side, field manager {APPLY_FIELD_MANAGER}" + (f", dry run {dry_run}" if dry_run else "")
+    header = (f"Ordered apply: {len(plan.manifests)} objects in {len(plan.waves)} waves "
+              f"({mode}, {time.time() - start_ts:.1f}s)")
+    ok = not failed and all(r.ok for r in results.values()) and len(results) == len(plan.manifests)
+    return "\n".join([header, *lines]), ok
+
+
+def split_apply_command(argv: list[str]) -> tuple[list[str], bool, Optional[str], list[str]]:
+    """
+    Split `kubectl apply ...` into (manifest paths, recursive, dry-run mode or None,
+    flags passed through to every batch). Raises ValueError for input the ordered
+    apply cannot read (stdin, URLs, kustomize directories) and for pruning and
+    selectors, which would act on each wave's subset instead of the whole set.
+    """
+    paths, flags = [], []
+    recursive, dry_run = False, None
+    i = 2
+    while i < len(argv):
+        tok = argv[i]
+        name, eq, value = tok.partition("=")
+        if name in ("-f", "--filename"):
+            if not eq:
+                i += 1
+                value = argv[i] if i < len(argv) else ""
+            if value == "-" or "://" in value:
+                raise ValueError(f"ordered apply reads local files only, not {value!r}")
+            paths.append(value)
+        elif name in ("-k", "--kustomize"):
+            raise ValueError("ordered apply does not support kustomize; render with `kubectl kustomize` first")
+        elif name in ("--prune", "--all", "--selector") or name.startswith(("--prune-", "-l")):
+            flag = "-l" if name.startswith("-l") else name
+            raise ValueError(f"ordered apply runs one apply per wave, so {flag} would prune or select within each wave")
+        elif name in ("-R", "--recursive"):
+            recursive = value.lower() != "false" if eq else True
+        elif name == "--dry-run":
+            dry_run = value if eq else "client"
+        elif name in ("--server-side", "--field-manager", "-o", "--output"):
+            if not eq and name in ("--field-manager", "-o", "--output"):
+                i += 1
+        elif name in ("-n", "--namespace", "--context", "--kubeconfig") and not eq:
+            flags += [name, argv[i + 1] if i + 1 < len(argv) else ""]
+            i += 1
+        else:
+            flags.append(tok)
+        i += 1
+    if not paths:
+        raise ValueError("ordered apply needs at least one -f file or directory")
+    return paths, recursive, None if dry_run == "none" else dry_run, flags
+
+
+async def ordered_apply(argv: list[str], timeout: float, progress=None) -> tuple[str, bool]:
+    """Run an ordered apply for a `kubectl apply -f ...` argv; `--dry-run[=client]` only prints the plan."""
+    paths, recursive, dry_run, flags = split_apply_command(argv)
+    objects = await asyncio.to_thread(load_manifests, paths, recursive)
+    if not objects:
+        return "No objects found in " + ", ".join(paths), False
+    namespace = None
+    for i, tok in enumerate(flags):
+        if tok in ("-n", "--namespace") and i + 1 < len(flags):
+            namespace = flags[i + 1]
+        elif tok.startswith("--namespace="):
+            namespace = tok.partition("=")[2]
+    plan = build_plan(objects, namespace)
+    if dry_run == "client":
+        return render_plan(plan), True
+    logger.info(f"Ordered apply of {len(plan.manifests)} objects in {len(plan.waves)} waves: {shlex.join(argv)}")
+    try:
+        return await apply_plan(plan, flags, timeout, dry_run, progress=progress)
+    finally:
+        if dry_run is None:
+            # Even a partial apply may have changed what was prefetched for the context
+            PREFETCHER.invalidate(command_scope(shlex.join(argv))[0])
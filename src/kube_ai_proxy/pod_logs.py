@@ -0,0 +1,283 @@
+# src/kube_ai_proxy/pod_logs.py
+
+"""
+Concurrent multi-pod log collection for Kube AI Proxy.
+
+Instead of one `kubectl logs` call per pod and container in sequence, a workload or
+label selector is resolved to its pods and every container stream is fetched at once
+(bounded by a semaphore), then merged into one timestamp-ordered view:
+  - get_json: run a kubectl query and parse its JSON output
+  - selector_for: turn a workload's `.spec.selector` into a label selector string
+  - resolve_pods: pods and container names for a workload, selector or single pod
+  - fetch_stream: one `kubectl logs --timestamps` stream, keeping its newest lines
+    within a byte budget
+  - collect_logs: fan out, k-way heap merge by timestamp, prefix `[pod/container]`
+"""
+
+import asyncio
+import codecs
+import heapq
+import time
+from asyncio.subprocess import Process
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Optional
+
+from kube_ai_proxy.cli_executor import run_cli
+from kube_ai_proxy.config import (
+    K8S_CONTEXT,
+    POD_LOGS_CONCURRENCY,
+    POD_LOGS_MAX_BYTES_PER_POD,
+    POD_LOGS_MAX_PODS,
+)
+from kube_ai_proxy.discovery import normalize_resource
+from kube_ai_proxy.loopwatch import loads_json
+
+
+@dataclass
+class LogStream:
+    """Lines of one pod/container, oldest first, each as (sort key, timestamp, text)."""
+    pod: str
+    container: str
+    lines: deque = field(default_factory=deque)
+    bytes: int = 0
+    dropped: int = 0
+    error: str = ""
+
+
+def _kubectl(args: list[str], namespace: str) -> list[str]:
+    cmd = ["kubectl", *args, "--namespace", namespace]
+    if K8S_CONTEXT:
+        cmd += ["--context", K8S_CONTEXT]
+    return cmd
+
+
+async def get_json(args: list[str], namespace: str, timeout: float) -> tuple[Optional[dict], str]:
+    """`kubectl <args> -o json` in `namespace`, parsed; returns (object or None, error)."""
+    done = await run_cli(_kubectl([*args, "-o", "json"], namespace), timeout)
+    if done.timed_out:
+        return None, f"Command timed out after {timeout}s"
+    if done.returncode != 0:
+        return None, done.stderr.decode("utf-8", "replace").strip()
+    try:
+        return await loads_json(done.stdout), ""
+    except ValueError as e:
+        return None, f"unparseable kubectl output: {e}"
+
+
+def selector_for(obj: dict) -> str:
+    """
+    Label selector string for a workload's pods: `matchLabels` and `matchExpressions`
+    of Deployments, StatefulSets, DaemonSets, ReplicaSets and Jobs, or the plain map
+    selector of Services and ReplicationControllers.
+    """
+    spec = obj.get("spec") or {}
+    if obj.get("kind") == "CronJob":
+        spec = ((spec.get("jobTemplate") or {}).get("spec")) or {}
+        labels = ((spec.get("template") or {}).get("metadata") or {}).get("labels") or {}
+        return ",".join(f"{k}={v}" for k, v in sorted(labels.items()))
+    sel = spec.get("selector") or {}
+    if "matchLabels" not in sel and "matchExpressions" not in sel:
+        return ",".join(f"{k}={v}" for k, v in sorted(sel.items()))
+
+    terms = [f"{k}={v}" for k, v in sorted((sel.get("matchLabels") or {}).items())]
+    for expr in sel.get("matchExpressions") or []:
+        key, op, values = expr.get("key", ""), expr.get("operator", ""), expr.get("values") or []
+        if op == "In":
+            terms.append(f"{key} in ({','.join(values)})")
+        elif op == "NotIn":
+            terms.append(f"{key} notin ({','.join(values)})")
+        elif op == "Exists":
+            terms.append(key)
+        elif op == "DoesNotExist":
+            terms.append(f"!{key}")
+    return ",".join(terms)
+
+
+async def resolve_pods(
+    target: str | None,
+    selector: str | None,
+    namespace: str,
+    timeout: float,
+    container: str | None = None,
+) -> tuple[list[tuple[str, list[str]]], str]:
+    """
+    Pods (with the containers to read) for `kind/name`, a bare pod name, or a label
+    selector. Returns ([(pod, [container, ...]), ...], error).
+    """
+    if not target and not selector:
+        return [], "Either a target (kind/name or pod) or a label selector is required"
+    if target and not selector:
+        kind, _, name = target.rpartition("/")
+        kind = normalize_resource(kind) if kind else "pods"
+        if kind.split(".")[0] in ("pods", "pod", "po"):
+            pod, error = await get_json(["get", "pod", name], namespace, timeout)
+            items = [pod] if pod else []
+        else:
+            obj, error = await get_json(["get", f"{kind}/{name}"], namespace, timeout)
+            if obj is None:
+                return [], error
+            selector = selector_for(obj)
+            if not selector:
+                return [], f"{target} has no pod selector"
+    if selector:
+        listing, error = await get_json(["get", "pods", "-l", selector], namespace, timeout)
+        items = (listing or {}).get("items") or []
+    if error:
+        return [], error
+
+    pods = []
+    for item in sorted(items, key=lambda i: i["metadata"]["name"]):
+        names = [c["name"] for c in (item.get("spec") or {}).get("containers") or []]
+        if container:
+            names = [c for c in names if c == container]
+        if names:
+            pods.append((item["metadata"]["name"], names))
+    return pods, ""
+
+
+def _sort_key(ts: str) -> str:
+    """
+    Lexically comparable form of an RFC3339Nano timestamp: kubectl trims trailing
+    zeros of the fraction, so it is padded to nine digits first.
+    """
+    base, _, frac = ts.rstrip("Z").partition(".")
+    return f"{base}.{frac[:9]:0<9}"
+
+
+async def fetch_stream(
+    pod: str,
+    container: str,
+    namespace: str,
+    budget: int,
+    timeout: float,
+    since: str | None = None,
+    tail: int | None = None,
+    previous: bool = False,
+) -> LogStream:
+    """
+    Stream `kubectl logs --timestamps` for one container, keeping only its newest
+    lines within `budget` bytes (older ones are dropped and counted as they arrive).
+    """
+    stream = LogStream(pod, container)
+    args = ["logs", pod, "-c", container, "--timestamps"]
+    if since:
+        args.append(f"--since={since}")
+    if tail is not None:
+        args.append(f"--tail={tail}")
+    if previous:
+        args.append("--previous")
+
+    def keep(line: str, last_key: str) -> str:
+        ts, sep, text = line.partition(" ")
+        if not sep or not ts[:4].isdigit():
+            # Continuation of a multi-line record: sorts with the line before it
+            ts, text = "", line
+        key = _sort_key(ts) if ts else last_key
+        stream.lines.append((key, ts, text))
+        stream.bytes += len(ts) + len(text) + 2
+        while stream.bytes > budget and len(stream.lines) > 1:
+            _, old_ts, old = stream.lines.popleft()
+            stream.bytes -= len(old_ts) + len(old) + 2
+            stream.dropped += 1
+        return key
+
+    async def read(proc: Process) -> None:
+        decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        pending, last_key = "", ""
+        while chunk := await proc.stdout.read(1 << 16):
+            lines = (pending + decoder.decode(chunk)).split("\n")
+            pending = lines.pop()
+            for line in lines:
+                if line:
+                    last_key = keep(line, last_key)
+        pending += decoder.decode(b"", final=True)
+        if pending:
+            keep(pending, last_key)
+
+    done = await run_cli(_kubectl(args, namespace), timeout, consume=read)
+    if done.timed_out:
+        stream.error = f"timed out after {timeout}s (partial output kept)"
+    elif done.returncode != 0:
+        stream.error = done.stderr.decode("utf-8", "replace").strip() or f"exit code {done.returncode}"
+    return stream
+
+
+def _tagged(stream: LogStream):
+    prefix = f"[{stream.pod}/{stream.container}]"
+    for key, ts, text in stream.lines:
+        yield key, ts, text, prefix
+
+
+def merge_streams(streams: list[LogStream], timestamps: bool = True):
+    """k-way heap merge of per-container streams into `[pod/container] ts text` lines."""
+    for _, ts, text, prefix in heapq.merge(*map(_tagged, streams), key=lambda entry: entry[0]):
+        yield f"{prefix} {ts} {text}" if timestamps and ts else f"{prefix} {text}"
+
+
+async def collect_logs(
+    target: str | None,
+    selector: str | None,
+    namespace: str,
+    timeout: float,
+    container: str | None = None,
+    since: str | None = None,
+    tail: int | None = None,
+    previous: bool = False,
+    timestamps: bool = True,
+    concurrency: int = POD_LOGS_CONCURRENCY,
+    max_bytes_per_pod: int = POD_LOGS_MAX_BYTES_PER_POD,
+    max_pods: int = POD_LOGS_MAX_PODS,
+    max_chars: int | None = None,
+    progress=None,
+) -> tuple[str, bool]:
+    """
+    Fetch every selected pod/container concurrently and return (merged text, ok).
+    `progress(done, total)` is awaited as each stream completes.
+    """
+    start_ts = time.time()
+    pods, error = await resolve_pods(target, selector, namespace, timeout, container)
+    if error:
+        return error, False
+    if not pods:
+        return f"No pods with containers matched in namespace {namespace}", False
+    skipped = max(0, len(pods) - max_pods)
+    pods = pods[:max_pods]
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+
+    async def fetch(pod: str, name: str, budget: int) -> LogStream:
+        async with sem:
+            return await fetch_stream(pod, name, namespace, budget, timeout, since, tail, previous)
+
+    # Each pod's byte budget is split evenly across its containers
+    jobs = [
+        fetch(pod, name, max(1, max_bytes_per_pod // len(names)))
+        for pod, names in pods for name in names
+    ]
+    streams: list[LogStream] = []
+    for done, next_stream in enumerate(asyncio.as_completed(jobs), start=1):
+        streams.append(await next_stream)
+        if progress is not None:
+            await progress(done, len(jobs))
+
+    merged = list(merge_streams(streams, timestamps))
+    header = [
+        f"Logs from {len(streams)} containers in {len(pods)} pods "
+        f"({len(merged)} lines, {time.time() - start_ts:.1f}s)"
+    ]
+    if skipped:
+        header.append(f"({skipped} more pods not collected; limit is {max_pods})")
+    for s in sorted(streams, key=lambda s: (s.pod, s.container)):
+        if s.dropped:
+            header.append(f"[{s.pod}/{s.container}] {s.dropped} older lines dropped (byte budget)")
+        if s.error:
+            header.append(f"[{s.pod}/{s.container}] error: {s.error}")
+    head = "\n".join(header) + "\n\n"
+
+    body = "\n".join(merged)
+    if max_chars is not None and len(head) + len(body) > max_chars:
+        # Keep the most recent lines
+        keep = max(0, max_chars - len(head))
+        body = "... earlier lines truncated\n" + body[len(body) - keep:].partition("\n")[2]
+    return head + body, all(not s.error for s in streams)
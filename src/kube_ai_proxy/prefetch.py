@@ -0,0 +1,573 @@
+# src/kube_ai_proxy/prefetch.py
+
+"""
+Speculative prefetch of likely follow-up commands for Kube AI Proxy.
+
+Agent sessions are predictable: `kubectl get pods` showing CrashLoopBackOff is
+followed by `describe pod` and `logs --previous`, `helm list` by `helm status`.
+When enabled, every completed kubectl/helm result is shown to the prefetcher,
+which predicts a few read-only follow-ups and runs them in the background while
+the context's throttle window has spare capacity. Results wait in a short-lived
+cache; the agent's own call of the same command is answered from it (once):
+  - command_key / command_shape: canonical form of a command (flag spelling and
+    order normalized) and its verb/resource shape
+  - rule_candidates: follow-ups derived from a result (unhealthy pods, workloads
+    not ready, failed Helm releases, ...)
+  - SessionModel: learned per-session transition counts between shapes and between
+    exact commands, which reweight rule candidates and propose repeats
+  - Prefetcher.lookup / observe: serve a prefetched result, learn from and predict
+    after a completed one; mutations drop what was prefetched for their context
+Budgets: candidates per result, concurrent prefetches, prefetches per minute,
+cached bytes and entry lifetime. Issued, hit, wasted and skipped prefetches are
+counted in the metrics registry, with the hit ratio as a gauge.
+"""
+
+import asyncio
+import logging
+import re
+import shlex
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Optional
+
+from kube_ai_proxy.audit import audit_command
+from kube_ai_proxy.cli_executor import communicate, spawn, terminate
+from kube_ai_proxy.config import (
+    K8S_CONTEXT,
+    K8S_NAMESPACE,
+    PREFETCH_CONCURRENCY,
+    PREFETCH_ENABLED,
+    PREFETCH_MAX_BYTES,
+    PREFETCH_MIN_SCORE,
+    PREFETCH_PER_MINUTE,
+    PREFETCH_PER_RESULT,
+    PREFETCH_TIMEOUT,
+    PREFETCH_TTL,
+)
+from kube_ai_proxy.discovery import normalize_resource
+from kube_ai_proxy.metrics import METRICS
+from kube_ai_proxy.security.rbac_checker import RBACChecker
+from kube_ai_proxy.security.security import validate_command
+from kube_ai_proxy.throttle import THROTTLE, is_idempotent_read
+from kube_ai_proxy.tools import CommandResult, command_scope, is_pipe_command
+
+logger = logging.getLogger("kube_ai_proxy.prefetch")
+
+# Prefetch only while the context's throttle window is less than this full
+CAPACITY_SHARE = 0.5
+MAX_SESSIONS = 256
+MAX_SHAPES_PER_SESSION = 256
+# Learned probabilities count once a shape has been followed this often
+MIN_OBSERVATIONS = 3
+
+_FLAG_ALIASES = {
+    "--namespace": "-n",
+    "--all-namespaces": "-A",
+    "--output": "-o",
+    "--selector": "-l",
+    "--container": "-c",
+    "--kube-context": "--context",
+    "--previous": "-p",
+}
+# Flags taking a value as the next token (after alias normalization)
+_VALUE_FLAGS = {"-n", "-o", "-l", "-c", "--context", "--tail", "--since", "--field-selector", "--revision", "--max"}
+_NO_CACHE_FLAGS = {"-w", "--watch", "-f", "--follow", "--watch-only"}
+
+_BAD_POD_STATUS = re.compile(
+    r"CrashLoopBackOff|Error|ImagePullBackOff|ErrImagePull|CreateContainerConfigError|"
+    r"OOMKilled|Init:|Pending|ContainerCreating|Evicted|Unknown"
+)
+_HELM_STATUSES = {
+    "deployed", "failed", "pending-install", "pending-upgrade", "pending-rollback",
+    "superseded", "uninstalling", "uninstalled", "unknown",
+}
+
+
+# Used when discovery has not resolved a name (index not loaded yet)
+_COMMON_RESOURCES = {
+    "po": "pods", "pod": "pods",
+    "deploy": "deployments.apps", "deployment": "deployments.apps", "deployments": "deployments.apps",
+    "sts": "statefulsets.apps", "statefulset": "statefulsets.apps", "statefulsets": "statefulsets.apps",
+    "ds": "daemonsets.apps", "daemonset": "daemonsets.apps", "daemonsets": "daemonsets.apps",
+    "rs": "replicasets.apps", "replicaset": "replicasets.apps", "replicasets": "replicasets.apps",
+}
+
+
+def _resource(token: str) -> str:
+    name = normalize_resource(token)
+    return _COMMON_RESOURCES.get(name, name)
+
+
+@dataclass
+class ParsedCommand:
+    tool: str
+    positional: list[str]
+    flags: dict[str, str]
+
+    @property
+    def verb(self) -> str:
+        return self.positional[0] if self.positional else ""
+
+    @property
+    def namespace(self) -> Optional[str]:
+        return self.flags.get("-n")
+
+
+def parse_command(argv: list[str]) -> Optional[ParsedCommand]:
+    if len(argv) < 2 or argv[0] not in ("kubectl", "helm"):
+        return None
+    positional: list[str] = []
+    flags: dict[str, str] = {}
+    i = 1
+    while i < len(argv):
+        tok = argv[i]
+        if tok.startswith("-") and len(tok) > 1:
+            name, eq, value = tok.partition("=")
+            if not eq and name.startswith("-n") and len(name) > 2 and not name.startswith("--"):
+                name, value, eq = "-n", name[2:], "="
+            name = _FLAG_ALIASES.get(name, name)
+            if not eq and name in _VALUE_FLAGS and i + 1 < len(argv):
+                value = argv[i + 1]
+                i += 1
+            flags[name] = value
+        elif argv[0] == "kubectl" and "/" in tok and positional:
+            positional.extend(tok.split("/", 1))
+        else:
+            positional.append(tok)
+        i += 1
+    if argv[0] == "kubectl" and len(positional) > 1:
+        if positional[0] in ("get", "describe"):
+            positional[1] = ",".join(_resource(t) for t in positional[1].split(","))
+        elif positional[0] == "logs" and len(positional) > 2 and _resource(positional[1]) == "pods":
+            del positional[1]
+    return ParsedCommand(argv[0], positional, flags)
+
+
+def command_key(argv: list[str]) -> Optional[str]:
+    """Canonical text of a command: positionals in order, flags sorted and unaliased."""
+    parsed = parse_command(argv)
+    if parsed is None:
+        return None
+    flags = [f"{k}={v}" if v else k for k, v in sorted(parsed.flags.items())]
+    return shlex.join([parsed.tool, *parsed.positional, *flags])
+
+
+def command_shape(parsed: ParsedCommand) -> str:
+    """Verb and resource type, e.g. "kubectl describe pods" or "helm status"."""
+    parts = [parsed.tool, parsed.verb]
+    if parsed.tool == "kubectl" and parsed.verb in ("get", "describe") and len(parsed.positional) > 1:
+        parts.append(parsed.positional[1])
+    return " ".join(parts)
+
+
+def is_cacheable(argv: list[str]) -> bool:
+    text = shlex.join(argv)
+    if is_pipe_command(text) or not is_idempotent_read(text):
+        return False
+    return not any(tok.partition("=")[0] in _NO_CACHE_FLAGS for tok in argv)
+
+
+@dataclass
+class Candidate:
+    argv: list[str]
+    prior: float
+
+    @property
+    def shape(self) -> str:
+        parsed = parse_command(self.argv)
+        return command_shape(parsed) if parsed else ""
+
+
+def _scope_flags(parsed: ParsedCommand, namespace: Optional[str] = None) -> list[str]:
+    flags = []
+    ns = namespace or parsed.namespace
+    if ns:
+        flags += ["-n", ns]
+    if "--context" in parsed.flags:
+        flags += ["--context", parsed.flags["--context"]]
+    return flags
+
+
+def _table(output: str) -> tuple[list[str], list[list[str]]]:
+    lines = [line for line in output.splitlines() if line.strip()]
+    if not lines:
+        return [], []
+    return lines[0].split(), [line.split() for line in lines[1:]]
+
+
+def rule_candidates(argv: list[str], output: str) -> list[Candidate]:
+    """Follow-ups suggested by a successful result; most useful first."""
+    parsed = parse_command(argv)
+    if parsed is None or "-o" in parsed.flags and parsed.flags["-o"] != "wide":
+        return []
+    out: list[Candidate] = []
+    if parsed.tool == "kubectl" and parsed.verb == "get" and len(parsed.positional) == 2:
+        resource = parsed.positional[1]
+        header, rows = _table(output)
+        if "NAME" not in header:
+            return []
+        name_i = header.index("NAME")
+        ns_i = header.index("NAMESPACE") if "NAMESPACE" in header else None
+        for row in rows:
+            if len(row) < len(header) - 1:
+                continue
+            name = row[name_i]
+            ns = row[ns_i] if ns_i is not None else None
+            scope = _scope_flags(parsed, ns)
+            if resource == "pods" and "STATUS" in header:
+                status = row[header.index("STATUS")]
+                restarts = row[header.index("RESTARTS")] if "RESTARTS" in header else "0"
+                if not _BAD_POD_STATUS.search(status) and not (status == "Running" and _not_ready(row, header)):
+                    continue
+                out.append(Candidate(["kubectl", "describe", "pods", name, *scope], 0.8))
+                if status in ("CrashLoopBackOff", "Error", "OOMKilled") or restarts not in ("0", ""):
+                    out.append(Candidate(["kubectl", "logs", name, "-p", *scope], 0.6))
+            elif resource in ("deployments.apps", "statefulsets.apps", "replicasets.apps") and _not_ready(row, header):
+                out.append(Candidate(["kubectl", "describe", resource, name, *scope], 0.6))
+            elif resource == "daemonsets.apps" and "READY" in header and "DESIRED" in header:
+                if row[header.index("READY")] != row[header.index("DESIRED")]:
+                    out.append(Candidate(["kubectl", "describe", resource, name, *scope], 0.6))
+    elif parsed.tool == "kubectl" and parsed.verb == "describe" and len(parsed.positional) == 3:
+        if parsed.positional[1] == "pods" and ("CrashLoopBackOff" in output or "Last State:     Terminated" in output):
+            out.append(Candidate(["kubectl", "logs", parsed.positional[2], "-p", *_scope_flags(parsed)], 0.7))
+    elif parsed.tool == "helm" and parsed.verb in ("list", "ls"):
+        header, rows = _table(output)
+        if header[:2] != ["NAME", "NAMESPACE"]:
+            return []
+        releases = []
+        for row in rows:
+            status = next((tok for tok in row if tok in _HELM_STATUSES), "unknown")
+            # Troubled releases first; a healthy one is a weaker guess
+            releases.append((status == "deployed", row[0], row[1]))
+        for healthy, name, ns in sorted(releases)[:PREFETCH_PER_RESULT]:
+            scope = ["-n", ns]
+            if "--context" in parsed.flags:
+                scope += ["--kube-context", parsed.flags["--context"]]
+            out.append(Candidate(["helm", "status", name, *scope], 0.3 if healthy else 0.7))
+    elif parsed.tool == "helm" and parsed.verb == "status" and len(parsed.positional) == 2:
+        scope = ["-n", parsed.namespace] if parsed.namespace else []
+        out.append(Candidate(["helm", "history", parsed.positional[1], *scope], 0.3))
+    return out
+
+
+def _not_ready(row: list[str], header: list[str]) -> bool:
+    if "READY" not in header:
+        return False
+    ready, _, want = row[header.index("READY")].partition("/")
+    return ready.isdigit() and want.isdigit() and int(ready) < int(want)
+
+
+@dataclass
+class SessionModel:
+    """Transition counts learned from one session's sequence of commands."""
+    shapes: "OrderedDict[str, Counter]" = field(default_factory=OrderedDict)
+    exact: "OrderedDict[str, Counter]" = field(default_factory=OrderedDict)
+    argv: dict[str, list[str]] = field(default_factory=dict)
+    last_shape: Optional[str] = None
+    last_key: Optional[str] = None
+
+    @staticmethod
+    def _bump(table: "OrderedDict[str, Counter]", prev: str, nxt: str) -> None:
+        table.setdefault(prev, Counter())[nxt] += 1
+        table.move_to_end(prev)
+        while len(table) > MAX_SHAPES_PER_SESSION:
+            table.popitem(last=False)
+
+    def record(self, key: str, shape: str, argv: list[str]) -> None:
+        if self.last_shape is not None:
+            self._bump(self.shapes, self.last_shape, shape)
+        if self.last_key is not None and self.last_key != key:
+            self._bump(self.exact, self.last_key, key)
+            self.argv[key] = argv
+            if len(self.argv) > MAX_SHAPES_PER_SESSION:
+                self.argv.pop(next(iter(self.argv)))
+        self.last_shape, self.last_key = shape, key
+
+    def shape_probability(self, prev: str, nxt: str) -> Optional[float]:
+        counts = self.shapes.get(prev)
+        total = sum(counts.values()) if counts else 0
+        return counts[nxt] / total if total >= MIN_OBSERVATIONS else None
+
+    def repeats(self, key: str) -> list[Candidate]:
+        """Exact commands this one was followed by at least twice, scored by frequency."""
+        counts = self.exact.get(key)
+        if not counts:
+            return []
+        total = sum(counts.values())
+        return [
+            Candidate(self.argv[nxt], n / total)
+            for nxt, n in counts.most_common(PREFETCH_PER_RESULT)
+            if n >= 2 and nxt in self.argv
+        ]
+
+
+@dataclass
+class _Entry:
+    result: CommandResult
+    expires: float
+    size: int
+
+
+def _context_attr(ctx, getter):
+    try:
+        return getter(ctx)
+    except (AttributeError, LookupError, ValueError):
+        return None  # outside a request, or a transport without it
+
+
+def session_key(ctx) -> str:
+    """
+    Key of the MCP session a tool call belongs to: the `mcp-session-id` header on
+    HTTP transports, else the client id, else "default". Session objects are not
+    used: stateless HTTP creates one per request, so their ids never repeat.
+    """
+    if ctx is None:
+        return "default"
+    headers = _context_attr(ctx, lambda c: c.request_context.request.headers)
+    session_id = headers.get("mcp-session-id") if headers is not None else None
+    if session_id:
+        return f"session-{session_id}"
+    client_id = _context_attr(ctx, lambda c: c.client_id)
+    return f"client-{client_id}" if client_id else "default"
+
+
+class Prefetcher:
+    """Predicts and runs follow-up reads; holds their results until used or expired."""
+
+    def __init__(
+        self,
+        enabled: bool = PREFETCH_ENABLED,
+        ttl: float = PREFETCH_TTL,
+        per_result: int = PREFETCH_PER_RESULT,
+        concurrency: int = PREFETCH_CONCURRENCY,
+        per_minute: int = PREFETCH_PER_MINUTE,
+        max_bytes: int = PREFETCH_MAX_BYTES,
+        timeout: float = PREFETCH_TIMEOUT,
+        min_score: float = PREFETCH_MIN_SCORE,
+    ):
+        self.enabled = enabled
+        self.ttl = ttl
+        self.per_result = per_result
+        self.concurrency = concurrency
+        self.per_minute = per_minute
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        self.min_score = min_score
+        self._cache: OrderedDict[str, _Entry] = OrderedDict()
+        self._bytes = 0
+        self._pending: dict[str, asyncio.Task] = {}
+        self._sessions: OrderedDict[str, SessionModel] = OrderedDict()
+        self._tokens = float(per_minute)
+        self._refilled = time.monotonic()
+        self._issued = 0
+        self._hits = 0
+
+    # ─── Cache ──────────────────────────────────────────────────────────────
+
+    def _drop(self, key: str, wasted: bool) -> None:
+        entry = self._cache.pop(key)
+        self._bytes -= entry.size
+        if wasted:
+            METRICS.inc("prefetch_wasted_total")
+
+    def _expire(self) -> None:
+        now = time.monotonic()
+        for key in [k for k, e in self._cache.items() if e.expires <= now]:
+            self._drop(key, wasted=True)
+        METRICS.set("prefetch_cached_bytes", self._bytes)
+
+    def _store(self, key: str, result: CommandResult) -> None:
+        size = len(result.get("output", ""))
+        if size > self.max_bytes // 4:
+            METRICS.inc("prefetch_skipped_total", reason="too_large")
+            return
+        self._expire()
+        if key in self._cache:
+            self._drop(key, wasted=False)
+        while self._cache and self._bytes + size > self.max_bytes:
+            self._drop(next(iter(self._cache)), wasted=True)
+        self._cache[key] = _Entry(result, time.monotonic() + self.ttl, size)
+        self._bytes += size
+        METRICS.set("prefetch_cached_bytes", self._bytes)
+
+    def _hit(self, tool: str, how: str) -> None:
+        self._hits += 1
+        METRICS.inc("prefetch_hits_total", tool=tool, source=how)
+        METRICS.set("prefetch_hit_ratio", round(self._hits / max(1, self._issued), 3))
+
+    async def lookup(self, argv: list[str]) -> Optional[CommandResult]:
+        """A prefetched result for this command (consumed), waiting for one still running."""
+        if not self.enabled or not is_cacheable(argv):
+            return None
+        key = command_key(argv)
+        if key is None:
+            return None
+        self._expire()
+        if key in self._cache:
+            entry = self._cache[key]
+            self._drop(key, wasted=False)
+            self._hit(argv[0], "cache")
+            return CommandResult(**{**entry.result, "execution_time": 0.0})
+        task = self._pending.get(key)
+        if task is not None:
+            start = time.monotonic()
+            result = await asyncio.shield(task)
+            if result is not None:
+                if key in self._cache:
+                    self._drop(key, wasted=False)
+                self._hit(argv[0], "in_flight")
+                return CommandResult(**{**result, "execution_time": time.monotonic() - start})
+        METRICS.inc("prefetch_misses_total", tool=argv[0])
+        return None
+
+    def invalidate(self, context: Optional[str]) -> int:
+        """Forget prefetched results (and ignore running prefetches) for a context."""
+        context = context or K8S_CONTEXT
+        victims = [k for k in self._cache if (command_scope(k)[0] or K8S_CONTEXT) == context]
+        for key in victims:
+            self._drop(key, wasted=True)
+        for key in [k for k in self._pending if (command_scope(k)[0] or K8S_CONTEXT) == context]:
+            self._pending.pop(key)
+        return len(victims)
+
+    # ─── Prediction ─────────────────────────────────────────────────────────
+
+    def session(self, session_id: str) -> SessionModel:
+        model = self._sessions.pop(session_id, None) or SessionModel()
+        self._sessions[session_id] = model
+        while len(self._sessions) > MAX_SESSIONS:
+            self._sessions.popitem(last=False)
+        return model
+
+    def predict(self, argv: list[str], output: str, model: SessionModel) -> list[Candidate]:
+        parsed = parse_command(argv)
+        if parsed is None:
+            return []
+        shape = command_shape(parsed)
+        scored: dict[str, Candidate] = {}
+        for cand in rule_candidates(argv, output):
+            learned = model.shape_probability(shape, cand.shape)
+            score = cand.prior if learned is None else (cand.prior + learned) / 2
+            scored.setdefault(command_key(cand.argv), Candidate(cand.argv, score))
+        for cand in model.repeats(command_key(argv)):
+            key = command_key(cand.argv)
+            if key not in scored or scored[key].prior < cand.prior:
+                scored[key] = cand
+        ranked = sorted(scored.values(), key=lambda c: -c.prior)
+        return [c for c in ranked if c.prior >= self.min_score and is_cacheable(c.argv)][: self.per_result]
+
+    # ─── Budgets and execution ──────────────────────────────────────────────
+
+    def _take_token(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(float(self.per_minute), self._tokens + (now - self._refilled) * self.per_minute / 60)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+    def _spare_capacity(self, context: str) -> bool:
+        if not THROTTLE.enabled:
+            return True
+        window = THROTTLE.window(context)
+        return window.in_flight < max(1, int(window.window * CAPACITY_SHARE))
+
+    def _skip(self, reason: str) -> None:
+        METRICS.inc("prefetch_skipped_total", reason=reason)
+
+    def observe(self, argv: list[str], result: CommandResult, session_id: str = "default") -> None:
+        """Learn from a completed command and start prefetches for its likely follow-ups."""
+        if not self.enabled:
+            return
+        text = shlex.join(argv)
+        if not is_idempotent_read(text):
+            # A mutation may change what was prefetched for its context
+            if self.invalidate(command_scope(text)[0]):
+                logger.debug(f"Dropped prefetched results after: {text}")
+            return
+        key = command_key(argv)
+        parsed = parse_command(argv)
+        if key is None or parsed is None:
+            return
+        model = self.session(session_id)
+        model.record(key, command_shape(parsed), argv)
+        if result.get("exit_code") != 0:
+            return
+        for cand in self.predict(argv, result.get("output", ""), model):
+            cand_key = command_key(cand.argv)
+            if cand_key in self._cache or cand_key in self._pending:
+                continue
+            if len(self._pending) >= self.concurrency:
+                self._skip("concurrency")
+                break
+            context = command_scope(shlex.join(cand.argv))[0] or K8S_CONTEXT or "default"
+            if not self._spare_capacity(context):
+                self._skip("capacity")
+                break
+            if not self._take_token():
+                self._skip("rate")
+                break
+            self._issued += 1
+            METRICS.inc("prefetch_issued_total", tool=cand.argv[0])
+            self._pending[cand_key] = asyncio.create_task(self._prefetch(cand_key, cand.argv))
+
+    async def _prefetch(self, key: str, argv: list[str]) -> Optional[CommandResult]:
+        task = asyncio.current_task()
+        try:
+            result = await self._run(argv)
+        except Exception as e:
+            logger.debug(f"Prefetch of {shlex.join(argv)} failed: {e}")
+            result = None
+        finally:
+            # Invalidated while running: the result may predate a mutation
+            current = self._pending.get(key) is task
+            if current:
+                self._pending.pop(key)
+        # A prefetch timeout says nothing about the caller's own timeout
+        if result is None or not current or result.get("exit_code") == -1:
+            return None
+        if result.get("exit_code") == 0:
+            self._store(key, result)
+        return result
+
+    async def _run(self, argv: list[str]) -> Optional[CommandResult]:
+        text = shlex.join(argv)
+        validate_command(text)
+        rbac = "n/a"
+        if argv[0] == "kubectl":
+            parsed = parse_command(argv)
+            # describe and logs are reads of the object (logs: of the pods/log subresource)
+            resource = parsed.positional[1] if parsed.verb != "logs" else "pods/log"
+            checker = RBACChecker(context=K8S_CONTEXT, namespace=parsed.namespace or K8S_NAMESPACE)
+            if not await checker.can_i("get", resource):
+                self._skip("rbac")
+                return None
+            rbac = "allowed"
+        start_ts = time.time()
+
+        async def run() -> CommandResult:
+            proc = await spawn(argv)
+            try:
+                out, err = await communicate(proc, self.timeout)
+            except asyncio.CancelledError:
+                await asyncio.shield(terminate(proc))
+                raise
+            except asyncio.TimeoutError:
+                return CommandResult(status="error", output=f"Command timed out after {self.timeout}s", exit_code=-1)
+            exit_code = proc.returncode if proc.returncode is not None else -1
+            return CommandResult(
+                status="success" if exit_code == 0 else "error",
+                output=out.decode("utf-8", errors="replace") or err.decode("utf-8", errors="replace"),
+                exit_code=exit_code,
+            )
+
+        result = await THROTTLE.run(argv, run)
+        result["execution_time"] = time.time() - start_ts
+        await audit_command(argv[0], argv, result, rbac=rbac, prefetch=True)
+        return result
+
+
+# Initialize once
+PREFETCHER = Prefetcher()
@@ -0,0 +1,281 @@
+# src/kube_ai_proxy/profiler.py
+
+"""
+Sampling profiler for a running Kube AI Proxy.
+
+A daemon thread wakes every interval and records the Python stack of every other
+thread (what is on the CPU or blocked in a call) and of every suspended asyncio
+task on the serving loop (what each coroutine is waiting on). Each stack is
+prefixed with where it came from and the tool call it works for (see activity),
+so time can be attributed per tool. Nothing is traced between samples.
+  - SamplingProfiler.start / wait: profile for a fixed duration, one run at a time
+  - Profile.collapsed: "frame;frame;frame count" lines for flamegraph.pl / speedscope
+  - Profile.summary: top-N functions by self and total samples, and samples per tool
+  - install: SIGUSR2 toggle and the K8S_MCP_PROFILE startup profile
+"""
+
+import asyncio
+import contextvars
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from kube_ai_proxy import activity
+from kube_ai_proxy.config import (
+    PROFILE_AT_STARTUP,
+    PROFILE_DIR,
+    PROFILE_INTERVAL,
+    PROFILE_SIGNAL_DURATION,
+)
+from kube_ai_proxy.metrics import METRICS
+
+logger = logging.getLogger("kube_ai_proxy.profiler")
+
+MAX_DEPTH = 128
+_EXECUTOR_FILE = os.path.join("concurrent", "futures", "thread.py")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _thread_stack(frame) -> tuple[str, ...]:
+    """Frames of a thread, outermost first."""
+    labels = []
+    while frame is not None and len(labels) < MAX_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+def _task_stack(task: asyncio.Task) -> tuple[str, ...]:
+    """Coroutine frames of a suspended task, outermost first, following the await chain."""
+    labels = []
+    coro = task.get_coro()
+    while coro is not None and len(labels) < MAX_DEPTH:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None) or getattr(coro, "ag_frame", None)
+        if frame is None:
+            break
+        labels.append(_frame_label(frame.f_code))
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None) or getattr(coro, "ag_await", None)
+    return tuple(labels)
+
+
+def _worker_call(frame) -> Optional[activity.ToolCall]:
+    """
+    The tool call an executor thread works for: asyncio.to_thread runs the function
+    in a copy of the caller's context, which the work item's frame holds.
+    """
+    while frame is not None:
+        code = frame.f_code
+        if code.co_name == "run" and code.co_filename.endswith(_EXECUTOR_FILE):
+            item = frame.f_locals.get("self")
+            fn = getattr(item, "fn", None)
+            ctx = getattr(getattr(fn, "func", None), "__self__", None)
+            return activity.call_in_context(ctx) if isinstance(ctx, contextvars.Context) else None
+        frame = frame.f_back
+    return None
+
+
+@dataclass
+class Profile:
+    started: float
+    interval: float
+    duration: float = 0.0
+    samples: int = 0
+    # (origin, tool, frames) -> samples; origin is "thread:<name>" or "task:<coroutine>"
+    stacks: Counter = field(default_factory=Counter)
+
+    def collapsed(self) -> str:
+        lines = []
+        for (origin, tool, frames), count in sorted(self.stacks.items(), key=lambda kv: -kv[1]):
+            lines.append(";".join((origin, f"tool:{tool}", *frames)) + f" {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, top: int = 20) -> str:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        waits: Counter = Counter()
+        tools: Counter = Counter()
+        for (origin, tool, frames), count in self.stacks.items():
+            tools[tool] += count
+            if not frames:
+                continue
+            if origin.startswith("task:"):
+                waits[frames[-1]] += count
+                continue
+            own[frames[-1]] += count
+            for label in set(frames):
+                total[label] += count
+        thread_samples = sum(c for (o, _, _), c in self.stacks.items() if o.startswith("thread:")) or 1
+        out = [
+            f"Profile: {self.samples} samples over {self.duration:.1f}s "
+            f"(every {self.interval * 1000:.0f} ms, {len(self.stacks)} distinct stacks)",
+            "",
+            f"Top {top} functions by self samples (threads):",
+        ]
+        for label, count in own.most_common(top):
+            out.append(f"{count:>8}  {100 * count / thread_samples:5.1f}%  {label}")
+        out += ["", f"Top {top} functions by total samples (threads):"]
+        for label, count in total.most_common(top):
+            out.append(f"{count:>8}  {100 * count / thread_samples:5.1f}%  {label}")
+        if waits:
+            out += ["", f"Top {top} await points of suspended tasks:"]
+            out += [f"{count:>8}  {label}" for label, count in waits.most_common(top)]
+        out += ["", "Samples per tool call (threads and tasks):"]
+        out += [f"{count:>8}  {tool}" for tool, count in tools.most_common()]
+        return "\n".join(out)
+
+
+class SamplingProfiler:
+    """Wall-clock stack sampler running in its own thread."""
+
+    def __init__(self, directory: Path = PROFILE_DIR, interval: float = PROFILE_INTERVAL):
+        self.directory = Path(directory)
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._done.set()
+        self.last: Optional[Profile] = None
+        self.last_paths: tuple[Optional[Path], Optional[Path]] = (None, None)
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        # A profile running in the parent does not continue in the child
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stop = threading.Event()
+        self._done = threading.Event()
+        self._done.set()
+
+    @property
+    def running(self) -> bool:
+        return not self._done.is_set()
+
+    def start(self, duration: float, interval: Optional[float] = None, top: int = 20) -> bool:
+        """Start a profile of `duration` seconds; False if one is already running."""
+        with self._lock:
+            if self.running:
+                return False
+            self._stop.clear()
+            self._done.clear()
+            self.last, self.last_paths = None, (None, None)
+            self._thread = threading.Thread(
+                target=self._run,
+                args=(duration, interval or self.interval, top),
+                name="kube-ai-proxy-profiler",
+                daemon=True,
+            )
+            self._thread.start()
+        logger.info(f"Profiling for {duration:.0f}s")
+        return True
+
+    def stop(self) -> None:
+        """End the running profile early; its results are still written."""
+        self._stop.set()
+
+    async def wait(self, timeout: Optional[float] = None) -> bool:
+        return await asyncio.to_thread(self._done.wait, timeout)
+
+    def _sample(self, profile: Profile, own_id: int) -> None:
+        loop = activity.event_loop()
+        loop_thread = activity.loop_thread()
+        running_task = asyncio.tasks._current_tasks.get(loop) if loop is not None else None
+        names = {t.ident: t.name for t in threading.enumerate()}
+
+        for ident, frame in sys._current_frames().items():
+            if ident == own_id:
+                continue
+            if ident == loop_thread:
+                call = activity.call_for_task(running_task)
+            else:
+                call = _worker_call(frame)
+            origin = f"thread:{names.get(ident, ident)}"
+            profile.stacks[(origin, call.tool if call else "-", _thread_stack(frame))] += 1
+
+        if loop is not None and not loop.is_closed():
+            try:
+                tasks = asyncio.all_tasks(loop)
+            except RuntimeError:
+                tasks = set()
+            for task in tasks:
+                # The running task is already in the loop thread's stack
+                if task is running_task or task.done():
+                    continue
+                call = activity.call_for_task(task)
+                coro = task.get_coro()
+                origin = f"task:{getattr(coro, '__qualname__', type(coro).__name__)}"
+                profile.stacks[(origin, call.tool if call else "-", _task_stack(task))] += 1
+        profile.samples += 1
+
+    def _run(self, duration: float, interval: float, top: int) -> None:
+        profile = Profile(started=time.time(), interval=interval)
+        own_id = threading.get_ident()
+        start = time.monotonic()
+        deadline = start + duration
+        next_at = start
+        try:
+            while not self._stop.is_set():
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                try:
+                    self._sample(profile, own_id)
+                except Exception as e:
+                    logger.debug(f"Profiler sample failed: {e}")
+                next_at = max(next_at + interval, time.monotonic())
+                self._stop.wait(next_at - time.monotonic())
+            profile.duration = time.monotonic() - start
+            self.last = profile
+            self.last_paths = self._write(profile, top)
+            METRICS.inc("profiles_total")
+            METRICS.inc("profile_samples_total", profile.samples)
+            logger.info(f"Profile written to {self.last_paths[0]} ({profile.samples} samples)")
+        except Exception as e:
+            logger.warning(f"Profiling failed: {e}")
+        finally:
+            self._done.set()
+
+    def _write(self, profile: Profile, top: int) -> tuple[Optional[Path], Optional[Path]]:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(profile.started))
+        base = self.directory / f"profile-{stamp}-{os.getpid()}"
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            collapsed = base.with_suffix(".collapsed")
+            summary = base.with_suffix(".txt")
+            collapsed.write_text(profile.collapsed())
+            summary.write_text(profile.summary(top) + "\n")
+            return collapsed, summary
+        except OSError as e:
+            logger.warning(f"Could not write profile to {self.directory}: {e}")
+            return None, None
+
+
+def _toggle(signum, frame) -> None:
+    if PROFILER.running:
+        logger.info("SIGUSR2: stopping profile")
+        PROFILER.stop()
+    else:
+        PROFILER.start(PROFILE_SIGNAL_DURATION)
+
+
+def install() -> None:
+    """Bind SIGUSR2 to start/stop a profile and honour K8S_MCP_PROFILE; call in each serving process."""
+    if hasattr(signal, "SIGUSR2"):
+        signal.signal(signal.SIGUSR2, _toggle)
+    if PROFILE_AT_STARTUP > 0:
+        PROFILER.start(PROFILE_AT_STARTUP)
+
+
+# Initialize once
+PROFILER = SamplingProfiler()
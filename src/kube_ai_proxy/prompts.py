@@ -54,6 +54,7 @@ Follow Kubernetes best practices for security and reliability."""
         return f"""Generate kubectl commands to troubleshoot the {resource_type}
 named '{resource_name}' in the {namespace} namespace.
 
+Start with the troubleshoot_bundle tool: it collects the items below in one call.
 Include commands to:
 1. Describe the resource and inspect its spec/status
 2. View recent events related to this resource
@@ -68,6 +69,8 @@ Include commands to:
         scope = f"in the {namespace} namespace" if namespace else "across all namespaces"
         return f"""Generate kubectl commands to inventory Kubernetes resources {scope}.
 
+Use the cluster_inventory tool for counts by type and namespace; it streams the
+lists instead of returning them, so prefer it over `kubectl get all -A -o json`.
 Include commands to:
 1. List all resource types and count by type
 2. Show resource usage (CPU/memory) if available
@@ -0,0 +1,327 @@
+# src/kube_ai_proxy/render_cache.py
+
+"""
+Content-addressed memoization of Helm render-only commands.
+
+`helm template` and client-side `helm install --dry-run` are pure functions of the
+chart contents, values, `--set*` arguments and the Helm version, so their output is
+cached under a hash of exactly those inputs:
+  - parse_render_command: recognize render-only argv and locate chart/values arguments
+  - ChartArchiveCache: local cache of pulled chart archives (no re-fetch per render)
+  - execute_render: validate, resolve chart, serve from cache or render and store
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shlex
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Optional
+
+from kube_ai_proxy.audit import audit_command
+from kube_ai_proxy.cache import DiskLRUCache
+from kube_ai_proxy.cli_executor import execute_command
+from kube_ai_proxy.config import (
+    CHART_CACHE_DIR,
+    CHART_CACHE_MAX_BYTES,
+    CHART_CACHE_TTL,
+    K8S_CONTEXT,
+    RENDER_CACHE_DIR,
+    RENDER_CACHE_MAX_BYTES,
+)
+from kube_ai_proxy.helm_index import parse_version
+from kube_ai_proxy.security.security import validate_command
+from kube_ai_proxy.tools import CommandResult
+
+logger = logging.getLogger("kube_ai_proxy.render_cache")
+
+# `helm template|install` flags (global ones included) that take a value, as
+# `--flag value` or `--flag=value`. A flag in neither set makes the command uncached,
+# since guessing wrong would shift the chart position.
+_VALUE_FLAGS = {
+    "-a", "--api-versions", "--burst-limit", "--ca-file", "--cert-file", "--description",
+    "-f", "--values", "--kube-apiserver", "--kube-as-group", "--kube-as-user",
+    "--kube-ca-file", "--kube-context", "--kube-tls-server-name", "--kube-token",
+    "--kube-version", "--kubeconfig", "--key-file", "--keyring", "-l", "--labels",
+    "--name-template", "-n", "--namespace", "-o", "--output", "--output-dir", "--password",
+    "--post-renderer", "--post-renderer-args", "--qps", "--registry-config", "--repo",
+    "--repository-cache", "--repository-config", "--set", "--set-file", "--set-json",
+    "--set-literal", "--set-string", "-s", "--show-only", "--timeout", "--username",
+    "--version",
+}
+# ... and flags that never take a separate value argument
+_BOOL_FLAGS = {
+    "--atomic", "--create-namespace", "--debug", "--dependency-update", "--devel",
+    "--disable-openapi-validation", "--dry-run", "--enable-dns", "--force",
+    "--generate-name", "-g", "--hide-notes", "--hide-secret", "--include-crds",
+    "--insecure-skip-tls-verify", "--is-upgrade", "--no-hooks", "--pass-credentials",
+    "--plain-http", "--release-name", "--render-subchart-notes", "--replace",
+    "--skip-crds", "--skip-schema-validation", "--skip-tests", "--take-ownership",
+    "--validate", "--verify", "--wait", "--wait-for-jobs",
+}
+_VALUES_FLAGS = {"-f", "--values"}
+# Flags that only say where to fetch the chart from; dropped once it is cached locally
+_FETCH_FLAGS = {"--repo", "--version", "--username", "--password", "--ca-file",
+                "--cert-file", "--key-file", "--keyring"}
+# Renders that talk to the cluster, write files or run external programs are not memoized
+_UNCACHEABLE_FLAGS = {"--validate", "--is-upgrade", "--output-dir", "--post-renderer"}
+
+
+@dataclass
+class RenderSpec:
+    """Where the inputs of a render-only helm command sit in its argv."""
+    chart_pos: int
+    values_pos: list[int] = field(default_factory=list)
+    set_file_pos: list[int] = field(default_factory=list)
+    fetch_spans: list[tuple[int, int]] = field(default_factory=list)
+    version: str = ""
+    repo: str = ""
+    devel: bool = False
+    verify: bool = False
+
+
+def parse_render_command(argv: list[str]) -> Optional[RenderSpec]:
+    """
+    Return a RenderSpec for `helm template ...` or `helm install ... --dry-run[=client]`,
+    or None if the command is not a cacheable, render-only invocation.
+    """
+    if len(argv) < 3 or argv[0] != "helm" or argv[1] not in ("template", "install"):
+        return None
+
+    positional: list[int] = []
+    spec = RenderSpec(chart_pos=-1)
+    dry_run = argv[1] == "template"
+    i = 2
+    while i < len(argv):
+        tok = argv[i]
+        if not tok.startswith("-") or tok == "-":
+            positional.append(i)
+            i += 1
+            continue
+
+        name, has_eq, value = tok.partition("=")
+        if name not in _VALUE_FLAGS and name not in _BOOL_FLAGS:
+            return None
+        takes_value = not has_eq and name in _VALUE_FLAGS
+        if takes_value and i + 1 >= len(argv):
+            return None
+        value_pos = i if has_eq else i + 1
+        value = value if has_eq else (argv[i + 1] if takes_value else "")
+
+        if name == "--dry-run":
+            if value in ("", "true", "client"):
+                dry_run = True
+            else:
+                return None
+        elif name in _UNCACHEABLE_FLAGS and value != "false":
+            return None
+        elif name in _VALUES_FLAGS:
+            spec.values_pos.append(value_pos)
+        elif name == "--set-file":
+            spec.set_file_pos.append(value_pos)
+        elif name == "--devel":
+            spec.devel = value != "false"
+        elif name == "--verify":
+            spec.verify = value != "false"
+
+        if name in _FETCH_FLAGS:
+            spec.fetch_spans.append((i, 1 if has_eq else 2))
+            if name == "--version":
+                spec.version = value
+            elif name == "--repo":
+                spec.repo = value
+
+        i += 2 if takes_value else 1
+
+    if not dry_run or not positional:
+        return None
+    # `[NAME] CHART`, or just `CHART` with --generate-name
+    spec.chart_pos = positional[1] if len(positional) > 1 else positional[0]
+    return spec
+
+
+# ─── Content hashing ───────────────────────────────────────────────────────────
+
+def _hash_file(path: Path, h) -> None:
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            h.update(block)
+
+
+def hash_path(path: Path) -> str:
+    """sha256 over a chart archive, or over every file (name + content) of a chart directory."""
+    h = hashlib.sha256()
+    if path.is_dir():
+        for p in sorted(path.rglob("*")):
+            if ".git" in p.relative_to(path).parts or not p.is_file():
+                continue
+            h.update(str(p.relative_to(path)).encode() + b"\0")
+            _hash_file(p, h)
+            h.update(b"\0")
+    else:
+        _hash_file(path, h)
+    return h.hexdigest()
+
+
+def _is_remote(ref: str) -> bool:
+    return "://" in ref
+
+
+def _split_inline(tok: str) -> tuple[str, str, str]:
+    """Split `--flag=value` into its parts; a bare value comes back as ("", "", value)."""
+    if tok.startswith("-") and "=" in tok:
+        return tok.partition("=")
+    return "", "", tok
+
+
+def render_cache_key(argv: list[str], spec: RenderSpec, helm_version: str) -> Optional[str]:
+    """
+    Hash of the render inputs: argv with the chart, values files and --set-file paths
+    replaced by content digests, plus Helm version and target context. Returns None
+    when an input cannot be content-addressed (stdin or remote values, missing files).
+    """
+    tokens = list(argv)
+    try:
+        chart = Path(argv[spec.chart_pos])
+        if not chart.exists():
+            return None
+        tokens[spec.chart_pos] = f"chart:{hash_path(chart)}"
+
+        for pos in spec.values_pos:
+            prefix, eq, paths = _split_inline(argv[pos])
+            digests = []
+            for p in paths.split(","):
+                if p == "-" or _is_remote(p):
+                    return None
+                digests.append(hash_path(Path(p)))
+            tokens[pos] = prefix + eq + "values:" + ",".join(digests)
+
+        for pos in spec.set_file_pos:
+            prefix, eq, pairs = _split_inline(argv[pos])
+            parts = []
+            for pair in pairs.split(","):
+                k, _, p = pair.partition("=")
+                if _is_remote(p):
+                    return None
+                parts.append(f"{k}={hash_path(Path(p))}")
+            tokens[pos] = prefix + eq + "file:" + ",".join(parts)
+    except OSError:
+        return None
+
+    payload = {
+        "argv": tokens,
+        "helm": helm_version,
+        "context": K8S_CONTEXT,
+        "namespace": os.environ.get("HELM_NAMESPACE", ""),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+# ─── Pulled chart archives ─────────────────────────────────────────────────────
+
+class ChartArchiveCache:
+    """
+    Pulled chart archives keyed by reference. Exact versions are immutable and kept
+    until evicted; unpinned references are re-pulled once per CHART_CACHE_TTL window.
+    """
+
+    def __init__(self, directory: Path | str = CHART_CACHE_DIR, max_bytes: int = CHART_CACHE_MAX_BYTES):
+        self.store = DiskLRUCache(directory, max_bytes, suffix=".tgz")
+
+    @staticmethod
+    def key(ref: str, version: str, repo: str, devel: bool) -> str:
+        pinned = bool(version) and parse_version(version) is not None
+        window = "" if pinned else str(int(time.time() // max(CHART_CACHE_TTL, 1)))
+        raw = json.dumps([ref, version, repo, devel, window])
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    async def fetch(self, ref: str, spec: RenderSpec, timeout: float) -> Optional[Path]:
+        """Return a local archive for `ref`, pulling it with `helm pull` on a miss."""
+        key = self.key(ref, spec.version, spec.repo, spec.devel)
+        cached = await asyncio.to_thread(self.store.path, key)
+        if cached is not None:
+            return cached
+
+        with tempfile.TemporaryDirectory(prefix="kube-ai-proxy-pull-") as tmp:
+            cmd = ["helm", "pull", ref, "--destination", tmp]
+            if spec.version:
+                cmd += ["--version", spec.version]
+            if spec.repo:
+                cmd += ["--repo", spec.repo]
+            if spec.devel:
+                cmd.append("--devel")
+            result = await execute_command(shlex.join(cmd), timeout)
+            archives = list(Path(tmp).glob("*.tgz"))
+            if result["status"] != "success" or not archives:
+                logger.info(f"helm pull {ref} failed; rendering without archive cache")
+                return None
+            return await asyncio.to_thread(self.store.put_file, key, archives[0])
+
+
+# ─── Cached execution ──────────────────────────────────────────────────────────
+
+_helm_version: Optional[str] = None
+
+
+async def helm_version() -> str:
+    """`helm version --short`, resolved once per process."""
+    global _helm_version
+    if _helm_version is None:
+        result = await execute_command("helm version --short")
+        _helm_version = result["output"].strip() if result["status"] == "success" else "unknown"
+    return _helm_version
+
+
+async def execute_render(argv: list[str], spec: RenderSpec, timeout: float) -> CommandResult:
+    """
+    Run a render-only helm command through the chart archive and render caches.
+    Cache hits and misses are both audited under the command as the user gave it.
+    """
+    command = shlex.join(argv)
+    validate_command(command)
+    start_ts = time.time()
+
+    chart = argv[spec.chart_pos]
+    if not Path(chart).exists() and not spec.verify:
+        archive = await CHART_ARCHIVES.fetch(chart, spec, timeout)
+        if archive is not None:
+            drop = {i for start, n in spec.fetch_spans for i in range(start, start + n)}
+            argv = list(argv)
+            argv[spec.chart_pos] = str(archive)
+            positions = [i for i in range(len(argv)) if i not in drop]
+            remap = {old: new for new, old in enumerate(positions)}
+            argv = [argv[i] for i in positions]
+            spec = RenderSpec(
+                chart_pos=remap[spec.chart_pos],
+                values_pos=[remap[i] for i in spec.values_pos],
+                set_file_pos=[remap[i] for i in spec.set_file_pos],
+            )
+
+    key = await asyncio.to_thread(render_cache_key, argv, spec, await helm_version())
+    if key is not None:
+        cached = await asyncio.to_thread(RENDER_CACHE.get, key)
+        if cached is not None:
+            logger.debug(f"Render cache hit for {key[:12]}")
+            result = CommandResult(
+                status="success",
+                output=cached.decode("utf-8", "replace"),
+                exit_code=0,
+                execution_time=time.time() - start_ts,
+            )
+            await audit_command("helm", command, result)
+            return result
+
+    result = await execute_command(shlex.join(argv), timeout, audit_as=command)
+    if key is not None and result["status"] == "success":
+        await asyncio.to_thread(RENDER_CACHE.put, key, result["output"].encode("utf-8"))
+    return result
+
+
+# Initialize once
+RENDER_CACHE = DiskLRUCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_BYTES)
+CHART_ARCHIVES = ChartArchiveCache()
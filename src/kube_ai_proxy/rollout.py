@@ -0,0 +1,496 @@
+# src/kube_ai_proxy/rollout.py
+
+"""
+Multiplexed rollout waiter for Kube AI Proxy.
+
+`kubectl rollout status` follows one workload per process. Waiting for a release
+of forty workloads that way means forty watch connections. Here the workloads
+are grouped by namespace and kind. Each group is fetched once and then followed
+by a single `kubectl get --watch` stream, and every event is judged in-process
+with the rules `kubectl rollout status` applies:
+  - rollout_status: (state, message) of a Deployment, StatefulSet or DaemonSet object
+  - parse_targets / discover: workloads named as `kind/name` or `namespace/kind/name`,
+    or every workload matching a label selector
+  - access_scopes: the namespaces (or the whole cluster) and resources a wait reads,
+    for the RBAC check before it starts
+  - RolloutWaiter.run: one list per namespace and kind, then one watch per group, until all
+    rollouts finish, one fails (with fail_fast), or the deadline passes
+  - wait_for_rollouts: render the outcome for the tool
+"""
+
+import asyncio
+import logging
+import time
+from asyncio.subprocess import Process
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional
+
+from kube_ai_proxy.cli_executor import run_cli, terminate
+from kube_ai_proxy.config import K8S_CONTEXT, K8S_NAMESPACE, ROLLOUT_MAX_WATCHES
+from kube_ai_proxy.jsonstream import iter_json_values
+from kube_ai_proxy.loopwatch import loads_json
+from kube_ai_proxy.metrics import METRICS
+
+logger = logging.getLogger("kube_ai_proxy.rollout")
+
+DEPLOYMENTS = "deployments.apps"
+STATEFULSETS = "statefulsets.apps"
+DAEMONSETS = "daemonsets.apps"
+
+RESOURCES = {
+    "deployment": DEPLOYMENTS, "deployments": DEPLOYMENTS, "deploy": DEPLOYMENTS,
+    "statefulset": STATEFULSETS, "statefulsets": STATEFULSETS, "sts": STATEFULSETS,
+    "daemonset": DAEMONSETS, "daemonsets": DAEMONSETS, "ds": DAEMONSETS,
+}
+RESOURCES.update({r.split(".")[0][:-1] + ".apps": r for r in (DEPLOYMENTS, STATEFULSETS, DAEMONSETS)})
+KINDS = {"Deployment": DEPLOYMENTS, "StatefulSet": STATEFULSETS, "DaemonSet": DAEMONSETS}
+
+PROGRESSING = "progressing"
+DONE = "done"
+FAILED = "failed"
+UNSUPPORTED = "unsupported"
+TERMINAL = (DONE, FAILED, UNSUPPORTED)
+
+# Consecutive watch failures without a single event before the group's workloads fail
+MAX_WATCH_FAILURES = 3
+WATCH_BACKOFF_MAX = 10.0
+
+
+def _deployment_status(obj: dict) -> tuple[str, str]:
+    meta, spec, status = obj.get("metadata") or {}, obj.get("spec") or {}, obj.get("status") or {}
+    name = meta.get("name", "")
+    if meta.get("generation", 0) > status.get("observedGeneration", 0):
+        return PROGRESSING, "Waiting for deployment spec update to be observed..."
+    for cond in status.get("conditions") or []:
+        if cond.get("type") == "Progressing" and cond.get("reason") == "ProgressDeadlineExceeded":
+            return FAILED, f'deployment "{name}" exceeded its progress deadline'
+    replicas = spec.get("replicas")
+    updated = status.get("updatedReplicas", 0)
+    if replicas is not None and updated < replicas:
+        return PROGRESSING, (
+            f'Waiting for deployment "{name}" rollout to finish: '
+            f"{updated} out of {replicas} new replicas have been updated..."
+        )
+    if status.get("replicas", 0) > updated:
+        return PROGRESSING, (
+            f'Waiting for deployment "{name}" rollout to finish: '
+            f"{status.get('replicas', 0) - updated} old replicas are pending termination..."
+        )
+    available = status.get("availableReplicas", 0)
+    if available < updated:
+        return PROGRESSING, (
+            f'Waiting for deployment "{name}" rollout to finish: '
+            f"{available} of {updated} updated replicas are available..."
+        )
+    return DONE, f'deployment "{name}" successfully rolled out'
+
+
+def _daemonset_status(obj: dict) -> tuple[str, str]:
+    meta, spec, status = obj.get("metadata") or {}, obj.get("spec") or {}, obj.get("status") or {}
+    name = meta.get("name", "")
+    if (spec.get("updateStrategy") or {}).get("type", "RollingUpdate") != "RollingUpdate":
+        return UNSUPPORTED, "rollout status is only available for RollingUpdate strategy type"
+    if meta.get("generation", 0) > status.get("observedGeneration", 0):
+        return PROGRESSING, "Waiting for daemon set spec update to be observed..."
+    desired = status.get("desiredNumberScheduled", 0)
+    updated = status.get("updatedNumberScheduled", 0)
+    if updated < desired:
+        return PROGRESSING, (
+            f'Waiting for daemon set "{name}" rollout to finish: '
+            f"{updated} out of {desired} new pods have been updated..."
+        )
+    available = status.get("numberAvailable", 0)
+    if available < desired:
+        return PROGRESSING, (
+            f'Waiting for daemon set "{name}" rollout to finish: '
+            f"{available} of {desired} updated pods are available..."
+        )
+    return DONE, f'daemon set "{name}" successfully rolled out'
+
+
+def _statefulset_status(obj: dict) -> tuple[str, str]:
+    meta, spec, status = obj.get("metadata") or {}, obj.get("spec") or {}, obj.get("status") or {}
+    strategy = spec.get("updateStrategy") or {}
+    if strategy.get("type", "RollingUpdate") != "RollingUpdate":
+        return UNSUPPORTED, "rollout status is only available for RollingUpdate strategy type"
+    observed = status.get("observedGeneration", 0)
+    if not observed or meta.get("generation", 0) > observed:
+        return PROGRESSING, "Waiting for statefulset spec update to be observed..."
+    replicas = spec.get("replicas")
+    ready = status.get("readyReplicas", 0)
+    if replicas is not None and ready < replicas:
+        return PROGRESSING, f"Waiting for {replicas - ready} pods to be ready..."
+    updated = status.get("updatedReplicas", 0)
+    partition = (strategy.get("rollingUpdate") or {}).get("partition")
+    if partition is not None and replicas is not None:
+        if updated < replicas - partition:
+            return PROGRESSING, (
+                "Waiting for partitioned roll out to finish: "
+                f"{updated} out of {replicas - partition} new pods have been updated..."
+            )
+        return DONE, f"partitioned roll out complete: {updated} new pods have been updated..."
+    if status.get("updateRevision") != status.get("currentRevision"):
+        return PROGRESSING, (
+            f"waiting for statefulset rolling update to complete {updated} pods "
+            f"at revision {status.get('updateRevision')}..."
+        )
+    return DONE, (
+        f"statefulset rolling update complete {status.get('currentReplicas', 0)} pods "
+        f"at revision {status.get('currentRevision')}..."
+    )
+
+
+_STATUS = {DEPLOYMENTS: _deployment_status, STATEFULSETS: _statefulset_status, DAEMONSETS: _daemonset_status}
+
+
+def rollout_status(obj: dict) -> tuple[str, str]:
+    """kubectl's rollout verdict for a workload object: (PROGRESSING|DONE|FAILED|UNSUPPORTED, message)."""
+    resource = KINDS.get(obj.get("kind", ""))
+    if resource is None:
+        return UNSUPPORTED, f"no rollout status for kind {obj.get('kind')!r}"
+    return _STATUS[resource](obj)
+
+
+@dataclass
+class Workload:
+    resource: str
+    namespace: str
+    name: str
+    state: str = PROGRESSING
+    message: str = "Waiting for the workload to be listed..."
+    finished: Optional[float] = None
+
+    @property
+    def key(self) -> tuple[str, str, str]:
+        return self.resource, self.namespace, self.name
+
+    @property
+    def ref(self) -> str:
+        return f"{self.resource.split('.')[0][:-1]}/{self.name} -n {self.namespace}"
+
+
+def parse_targets(targets: list[str], namespace: str) -> list[Workload]:
+    """`kind/name` (in `namespace`) or `namespace/kind/name`; ValueError for anything else."""
+    workloads: dict[tuple, Workload] = {}
+    for target in targets:
+        parts = target.strip().split("/")
+        if len(parts) == 2:
+            ns, (kind, name) = namespace, parts
+        elif len(parts) == 3:
+            ns, kind, name = parts
+        else:
+            raise ValueError(f"expected kind/name or namespace/kind/name, got {target!r}")
+        resource = RESOURCES.get(kind.lower()) or (kind.lower() if kind.lower() in _STATUS else None)
+        if resource is None or not name or not ns:
+            raise ValueError(f"not a Deployment, StatefulSet or DaemonSet: {target!r}")
+        w = Workload(resource, ns, name)
+        workloads.setdefault(w.key, w)
+    return list(workloads.values())
+
+
+def access_scopes(
+    targets: list[str],
+    selector: Optional[str],
+    namespace: Optional[str],
+    max_watches: int = ROLLOUT_MAX_WATCHES,
+) -> dict[Optional[str], set[str]]:
+    """
+    Resources read per namespace (None: across all namespaces) by a wait for
+    `targets` and/or `selector`: named workloads in their own namespaces, or
+    cluster-wide once they span more namespaces than are watched one by one,
+    and every workload kind where a selector is listed. ValueError from parse_targets.
+    """
+    scopes: dict[Optional[str], set[str]] = {}
+    for w in parse_targets(targets, namespace or K8S_NAMESPACE):
+        scopes.setdefault(w.namespace, set()).add(w.resource)
+    if len(scopes) > max_watches:
+        scopes[None] = set().union(*scopes.values())
+    if selector:
+        scopes.setdefault(namespace, set()).update(_STATUS)
+    return scopes
+
+
+def _kubectl(*args: str) -> list[str]:
+    cmd = ["kubectl", *args]
+    if K8S_CONTEXT:
+        cmd += ["--context", K8S_CONTEXT]
+    return cmd
+
+
+def _scope(namespace: Optional[str]) -> list[str]:
+    return ["--namespace", namespace] if namespace else ["--all-namespaces"]
+
+
+def _objects(doc) -> list[dict]:
+    """The objects of a `-o json` answer: a List's items or a single object."""
+    if not isinstance(doc, dict):
+        return []
+    if "items" in doc:
+        return [o for o in doc.get("items") or [] if isinstance(o, dict)]
+    return [doc]
+
+
+async def _get_json(cmd: list[str], timeout: float) -> list[dict]:
+    """Run a `kubectl get -o json`; RuntimeError with kubectl's last stderr line on failure."""
+    done = await run_cli(cmd, timeout)
+    if done.timed_out:
+        raise asyncio.TimeoutError
+    if done.returncode != 0:
+        raise RuntimeError(done.error())
+    return _objects(await loads_json(done.stdout)) if done.stdout.strip() else []
+
+
+async def discover(selector: str, namespace: Optional[str], timeout: float) -> tuple[list[Workload], list[dict]]:
+    """Every Deployment, StatefulSet and DaemonSet matching `selector`, with the listed objects."""
+    cmd = _kubectl("get", ",".join(_STATUS), "-l", selector, "-o", "json", *_scope(namespace))
+    objects = await _get_json(cmd, timeout)
+    workloads = []
+    for obj in objects:
+        meta = obj.get("metadata") or {}
+        resource = KINDS.get(obj.get("kind", ""))
+        if resource:
+            workloads.append(Workload(resource, meta.get("namespace", ""), meta.get("name", "")))
+    return workloads, objects
+
+
+@dataclass
+class _Group:
+    """Workloads followed by one watch: one kind in one namespace (None: all namespaces)."""
+    resource: str
+    namespace: Optional[str]
+    keys: set
+    selector: Optional[str] = None
+
+    def watch_command(self) -> list[str]:
+        cmd = _kubectl(
+            "get", self.resource, "-o", "json", "--watch", "--output-watch-events", *_scope(self.namespace)
+        )
+        if self.selector:
+            cmd += ["-l", self.selector]
+        elif len(self.keys) == 1:
+            cmd += [f"--field-selector=metadata.name={next(iter(self.keys))[2]}"]
+        return cmd
+
+
+class RolloutWaiter:
+    """Follows the rollouts of a set of workloads with one watch per namespace and kind."""
+
+    def __init__(
+        self,
+        workloads: list[Workload],
+        selector: Optional[str] = None,
+        max_watches: int = ROLLOUT_MAX_WATCHES,
+        on_change: Optional[Callable[[Workload, int, int], Awaitable[None]]] = None,
+    ):
+        self.workloads = {w.key: w for w in workloads}
+        self.selector = selector
+        self.max_watches = max_watches
+        self.on_change = on_change
+        self.started = time.monotonic()
+        self.watches = 0
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> int:
+        return sum(w.state in TERMINAL for w in self.workloads.values())
+
+    def failed(self) -> list[Workload]:
+        return [w for w in self.workloads.values() if w.state == FAILED]
+
+    def _by_namespace(self) -> dict[tuple, set]:
+        by_ns: dict[tuple, set] = {}
+        for key in self.workloads:
+            by_ns.setdefault((key[0], key[1]), set()).add(key)
+        return by_ns
+
+    def groups(self, namespace: Optional[str] = None) -> list[_Group]:
+        by_ns = self._by_namespace()
+        if (self.selector and namespace is None) or len(by_ns) > self.max_watches:
+            # Too many namespaces to watch one by one: one cluster-wide watch per kind
+            by_kind: dict[tuple, set] = {}
+            for (resource, _), keys in by_ns.items():
+                by_kind.setdefault((resource, None), set()).update(keys)
+            by_ns = by_kind
+        return [_Group(resource, ns, keys, self.selector) for (resource, ns), keys in sorted(by_ns.items(), key=str)]
+
+    async def update(self, key: tuple, state: str, message: str) -> None:
+        w = self.workloads.get(key)
+        if w is None or w.state in TERMINAL or (w.state, w.message) == (state, message):
+            return
+        w.state, w.message = state, message
+        if state in TERMINAL:
+            w.finished = time.monotonic() - self.started
+        self._changed.set()
+        if self.on_change:
+            try:
+                await self.on_change(w, self.finished, len(self.workloads))
+            except Exception as e:
+                logger.debug(f"Rollout progress callback failed: {e}")
+
+    async def observe(self, obj: dict) -> None:
+        meta = obj.get("metadata") or {}
+        resource = KINDS.get(obj.get("kind", ""))
+        if resource:
+            await self.update((resource, meta.get("namespace", ""), meta.get("name", "")), *rollout_status(obj))
+
+    async def _initial(self, resource: str, namespace: str, keys: set, timeout: float, limit: asyncio.Semaphore) -> None:
+        """Fetch the workloads of one kind in one namespace; the ones that do not exist fail right away."""
+        names = sorted(key[2] for key in keys)
+        try:
+            async with limit:
+                objects = await _get_json(
+                    _kubectl("get", resource, *names, "-o", "json", "--ignore-not-found", "--namespace", namespace),
+                    timeout,
+                )
+        except (RuntimeError, ValueError, asyncio.TimeoutError) as e:
+            for key in keys:
+                await self.update(key, FAILED, f"cannot get {resource}: {e or 'timed out'}")
+            return
+        found = set()
+        for obj in objects:
+            meta = obj.get("metadata") or {}
+            found.add((resource, meta.get("namespace", ""), meta.get("name", "")))
+            await self.observe(obj)
+        for key in keys - found:
+            await self.update(key, FAILED, f"{resource} {key[2]!r} not found in namespace {key[1]!r}")
+
+    async def _watch(self, group: _Group) -> None:
+        """Follow one group until cancelled, re-establishing the watch when kubectl exits."""
+        failures = 0
+        backoff = 1.0
+        while any(self.workloads[k].state not in TERMINAL for k in group.keys):
+            self.watches += 1
+            METRICS.inc("rollout_watches_total")
+            events = 0
+
+            async def follow(proc: Process) -> None:
+                nonlocal events
+                try:
+                    async for event in iter_json_values(proc.stdout):
+                        if not isinstance(event, dict):
+                            continue
+                        events += 1
+                        obj = event.get("object") or {}
+                        kind = event.get("type")
+                        if kind == "ERROR":
+                            # Usually 410 Gone: the resource version expired, so list and watch again
+                            logger.debug(f"Watch of {group.resource} ended: {obj.get('message')}")
+                            break
+                        meta = obj.get("metadata") or {}
+                        key = (group.resource, meta.get("namespace", ""), meta.get("name", ""))
+                        if kind == "DELETED":
+                            await self.update(key, FAILED, f"{group.resource} {key[2]!r} was deleted")
+                        else:
+                            await self.observe(obj)
+                except ValueError as e:
+                    logger.debug(f"Unparseable watch output for {group.resource}: {e}")
+                await terminate(proc)
+
+            done = await run_cli(group.watch_command(), None, consume=follow, hold=False)
+            if events:
+                failures, backoff = 0, 1.0
+                continue
+            failures += 1
+            if failures >= MAX_WATCH_FAILURES:
+                reason = done.error()
+                for key in group.keys:
+                    await self.update(key, FAILED, f"watch of {group.resource} failed: {reason}")
+                return
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, WATCH_BACKOFF_MAX)
+
+    def _settled(self, fail_fast: bool) -> bool:
+        return self.finished == len(self.workloads) or (fail_fast and bool(self.failed()))
+
+    async def run(
+        self,
+        timeout: float,
+        fail_fast: bool = True,
+        namespace: Optional[str] = None,
+        listed: Optional[list[dict]] = None,
+    ) -> bool:
+        """
+        Wait until every rollout is finished, one fails (fail_fast) or `timeout`
+        passes. `listed` are objects already fetched (by discover), which spares
+        the initial list. True when all rollouts completed.
+        """
+        deadline = time.monotonic() + timeout
+        groups = self.groups(namespace)
+        if listed is not None:
+            for obj in listed:
+                await self.observe(obj)
+        else:
+            limit = asyncio.Semaphore(self.max_watches)
+            await asyncio.gather(*(
+                self._initial(resource, ns, keys, max(deadline - time.monotonic(), 1.0), limit)
+                for (resource, ns), keys in self._by_namespace().items()
+            ))
+        watchers = [
+            asyncio.ensure_future(self._watch(g))
+            for g in groups
+            if any(self.workloads[k].state not in TERMINAL for k in g.keys)
+        ]
+        try:
+            while not self._settled(fail_fast):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or (watchers and all(t.done() for t in watchers)):
+                    break
+                self._changed.clear()
+                try:
+                    await asyncio.wait_for(self._changed.wait(), remaining)
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            for task in watchers:
+                task.cancel()
+            await asyncio.gather(*watchers, return_exceptions=True)
+        return not self.failed() and self.finished == len(self.workloads)
+
+    def report(self, timeout: float) -> str:
+        elapsed = time.monotonic() - self.started
+        states = [w.state for w in self.workloads.values()]
+        pending = states.count(PROGRESSING)
+        lines = [
+            f"Rollouts: {states.count(DONE)} of {len(states)} complete, {states.count(FAILED)} failed, "
+            f"{pending} pending after {elapsed:.1f}s"
+            + (f" (deadline of {timeout:.0f}s reached)" if pending and elapsed >= timeout else "")
+            + f"; {self.watches} watch stream(s)"
+        ]
+        order = {FAILED: 0, PROGRESSING: 1, UNSUPPORTED: 2, DONE: 3}
+        for w in sorted(self.workloads.values(), key=lambda w: (order[w.state], w.key)):
+            took = f" ({w.finished:.1f}s)" if w.finished is not None and w.state == DONE else ""
+            lines.append(f"  {w.state.upper():<12} {w.ref}: {w.message}{took}")
+        return "\n".join(lines)
+
+
+async def wait_for_rollouts(
+    targets: list[str],
+    selector: Optional[str],
+    namespace: Optional[str],
+    timeout: float,
+    fail_fast: bool = True,
+    on_change: Optional[Callable[[Workload, int, int], Awaitable[None]]] = None,
+) -> tuple[str, bool]:
+    """
+    Resolve the workloads (named ones default to K8S_NAMESPACE, a selector without
+    a namespace spans all of them), wait for their rollouts and render the outcome;
+    (text, all complete).
+    """
+    start = time.monotonic()
+    listed = None
+    try:
+        workloads = parse_targets(targets, namespace or K8S_NAMESPACE)
+        if selector:
+            found, listed = await discover(selector, namespace, timeout)
+            workloads += [w for w in found if w.key not in {x.key for x in workloads}]
+    except (ValueError, RuntimeError, asyncio.TimeoutError) as e:
+        return f"Error: {e}", False
+    if not workloads:
+        return "No Deployments, StatefulSets or DaemonSets to wait for.", False
+
+    waiter = RolloutWaiter(workloads, selector if not targets else None, on_change=on_change)
+    waiter.started = start
+    remaining = max(timeout - (time.monotonic() - start), 1.0)
+    ok = await waiter.run(remaining, fail_fast, namespace, listed if not targets else None)
+    METRICS.inc("rollout_waits_total", outcome="complete" if ok else ("failed" if waiter.failed() else "timeout"))
+    return waiter.report(timeout), ok
@@ -2,12 +2,14 @@
 
 """
 RBACChecker: Enforces Role-Based Access Control by invoking Kubernetes 'auth can-i' and stubbing for other tools.
+Kubernetes verdicts are shared by all worker processes for RBAC_CACHE_TTL seconds.
 """
-import shlex
 import asyncio
-from asyncio.subprocess import PIPE
+import shlex
 
-from kube_ai_proxy.config import K8S_CONTEXT, K8S_NAMESPACE
+from kube_ai_proxy.cli_executor import communicate, spawn
+from kube_ai_proxy.config import K8S_CONTEXT, K8S_NAMESPACE, RBAC_CACHE_TTL
+from kube_ai_proxy.shared_store import SHARED_STORE
 
 
 class RBACChecker:
@@ -16,9 +18,10 @@ class RBACChecker:
     For Kubernetes, uses `kubectl auth can-i`. For other tools, extend as needed.
     """
 
-    def __init__(self, context: str | None = None, namespace: str | None = None):
+    def __init__(self, context: str | None = None, namespace: str | None = None, all_namespaces: bool = False):
         self.context = context or K8S_CONTEXT
         self.namespace = namespace or K8S_NAMESPACE
+        self.all_namespaces = all_namespaces
 
     async def can_i(self, verb: str, resource: str) -> bool:
         """
@@ -27,13 +30,25 @@ class RBACChecker:
         cmd = ["kubectl", "auth", "can-i", verb, resource]
         if self.context:
             cmd += ["--context", self.context]
-        if self.namespace:
+        if self.all_namespaces:
+            cmd.append("--all-namespaces")
+        elif self.namespace:
             cmd += ["--namespace", self.namespace]
 
-        proc = await asyncio.create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        out, _ = await proc.communicate()
+        key = shlex.join(cmd[3:])
+        if RBAC_CACHE_TTL > 0:
+            cached = await asyncio.to_thread(SHARED_STORE.get, "rbac", key)
+            if cached is not None:
+                return cached
+
+        proc = await spawn(cmd)
+        out, _ = await communicate(proc, None)
         result = out.decode().strip().lower()
-        return result == "yes"
+        allowed = result == "yes"
+        # "no" is a verdict too; errors (empty output) are not cached
+        if result in ("yes", "no") and RBAC_CACHE_TTL > 0:
+            await asyncio.to_thread(SHARED_STORE.put, "rbac", key, allowed, RBAC_CACHE_TTL)
+        return allowed
 
     async def can_i_helm(self, verb: str, release: str) -> bool:
         """
@@ -14,9 +14,13 @@ from kube_ai_proxy.tools import (
     split_pipe_command,
     validate_unix_command,
 )
+from kube_ai_proxy.warm_state import WARM_STATE, content_fingerprint
 
 logger = logging.getLogger("kube_ai_proxy.security")
 
+# Parsed rules file of the previous run, reused while the file's contents are unchanged
+_STATE = WARM_STATE.section("policy", 1, lambda: content_fingerprint(SECURITY_CONFIG_PATH))
+
 # Default dictionary of potentially dangerous commands for each CLI tool
 DEFAULT_DANGEROUS_COMMANDS: dict[str, list[str]] = {
     "kubectl": [
@@ -112,7 +116,10 @@ def load_security_config() -> SecurityConfig:
         path = Path(SECURITY_CONFIG_PATH)
         if path.exists():
             try:
-                data = yaml.safe_load(path.read_text())
+                data = _STATE.get("rules")
+                if data is None:
+                    data = yaml.safe_load(path.read_text())
+                    _STATE.put("rules", data)
                 # override dangerous
                 for tool, cmds in data.get("dangerous_commands", {}).items():
                     dangerous[tool] = cmds
@@ -224,6 +231,7 @@ def validate_pipe_command(pipe_command: str) -> None:
 def reload_security_config() -> None:
     """Reload the YAML security config at runtime."""
     global SECURITY_CONFIG
+    _STATE.refresh_fingerprint()
     SECURITY_CONFIG = load_security_config()
     logger.info("Security configuration reloaded")
 
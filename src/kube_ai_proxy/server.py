@@ -0,0 +1,182 @@
+# src/kube_ai_proxy/server.py
+
+"""
+Serving the Kube AI Proxy MCP server over its transports.
+  - install_uvloop: switch asyncio to uvloop when enabled and installed
+  - serve: stdio, or SSE / streamable HTTP on one uvicorn server in this process
+  - serve_workers: streamable HTTP from several pre-forked worker processes that
+    accept on one shared listening socket; dead workers are restarted
+
+A stateful MCP session lives in the memory of the worker that created it, and
+the kernel hands connections to whichever worker accepts first, so workers serve
+streamable HTTP statelessly: every request carries all it needs and any worker can
+answer it. SSE streams are inherently stateful and stay single-process. Caches
+worth sharing between workers go through the SQLite shared store.
+
+Workers are forked after startup, when background threads (audit writer, warm
+state flusher, loop watchdog) may already run. Modules owning such threads or
+locks reset them in the child via os.register_at_fork.
+"""
+
+import logging
+import os
+import signal
+import socket
+import time
+from typing import Callable, Optional
+
+from kube_ai_proxy.config import MCP_HOST, MCP_PORT, MCP_UVLOOP
+
+logger = logging.getLogger("kube_ai_proxy.server")
+
+# A worker that dies sooner than this after starting is restarted only after a pause
+_MIN_WORKER_LIFETIME = 1.0
+
+
+def install_uvloop(enabled: bool = MCP_UVLOOP) -> bool:
+    """Make new event loops uvloop loops; returns True if uvloop is in use."""
+    if not enabled:
+        return False
+    try:
+        import uvloop
+    except ImportError:
+        logger.info("uvloop is not installed; using the default asyncio event loop")
+        return False
+    import asyncio
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    return True
+
+
+def _http_app(mcp, transport: str):
+    return mcp.streamable_http_app() if transport == "streamable-http" else mcp.sse_app()
+
+
+def _run_uvicorn(app, use_uvloop: bool, sock: Optional[socket.socket] = None) -> None:
+    import uvicorn
+
+    config = uvicorn.Config(
+        app,
+        host=MCP_HOST,
+        port=MCP_PORT,
+        loop="uvloop" if use_uvloop else "asyncio",
+        log_level=logging.getLevelName(logging.getLogger().level).lower(),
+    )
+    uvicorn.Server(config).run(sockets=[sock] if sock is not None else None)
+
+
+def serve(mcp, transport: str, workers: int = 1, on_exit: Optional[Callable[[], None]] = None) -> None:
+    """Run the server until shutdown; `on_exit` runs in every serving process as it stops."""
+    if workers > 1 and transport != "streamable-http":
+        logger.error(f"Multiple workers need the streamable-http transport; serving '{transport}' with one process")
+        workers = 1
+    if workers > 1:
+        serve_workers(mcp, workers, on_exit)
+        return
+
+    use_uvloop = install_uvloop()
+    from kube_ai_proxy.profiler import install as install_profiler
+    install_profiler()
+    try:
+        if transport == "stdio":
+            mcp.run(transport="stdio")
+        else:
+            logger.info(f"Listening on {MCP_HOST}:{MCP_PORT} (uvloop: {use_uvloop})")
+            _run_uvicorn(_http_app(mcp, transport), use_uvloop)
+    finally:
+        if on_exit is not None:
+            on_exit()
+
+
+def _worker(mcp, index: int, sock: socket.socket, on_exit: Optional[Callable[[], None]]) -> None:
+    # uvicorn installs its own graceful-shutdown handlers once serving
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+
+    # Per-process state that must not be shared with the other workers
+    from kube_ai_proxy.audit import AUDIT
+    from kube_ai_proxy.metrics import METRICS
+    AUDIT.directory = AUDIT.directory / f"worker-{index}"
+    METRICS.set("worker_info", 1, worker=index, pid=os.getpid())
+
+    from kube_ai_proxy.profiler import install as install_profiler
+    install_profiler()
+
+    use_uvloop = install_uvloop()
+    mcp.settings.stateless_http = True
+    logger.info(f"Worker {index} (pid {os.getpid()}) serving on {MCP_HOST}:{MCP_PORT} (uvloop: {use_uvloop})")
+    try:
+        _run_uvicorn(mcp.streamable_http_app(), use_uvloop, sock)
+    finally:
+        if on_exit is not None:
+            on_exit()
+
+
+def serve_workers(mcp, workers: int, on_exit: Optional[Callable[[], None]] = None) -> None:
+    """
+    Bind the listening socket, fork `workers` processes that all accept on it, and
+    supervise them until SIGINT/SIGTERM, which is forwarded to every worker (as is
+    SIGUSR2, the profiler toggle).
+    Everything imported before the fork (tool registry, discovery index) is shared
+    copy-on-write.
+    """
+    sock = socket.create_server((MCP_HOST, MCP_PORT), backlog=2048)
+    sock.set_inheritable(True)
+    children: dict[int, tuple[int, float]] = {}
+    stopping = False
+
+    def start(index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                _worker(mcp, index, sock, on_exit)
+            except BaseException:
+                logger.exception(f"Worker {index} failed")
+                code = 1
+            finally:
+                os._exit(code)
+        children[pid] = (index, time.monotonic())
+
+    def stop(signum, frame) -> None:
+        nonlocal stopping
+        if not stopping:
+            logger.info(f"Received signal {signum}, stopping {len(children)} workers...")
+        stopping = True
+        for pid in list(children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    def forward(signum, frame) -> None:
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    # SIGUSR2 toggles the profiler of every worker
+    signal.signal(signal.SIGUSR2, forward)
+    logger.info(f"Starting {workers} workers on {MCP_HOST}:{MCP_PORT}")
+    for index in range(workers):
+        start(index)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        if pid not in children:
+            continue
+        index, started = children.pop(pid)
+        if stopping:
+            continue
+        logger.warning(f"Worker {index} (pid {pid}) exited with code {os.waitstatus_to_exitcode(status)}; restarting")
+        if time.monotonic() - started < _MIN_WORKER_LIFETIME:
+            time.sleep(_MIN_WORKER_LIFETIME)
+        if not stopping:
+            start(index)
+    sock.close()
+    logger.info("All workers stopped")
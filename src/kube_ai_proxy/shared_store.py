@@ -0,0 +1,138 @@
+# src/kube_ai_proxy/shared_store.py
+
+"""
+Key/value store shared by every Kube AI Proxy worker process.
+
+In multi-worker mode each worker has its own memory, so caches that are worth
+sharing (help text, RBAC verdicts) go through one SQLite file in WAL mode instead:
+  - SharedStore.get / put: JSON values under (namespace, key) with a per-entry TTL
+  - SharedStore.invalidate: drop one key or a whole namespace
+  - size-capped: expired entries go first, then the oldest, once the cap is exceeded
+A single-process server uses the same store, which also keeps it warm across restarts.
+"""
+
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from kube_ai_proxy.config import SHARED_STORE_MAX_BYTES, SHARED_STORE_PATH
+
+logger = logging.getLogger("kube_ai_proxy.shared_store")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    namespace  TEXT NOT NULL,
+    key        TEXT NOT NULL,
+    value      TEXT NOT NULL,
+    size       INTEGER NOT NULL,
+    stored_at  REAL NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS entries_stored_at ON entries(stored_at);
+"""
+
+# Check the size cap once per this many writes
+_PRUNE_EVERY = 64
+
+
+class SharedStore:
+    """
+    SQLite-backed TTL key/value table. Connections are per process (reopened after
+    a fork) and serialized by a lock within it; SQLite locking handles the rest.
+    All methods are blocking; call them via asyncio.to_thread from the event loop.
+    """
+
+    def __init__(self, path: Path | str = SHARED_STORE_PATH, max_bytes: int = SHARED_STORE_MAX_BYTES):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._writes = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None or self._pid != os.getpid():
+            if str(self.path) != ":memory:":
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+            # A connection inherited across fork must not be used, only replaced
+            self._conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+            self._pid = os.getpid()
+        return self._conn
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        try:
+            with self._lock:
+                row = self._db().execute(
+                    "SELECT value FROM entries WHERE namespace = ? AND key = ? AND expires_at > ?",
+                    (namespace, key, time.time()),
+                ).fetchone()
+        except sqlite3.Error as e:
+            logger.warning(f"Shared store read failed: {e}")
+            return None
+        return json.loads(row[0]) if row else None
+
+    def put(self, namespace: str, key: str, value: Any, ttl: float) -> None:
+        if ttl <= 0:
+            return
+        data = json.dumps(value, separators=(",", ":"))
+        now = time.time()
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    db.execute(
+                        "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                        (namespace, key, data, len(data), now, now + ttl),
+                    )
+                self._writes += 1
+                if self._writes % _PRUNE_EVERY == 0:
+                    self._prune(db, now)
+        except sqlite3.Error as e:
+            logger.warning(f"Shared store write failed: {e}")
+
+    def invalidate(self, namespace: str, key: Optional[str] = None) -> None:
+        try:
+            with self._lock:
+                db = self._db()
+                with db:
+                    if key is None:
+                        db.execute("DELETE FROM entries WHERE namespace = ?", (namespace,))
+                    else:
+                        db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+        except sqlite3.Error as e:
+            logger.warning(f"Shared store invalidation failed: {e}")
+
+    def _prune(self, db: sqlite3.Connection, now: float) -> None:
+        with db:
+            db.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            # Oldest first until back under the cap
+            excess = total - self.max_bytes
+            cutoff = db.execute(
+                "SELECT stored_at FROM (SELECT stored_at, SUM(size) OVER (ORDER BY stored_at) AS running"
+                " FROM entries) WHERE running >= ? LIMIT 1",
+                (excess,),
+            ).fetchone()
+            if cutoff:
+                db.execute("DELETE FROM entries WHERE stored_at <= ?", (cutoff[0],))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+# Initialize once
+SHARED_STORE = SharedStore()
@@ -0,0 +1,480 @@
+# src/kube_ai_proxy/spawn_server.py
+
+"""
+Spawn helper process for Kube AI Proxy.
+
+Starting a child from the server means fork (or vfork) from a process whose
+memory keeps growing with caches and connections, on the event loop's thread. A
+helper started at launch, while the server is still small, starts the children
+instead:
+  - serve (`python -m kube_ai_proxy.spawn_server <socket> <parent pid>`): the helper
+    loop; accepts connections on a Unix socket, starts each child with posix_spawn
+    in a new session, passes the server's ends of the child's pipes back with
+    SCM_RIGHTS, reaps children and reports their exit status to whoever spawned them
+  - SpawnClient.start: launch the helper (from main, before the server is imported)
+  - SpawnClient.spawn: start a child through the helper; one connection per process
+    and event loop, so forked workers each get their own
+  - HelperProcess: the parts of asyncio.subprocess.Process the executors use (pid,
+    returncode, stdout, stderr, wait, communicate, send_signal) for a helper's child
+The helper imports nothing but the standard library and exits with its parent.
+"""
+
+import asyncio
+import errno
+import itertools
+import json
+import logging
+import os
+import resource
+import selectors
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from asyncio.subprocess import DEVNULL, PIPE, STDOUT
+from typing import Optional
+
+logger = logging.getLogger("kube_ai_proxy.spawn_server")
+
+# Largest request (argv + environment) and number of descriptors in one message
+MAX_MESSAGE = 1 << 20
+MAX_FDS = 2
+STARTUP_TIMEOUT = 5.0
+
+_STREAMS = {PIPE: "pipe", DEVNULL: "devnull", STDOUT: "stdout"}
+
+
+class SpawnUnavailable(Exception):
+    """The helper cannot be used (not started, gone, or the request needs the in-process path)."""
+
+
+# ─── Helper side ───────────────────────────────────────────────────────────────
+
+def _resolve(argv0: str, env: dict) -> str:
+    if "/" in argv0:
+        return argv0
+    path = shutil.which(argv0, path=env.get("PATH", os.defpath))
+    if path is None:
+        raise FileNotFoundError(errno.ENOENT, os.strerror(errno.ENOENT), argv0)
+    return path
+
+
+def _spawn_child(req: dict) -> tuple[int, list[int]]:
+    """posix_spawn the requested child; returns its pid and the server's pipe ends."""
+    env = req["env"]
+    argv = ["/bin/bash", "-c", req["command"]] if req.get("shell") else req["argv"]
+    path = _resolve(argv[0], env)
+    keep: list[int] = []   # pipe ends handed back to the server
+    close: list[int] = []  # the child's ends, closed here once it has them
+    try:
+        devnull = os.open(os.devnull, os.O_RDWR)
+        close.append(devnull)
+        targets = {0: devnull}
+        for fd, stream in ((1, req.get("stdout", "pipe")), (2, req.get("stderr", "pipe"))):
+            if stream == "pipe":
+                r, w = os.pipe()
+                keep.append(r)
+                close.append(w)
+                targets[fd] = w
+            elif stream == "stdout":
+                targets[fd] = targets[1]
+            else:
+                targets[fd] = devnull
+        # Pipes are created close-on-exec; dup2 onto 0-2 is all the child inherits
+        actions = [(os.POSIX_SPAWN_DUP2, src, dst) for dst, src in targets.items()]
+        pid = os.posix_spawn(path, argv, env, file_actions=actions, setsid=True)
+    except BaseException:
+        for fd in keep:
+            os.close(fd)
+        raise
+    finally:
+        for fd in close:
+            os.close(fd)
+    # posix_spawn has no rlimit attribute; the limits are set the moment it returns
+    for limit, value in req.get("rlimits") or []:
+        try:
+            resource.prlimit(pid, limit, (value, value))
+        except (OSError, ValueError):
+            pass
+    return pid, keep
+
+
+def _send(conn: socket.socket, message: dict, fds: list[int] = ()) -> None:
+    data = json.dumps(message).encode()
+    if fds:
+        socket.send_fds(conn, [data], list(fds))
+    else:
+        conn.send(data)
+
+
+def serve(path: str, parent_pid: int) -> None:
+    """Helper main loop; runs until the parent process is gone."""
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+    listener.bind(path)
+    os.chmod(path, 0o600)
+    listener.listen(64)
+
+    wake_r, wake_w = os.pipe()
+    os.set_blocking(wake_r, False)
+    os.set_blocking(wake_w, False)
+    signal.set_wakeup_fd(wake_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    # Shutdown is the parent's business; its SIGINT must not kill the helper first
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+
+    sel = selectors.DefaultSelector()
+    sel.register(listener, selectors.EVENT_READ, "accept")
+    sel.register(wake_r, selectors.EVENT_READ, "child")
+    owners: dict[int, socket.socket] = {}
+
+    def drop(conn: socket.socket) -> None:
+        try:
+            sel.unregister(conn)
+        except (KeyError, ValueError):
+            return
+        conn.close()
+        for pid in [p for p, c in owners.items() if c is conn]:
+            owners[pid] = None
+
+    def reap() -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            conn = owners.pop(pid, None)
+            if conn is not None:
+                try:
+                    _send(conn, {"exit": pid, "returncode": os.waitstatus_to_exitcode(status)})
+                except OSError:
+                    drop(conn)
+
+    try:
+        while os.getppid() == parent_pid:
+            for key, _ in sel.select(timeout=1.0):
+                if key.data == "accept":
+                    conn, _ = listener.accept()
+                    # A server that stops reading must not wedge the helper for everyone else
+                    conn.settimeout(5.0)
+                    sel.register(conn, selectors.EVENT_READ, "conn")
+                elif key.data == "child":
+                    try:
+                        while os.read(wake_r, 512):
+                            pass
+                    except BlockingIOError:
+                        pass
+                    reap()
+                else:
+                    conn = key.fileobj
+                    try:
+                        data, _, _, _ = socket.recv_fds(conn, MAX_MESSAGE, 0)
+                    except OSError:
+                        data = b""
+                    if not data:
+                        drop(conn)
+                        continue
+                    req: dict = {}
+                    try:
+                        req = json.loads(data)
+                        pid, fds = _spawn_child(req)
+                    except OSError as e:
+                        reply, fds = {"id": req.get("id"), "errno": e.errno or 0, "error": e.strerror or str(e),
+                                      "filename": e.filename}, []
+                    except Exception as e:
+                        # A malformed request (or argv/env posix_spawn rejects) fails alone, not the helper
+                        reply, fds = {"id": req.get("id") if isinstance(req, dict) else None,
+                                      "errno": errno.EINVAL, "error": f"bad spawn request: {e!r}"}, []
+                    else:
+                        owners[pid] = conn
+                        reply = {"id": req["id"], "pid": pid, "fds": len(fds)}
+                    try:
+                        _send(conn, reply, fds)
+                    except OSError:
+                        drop(conn)
+                    finally:
+                        for fd in fds:
+                            os.close(fd)
+            reap()
+    finally:
+        listener.close()
+        try:
+            os.unlink(path)
+            os.rmdir(os.path.dirname(path))
+        except OSError:
+            pass
+
+
+# ─── Server side ───────────────────────────────────────────────────────────────
+
+def _kill_group(pid: int) -> None:
+    try:
+        os.killpg(pid, signal.SIGKILL)
+    except (ProcessLookupError, PermissionError):
+        pass
+
+
+class HelperProcess:
+    """A child started by the helper; exit status arrives over the helper connection."""
+
+    def __init__(self, pid: int, exited: asyncio.Future, stdout, stderr):
+        self.pid = pid
+        self.stdin = None
+        self.stdout = stdout
+        self.stderr = stderr
+        self._exited = exited
+
+    @property
+    def returncode(self) -> Optional[int]:
+        return self._exited.result() if self._exited.done() else None
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._exited)
+
+    async def communicate(self, input=None) -> tuple[Optional[bytes], Optional[bytes]]:
+        async def read(stream):
+            return await stream.read() if stream is not None else None
+
+        out, err = await asyncio.gather(read(self.stdout), read(self.stderr))
+        await self.wait()
+        return out, err
+
+    def send_signal(self, sig: int) -> None:
+        try:
+            os.kill(self.pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self.send_signal(signal.SIGKILL)
+
+
+class _Connection:
+    """One process's (and event loop's) connection to the helper."""
+
+    def __init__(self, path: str, loop: asyncio.AbstractEventLoop, on_lost):
+        self.loop = loop
+        self.pid = os.getpid()
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        self.sock.connect(path)
+        self.sock.setblocking(False)
+        self.ids = itertools.count(1)
+        self.requests: dict[int, asyncio.Future] = {}
+        self.exits: dict[int, asyncio.Future] = {}
+        # The loop keeps one writer callback per socket: concurrent sock_sendall calls would strand each other
+        self.send_lock = asyncio.Lock()
+        self.closed = False
+        self._on_lost = on_lost
+        loop.add_reader(self.sock.fileno(), self._readable)
+
+    def _readable(self) -> None:
+        while True:
+            try:
+                data, fds, _, _ = socket.recv_fds(self.sock, MAX_MESSAGE, MAX_FDS)
+            except BlockingIOError:
+                return
+            except OSError as e:
+                self.close(f"connection failed: {e}")
+                return
+            if not data:
+                self.close("helper closed the connection")
+                return
+            msg = json.loads(data)
+            if "exit" in msg:
+                exited = self.exits.pop(msg["exit"], None)
+                if exited is not None and not exited.done():
+                    exited.set_result(msg["returncode"])
+                continue
+            fut = self.requests.pop(msg["id"], None)
+            exited = None
+            if "pid" in msg:
+                exited = self.exits[msg["pid"]] = self.loop.create_future()
+            if fut is None or fut.done():
+                # The spawning task was cancelled while waiting for the reply
+                for fd in fds:
+                    os.close(fd)
+                if "pid" in msg:
+                    _kill_group(msg["pid"])
+                continue
+            fut.set_result((msg, fds, exited))
+
+    async def request(self, req: dict) -> tuple[dict, list[int], Optional[asyncio.Future]]:
+        req["id"] = next(self.ids)
+        fut = self.loop.create_future()
+        self.requests[req["id"]] = fut
+        try:
+            async with self.send_lock:
+                await self.loop.sock_sendall(self.sock, json.dumps(req).encode())
+        except OSError as e:
+            self.requests.pop(req["id"], None)
+            self.close(f"send failed: {e}")
+            raise SpawnUnavailable(str(e)) from e
+        return await fut
+
+    def close(self, reason: str) -> None:
+        if self.closed:
+            return
+        self.closed = True
+        if not self.loop.is_closed():
+            self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+        for fut in self.requests.values():
+            if not fut.done():
+                fut.set_exception(SpawnUnavailable(reason))
+        # Children still running can no longer be waited for through the helper
+        for fut in self.exits.values():
+            if not fut.done():
+                fut.set_result(-1)
+        self.requests.clear()
+        self.exits.clear()
+        self._on_lost(reason)
+
+
+class SpawnClient:
+    """Starts the helper and sends it spawn requests."""
+
+    def __init__(self):
+        self.path: Optional[str] = None
+        self._helper: Optional[subprocess.Popen] = None
+        self._conn: Optional[_Connection] = None
+        self._lost: Optional[str] = None
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        # The helper stays the parent's to stop; a forked worker opens its own connection to it
+        if self._conn is not None:
+            self._conn.closed = True
+            self._conn.sock.close()
+            self._conn = None
+        self._helper = None
+
+    @property
+    def available(self) -> bool:
+        return self.path is not None and self._lost is None
+
+    def start(self) -> bool:
+        """Launch the helper; call early, while this process is small. False if it cannot run here."""
+        if self.path is not None:
+            return self.available
+        if not (sys.platform.startswith("linux") and hasattr(os, "posix_spawn") and hasattr(socket, "send_fds")):
+            return False
+        directory = tempfile.mkdtemp(prefix="kube-ai-proxy-spawn-")
+        path = os.path.join(directory, "spawn.sock")
+        try:
+            self._helper = subprocess.Popen(
+                [sys.executable, "-m", "kube_ai_proxy.spawn_server", path, str(os.getpid())],
+                stdin=subprocess.DEVNULL,
+                close_fds=True,
+            )
+        except OSError as e:
+            logger.warning(f"Spawn helper unavailable, starting children in-process: {e}")
+            os.rmdir(directory)
+            return False
+        deadline = time.monotonic() + STARTUP_TIMEOUT
+        while not os.path.exists(path):
+            if self._helper.poll() is not None or time.monotonic() > deadline:
+                logger.warning("Spawn helper did not start, starting children in-process")
+                self._helper.kill()
+                return False
+            time.sleep(0.005)
+        self.path = path
+        logger.info(f"Spawn helper started (pid {self._helper.pid})")
+        return True
+
+    def _connection(self) -> _Connection:
+        if not self.available:
+            raise SpawnUnavailable(self._lost or "not started")
+        loop = asyncio.get_running_loop()
+        conn = self._conn
+        if conn is None or conn.closed or conn.pid != os.getpid() or conn.loop is not loop:
+            if conn is not None and not conn.closed and conn.pid == os.getpid():
+                # The socket goes with the connection; only unregistering needs its loop
+                conn.closed = True
+                if not conn.loop.is_closed():
+                    conn.loop.remove_reader(conn.sock.fileno())
+                conn.sock.close()
+            try:
+                conn = self._conn = _Connection(self.path, loop, self._connection_lost)
+            except OSError as e:
+                self._connection_lost(f"cannot connect: {e}")
+                raise SpawnUnavailable(str(e)) from e
+        return conn
+
+    def _connection_lost(self, reason: str) -> None:
+        if self._lost is None:
+            logger.warning(f"Spawn helper lost ({reason}); starting children in-process")
+            self._lost = reason
+
+    @staticmethod
+    def supports(kwargs: dict) -> bool:
+        """Whether the helper can honour these stdout/stderr (and no other) subprocess arguments."""
+        return (
+            set(kwargs) <= {"stdout", "stderr"}
+            and kwargs.get("stdout", PIPE) in (PIPE, DEVNULL)
+            and kwargs.get("stderr", PIPE) in (PIPE, DEVNULL, STDOUT)
+        )
+
+    async def spawn(
+        self,
+        cmd: list[str] | str,
+        shell: bool,
+        env: dict[str, str],
+        stdout=PIPE,
+        stderr=PIPE,
+        rlimits: list[tuple[int, int]] = (),
+    ) -> HelperProcess:
+        """Start a child through the helper; OSError as create_subprocess_exec would raise it."""
+        conn = self._connection()
+        req = {"env": env, "stdout": _STREAMS[stdout], "stderr": _STREAMS[stderr], "rlimits": list(rlimits)}
+        if shell:
+            req.update(shell=True, command=cmd)
+        else:
+            req["argv"] = list(cmd)
+        msg, fds, exited = await conn.request(req)
+        if "pid" not in msg:
+            raise OSError(msg["errno"], msg["error"], msg.get("filename"))
+
+        readers = []
+        try:
+            for i, fd in enumerate(fds):
+                reader = asyncio.StreamReader(loop=conn.loop)
+                pipe = os.fdopen(fd, "rb", 0)
+                fds[i] = -1
+                await conn.loop.connect_read_pipe(lambda reader=reader: asyncio.StreamReaderProtocol(reader), pipe)
+                readers.append(reader)
+        except BaseException:
+            _kill_group(msg["pid"])
+            for fd in fds:
+                if fd >= 0:
+                    os.close(fd)
+            raise
+        out = readers.pop(0) if stdout == PIPE else None
+        err = readers.pop(0) if stderr == PIPE else None
+        return HelperProcess(msg["pid"], exited, out, err)
+
+    def close(self) -> None:
+        """Stop the helper (it also exits on its own once this process is gone)."""
+        if self._helper is not None and self._helper.poll() is None:
+            self._helper.terminate()
+            try:
+                self._helper.wait(1.0)
+            except subprocess.TimeoutExpired:
+                self._helper.kill()
+        self._lost = self._lost or "closed"
+
+
+# Initialize once
+SPAWNER = SpawnClient()
+
+
+if __name__ == "__main__":
+    serve(sys.argv[1], int(sys.argv[2]))
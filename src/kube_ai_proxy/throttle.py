@@ -0,0 +1,289 @@
+# src/kube_ai_proxy/throttle.py
+
+"""
+Adaptive client-side throttling for Kube AI Proxy.
+
+When many agents hit one cluster, the API server starts answering with 429s
+(including API Priority & Fairness rejections). Rather than keep spawning, every
+command for a Kubernetes context runs inside that context's AIMD window:
+  - AIMDWindow: concurrency limit that grows additively on success and shrinks
+    multiplicatively when a throttling signal is seen
+  - is_throttled: recognize throttling in CLI output/exit status or HTTP status codes
+  - is_idempotent_read: commands that are safe to retry
+  - is_long_running: commands that stay open (follows, watches, waits, rollout status)
+  - Throttle.run: run a command in its context's window, retrying idempotent reads
+    with jittered exponential backoff. Long-running commands hold their slot only
+    until their child has started (spawn calls child_started)
+  - Throttle.window_for: the window a command runs in
+The current window and in-flight count per context are exported as metrics.
+"""
+
+import asyncio
+import logging
+import random
+import re
+import shlex
+from contextvars import ContextVar
+from typing import Awaitable, Callable, Optional
+
+from kube_ai_proxy.config import (
+    K8S_CONTEXT,
+    THROTTLE_BACKOFF_BASE,
+    THROTTLE_BACKOFF_MAX,
+    THROTTLE_ENABLED,
+    THROTTLE_INITIAL_WINDOW,
+    THROTTLE_MAX_RETRIES,
+    THROTTLE_MAX_WINDOW,
+    THROTTLE_MIN_WINDOW,
+)
+from kube_ai_proxy.metrics import METRICS
+from kube_ai_proxy.tools import CommandResult, command_scope, is_pipe_command, split_pipe_command
+
+logger = logging.getLogger("kube_ai_proxy.throttle")
+
+# kubectl/helm/client-go wording for 429 TooManyRequests (APF rejections included)
+# and for the client-side rate limiter giving up. A bare "429" is not enough: it
+# turns up in names, ports and counts of ordinary errors.
+_THROTTLE_PATTERNS = re.compile(
+    r"TooManyRequests"
+    r"|\b429 Too Many Requests"
+    r"|status code:? 429\b"
+    r"|rejected by (?:API )?priority and fairness"
+    r"|client rate limiter Wait returned an error"
+    r"|rate: Wait\(n=\d+\) would exceed context deadline",
+    re.IGNORECASE,
+)
+
+# Read-only subcommands per tool (second token, or second and third for argocd)
+_READ_COMMANDS = {
+    "kubectl": {
+        "get", "describe", "logs", "top", "explain", "api-resources", "api-versions",
+        "version", "cluster-info", "events", "diff", "auth",
+    },
+    "helm": {
+        "list", "ls", "status", "get", "history", "hist", "show", "inspect", "search",
+        "template", "version", "env", "lint", "verify",
+    },
+    "istioctl": {
+        "proxy-config", "pc", "proxy-status", "ps", "analyze", "version", "describe",
+        "x", "experimental",
+    },
+    "argocd": {
+        "app list", "app get", "app history", "app manifests", "app diff", "app resources",
+        "app logs", "proj list", "proj get", "cluster list", "cluster get", "repo list",
+        "repo get", "version", "account get-user-info",
+    },
+}
+
+
+def is_throttled(output: str, exit_code: Optional[int] = None, status: Optional[int] = None) -> bool:
+    """True if a command result or HTTP status carries an API-server throttling signal."""
+    if status is not None:
+        return status == 429
+    if exit_code == 0:
+        return False
+    return _THROTTLE_PATTERNS.search(output) is not None
+
+
+def is_idempotent_read(command: str) -> bool:
+    """True for commands that only read cluster state (safe to retry)."""
+    head = split_pipe_command(command)[0] if is_pipe_command(command) else command
+    try:
+        argv = shlex.split(head)
+    except ValueError:
+        return False
+    if len(argv) < 2:
+        return False
+    reads = _READ_COMMANDS.get(argv[0], set())
+    if argv[0] == "argocd" and len(argv) > 2:
+        sub = argv[1].rstrip("s").replace("application", "app")
+        return f"{sub} {argv[2]}" in reads or argv[1] in reads
+    if argv[0] == "kubectl" and argv[1] == "auth":
+        return len(argv) > 2 and argv[2] in ("can-i", "whoami")
+    return argv[1] in reads
+
+
+def is_long_running(command: str) -> bool:
+    """
+    True for commands that stay open until something happens in the cluster: log
+    follows, watches, `wait`, `rollout status` and helm's --wait.
+    """
+    head = split_pipe_command(command)[0] if is_pipe_command(command) else command
+    try:
+        argv = shlex.split(head)
+    except ValueError:
+        return False
+    flags = {}
+    for arg in argv[1:]:
+        if arg.startswith("-"):
+            name, eq, value = arg.partition("=")
+            flags[name] = value.lower() if eq else "true"
+    # Leading positional words: the subcommand (flag values among them do no harm)
+    words = [a for a in argv[1:] if not a.startswith("-")][:3]
+
+    def on(*names: str) -> bool:
+        return any(flags.get(n, "false") != "false" for n in names)
+
+    if "wait" in words or "rollout status" in " ".join(words):
+        return True
+    if "logs" in words and on("-f", "--follow"):
+        return True
+    if argv[:1] == ["helm"]:
+        return on("--wait", "--wait-for-jobs")
+    return on("-w", "--watch", "--watch-only")
+
+
+# Set by Throttle.run around a run that holds its slot only while its child starts
+_CHILD_STARTED: ContextVar[Optional[Callable[[], Awaitable[None]]]] = ContextVar("child_started", default=None)
+
+
+async def child_started() -> None:
+    """Called by spawn once a child runs: frees the slot of a run that does not hold it."""
+    release = _CHILD_STARTED.get()
+    if release is not None:
+        await release()
+
+
+class AIMDWindow:
+    """
+    Concurrency window for one context. Each unthrottled completion grows the window
+    by `increase / window` (about +`increase` per window's worth of commands); a
+    throttled one multiplies it by `decrease`. Commands already in flight when the
+    window shrank were sent under the old limit, so their outcomes neither shrink
+    nor grow it again (one decrease per overload episode, as in TCP recovery).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        initial: float = THROTTLE_INITIAL_WINDOW,
+        minimum: float = THROTTLE_MIN_WINDOW,
+        maximum: float = THROTTLE_MAX_WINDOW,
+        increase: float = 1.0,
+        decrease: float = 0.5,
+    ):
+        self.name = name
+        self.minimum = max(1.0, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.window = min(max(initial, self.minimum), self.maximum)
+        self.increase = increase
+        self.decrease = decrease
+        self.in_flight = 0
+        self._completed = 0
+        self._recovery_until = 0
+        self._cond = asyncio.Condition()
+        self._publish()
+
+    def _publish(self) -> None:
+        METRICS.set("throttle_window", round(self.window, 2), context=self.name)
+        METRICS.set("throttle_in_flight", self.in_flight, context=self.name)
+
+    async def acquire(self) -> None:
+        async with self._cond:
+            await self._cond.wait_for(lambda: self.in_flight < int(self.window))
+            self.in_flight += 1
+            self._publish()
+
+    async def release(self, throttled: Optional[bool]) -> None:
+        """Free a slot; `throttled` None leaves the window size alone (outcome unknown)."""
+        async with self._cond:
+            self.in_flight -= 1
+            self._completed += 1
+            if self._completed <= self._recovery_until or throttled is None:
+                pass  # started before the last decrease, or nothing to learn
+            elif throttled:
+                self.window = max(self.minimum, self.window * self.decrease)
+                self._recovery_until = self._completed + self.in_flight
+                logger.info(f"API throttling on context {self.name!r}: window now {self.window:.1f}")
+            else:
+                self.window = min(self.maximum, self.window + self.increase / self.window)
+            self._publish()
+            self._cond.notify_all()
+
+
+class Throttle:
+    """AIMD windows keyed by Kubernetes context."""
+
+    def __init__(
+        self,
+        enabled: bool = THROTTLE_ENABLED,
+        max_retries: int = THROTTLE_MAX_RETRIES,
+        backoff_base: float = THROTTLE_BACKOFF_BASE,
+        backoff_max: float = THROTTLE_BACKOFF_MAX,
+    ):
+        self.enabled = enabled
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._windows: dict[str, AIMDWindow] = {}
+
+    def window(self, context: str) -> AIMDWindow:
+        if context not in self._windows:
+            self._windows[context] = AIMDWindow(context)
+        return self._windows[context]
+
+    def window_for(self, command: str | list[str], context: Optional[str] = None) -> Optional[AIMDWindow]:
+        """The window `command` runs in (see run), or None when throttling is off."""
+        if not self.enabled:
+            return None
+        text = command if isinstance(command, str) else shlex.join(command)
+        return self.window(command_scope(text)[0] or context or K8S_CONTEXT or "default")
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff for retry `attempt` (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    async def run(
+        self,
+        command: str | list[str],
+        run: Callable[[], Awaitable[CommandResult]],
+        context: Optional[str] = None,
+        retry: bool = True,
+        hold: Optional[bool] = None,
+    ) -> CommandResult:
+        """
+        Await `run()` inside the window of the command's context (its --context /
+        --kube-context flag, else `context`, else the proxy default). Throttled
+        idempotent reads are retried with backoff unless `retry` is False (runs
+        whose output was already handed on); other commands are not. With hold
+        False (default: for long-running commands) the slot is freed, without
+        resizing the window, as soon as run() has spawned its child.
+        """
+        window = self.window_for(command, context)
+        if window is None:
+            return await run()
+        text = command if isinstance(command, str) else shlex.join(command)
+        context = window.name
+        retries = self.max_retries if retry and is_idempotent_read(text) else 0
+        if hold is None:
+            hold = not is_long_running(text)
+
+        for attempt in range(retries + 1):
+            await window.acquire()
+            released = False
+
+            async def release(throttled: Optional[bool]) -> None:
+                nonlocal released
+                if not released:
+                    released = True
+                    await window.release(throttled)
+
+            token = _CHILD_STARTED.set(None if hold else lambda: release(None))
+            throttled = False
+            try:
+                result = await run()
+                throttled = is_throttled(result.get("output", ""), result.get("exit_code"))
+            finally:
+                _CHILD_STARTED.reset(token)
+                await release(throttled)
+            if not throttled:
+                return result
+            METRICS.inc("throttle_events_total", context=context)
+            if attempt < retries:
+                METRICS.inc("throttle_retries_total", context=context)
+                await asyncio.sleep(self.backoff(attempt))
+        return result
+
+
+# Initialize once
+THROTTLE = Throttle()
@@ -72,6 +72,29 @@ class CommandResult(TypedDict):
     error: NotRequired[ErrorDetails]
 
 
+class JobStatus(TypedDict):
+    """
+    State of a background job.
+
+    - job_id: identifier returned on submission
+    - command: the command line being run
+    - state: "running", "succeeded", "failed", "cancelled" or "timed_out"
+    - output: output from the requested offset (stdout and stderr interleaved)
+    - offset: offset to pass on the next poll to continue the output
+    - exit_code: optional exit code once finished
+    - execution_time: seconds since the job started (or its total runtime)
+    - dropped_bytes: optional output bytes not recorded (per-job output cap)
+    """
+    job_id: str
+    command: str
+    state: Literal["running", "succeeded", "failed", "cancelled", "timed_out"]
+    output: str
+    offset: int
+    exit_code: NotRequired[int]
+    execution_time: NotRequired[float]
+    dropped_bytes: NotRequired[int]
+
+
 @dataclass
 class CommandHelpResult:
     """
@@ -155,3 +178,28 @@ def split_pipe_command(pipe_command: str) -> list[str]:
         commands.append(buf.strip())
 
     return commands
+
+
+def command_scope(command: str) -> tuple[str | None, str | None]:
+    """
+    Kubernetes context and namespace a command selects with its own flags
+    (`--context`/`--kube-context`, `-n`/`--namespace`, `-A` as "*"), looking at the
+    first stage of a pipe. None where the command does not say.
+    """
+    head = split_pipe_command(command)[0] if is_pipe_command(command) else command
+    try:
+        argv = shlex.split(head)
+    except ValueError:
+        return None, None
+    context = namespace = None
+    for i, tok in enumerate(argv):
+        name, eq, value = tok.partition("=")
+        if not eq:
+            value = argv[i + 1] if i + 1 < len(argv) else ""
+        if name in ("--context", "--kube-context"):
+            context = value
+        elif name in ("-n", "--namespace"):
+            namespace = value
+        elif name in ("-A", "--all-namespaces"):
+            namespace = "*"
+    return context, namespace
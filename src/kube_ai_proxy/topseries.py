@@ -0,0 +1,548 @@
+# src/kube_ai_proxy/topseries.py
+
+"""
+Rolling time series of `kubectl top` samples for Kube AI Proxy.
+
+`kubectl top` only shows the current usage. When the sampler is enabled, a
+background task polls `kubectl top pods -A` and `kubectl top nodes` for each
+configured context. It keeps the CPU and memory of every pod and node in
+fixed-size rings, so questions like "which pods are growing" can be answered
+without a metrics stack:
+  - parse_top: {(namespace, name): (cpu millicores, memory MiB)} from `--no-headers` output
+  - Tier: one resolution (raw, 1m or 10m). A time ring is shared by all series, and
+    each metric has a slot-major float32 `array` matrix, NaN where a series had no sample
+  - SeriesTable: the tiers of one context and kind. Pods and nodes get slots; a slot is
+    recycled once its series has aged out, or when the table is full
+  - series_stats: latest, mean, min/max, p50/p95, trend per hour and change over a window.
+    Computed on zero-copy NumPy views when NumPy is installed, in pure Python otherwise
+  - TopSampler: the polling task (throttled, with per-context backoff) and query()
+Memory is bounded by K8S_MCP_TOP_MAX_SERIES slots per context and kind, each
+holding a fixed number of points per tier, however many pods come and go.
+"""
+
+import asyncio
+import fnmatch
+import heapq
+import logging
+import math
+import re
+import time
+from array import array
+from typing import Optional, Sequence
+
+from kube_ai_proxy.cli_executor import run_cli
+from kube_ai_proxy.config import (
+    K8S_CONTEXT,
+    TOP_CONTEXTS,
+    TOP_INTERVAL,
+    TOP_MAX_SERIES,
+    TOP_POINTS,
+    TOP_SAMPLER_ENABLED,
+)
+from kube_ai_proxy.metrics import METRICS
+
+try:
+    import numpy as np
+except ImportError:  # Optional: the pure-Python path reads the same buffers
+    np = None
+
+logger = logging.getLogger("kube_ai_proxy.topseries")
+
+KINDS = ("pods", "nodes")
+METRIC_NAMES = ("cpu", "memory")
+UNITS = {"cpu": "millicores", "memory": "MiB"}
+
+# (name, bucket seconds, points kept); bucket 0 keeps every sample
+TIERS = (("raw", 0, TOP_POINTS[0]), ("1m", 60, TOP_POINTS[1]), ("10m", 600, TOP_POINTS[2]))
+
+SORTS = ("trend", "change", "p95", "max", "latest")
+BACKOFF_MAX = 600.0
+NAN = float("nan")
+
+_CPU_UNITS = {"n": 1e-6, "u": 1e-3, "m": 1.0, "": 1000.0}
+_MEMORY_UNITS = {
+    "": 1, "k": 1e3, "M": 1e6, "G": 1e9, "T": 1e12,
+    "Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40,
+}
+_QUANTITY = re.compile(r"^([0-9.]+)([a-zA-Z]*)$")
+_WINDOW = re.compile(r"^\s*([0-9.]+)\s*([smhd]?)\s*$")
+_WINDOW_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def _quantity(text: str, units: dict[str, float]) -> Optional[float]:
+    m = _QUANTITY.match(text)
+    if not m or m.group(2) not in units:
+        return None
+    return float(m.group(1)) * units[m.group(2)]
+
+
+def parse_top(kind: str, text: str) -> dict[tuple[str, str], tuple[float, float]]:
+    """
+    `kubectl top pods -A --no-headers` (NAMESPACE NAME CPU MEMORY) or `kubectl top
+    nodes --no-headers` (NAME CPU CPU% MEMORY MEMORY%) as {(namespace, name): (cpu, memory)}.
+    Node keys have an empty namespace. Rows with unknown values are skipped.
+    """
+    samples = {}
+    for line in text.splitlines():
+        fields = line.split()
+        if kind == "pods" and len(fields) >= 4:
+            key, cpu, memory = (fields[0], fields[1]), fields[2], fields[3]
+        elif kind == "nodes" and len(fields) >= 4:
+            key, cpu, memory = ("", fields[0]), fields[1], fields[3]
+        else:
+            continue
+        cpu_m = _quantity(cpu, _CPU_UNITS)
+        memory_b = _quantity(memory, _MEMORY_UNITS)
+        if cpu_m is not None and memory_b is not None:
+            samples[key] = (cpu_m, memory_b / 2**20)
+    return samples
+
+
+def parse_window(window: str | int | float) -> float:
+    """Seconds in a window like "90s", "30m", "6h", "2d" or a plain number of seconds."""
+    if isinstance(window, (int, float)):
+        seconds = float(window)
+    else:
+        m = _WINDOW.match(window)
+        if not m:
+            raise ValueError(f"invalid window {window!r} (use e.g. 30m, 6h, 2d)")
+        seconds = float(m.group(1)) * _WINDOW_UNITS[m.group(2)]
+    if seconds <= 0:
+        raise ValueError("window must be positive")
+    return seconds
+
+
+class Tier:
+    """
+    One resolution of a SeriesTable. Column `c` of every series was sampled at
+    `times[c]`; the value of series `s` is `values[metric][s * capacity + c]`.
+    A downsampled tier sums the samples of each `step`-second bucket per series
+    and appends their means when the bucket closes.
+    """
+
+    def __init__(self, name: str, step: int, capacity: int):
+        self.name = name
+        self.step = step
+        self.capacity = capacity
+        self.times = array("d", [NAN]) * capacity
+        self.values = {m: array("f") for m in METRIC_NAMES}
+        self.slots = 0
+        self.head = 0  # next column written
+        self.count = 0
+        # Open bucket of a downsampled tier
+        self.bucket: Optional[int] = None
+        self.sums = {m: array("d") for m in METRIC_NAMES}
+        self.counts = {m: array("I") for m in METRIC_NAMES}
+
+    def grow(self, slots: int) -> None:
+        added = slots - self.slots
+        for m in METRIC_NAMES:
+            self.values[m].extend(array("f", [NAN]) * (added * self.capacity))
+            if self.step:
+                self.sums[m].extend(array("d", [0.0]) * added)
+                self.counts[m].extend(array("I", [0]) * added)
+        self.slots = slots
+
+    def clear(self, slot: int) -> None:
+        base = slot * self.capacity
+        for m in METRIC_NAMES:
+            self.values[m][base:base + self.capacity] = array("f", [NAN]) * self.capacity
+            if self.step:
+                self.sums[m][slot] = 0.0
+                self.counts[m][slot] = 0
+
+    def add(self, ts: float, columns: dict[str, array]) -> None:
+        """Take one sample column per metric (one value per slot, NaN when absent)."""
+        if not self.step:
+            self._append(ts, columns)
+            return
+        bucket = int(ts // self.step)
+        if self.bucket is not None and bucket != self.bucket:
+            self._close_bucket()
+        self.bucket = bucket
+        for m in METRIC_NAMES:
+            column, sums, counts = columns[m], self.sums[m], self.counts[m]
+            if np is not None and self.slots:
+                v = np.frombuffer(column, dtype=np.float32)
+                present = ~np.isnan(v)
+                np.frombuffer(sums, dtype=np.float64)[present] += v[present]
+                np.frombuffer(counts, dtype=np.uint32)[present] += 1
+                continue
+            for slot, value in enumerate(column):
+                if value == value:
+                    sums[slot] += value
+                    counts[slot] += 1
+
+    def _close_bucket(self) -> None:
+        means = {}
+        for m in METRIC_NAMES:
+            sums, counts = self.sums[m], self.counts[m]
+            means[m] = array("f", (s / n if n else NAN for s, n in zip(sums, counts)))
+            self.sums[m] = array("d", [0.0]) * self.slots
+            self.counts[m] = array("I", [0]) * self.slots
+        self._append(float(self.bucket * self.step), means)
+
+    def _append(self, ts: float, columns: dict[str, array]) -> None:
+        col = self.head
+        self.times[col] = ts
+        for m in METRIC_NAMES:
+            if np is not None and self.slots:
+                matrix = np.frombuffer(self.values[m], dtype=np.float32).reshape(self.slots, self.capacity)
+                matrix[:, col] = np.frombuffer(columns[m], dtype=np.float32)
+                continue
+            values, cap = self.values[m], self.capacity
+            for slot, value in enumerate(columns[m]):
+                values[slot * cap + col] = value
+        self.head = (col + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def columns(self, since: float) -> list[int]:
+        """Columns sampled at or after `since`, oldest first."""
+        first = (self.head - self.count) % self.capacity
+        cols = [(first + i) % self.capacity for i in range(self.count)]
+        return [c for c in cols if self.times[c] >= since]
+
+    def oldest(self) -> Optional[float]:
+        return self.times[(self.head - self.count) % self.capacity] if self.count else None
+
+
+class SeriesTable:
+    """The pods or nodes of one context: a slot per series, and the tiers holding their samples."""
+
+    def __init__(self, context: str, kind: str, interval: float, max_series: int = TOP_MAX_SERIES):
+        self.context = context
+        self.kind = kind
+        self.interval = interval
+        self.max_series = max_series
+        self.tiers = [Tier(name, step, capacity) for name, step, capacity in TIERS]
+        # A series whose newest point has left every tier is forgotten
+        self.retention = max(capacity * (step or interval) for _, step, capacity in TIERS)
+        self.slots: dict[tuple[str, str], int] = {}
+        self.keys: list[Optional[tuple[str, str]]] = []
+        self.last_seen = array("d")
+        self.free: list[int] = []
+        self.dropped = 0
+        self.updated: Optional[float] = None
+
+    def _release(self, slot: int) -> None:
+        del self.slots[self.keys[slot]]
+        self.keys[slot] = None
+        for tier in self.tiers:
+            tier.clear(slot)
+        self.free.append(slot)
+
+    def _slot(self, key: tuple[str, str], now: float) -> Optional[int]:
+        slot = self.slots.get(key)
+        if slot is not None:
+            return slot
+        if self.free:
+            slot = self.free.pop()
+        elif len(self.keys) < self.max_series:
+            slot = len(self.keys)
+            self.keys.append(None)
+            self.last_seen.append(0.0)
+            for tier in self.tiers:
+                tier.grow(len(self.keys))
+        else:
+            # Full: reuse the series seen longest ago, unless all were in this sample
+            slot = min(range(len(self.keys)), key=self.last_seen.__getitem__)
+            if self.last_seen[slot] >= now:
+                return None
+            self._release(slot)
+            self.free.remove(slot)
+        self.slots[key] = slot
+        self.keys[slot] = key
+        return slot
+
+    def record(self, now: float, samples: dict[tuple[str, str], tuple[float, float]]) -> None:
+        for slot in [s for k, s in self.slots.items() if self.last_seen[s] < now - self.retention]:
+            self._release(slot)
+        cpu = array("f", [NAN]) * len(self.keys)
+        memory = array("f", [NAN]) * len(self.keys)
+        for key, (cpu_m, memory_mb) in samples.items():
+            slot = self._slot(key, now)
+            if slot is None:
+                self.dropped += 1
+                continue
+            if slot >= len(cpu):
+                grow = array("f", [NAN]) * (len(self.keys) - len(cpu))
+                cpu.extend(grow)
+                memory.extend(grow)
+            cpu[slot], memory[slot] = cpu_m, memory_mb
+            self.last_seen[slot] = now
+        for tier in self.tiers:
+            tier.add(now, {"cpu": cpu, "memory": memory})
+        self.updated = now
+
+    def pick_tier(self, since: float) -> Optional[Tier]:
+        """The finest tier reaching back to `since`, else the one reaching back furthest."""
+        tiers = [t for t in self.tiers if t.count]
+        for tier in tiers:
+            if tier.oldest() <= since + (tier.step or self.interval):
+                return tier
+        return min(tiers, key=Tier.oldest) if tiers else None
+
+
+def _percentile(ordered: Sequence[float], q: float) -> float:
+    """Linear interpolation between closest ranks, as numpy.percentile does by default."""
+    pos = (len(ordered) - 1) * q / 100
+    lo = math.floor(pos)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (pos - lo)
+
+
+def _stats_python(times: Sequence[float], rows: list[list[float]]) -> list[Optional[dict]]:
+    stats = []
+    for row in rows:
+        points = [(t, v) for t, v in zip(times, row) if v == v]
+        if not points:
+            stats.append(None)
+            continue
+        n = len(points)
+        values = sorted(v for _, v in points)
+        mean = sum(values) / n
+        t_mean = sum(t for t, _ in points) / n
+        var = sum((t - t_mean) ** 2 for t, _ in points)
+        cov = sum((t - t_mean) * (v - mean) for t, v in points)
+        stats.append({
+            "points": n,
+            "first": points[0][1],
+            "latest": points[-1][1],
+            "mean": mean,
+            "min": values[0],
+            "max": values[-1],
+            "p50": _percentile(values, 50),
+            "p95": _percentile(values, 95),
+            "trend": cov / var * 3600 if var else 0.0,
+        })
+    return stats
+
+
+def _stats_numpy(times, matrix) -> list[Optional[dict]]:
+    """Same as _stats_python over a (series x columns) float matrix, one pass per statistic."""
+    values = matrix.astype(np.float64)
+    present = ~np.isnan(values)
+    n = present.sum(axis=1)
+    some = n > 0
+    stats: list[Optional[dict]] = [None] * len(values)
+    if not some.any():
+        return stats
+    values, present, n = values[some], present[some], n[some]
+    rows = np.arange(len(values))
+    filled = np.where(present, values, 0.0)
+    mean = filled.sum(axis=1) / n
+    first = values[rows, present.argmax(axis=1)]
+    latest = values[rows, values.shape[1] - 1 - present[:, ::-1].argmax(axis=1)]
+    low = np.where(present, values, np.inf).min(axis=1)
+    high = np.where(present, values, -np.inf).max(axis=1)
+    p50, p95 = np.nanpercentile(values, [50, 95], axis=1)
+    t_mean = (present * times).sum(axis=1) / n
+    dt = np.where(present, times - t_mean[:, None], 0.0)
+    var = (dt * dt).sum(axis=1)
+    cov = (dt * (filled - mean[:, None])).sum(axis=1)
+    trend = np.divide(cov, var, out=np.zeros_like(cov), where=var > 0) * 3600
+    columns = zip(n, first, latest, mean, low, high, p50, p95, trend)
+    for i, row in zip(np.flatnonzero(some), columns):
+        stats[i] = dict(zip(("points", "first", "latest", "mean", "min", "max", "p50", "p95", "trend"),
+                            (int(row[0]), *(float(v) for v in row[1:]))))
+    return stats
+
+
+def series_stats(tier: Tier, metric: str, slots: list[int], cols: list[int]) -> list[Optional[dict]]:
+    """
+    Statistics of each slot's `metric` over `cols` of `tier` (None for a slot
+    without points): points, first, latest, mean, min, max, p50, p95, and the
+    least-squares trend in units per hour.
+    """
+    if not slots or not cols:
+        return [None] * len(slots)
+    if np is not None:
+        # Views straight over the array buffers; the fancy index below copies the selection
+        times = np.frombuffer(tier.times, dtype=np.float64)[cols]
+        matrix = np.frombuffer(tier.values[metric], dtype=np.float32).reshape(tier.slots, tier.capacity)
+        return _stats_numpy(times, matrix[np.ix_(slots, cols)])
+    values, cap = tier.values[metric], tier.capacity
+    times = [tier.times[c] for c in cols]
+    return _stats_python(times, [[values[s * cap + c] for c in cols] for s in slots])
+
+
+def _matches(key: tuple[str, str], namespace: Optional[str], name: Optional[str]) -> bool:
+    if namespace and key[0] != namespace:
+        return False
+    if not name:
+        return True
+    if any(ch in name for ch in "*?["):
+        return fnmatch.fnmatchcase(key[1], name)
+    return name in key[1]
+
+
+def _rank(stats: dict, sort: str) -> float:
+    if sort == "trend":
+        return abs(stats["trend"])
+    if sort == "change":
+        return abs(stats["latest"] - stats["first"])
+    return stats[sort]
+
+
+def _fmt(value: float) -> str:
+    return f"{value:.1f}"
+
+
+def _signed(value: float) -> str:
+    return f"{value:+.1f}"
+
+
+class TopSampler:
+    """Background `kubectl top` polling into SeriesTables, and queries over them."""
+
+    def __init__(
+        self,
+        contexts: Sequence[str] = TOP_CONTEXTS,
+        interval: float = TOP_INTERVAL,
+        enabled: bool = TOP_SAMPLER_ENABLED,
+    ):
+        # "" is the proxy's own context (K8S_CONTEXT, else the kubeconfig's current one)
+        self.contexts = list(contexts) or [K8S_CONTEXT or ""]
+        self.interval = interval
+        self.enabled = enabled and interval > 0
+        self.tables: dict[tuple[str, str], SeriesTable] = {}
+        self.errors: dict[str, str] = {}
+        self._failures: dict[str, int] = {}
+        self._next: dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def ensure_started(self) -> None:
+        """Start the polling task on the running loop (idempotent)."""
+        if not self.enabled or (self._task and not self._task.done()):
+            return
+        self._task = asyncio.get_running_loop().create_task(self._loop())
+
+    async def _loop(self) -> None:
+        while True:
+            now = time.monotonic()
+            due = [c for c in self.contexts if self._next.get(c, 0.0) <= now]
+            await asyncio.gather(*(self._sample(c) for c in due))
+            await asyncio.sleep(self.interval)
+
+    async def _top(self, context: str, kind: str) -> str:
+        argv = ["kubectl", "top", kind, "--no-headers"]
+        if kind == "pods":
+            argv.append("--all-namespaces")
+        if context:
+            argv += ["--context", context]
+
+        done = await run_cli(argv, self.interval)
+        if done.timed_out:
+            raise RuntimeError(f"timed out after {self.interval:.0f}s")
+        if done.returncode != 0:
+            raise RuntimeError(done.error())
+        return done.stdout.decode("utf-8", "replace")
+
+    async def _sample(self, context: str) -> None:
+        label = context or "current"
+        try:
+            for kind in KINDS:
+                text = await self._top(context, kind)
+                table = self.tables.get((context, kind))
+                if table is None:
+                    table = self.tables[(context, kind)] = SeriesTable(context, kind, self.interval)
+                table.record(time.time(), parse_top(kind, text))
+                METRICS.inc("top_samples_total", context=label, kind=kind)
+                METRICS.set("top_series", len(table.slots), context=label, kind=kind)
+        except (RuntimeError, OSError, asyncio.TimeoutError) as e:
+            failures = self._failures[context] = self._failures.get(context, 0) + 1
+            delay = min(self.interval * 2 ** failures, BACKOFF_MAX)
+            self._next[context] = time.monotonic() + delay
+            if self.errors.get(context) != str(e):
+                logger.warning(f"kubectl top on context {label!r} failed ({e}); retrying in {delay:.0f}s")
+            self.errors[context] = str(e)
+            METRICS.inc("top_sample_errors_total", context=label)
+            return
+        self._failures.pop(context, None)
+        self._next.pop(context, None)
+        self.errors.pop(context, None)
+
+    def query(
+        self,
+        kind: str = "pods",
+        metric: str = "memory",
+        window: str | float = "1h",
+        namespace: Optional[str] = None,
+        name: Optional[str] = None,
+        top: int = 10,
+        sort: str = "trend",
+        context: Optional[str] = None,
+    ) -> str:
+        """
+        Render the top-K series of one context and kind over `window`, ranked by
+        `sort`: "trend" and "change" rank movers either way by magnitude, the
+        others by the largest value. A single matching series also lists its points.
+        Raises ValueError for invalid arguments or before the first sample.
+        """
+        if kind not in KINDS:
+            raise ValueError(f"kind must be one of {', '.join(KINDS)}")
+        if metric not in METRIC_NAMES:
+            raise ValueError(f"metric must be one of {', '.join(METRIC_NAMES)}")
+        if sort not in SORTS:
+            raise ValueError(f"sort must be one of {', '.join(SORTS)}")
+        context = self.contexts[0] if context is None else context
+        if context not in self.contexts:
+            raise ValueError(f"context {context!r} is not sampled (K8S_MCP_TOP_CONTEXTS)")
+        seconds = parse_window(window)
+        if kind == "nodes":
+            namespace = None
+        label = context or "current"
+
+        table = self.tables.get((context, kind))
+        if table is None or table.updated is None:
+            error = self.errors.get(context)
+            raise ValueError(f"no samples for context {label!r} yet" + (f": {error}" if error else ""))
+        since = time.time() - seconds
+        tier = table.pick_tier(since)
+        cols = tier.columns(since)
+        keys = sorted(k for k in table.slots if _matches(k, namespace, name))
+        stats = series_stats(tier, metric, [table.slots[k] for k in keys], cols)
+        found = [(k, s) for k, s in zip(keys, stats) if s is not None]
+        if not found:
+            return f"No {kind} with {metric} samples match in the last {window} (context {label})."
+
+        chosen = heapq.nlargest(max(1, top), found, key=lambda item: _rank(item[1], sort))
+        lines = [
+            f"{kind} {metric} ({UNITS[metric]}) over the last {window}, context {label} "
+            f"({tier.name} tier, {len(cols)} points); "
+            f"{len(chosen)} of {len(found)} series by {sort}:",
+            "",
+        ]
+        header = ("NAMESPACE/NAME" if kind == "pods" else "NAME", "LATEST", "MEAN", "P50", "P95", "MAX", "CHANGE", "TREND/H")
+        rows = [header]
+        for key, s in chosen:
+            change = s["latest"] - s["first"]
+            pct = f" ({change / s['first']:+.0%})" if s["first"] else ""
+            rows.append((
+                f"{key[0]}/{key[1]}" if key[0] else key[1],
+                _fmt(s["latest"]), _fmt(s["mean"]), _fmt(s["p50"]), _fmt(s["p95"]), _fmt(s["max"]),
+                _signed(change) + pct, _signed(s["trend"]),
+            ))
+        widths = [max(len(r[i]) for r in rows) for i in range(len(header))]
+        lines += ["  ".join(v.ljust(w) if i == 0 else v.rjust(w) for i, (v, w) in enumerate(zip(r, widths))) for r in rows]
+
+        if len(found) == 1:
+            slot = table.slots[found[0][0]]
+            values, cap = tier.values[metric], tier.capacity
+            lines += ["", "points:"]
+            for c in cols:
+                value = values[slot * cap + c]
+                if value == value:
+                    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(tier.times[c]))
+                    lines.append(f"  {stamp}  {_fmt(value)}")
+        if table.dropped:
+            lines += ["", f"({table.dropped} samples dropped: over K8S_MCP_TOP_MAX_SERIES series)"]
+        return "\n".join(lines)
+
+
+# Initialize once
+TOP_SAMPLER = TopSampler()
+
+
+def ensure_top_sampler() -> None:
+    TOP_SAMPLER.ensure_started()
@@ -0,0 +1,455 @@
+# src/kube_ai_proxy/troubleshoot.py
+
+"""
+One-shot troubleshooting bundles for Kube AI Proxy.
+
+Instead of describe, events, owner lookups, pod logs and service checks one tool
+call at a time, everything related to one resource is collected concurrently (each
+query with its own time budget) and returned as a single size-bounded report:
+  - owner_chain: walk controller ownerReferences up from the target
+  - failing_conditions / container_problems: unhealthy status signals of an object
+  - pod_health: unhealthiness score, to pick the pods whose logs are fetched
+  - collect_bundle: fan out, deduplicate, and render sections by relevance:
+    failing conditions, warning events, crash logs, services/endpoints, then
+    related objects, other events and the describe output
+"""
+
+import asyncio
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from kube_ai_proxy.cli_executor import run_cli
+from kube_ai_proxy.config import (
+    K8S_CONTEXT,
+    TROUBLESHOOT_CONCURRENCY,
+    TROUBLESHOOT_ITEM_TIMEOUT,
+    TROUBLESHOOT_LOG_BYTES,
+    TROUBLESHOOT_LOG_TAIL,
+    TROUBLESHOOT_MAX_PODS,
+)
+from kube_ai_proxy.discovery import normalize_resource
+from kube_ai_proxy.pod_logs import LogStream, fetch_stream, get_json, selector_for
+
+# Section priorities, most relevant first
+FAILING, WARNINGS, CRASH_LOGS, NETWORK, RELATED, EVENTS, DESCRIBE = range(7)
+
+# Condition types that signal trouble when True; any other condition does when False
+_NEGATIVE_CONDITIONS = {
+    "ReplicaFailure", "Failed", "Stalled", "Degraded",
+    "MemoryPressure", "DiskPressure", "PIDPressure", "NetworkUnavailable",
+}
+# Waiting reasons that are normal while a pod starts
+_BENIGN_WAITING = {"ContainerCreating", "PodInitializing"}
+
+MAX_WARNING_EVENTS = 20
+MAX_OTHER_EVENTS = 10
+MAX_POD_ROWS = 20
+MAX_DESCRIBE_CHARS = 8000
+# Room kept for the trailing notes when the bundle is cut to size
+_NOTES_RESERVE = 200
+
+
+@dataclass
+class Section:
+    priority: int
+    title: str
+    lines: list[str] = field(default_factory=list)
+
+
+def ref(obj: dict) -> str:
+    return f"{obj.get('kind', '?')}/{obj['metadata']['name']}"
+
+
+def _resource_arg(kind: str, api_version: str, name: str) -> str:
+    """`kind.group/name` for kubectl, so same-named kinds of other API groups do not match."""
+    group = api_version.rpartition("/")[0]
+    return f"{kind.lower()}.{group}/{name}" if group else f"{kind.lower()}/{name}"
+
+
+def failing_conditions(obj: dict) -> list[str]:
+    """Unhealthy conditions, phases and replica shortfalls of any object."""
+    status = obj.get("status") or {}
+    spec = obj.get("spec") or {}
+    kind = obj.get("kind")
+    problems = []
+    for cond in status.get("conditions") or []:
+        ctype, cstatus = cond.get("type", ""), cond.get("status", "")
+        if (cstatus == "True") if ctype in _NEGATIVE_CONDITIONS else (cstatus == "False"):
+            reason = f" ({cond['reason']})" if cond.get("reason") else ""
+            message = f": {cond['message']}" if cond.get("message") else ""
+            problems.append(f"{ctype}={cstatus}{reason}{message}")
+
+    if kind in ("Deployment", "StatefulSet", "ReplicaSet"):
+        want, ready = spec.get("replicas", 1), status.get("readyReplicas", 0)
+        if ready < want:
+            problems.append(f"{ready}/{want} replicas ready")
+    elif kind == "DaemonSet":
+        want, ready = status.get("desiredNumberScheduled", 0), status.get("numberReady", 0)
+        if ready < want:
+            problems.append(f"{ready}/{want} scheduled pods ready")
+    elif kind == "Job" and status.get("failed"):
+        problems.append(f"{status['failed']} failed pods")
+    elif kind == "Pod" and status.get("phase") in ("Pending", "Failed", "Unknown"):
+        reason = f" ({status['reason']})" if status.get("reason") else ""
+        message = f": {status['message']}" if status.get("message") else ""
+        problems.append(f"phase {status['phase']}{reason}{message}")
+    return problems
+
+
+def _container_statuses(pod: dict) -> list[dict]:
+    status = pod.get("status") or {}
+    return (status.get("initContainerStatuses") or []) + (status.get("containerStatuses") or [])
+
+
+def container_problems(pod: dict) -> list[str]:
+    """Waiting reasons, failed terminations and restarts of a pod's containers."""
+    problems = []
+    for cs in _container_statuses(pod):
+        state = cs.get("state") or {}
+        restarts = cs.get("restartCount", 0)
+        parts = []
+        waiting = state.get("waiting")
+        if waiting and waiting.get("reason") not in _BENIGN_WAITING:
+            # The CrashLoopBackOff message only repeats the pod name and back-off delay
+            message = waiting.get("message") if waiting.get("reason") != "CrashLoopBackOff" else ""
+            parts.append(f"waiting: {waiting.get('reason', '')}" + (f" - {message}" if message else ""))
+        terminated = state.get("terminated")
+        if terminated and terminated.get("exitCode", 0) != 0:
+            parts.append(f"terminated: {terminated.get('reason', '')} (exit {terminated.get('exitCode')})")
+        last = (cs.get("lastState") or {}).get("terminated")
+        if restarts and last:
+            parts.append(f"{restarts} restarts, last exit {last.get('exitCode')} ({last.get('reason', '')})")
+        elif restarts:
+            parts.append(f"{restarts} restarts")
+        if parts:
+            problems.append(f"container {cs.get('name')} " + "; ".join(parts))
+    return problems
+
+
+def pod_health(pod: dict) -> int:
+    """Unhealthiness score: 0 for a running (or completed) pod with ready, never-restarted containers."""
+    phase = (pod.get("status") or {}).get("phase")
+    score = 0 if phase in ("Running", "Succeeded") else 100
+    for cs in _container_statuses(pod):
+        waiting = (cs.get("state") or {}).get("waiting")
+        if waiting and waiting.get("reason") not in _BENIGN_WAITING:
+            score += 50
+        if not cs.get("ready") and phase != "Succeeded" and "terminated" not in (cs.get("state") or {}):
+            score += 10
+        score += min(cs.get("restartCount", 0), 50)
+    return score
+
+
+def _group(entries: list[tuple[str, str]], limit: int = 3) -> list[str]:
+    """Merge identical findings of several objects: `text [Pod/a, Pod/b, +N more]`."""
+    grouped: dict[str, list[str]] = {}
+    for obj, text in entries:
+        grouped.setdefault(text, [])
+        if obj not in grouped[text]:
+            grouped[text].append(obj)
+    lines = []
+    for text, objs in grouped.items():
+        more = f", +{len(objs) - limit} more" if len(objs) > limit else ""
+        lines.append(f"- {', '.join(objs[:limit])}{more}: {text}")
+    return lines
+
+
+def _event_time(event: dict) -> str:
+    return (
+        event.get("lastTimestamp") or event.get("eventTime")
+        or (event.get("metadata") or {}).get("creationTimestamp") or ""
+    )
+
+
+def event_lines(events: list[dict], limit: int) -> list[str]:
+    """Events grouped by (reason, message), with summed counts, newest first."""
+    groups: dict[tuple[str, str], dict] = {}
+    for ev in events:
+        involved = ev.get("involvedObject") or {}
+        key = (ev.get("reason", ""), ev.get("message", "").strip())
+        g = groups.setdefault(key, {"count": 0, "last": "", "objects": []})
+        g["count"] += ev.get("count") or 1
+        g["last"] = max(g["last"], _event_time(ev))
+        obj = f"{involved.get('kind', '?')}/{involved.get('name', '?')}"
+        if obj not in g["objects"]:
+            g["objects"].append(obj)
+    ordered = sorted(groups.items(), key=lambda kv: kv[1]["last"], reverse=True)
+    lines = []
+    for (reason, message), g in ordered[:limit]:
+        objs = ", ".join(g["objects"][:3]) + (f", +{len(g['objects']) - 3} more" if len(g["objects"]) > 3 else "")
+        lines.append(f"- {g['count']}x {reason} on {objs} (last {g['last'] or '?'}): {message}")
+    if len(ordered) > limit:
+        lines.append(f"- ... {len(ordered) - limit} more distinct events")
+    return lines
+
+
+def _matches(selector: dict, labels: dict) -> bool:
+    return all(labels.get(k) == v for k, v in selector.items())
+
+
+def service_lines(services: list[dict], slices: list[dict]) -> tuple[list[str], list[str]]:
+    """(failing, informational) lines for services and their EndpointSlice readiness."""
+    ready: dict[str, int] = {}
+    not_ready: dict[str, list[str]] = {}
+    for es in slices:
+        svc = ((es.get("metadata") or {}).get("labels") or {}).get("kubernetes.io/service-name")
+        if not svc:
+            continue
+        for ep in es.get("endpoints") or []:
+            if (ep.get("conditions") or {}).get("ready") is False:
+                target = (ep.get("targetRef") or {}).get("name") or ",".join(ep.get("addresses") or [])
+                not_ready.setdefault(svc, []).append(target)
+            else:
+                ready[svc] = ready.get(svc, 0) + 1
+
+    failing, info = [], []
+    for svc in services:
+        name = svc["metadata"]["name"]
+        spec = svc.get("spec") or {}
+        ports = ", ".join(
+            f"{p.get('port')}/{p.get('protocol', 'TCP')}->{p.get('targetPort', p.get('port'))}"
+            for p in spec.get("ports") or []
+        )
+        waiting = not_ready.get(name, [])
+        detail = f" ({len(waiting)} not ready: {', '.join(waiting[:5])})" if waiting else ""
+        line = f"- Service/{name} {spec.get('type', 'ClusterIP')} {spec.get('clusterIP', '')} [{ports}]: " \
+               f"{ready.get(name, 0)} ready endpoints{detail}"
+        if spec.get("selector") and not ready.get(name):
+            failing.append(f"- Service/{name}: no ready endpoints{detail}")
+        info.append(line)
+    return failing, info
+
+
+def _pod_row(pod: dict) -> str:
+    status = pod.get("status") or {}
+    statuses = status.get("containerStatuses") or []
+    ready = sum(1 for cs in statuses if cs.get("ready"))
+    restarts = sum(cs.get("restartCount", 0) for cs in statuses)
+    node = (pod.get("spec") or {}).get("nodeName") or "-"
+    return (
+        f"- {pod['metadata']['name']}  {status.get('phase', '?')}  ready {ready}/{len(statuses)}  "
+        f"restarts {restarts}  node {node}"
+    )
+
+
+def _log_lines(stream: LogStream, previous: bool) -> list[str]:
+    label = "previous" if previous else "current"
+    head = f"### {stream.pod}/{stream.container} ({label})"
+    if stream.error and not stream.lines:
+        return [head, f"(unavailable: {stream.error})"]
+    lines = [head]
+    if stream.dropped:
+        lines.append(f"... {stream.dropped} earlier lines dropped")
+    lines.extend(text for _, _, text in stream.lines)
+    return lines
+
+
+def render(header: list[str], sections: list[Section], max_chars: Optional[int]) -> str:
+    """Sections in priority order, cut to `max_chars`; what did not fit is listed at the end."""
+    out = [line + "\n" for line in header]
+    used = sum(map(len, out))
+    limit = None if max_chars is None else max(0, max_chars - _NOTES_RESERVE)
+    omitted = []
+    full = False
+    for section in sorted(sections, key=lambda s: s.priority):
+        if not section.lines:
+            continue
+        title = f"\n## {section.title}\n"
+        if full or (limit is not None and used + len(title) + len(section.lines[0]) + 1 > limit):
+            omitted.append(section.title)
+            full = True
+            continue
+        out.append(title)
+        used += len(title)
+        for i, line in enumerate(section.lines):
+            if limit is not None and used + len(line) + 1 > limit:
+                out.append(f"... {len(section.lines) - i} more lines cut for size\n")
+                full = True
+                break
+            out.append(line + "\n")
+            used += len(line) + 1
+    if omitted:
+        out.append(f"\n(omitted for size: {', '.join(omitted)})\n")
+    return "".join(out)
+
+
+async def _describe(resource: str, namespace: str, timeout: float) -> str:
+    cmd = ["kubectl", "describe", resource, "--namespace", namespace]
+    if K8S_CONTEXT:
+        cmd += ["--context", K8S_CONTEXT]
+    done = await run_cli(cmd, timeout)
+    if done.timed_out:
+        raise asyncio.TimeoutError
+    if done.returncode != 0:
+        raise RuntimeError(done.stderr.decode("utf-8", "replace").strip())
+    return done.stdout.decode("utf-8", "replace")
+
+
+async def owner_chain(obj: dict, fetch, max_depth: int = 5) -> list[dict]:
+    """Controlling owners of `obj`, nearest first; `fetch(label, args)` returns an object or None."""
+    chain = []
+    current = obj
+    for _ in range(max_depth):
+        owners = current["metadata"].get("ownerReferences") or []
+        if not owners:
+            break
+        owner = next((o for o in owners if o.get("controller")), owners[0])
+        parent = await fetch(
+            f"owner {owner['kind']}/{owner['name']}",
+            ["get", _resource_arg(owner["kind"], owner.get("apiVersion", ""), owner["name"])],
+        )
+        if parent is None:
+            break
+        chain.append(parent)
+        current = parent
+    return chain
+
+
+async def collect_bundle(
+    kind: str,
+    name: str,
+    namespace: str,
+    timeout: float = TROUBLESHOOT_ITEM_TIMEOUT,
+    concurrency: int = TROUBLESHOOT_CONCURRENCY,
+    max_pods: int = TROUBLESHOOT_MAX_PODS,
+    log_tail: int = TROUBLESHOOT_LOG_TAIL,
+    log_bytes: int = TROUBLESHOOT_LOG_BYTES,
+    include_logs: bool = True,
+    max_chars: Optional[int] = None,
+) -> tuple[str, bool]:
+    """
+    Collect the troubleshooting bundle for `kind/name` and return (text, ok). Every
+    query runs under its own `timeout`; one that fails or runs out of time is listed
+    under "Collection errors" instead of failing the bundle.
+    """
+    start_ts = time.time()
+    resource = f"{normalize_resource(kind)}/{name}"
+    target, error = await get_json(["get", resource], namespace, timeout)
+    if target is None:
+        return f"Cannot get {kind}/{name} in namespace {namespace}: {error}", False
+
+    sem = asyncio.Semaphore(max(1, concurrency))
+    errors: list[str] = []
+
+    async def item(label: str, coro):
+        async with sem:
+            try:
+                return await asyncio.wait_for(coro, timeout)
+            except asyncio.TimeoutError:
+                errors.append(f"{label}: no answer within {timeout:g}s")
+            except (OSError, RuntimeError) as e:
+                errors.append(f"{label}: {e}")
+        return None
+
+    async def fetch(label: str, args: list[str]) -> Optional[dict]:
+        result = await item(label, get_json(args, namespace, timeout))
+        if result is None:
+            return None
+        obj, error = result
+        if obj is None:
+            errors.append(f"{label}: {error}")
+        return obj
+
+    async def listing(label: str, args: list[str]) -> list[dict]:
+        return ((await fetch(label, args)) or {}).get("items") or []
+
+    async def pods_and_logs() -> tuple[list[dict], list[list[str]]]:
+        if target.get("kind") == "Pod":
+            pods = [target]
+        else:
+            selector = selector_for(target)
+            pods = await listing("pods", ["get", "pods", "-l", selector]) if selector else []
+        if not include_logs:
+            return pods, []
+
+        # Previous logs of restarted containers, current logs of not-ready ones
+        wanted = []
+        sick = sorted((p for p in pods if pod_health(p) > 0), key=pod_health, reverse=True)
+        for pod in sick[:max_pods]:
+            for cs in _container_statuses(pod):
+                if cs.get("restartCount", 0) > 0:
+                    wanted.append((pod["metadata"]["name"], cs["name"], True))
+                if not cs.get("ready") and "running" in (cs.get("state") or {}):
+                    wanted.append((pod["metadata"]["name"], cs["name"], False))
+        streams = await asyncio.gather(*(
+            item(f"logs {pod}/{container}", fetch_stream(
+                pod, container, namespace, log_bytes, timeout, tail=log_tail, previous=previous,
+            ))
+            for pod, container, previous in wanted
+        ))
+        return pods, [
+            _log_lines(stream, previous)
+            for stream, (_, _, previous) in zip(streams, wanted) if stream is not None
+        ]
+
+    owners, (pods, logs), services, slices, events, described = await asyncio.gather(
+        owner_chain(target, fetch),
+        pods_and_logs(),
+        listing("services", ["get", "services"]),
+        listing("endpointslices", ["get", "endpointslices"]),
+        listing("events", ["get", "events"]),
+        item("describe", _describe(resource, namespace, timeout)),
+    )
+
+    # Services selecting any related pod, plus the target itself if it is one
+    pod_labels = [(p["metadata"].get("labels") or {}) for p in pods]
+    related_services = [
+        s for s in services
+        if (target.get("kind") == "Service" and s["metadata"]["name"] == name)
+        or ((s.get("spec") or {}).get("selector")
+            and any(_matches(s["spec"]["selector"], labels) for labels in pod_labels))
+    ]
+    svc_failing, svc_info = service_lines(related_services, slices)
+
+    # Conditions of the target and its owners first, then per-pod problems
+    entries = []
+    for obj in [target, *owners]:
+        entries += [(ref(obj), text) for text in failing_conditions(obj)]
+    for pod in sorted(pods, key=pod_health, reverse=True):
+        if pod is target:
+            continue
+        entries += [(ref(pod), text) for text in failing_conditions(pod)]
+    for pod in pods:
+        entries += [(ref(pod), text) for text in container_problems(pod)]
+
+    uids = {
+        o["metadata"].get("uid")
+        for o in [target, *owners, *pods, *related_services]
+    }
+    related_events = [e for e in events if (e.get("involvedObject") or {}).get("uid") in uids]
+    warnings = [e for e in related_events if e.get("type") == "Warning"]
+    others = [e for e in related_events if e.get("type") != "Warning"]
+
+    chain = " -> ".join(ref(o) for o in [target, *owners])
+    related = [f"- owner chain: {chain}"]
+    related += [_pod_row(p) for p in sorted(pods, key=pod_health, reverse=True)[:MAX_POD_ROWS]]
+    if len(pods) > MAX_POD_ROWS:
+        related.append(f"- ... {len(pods) - MAX_POD_ROWS} more pods")
+
+    describe_lines = []
+    if described:
+        text = described[:MAX_DESCRIBE_CHARS]
+        describe_lines = text.rstrip("\n").split("\n")
+        if len(described) > MAX_DESCRIBE_CHARS:
+            describe_lines.append("... describe output truncated")
+
+    sections = [
+        Section(FAILING, "Failing conditions", _group(entries) + svc_failing),
+        Section(WARNINGS, "Warning events", event_lines(warnings, MAX_WARNING_EVENTS)),
+        Section(CRASH_LOGS, "Container logs", [line for block in logs for line in block]),
+        Section(NETWORK, "Services and endpoints", svc_info),
+        Section(RELATED, "Related objects", related),
+        Section(EVENTS, "Other events", event_lines(others, MAX_OTHER_EVENTS)),
+        Section(DESCRIBE, f"kubectl describe {resource}", describe_lines),
+        Section(DESCRIBE + 1, "Collection errors", [f"- {e}" for e in errors]),
+    ]
+    unhealthy = sum(1 for p in pods if pod_health(p) > 0)
+    header = [
+        f"Troubleshooting bundle for {ref(target)} in namespace {namespace}: "
+        f"{len(owners)} owners, {len(pods)} pods ({unhealthy} unhealthy), "
+        f"{len(related_services)} services, {len(related_events)} events ({time.time() - start_ts:.1f}s)"
+    ]
+    if not sections[0].lines:
+        header.append("No failing conditions found.")
+    return render(header, sections, max_chars), True
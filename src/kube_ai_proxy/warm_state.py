@@ -0,0 +1,391 @@
+# src/kube_ai_proxy/warm_state.py
+
+"""
+Warm-start state of Kube AI Proxy, persisted across restarts.
+
+A restart used to throw away everything the proxy had learned: which CLIs are
+installed, the API discovery index, the parsed security policy. Subsystems now
+keep such state in sections of one SQLite file under K8S_MCP_STATE_DIR:
+  - WarmState.section: register a namespace with a version and a fingerprint
+    function; entries written under another version or fingerprint are ignored
+  - StateSection.get / put / invalidate: in-memory reads, loaded lazily (one query
+    per namespace on first use), writes batched and flushed by a background thread
+  - file_fingerprint / binary_fingerprint / kubeconfig_fingerprint: stat-based
+    fingerprints (path, size, mtime) of the inputs state is derived from
+  - content_fingerprint: hash of file contents, for inputs whose derived state
+    must not survive an edit that keeps size and mtime (the security policy)
+The file is checked on open; a damaged one is moved aside and replaced by an
+empty one. Entries over K8S_MCP_STATE_MAX_ENTRY_KB are not stored, and the least
+recently written entries go once the store exceeds K8S_MCP_STATE_MAX_MB.
+"""
+
+import atexit
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from kube_ai_proxy.config import (
+    K8S_CONTEXT,
+    STATE_DIR,
+    STATE_FLUSH_DELAY,
+    STATE_MAX_BYTES,
+    STATE_MAX_ENTRY_BYTES,
+    WARM_START_ENABLED,
+)
+from kube_ai_proxy.metrics import METRICS
+
+logger = logging.getLogger("kube_ai_proxy.warm_state")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS state (
+    namespace   TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    version     INTEGER NOT NULL,
+    fingerprint TEXT NOT NULL,
+    value       TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    stored_at   REAL NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+CREATE INDEX IF NOT EXISTS state_stored_at ON state(stored_at);
+"""
+
+# Binary fingerprints are re-read at most this often (they cost a PATH lookup and a stat)
+_BINARY_TTL = 60.0
+_binaries: dict[str, tuple[float, str]] = {}
+
+
+def file_fingerprint(*paths: Optional[str | Path]) -> str:
+    """Short hash of the path, size and mtime of each file ("-" for a missing one)."""
+    h = hashlib.sha256()
+    for path in paths:
+        if not path:
+            h.update(b"\0")
+            continue
+        try:
+            st = os.stat(path)
+            h.update(f"{path}:{st.st_size}:{st.st_mtime_ns}\0".encode())
+        except OSError:
+            h.update(f"{path}:-\0".encode())
+    return h.hexdigest()[:16]
+
+
+def content_fingerprint(*paths: Optional[str | Path]) -> str:
+    """Short sha256 of the contents of each file ("-" for a missing one)."""
+    h = hashlib.sha256()
+    for path in paths:
+        if not path:
+            h.update(b"\0")
+            continue
+        try:
+            data = Path(path).read_bytes()
+            h.update(f"{path}:{len(data)}\0".encode())
+            h.update(data)
+        except OSError:
+            h.update(f"{path}:-\0".encode())
+    return h.hexdigest()[:16]
+
+
+def binary_fingerprint(tool: str) -> str:
+    """Fingerprint of the executable `tool` resolves to on PATH; changes when it is upgraded or installed."""
+    now = time.monotonic()
+    cached = _binaries.get(tool)
+    if cached and now - cached[0] < _BINARY_TTL:
+        return cached[1]
+    path = shutil.which(tool)
+    fingerprint = file_fingerprint(os.path.realpath(path) if path else f"missing:{tool}")
+    _binaries[tool] = (now, fingerprint)
+    return fingerprint
+
+
+def kubeconfig_fingerprint() -> str:
+    """Fingerprint of the kubeconfig files in use and the selected context."""
+    paths = os.environ.get("KUBECONFIG") or str(Path.home() / ".kube" / "config")
+    return file_fingerprint(f"context:{K8S_CONTEXT or ''}", *paths.split(os.pathsep))
+
+
+class StateSection:
+    """The entries of one subsystem, valid only for its version and current fingerprint."""
+
+    def __init__(self, store: "WarmState", namespace: str, version: int, fingerprint: Callable[[], str]):
+        self.store = store
+        self.namespace = namespace
+        self.version = version
+        self._fingerprint = fingerprint
+        self._current: Optional[str] = None
+
+    @property
+    def fingerprint(self) -> str:
+        if self._current is None:
+            try:
+                self._current = self._fingerprint()
+            except Exception as e:
+                logger.debug(f"Fingerprint of {self.namespace} failed: {e}")
+                self._current = ""
+        return self._current
+
+    def refresh_fingerprint(self) -> None:
+        """Recompute the fingerprint on next use (after the inputs may have changed)."""
+        self._current = None
+
+    def get(self, key: str, default: Any = None) -> Any:
+        entry = self.store._entry(self.namespace, key)
+        if entry is None:
+            METRICS.inc("warm_state_lookups_total", namespace=self.namespace, result="absent")
+            return default
+        version, fingerprint, value = entry
+        if version != self.version or fingerprint != self.fingerprint:
+            METRICS.inc("warm_state_lookups_total", namespace=self.namespace, result="stale")
+            return default
+        METRICS.inc("warm_state_lookups_total", namespace=self.namespace, result="hit")
+        return value
+
+    def put(self, key: str, value: Any) -> bool:
+        """Store a JSON-serializable value; False if it is not one or is over the entry size cap."""
+        return self.store._put(self.namespace, key, self.version, self.fingerprint, value)
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        self.store._invalidate(self.namespace, key)
+
+
+class WarmState:
+    """
+    SQLite-backed state store. Reads are served from memory; writes mark entries
+    dirty and a daemon thread flushes them in one transaction after `flush_delay`
+    seconds (and at exit). Each process (forked workers included) opens its own
+    connection and flusher.
+    """
+
+    def __init__(
+        self,
+        directory: Path | str = STATE_DIR,
+        max_bytes: int = STATE_MAX_BYTES,
+        max_entry_bytes: int = STATE_MAX_ENTRY_BYTES,
+        flush_delay: float = STATE_FLUSH_DELAY,
+        enabled: bool = WARM_START_ENABLED,
+    ):
+        self.path = Path(directory) / "warm.sqlite3"
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self.flush_delay = flush_delay
+        self.enabled = enabled
+        self._lock = threading.Lock()      # in-memory entries and pending changes
+        self._io_lock = threading.Lock()   # the connection; taken inside _lock, never around it
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+        self._sections: dict[str, StateSection] = {}
+        # namespace -> key -> (version, fingerprint, value); loaded on first use
+        self._loaded: dict[str, dict[str, tuple[int, str, Any]]] = {}
+        # (namespace, key) -> (version, fingerprint, serialized value), or None to delete
+        self._dirty: dict[tuple[str, str], Optional[tuple[int, str, str]]] = {}
+        self._cleared: set[str] = set()
+        self._wake = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        self._flusher_pid = 0
+        if hasattr(os, "register_at_fork"):
+            os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self) -> None:
+        # The flusher thread may have held a lock at fork time; the child starts with fresh ones
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._flusher = None
+
+    def section(self, namespace: str, version: int = 1, fingerprint: Callable[[], str] = lambda: "") -> StateSection:
+        """Register (or return) the section of `namespace`."""
+        section = self._sections.get(namespace)
+        if section is None or section.version != version:
+            section = self._sections[namespace] = StateSection(self, namespace, version, fingerprint)
+        return section
+
+    # ─── SQLite ────────────────────────────────────────────────────────────────
+
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(str(self.path), timeout=5.0, check_same_thread=False)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            check = conn.execute("PRAGMA quick_check").fetchone()
+            if not check or check[0] != "ok":
+                raise sqlite3.DatabaseError(f"integrity check failed: {check[0] if check else '?'}")
+            conn.executescript(_SCHEMA)
+            return conn
+        except sqlite3.Error:
+            conn.close()
+            raise
+
+    def _quarantine(self, error: Exception) -> None:
+        """Move a damaged store (and its WAL) aside so the next open starts empty."""
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        logger.warning(f"Warm-start state at {self.path} is unreadable ({error}); starting empty")
+        METRICS.inc("warm_state_corrupt_total")
+        for suffix in ("", "-wal", "-shm"):
+            src = Path(f"{self.path}{suffix}")
+            if src.exists():
+                try:
+                    src.replace(Path(f"{self.path}{suffix}.corrupt-{stamp}"))
+                except OSError:
+                    src.unlink(missing_ok=True)
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """The process's connection (caller holds _io_lock); None when the store cannot be used."""
+        if not self.enabled:
+            return None
+        if self._conn is None or self._pid != os.getpid():
+            # A connection inherited across fork must not be used, only replaced
+            self._conn = None
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    self._conn = self._open()
+                except sqlite3.DatabaseError as e:
+                    self._quarantine(e)
+                    self._conn = self._open()
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Warm-start state disabled: {e}")
+                self.enabled = False
+                return None
+            self._pid = os.getpid()
+        return self._conn
+
+    def _load(self, namespace: str) -> dict[str, tuple[int, str, Any]]:
+        entries = self._loaded.get(namespace)
+        if entries is not None:
+            return entries
+        entries = {}
+        rows = []
+        with self._io_lock:
+            db = self._db() if namespace not in self._cleared else None
+            try:
+                if db is not None:
+                    rows = db.execute(
+                        "SELECT key, version, fingerprint, value FROM state WHERE namespace = ?", (namespace,)
+                    ).fetchall()
+            except sqlite3.DatabaseError as e:
+                logger.warning(f"Warm-start state read failed: {e}")
+            for key, version, fingerprint, value in rows:
+                try:
+                    entries[key] = (version, fingerprint, json.loads(value))
+                except ValueError:
+                    # A torn value: treated as absent and overwritten by the next put
+                    continue
+        self._loaded[namespace] = entries
+        return entries
+
+    # ─── Entries ───────────────────────────────────────────────────────────────
+
+    def _entry(self, namespace: str, key: str) -> Optional[tuple[int, str, Any]]:
+        with self._lock:
+            return self._load(namespace).get(key)
+
+    def _put(self, namespace: str, key: str, version: int, fingerprint: str, value: Any) -> bool:
+        if not self.enabled:
+            return False
+        try:
+            data = json.dumps(value, separators=(",", ":"))
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Warm-start entry {namespace}/{key} not serializable: {e}")
+            return False
+        if len(data) > self.max_entry_bytes:
+            logger.debug(f"Warm-start entry {namespace}/{key} over the size cap ({len(data)} bytes)")
+            return False
+        with self._lock:
+            self._load(namespace)[key] = (version, fingerprint, json.loads(data))
+            self._dirty[(namespace, key)] = (version, fingerprint, data)
+        self._schedule()
+        return True
+
+    def _invalidate(self, namespace: str, key: Optional[str]) -> None:
+        with self._lock:
+            entries = self._load(namespace)
+            if key is None:
+                entries.clear()
+                self._cleared.add(namespace)
+                for dirty in [k for k in self._dirty if k[0] == namespace]:
+                    del self._dirty[dirty]
+            else:
+                entries.pop(key, None)
+                self._dirty[(namespace, key)] = None
+        self._schedule()
+
+    # ─── Flushing ──────────────────────────────────────────────────────────────
+
+    def _schedule(self) -> None:
+        if self._flusher is None or self._flusher_pid != os.getpid() or not self._flusher.is_alive():
+            with self._lock:
+                if self._flusher is None or self._flusher_pid != os.getpid() or not self._flusher.is_alive():
+                    self._flusher_pid = os.getpid()
+                    self._flusher = threading.Thread(target=self._flush_loop, name="kube-ai-proxy-state", daemon=True)
+                    self._flusher.start()
+        self._wake.set()
+
+    def _flush_loop(self) -> None:
+        while True:
+            self._wake.wait()
+            # Batch whatever else is written in the next flush_delay seconds
+            time.sleep(self.flush_delay)
+            self._wake.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """Write pending changes now; returns the number of entries written or deleted."""
+        with self._lock:
+            if not self._dirty and not self._cleared:
+                return 0
+            dirty, self._dirty = self._dirty, {}
+            cleared, self._cleared = self._cleared, set()
+        with self._io_lock:
+            db = self._db()
+            if db is None:
+                return 0
+            now = time.time()
+            try:
+                with db:
+                    for namespace in cleared:
+                        db.execute("DELETE FROM state WHERE namespace = ?", (namespace,))
+                    for (namespace, key), entry in dirty.items():
+                        if entry is None:
+                            db.execute("DELETE FROM state WHERE namespace = ? AND key = ?", (namespace, key))
+                        else:
+                            version, fingerprint, data = entry
+                            db.execute(
+                                "INSERT OR REPLACE INTO state VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                (namespace, key, version, fingerprint, data, len(data), now),
+                            )
+                    self._prune(db)
+            except sqlite3.Error as e:
+                logger.warning(f"Warm-start state flush failed: {e}")
+                return 0
+        METRICS.inc("warm_state_flushes_total")
+        return len(dirty) + len(cleared)
+
+    def _prune(self, db: sqlite3.Connection) -> None:
+        total = db.execute("SELECT COALESCE(SUM(size), 0) FROM state").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Least recently written first (insertion order within one flush) until back under the cap
+        db.execute(
+            "DELETE FROM state WHERE rowid IN (SELECT rowid FROM (SELECT rowid,"
+            " SUM(size) OVER (ORDER BY stored_at, rowid) - size AS before FROM state) WHERE before < ?)",
+            (total - self.max_bytes,),
+        )
+
+    def close(self) -> None:
+        self.flush()
+        with self._io_lock:
+            if self._conn is not None and self._pid == os.getpid():
+                self._conn.close()
+            self._conn = None
+
+
+# Initialize once
+WARM_STATE = WarmState()
+atexit.register(WARM_STATE.flush)
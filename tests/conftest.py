@@ -0,0 +1,17 @@
+# tests/conftest.py
+
+"""
+Test settings: configuration is read from the environment at import time, so it
+is pinned here before any kube_ai_proxy module is imported.
+"""
+
+import os
+import tempfile
+
+_CACHE = tempfile.mkdtemp(prefix="kube-ai-proxy-tests-")
+
+os.environ.setdefault("K8S_MCP_CACHE_DIR", _CACHE)
+os.environ.setdefault("K8S_MCP_WARM_START", "false")
+os.environ.setdefault("K8S_MCP_AUDIT", "false")
+os.environ.setdefault("K8S_MCP_SPAWN_SERVER", "false")
+os.environ.setdefault("K8S_MCP_CHILD_KILL_GRACE", "0.5")
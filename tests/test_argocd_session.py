@@ -0,0 +1,105 @@
+# tests/test_argocd_session.py
+
+"""The shared ArgoCD session: logins against a local API stub, and options handed to CLI children."""
+
+import asyncio
+import base64
+import json
+import shlex
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+import pytest
+
+from kube_ai_proxy.argocd_session import REFRESH_MARGIN, ArgoCDSession
+
+
+def _jwt(exp: float, n: int) -> str:
+    def part(obj: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(obj).encode()).decode().rstrip("=")
+    return f"{part({'alg': 'none'})}.{part({'exp': int(exp), 'n': n})}.sig"
+
+
+class _ArgoCDStub(BaseHTTPRequestHandler):
+    """POST /api/v1/session: a new token per login, valid for `lifetime` seconds."""
+    logins: list[dict] = []
+    lifetime = 3600.0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path != "/api/v1/session" or body != {"username": "admin", "password": "pw"}:
+            self.send_response(401)
+            self.end_headers()
+            return
+        type(self).logins.append(body)
+        data = json.dumps({"token": _jwt(time.time() + self.lifetime, len(self.logins))}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def argocd(tmp_path):
+    _ArgoCDStub.logins = []
+    _ArgoCDStub.lifetime = 3600.0
+    server = HTTPServer(("127.0.0.1", 0), _ArgoCDStub)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    def session(password: str = "pw") -> ArgoCDSession:
+        return ArgoCDSession(
+            server=f"127.0.0.1:{server.server_port}", username="admin", password=password,
+            token="", plaintext=True, config_dir=tmp_path,
+        )
+
+    yield session
+    server.shutdown()
+    server.server_close()
+
+
+def test_token_is_reused_until_invalidated(argocd):
+    session = argocd()
+
+    async def run() -> list[str]:
+        first = await session.token()
+        again = await session.token()
+        session.expire()
+        return [first, again, await session.token()]
+
+    first, again, renewed = asyncio.run(run())
+    assert first and first == again
+    assert renewed and renewed != first
+    assert len(_ArgoCDStub.logins) == session.logins == 2
+
+
+def test_token_close_to_expiry_is_refreshed(argocd):
+    _ArgoCDStub.lifetime = REFRESH_MARGIN / 2
+    session = argocd()
+
+    async def run() -> list[str]:
+        return [await session.token() for _ in range(2)]
+
+    first, second = asyncio.run(run())
+    assert first != second
+    assert len(_ArgoCDStub.logins) == 2
+
+
+def test_failed_login_leaves_no_token(argocd):
+    session = argocd(password="wrong")
+    assert asyncio.run(session.token()) == ""
+    assert session.logins == 0
+
+
+def test_config_path_with_spaces_survives_argocd_opts(tmp_path, monkeypatch):
+    monkeypatch.setenv("ARGOCD_OPTS", "--grpc-web-root-path /argo")
+    config_dir = tmp_path / "argo cd"
+    session = ArgoCDSession(server="", username="", password="", token="", config_dir=config_dir)
+    env = asyncio.run(session.env())
+    opts = shlex.split(env["ARGOCD_OPTS"])
+    assert opts == ["--grpc-web-root-path", "/argo", "--config", str(config_dir / "config")]
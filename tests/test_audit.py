@@ -0,0 +1,32 @@
+# tests/test_audit.py
+
+"""Credentials never reach the audit log in plaintext."""
+
+import pytest
+
+from kube_ai_proxy.audit import redact_command
+
+
+@pytest.mark.parametrize(
+    "command, secret",
+    [
+        ("argocd login cd.example.com --username admin --password hunter2", "hunter2"),
+        ("argocd app list --auth-token=eyJhbGciOi", "eyJhbGciOi"),
+        ("kubectl --token abc123 get pods", "abc123"),
+        ("helm install db bitnami/postgresql --set auth.password=s3cret,replicas=2", "s3cret"),
+        ("helm upgrade app ./chart --set-string apiKey=k-123", "k-123"),
+        ("kubectl create secret generic creds --from-literal=password=pw1", "pw1"),
+        ("kubectl create secret generic creds --from-literal user=alice", "alice"),
+    ],
+)
+def test_secrets_are_masked(command, secret):
+    redacted = redact_command(command)
+    assert secret not in redacted
+    assert "***" in redacted
+
+
+def test_other_values_are_kept():
+    redacted = redact_command("helm install db ./chart --set auth.password=x,replicas=2")
+    assert "replicas=2" in redacted and "auth.password=***" in redacted
+    for command in ("kubectl get pods -n shop -o json | jq .items", "helm repo add x https://x --password-stdin"):
+        assert redact_command(command) == command
@@ -0,0 +1,85 @@
+# tests/test_cli_executor.py
+
+"""No child process or process-group member outlives communicate() on timeout or cancellation."""
+
+import asyncio
+import os
+import time
+
+import pytest
+
+from kube_ai_proxy import cli_executor
+from kube_ai_proxy.cli_executor import communicate, spawn
+
+
+def _group_alive(pgid: int) -> bool:
+    try:
+        os.killpg(pgid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+
+
+async def settle() -> None:
+    """Let the subprocess transports see EOF on their pipes before the loop closes."""
+    await asyncio.sleep(0.1)
+
+
+def assert_no_leaks(pgid: int, timeout: float = 3.0) -> None:
+    assert not cli_executor._LIVE
+    # Killed grandchildren are reparented and reaped by init, which takes a moment
+    deadline = time.monotonic() + timeout
+    while _group_alive(pgid) and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert not _group_alive(pgid), f"process group {pgid} still has members"
+
+
+def test_timeout_kills_group():
+    async def run() -> int:
+        proc = await spawn(["sleep", "30"])
+        with pytest.raises(asyncio.TimeoutError):
+            await communicate(proc, 0.2)
+        await settle()
+        return proc.pid
+
+    assert_no_leaks(asyncio.run(run()))
+
+
+def test_cancellation_kills_group():
+    async def run() -> int:
+        proc = await spawn(["sleep", "30"])
+        task = asyncio.ensure_future(communicate(proc, None))
+        await asyncio.sleep(0.2)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        await settle()
+        return proc.pid
+
+    assert_no_leaks(asyncio.run(run()))
+
+
+def test_sigterm_ignoring_child_and_grandchild_are_killed():
+    async def run() -> int:
+        # Both the leader and the grandchild it forks ignore SIGTERM
+        proc = await spawn("trap '' TERM; sleep 30 & wait", shell=True)
+        await asyncio.sleep(0.2)
+        with pytest.raises(asyncio.TimeoutError):
+            await communicate(proc, 0.1)
+        await settle()
+        return proc.pid
+
+    assert_no_leaks(asyncio.run(run()))
+
+
+def test_grandchild_outliving_leader_is_killed():
+    async def run() -> int:
+        # The leader exits on SIGTERM; only the grandchild ignores it
+        proc = await spawn("(trap '' TERM; while :; do sleep 1; done) & exec sleep 30", shell=True)
+        await asyncio.sleep(0.2)
+        with pytest.raises(asyncio.TimeoutError):
+            await communicate(proc, 0.1)
+        await settle()
+        return proc.pid
+
+    assert_no_leaks(asyncio.run(run()))
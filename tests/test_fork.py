@@ -0,0 +1,58 @@
+# tests/test_fork.py
+
+"""A worker forked while other threads hold locks starts with fresh ones."""
+
+import os
+import signal
+import threading
+
+import pytest
+
+from kube_ai_proxy import activity, cli_executor
+from kube_ai_proxy.audit import AUDIT
+from kube_ai_proxy.metrics import METRICS
+
+
+def _in_child(check) -> int:
+    """Run `check` in a forked child (a deadlock there ends in SIGALRM); returns its exit code."""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            signal.alarm(5)
+            check()
+            code = 0
+        finally:
+            os._exit(code)
+    _, status = os.waitpid(pid, 0)
+    return os.waitstatus_to_exitcode(status)
+
+
+@pytest.mark.filterwarnings("ignore::DeprecationWarning")
+def test_child_does_not_inherit_held_locks_or_queued_work():
+    held, release = threading.Event(), threading.Event()
+
+    def hold() -> None:
+        with METRICS._lock, activity._LOCK:
+            held.set()
+            release.wait()
+
+    holder = threading.Thread(target=hold)
+    holder.start()
+    held.wait()
+    AUDIT._queue.put_nowait({"command": "kubectl get pods"})
+    cli_executor._LIVE.add(object())
+
+    def check() -> None:
+        METRICS.inc("fork_test_total")
+        activity.running_calls()
+        assert AUDIT._queue.empty() and AUDIT._thread is None
+        assert not cli_executor._LIVE
+
+    try:
+        assert _in_child(check) == 0
+    finally:
+        release.set()
+        holder.join()
+        AUDIT._queue.get_nowait()
+        cli_executor._LIVE.clear()
@@ -0,0 +1,74 @@
+# tests/test_helm_index.py
+
+"""The Helm chart index built from a repository cache: search, semver constraints and rebuilds."""
+
+import os
+import shutil
+from pathlib import Path
+
+import pytest
+
+from kube_ai_proxy.helm_index import HelmChartIndex
+
+FIXTURE = Path(__file__).parent / "fixtures" / "stable-index.yaml"
+
+
+@pytest.fixture
+def index(tmp_path):
+    cache = tmp_path / "repository"
+    cache.mkdir()
+    shutil.copy(FIXTURE, cache / "stable-index.yaml")
+    idx = HelmChartIndex(cache_dir=cache, db_path=tmp_path / "charts.sqlite3")
+    yield idx
+    idx.close()
+
+
+def _found(results) -> list[str]:
+    return [f"{r.full_name}@{r.version}" for r in results]
+
+
+def test_search_by_name_description_and_keyword(index):
+    assert index.sync() == ["stable"]
+    assert _found(index.search("redis")) == ["stable/redis@17.11.3"]
+    assert _found(index.search("relational")) == ["stable/postgresql@12.5.1"]
+    assert _found(index.search(keyword="DATABASE")) == ["stable/postgresql@12.5.1", "stable/redis@17.11.3"]
+    assert _found(index.search("nginx")) == []
+    assert _found(index.search("nginx", include_deprecated=True)) == ["stable/nginx-legacy@1.0.0"]
+
+
+@pytest.mark.parametrize(
+    "constraint, versions",
+    [
+        ("^12.4", ["12.5.1", "12.4.0"]),
+        ("~12.4.0", ["12.4.0"]),
+        ("<12", ["11.9.13"]),
+        (">=12.0.0 <12.5.0 || 11.x", ["12.4.0", "11.9.13"]),
+        (">=13.0.0-0", ["13.0.0-rc.1"]),
+    ],
+)
+def test_semver_constraints(index, constraint, versions):
+    results = index.search("postgresql", version=constraint, all_versions=True)
+    assert [r.version for r in results] == versions
+
+
+def test_prereleases_need_a_constraint(index):
+    all_versions = [r.version for r in index.search("postgresql", all_versions=True)]
+    assert "13.0.0-rc.1" not in all_versions
+    assert all_versions == ["12.5.1", "12.4.0", "11.9.13"]
+
+
+def test_changed_index_is_rebuilt_and_removed_one_dropped(index):
+    index.sync()
+    assert index.sync() == []  # unchanged files are not re-read
+
+    path = index.cache_dir / "stable-index.yaml"
+    text = path.read_text().replace("version: 17.11.3", "version: 18.0.0")
+    path.write_text(text)
+    st = path.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert index.sync() == ["stable"]
+    assert _found(index.search("redis")) == ["stable/redis@18.0.0"]
+
+    path.unlink()
+    assert index.sync() == ["stable"]
+    assert index.search("redis") == []
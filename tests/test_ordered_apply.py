@@ -0,0 +1,62 @@
+# tests/test_ordered_apply.py
+
+"""Ordered apply refuses flags that would act on each wave instead of the whole set."""
+
+import asyncio
+
+import pytest
+
+from kube_ai_proxy import ordered_apply as ordered
+from kube_ai_proxy.ordered_apply import _cluster_flags, split_apply_command
+from kube_ai_proxy.prefetch import Prefetcher, command_key
+
+
+@pytest.mark.parametrize(
+    "extra",
+    [
+        ["--prune", "-l", "app=web"],
+        ["--prune-allowlist=core/v1/ConfigMap"],
+        ["--all"],
+        ["-l", "app=web"],
+        ["-lapp=web"],
+        ["--selector=app=web"],
+    ],
+)
+def test_pruning_and_selectors_are_rejected(extra):
+    with pytest.raises(ValueError, match="each wave"):
+        split_apply_command(["kubectl", "apply", "-f", "manifests/", *extra])
+
+
+def test_other_flags_pass_through():
+    paths, recursive, dry_run, flags = split_apply_command(
+        ["kubectl", "apply", "-f", "manifests/", "-R", "-n", "shop", "--server-side", "--force-conflicts"]
+    )
+    assert (paths, recursive, dry_run) == (["manifests/"], True, None)
+    assert flags == ["-n", "shop", "--force-conflicts"]
+
+
+@pytest.mark.parametrize("dry_run, dropped", [([], True), (["--dry-run=server"], False)])
+def test_apply_drops_prefetched_reads(monkeypatch, tmp_path, dry_run, dropped):
+    manifest = tmp_path / "cm.yaml"
+    manifest.write_text("apiVersion: v1\nkind: ConfigMap\nmetadata:\n  name: web\n  namespace: shop\n")
+    prefetcher = Prefetcher(enabled=True)
+    key = command_key(["kubectl", "describe", "configmap", "web", "-n", "shop"])
+    prefetcher._store(key, {"status": "success", "output": "stale"})
+    monkeypatch.setattr(ordered, "PREFETCHER", prefetcher)
+
+    async def apply_plan(*args, **kwargs):
+        return "applied", True
+
+    monkeypatch.setattr(ordered, "apply_plan", apply_plan)
+    output, ok = asyncio.run(ordered.ordered_apply(["kubectl", "apply", "-f", str(manifest), *dry_run], 10))
+    assert (output, ok) == ("applied", True)
+    assert (key not in prefetcher._cache) is dropped
+
+
+def test_crd_wait_keeps_cluster_flag_values():
+    *_, flags = split_apply_command(
+        ["kubectl", "apply", "-f", "crds/", "--context", "prod", "-n", "shop", "--kubeconfig=/etc/kube/config"]
+    )
+    assert _cluster_flags(flags) == ["--context", "prod", "--kubeconfig=/etc/kube/config"]
+    *_, flags = split_apply_command(["kubectl", "apply", "-f", "crds/", "--context=prod", "--kubeconfig", "kc"])
+    assert _cluster_flags(flags) == ["--context=prod", "--kubeconfig", "kc"]
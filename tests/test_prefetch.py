@@ -0,0 +1,34 @@
+# tests/test_prefetch.py
+
+"""Prefetch sessions are keyed by the MCP session id, not by per-request objects."""
+
+from types import SimpleNamespace
+
+from kube_ai_proxy.prefetch import session_key
+
+
+def _ctx(headers=None, client_id=None):
+    request = SimpleNamespace(headers=headers) if headers is not None else None
+    return SimpleNamespace(request_context=SimpleNamespace(request=request), client_id=client_id)
+
+
+class _OutsideRequest:
+    @property
+    def request_context(self):
+        raise ValueError("Context is not available outside of a request")
+
+    @property
+    def client_id(self):
+        raise ValueError("Context is not available outside of a request")
+
+
+def test_session_header_is_the_key():
+    assert session_key(_ctx({"mcp-session-id": "abc"})) == session_key(_ctx({"mcp-session-id": "abc"}))
+    assert session_key(_ctx({"mcp-session-id": "abc"})) == "session-abc"
+
+
+def test_client_id_then_default():
+    assert session_key(_ctx({}, client_id="agent-1")) == "client-agent-1"
+    assert session_key(_ctx()) == "default"
+    assert session_key(_OutsideRequest()) == "default"
+    assert session_key(None) == "default"
@@ -0,0 +1,69 @@
+# tests/test_render_cache.py
+
+"""Render cache hits and misses are audited under the command the user gave."""
+
+import asyncio
+import shlex
+
+import pytest
+
+from kube_ai_proxy import render_cache
+from kube_ai_proxy.audit import AUDIT
+from kube_ai_proxy.cache import DiskLRUCache
+from kube_ai_proxy.render_cache import ChartArchiveCache, execute_render, parse_render_command
+
+FAKE_HELM = """#!/bin/sh
+case "$1" in
+  version) echo v3.14.0 ;;
+  pull) while [ $# -gt 0 ]; do [ "$1" = --destination ] && echo archive > "$2/demo-1.0.0.tgz"; shift; done ;;
+  template) echo "kind: ConfigMap" ;;
+esac
+"""
+
+
+@pytest.fixture
+def records(monkeypatch, tmp_path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    helm = bin_dir / "helm"
+    helm.write_text(FAKE_HELM)
+    helm.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+    monkeypatch.setattr(render_cache, "RENDER_CACHE", DiskLRUCache(tmp_path / "renders", 1 << 20))
+    monkeypatch.setattr(render_cache, "CHART_ARCHIVES", ChartArchiveCache(tmp_path / "charts", 1 << 20))
+
+    emitted = []
+
+    async def emit(record: dict) -> bool:
+        emitted.append(record)
+        return True
+
+    monkeypatch.setattr(AUDIT, "enabled", True)
+    monkeypatch.setattr(AUDIT, "emit", emit)
+    return emitted
+
+
+def test_hit_and_miss_audit_original_command(records):
+    argv = ["helm", "template", "web", "repo/demo", "--version", "1.0.0"]
+    spec = parse_render_command(argv)
+
+    async def run() -> list[str]:
+        return [(await execute_render(argv, spec, 10))["output"] for _ in range(2)]
+
+    miss, hit = asyncio.run(run())
+    assert miss == hit == "kind: ConfigMap\n"
+    renders = [r for r in records if " template " in r["command"]]
+    assert [r["command"] for r in renders] == [shlex.join(argv)] * 2
+    assert all(r["exit_code"] == 0 for r in renders)
+
+
+def test_value_flags_are_skipped_to_find_the_chart():
+    argv = ["helm", "template", "web", "./chart", "--kube-version", "1.29.0", "-f", "v.yaml", "--include-crds"]
+    spec = parse_render_command(argv)
+    assert spec is not None and argv[spec.chart_pos] == "./chart"
+    assert [argv[i] for i in spec.values_pos] == ["v.yaml"]
+
+
+@pytest.mark.parametrize("flag", ["--some-new-flag", "-x"])
+def test_unknown_flags_are_not_cached(flag):
+    assert parse_render_command(["helm", "template", "web", flag, "value", "./chart"]) is None
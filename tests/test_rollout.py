@@ -0,0 +1,28 @@
+# tests/test_rollout.py
+
+"""The RBAC scopes of a rollout wait cover every namespace it reads."""
+
+import pytest
+
+from kube_ai_proxy.rollout import DAEMONSETS, DEPLOYMENTS, STATEFULSETS, access_scopes
+
+
+def test_named_workloads_are_checked_in_their_namespaces():
+    scopes = access_scopes(["deploy/web", "shop/sts/db", "ops/ds/agent"], None, "default")
+    assert scopes == {"default": {DEPLOYMENTS}, "shop": {STATEFULSETS}, "ops": {DAEMONSETS}}
+
+
+def test_selector_without_namespace_is_checked_cluster_wide():
+    scopes = access_scopes([], "app=web", None)
+    assert scopes == {None: {DEPLOYMENTS, STATEFULSETS, DAEMONSETS}}
+
+
+def test_too_many_namespaces_are_watched_cluster_wide():
+    scopes = access_scopes([f"ns{i}/deploy/web" for i in range(3)], None, None, max_watches=2)
+    assert scopes[None] == {DEPLOYMENTS}
+    assert {"ns0", "ns1", "ns2"} <= set(scopes)
+
+
+def test_bad_target_is_rejected():
+    with pytest.raises(ValueError):
+        access_scopes(["configmap/settings"], None, "default")
@@ -0,0 +1,57 @@
+# tests/test_run_cli.py
+
+"""Fan-out children run through run_cli are throttled and audited like user commands."""
+
+import asyncio
+
+import pytest
+
+from kube_ai_proxy.audit import AUDIT
+from kube_ai_proxy.cli_executor import run_cli
+from kube_ai_proxy.throttle import THROTTLE
+
+
+@pytest.fixture
+def records(monkeypatch):
+    emitted = []
+
+    async def emit(record: dict) -> bool:
+        emitted.append(record)
+        return True
+
+    monkeypatch.setattr(AUDIT, "enabled", True)
+    monkeypatch.setattr(AUDIT, "emit", emit)
+    return emitted
+
+
+def test_collected_run_is_audited(records):
+    done = asyncio.run(run_cli(["sh", "-c", "echo out; echo oops >&2; exit 3"], 5))
+    assert (done.returncode, done.stdout, done.error()) == (3, b"out\n", "oops")
+    [record] = records
+    assert record["tool"] == "sh"
+    assert record["command"].startswith("sh -c ")
+    assert (record["exit_code"], record["output_chars"]) == (3, 4)
+
+
+def test_timeout_is_reported_and_audited(records):
+    done = asyncio.run(run_cli(["sleep", "30"], 0.2))
+    assert done.timed_out and done.returncode == -1
+    assert records[0]["exit_code"] == -1 and records[0]["status"] == "error"
+
+
+def test_streamed_run_holds_slot_only_when_asked(records):
+    window = THROTTLE.window_for(["sh"])
+    seen = []
+
+    async def consume(proc) -> None:
+        seen.append(window.in_flight)
+        await proc.stdout.read()
+
+    async def run() -> None:
+        await run_cli(["sh", "-c", "echo hi"], 5, consume=consume)
+        await run_cli(["sh", "-c", "echo hi"], 5, consume=consume, hold=False)
+
+    asyncio.run(run())
+    assert seen == [1, 0]
+    assert window.in_flight == 0
+    assert [r["exit_code"] for r in records] == [0, 0]
@@ -0,0 +1,54 @@
+# tests/test_spawn_server.py
+
+"""The spawn helper survives bad requests, and replaced connections release their sockets."""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+import kube_ai_proxy
+from kube_ai_proxy.spawn_server import SpawnClient
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="spawn helper is Linux-only")
+
+
+@pytest.fixture
+def client(monkeypatch):
+    # The helper runs as `python -m kube_ai_proxy.spawn_server`, from the same tree
+    src = os.path.dirname(os.path.dirname(kube_ai_proxy.__file__))
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")])))
+    spawner = SpawnClient()
+    if not spawner.start():
+        pytest.skip("spawn helper cannot run here")
+    yield spawner
+    spawner.close()
+
+
+async def _echo(client: SpawnClient, text: str) -> bytes:
+    proc = await client.spawn(["echo", text], shell=False, env=dict(os.environ))
+    out, _ = await proc.communicate()
+    await proc.wait()
+    return out
+
+
+def test_connection_of_a_closed_loop_is_closed_when_replaced(client):
+    assert asyncio.run(_echo(client, "one")) == b"one\n"
+    first = client._conn
+    assert asyncio.run(_echo(client, "two")) == b"two\n"
+    assert client._conn is not first
+    assert first.closed and first.sock.fileno() == -1
+
+
+def test_bad_request_gets_an_error_reply(client):
+    async def run() -> tuple[str, bytes]:
+        with pytest.raises(OSError) as raised:
+            # posix_spawn raises ValueError for an embedded NUL byte
+            await client.spawn(["echo", "bad\0arg"], shell=False, env=dict(os.environ))
+        return str(raised.value), await _echo(client, "still serving")
+
+    error, out = asyncio.run(run())
+    assert "bad spawn request" in error
+    assert out == b"still serving\n"
+    assert client.available
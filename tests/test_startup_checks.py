@@ -0,0 +1,25 @@
+# tests/test_startup_checks.py
+
+"""A failed check of an installed binary is not remembered across restarts; a missing binary is."""
+
+from kube_ai_proxy import cli_executor
+from kube_ai_proxy.warm_state import WarmState
+
+
+def test_only_missing_binaries_are_remembered_as_uninstalled(monkeypatch, tmp_path):
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    flaky = bin_dir / "flaky-cli"
+    flaky.write_text("#!/bin/sh\n")
+    flaky.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}:/usr/bin:/bin")
+    monkeypatch.setattr(cli_executor, "WARM_STATE", WarmState(tmp_path / "state", enabled=True))
+
+    async def check_cli_installed(name: str) -> bool:
+        return False
+
+    monkeypatch.setattr(cli_executor, "check_cli_installed", check_cli_installed)
+    tools = {"flaky-cli": {}, "absent-cli": {}}
+    assert cli_executor.run_startup_checks(tools) == {"flaky-cli": False, "absent-cli": False}
+    assert cli_executor.WARM_STATE.section("cli.flaky-cli").get("installed") is None
+    assert cli_executor.WARM_STATE.section("cli.absent-cli").get("installed") is False
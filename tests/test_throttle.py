@@ -0,0 +1,77 @@
+# tests/test_throttle.py
+
+"""Only the API server's throttling answers count as throttling; commands that stay open do not keep a slot."""
+
+import asyncio
+
+import pytest
+
+from kube_ai_proxy.cli_executor import communicate, spawn
+from kube_ai_proxy.throttle import THROTTLE, is_long_running, is_throttled
+
+
+@pytest.mark.parametrize(
+    "output",
+    [
+        "Error from server (TooManyRequests): the server has received too many requests",
+        "Error: GET https://argocd.example.com/api/v1/applications: 429 Too Many Requests",
+        "rpc error: unexpected HTTP status code 429 received",
+        "Error: status code: 429",
+        "Error from server: rejected by API priority and fairness",
+    ],
+)
+def test_throttling_is_recognized(output):
+    assert is_throttled(output, 1)
+
+
+@pytest.mark.parametrize(
+    "output",
+    [
+        'Error from server (NotFound): pods "worker-429" not found',
+        "error: unable to forward port 4290 -> 429: connection refused",
+        "Error: release web failed: 429 resources were not ready",
+    ],
+)
+def test_other_errors_mentioning_429_are_not(output):
+    assert not is_throttled(output, 1)
+
+
+def test_success_is_never_throttled():
+    assert not is_throttled("429 Too Many Requests", 0)
+
+
+@pytest.mark.parametrize(
+    "command, long_running",
+    [
+        ("kubectl logs -f web-0", True),
+        ("kubectl logs web-0 --follow=true | grep error", True),
+        ("kubectl get pods -w", True),
+        ("kubectl -n shop get pods --watch", True),
+        ("kubectl rollout status deployment/web", True),
+        ("kubectl wait --for=condition=ready pod/web-0", True),
+        ("helm upgrade --install web ./chart --wait", True),
+        ("argocd app wait web", True),
+        ("kubectl logs web-0", False),
+        ("kubectl get pods --watch=false", False),
+        ("kubectl apply -f deploy.yaml", False),
+        ("helm upgrade --install web ./chart -f values.yaml", False),
+    ],
+)
+def test_long_running_commands(command, long_running):
+    assert is_long_running(command) is long_running
+
+
+@pytest.mark.parametrize("command, held", [("kubectl get pods -w", 0), ("kubectl get pods", 1)])
+def test_slot_of_long_running_command_is_freed_once_started(command, held):
+    window = THROTTLE.window_for(command)
+    seen = []
+
+    async def run() -> dict:
+        proc = await spawn(["sh", "-c", "echo started"])
+        seen.append(window.in_flight)
+        await communicate(proc, 5)
+        return {"output": "", "exit_code": proc.returncode}
+
+    asyncio.run(THROTTLE.run(command, run))
+    assert seen == [held]
+    assert window.in_flight == 0
@@ -0,0 +1,19 @@
+# tests/test_warm_state.py
+
+"""Content fingerprints see edits that keep a file's size and mtime."""
+
+import os
+
+from kube_ai_proxy.warm_state import content_fingerprint, file_fingerprint
+
+
+def test_same_size_and_mtime_edit_changes_content_fingerprint(tmp_path):
+    policy = tmp_path / "security.yaml"
+    policy.write_text("dangerous_commands: {kubectl: [kubectl delete]}\n")
+    st = policy.stat()
+    before = file_fingerprint(policy), content_fingerprint(policy)
+    policy.write_text("dangerous_commands: {kubectl: [kubectl drain!]}\n")
+    os.utime(policy, ns=(st.st_atime_ns, st.st_mtime_ns))
+    assert file_fingerprint(policy) == before[0]
+    assert content_fingerprint(policy) != before[1]
+    assert content_fingerprint(tmp_path / "missing.yaml") != content_fingerprint(policy)